@@ -1,5 +1,10 @@
+import os
+import types
 import math as m
-from galpy.util import config
+import pickle
+import hashlib
+import numpy
+from galpy.util import config, save_pickles
 from galpy.util.bovy_conversion import physical_conversion_actionAngle, \
     actionAngle_physical_input
 _APY_LOADED= True
@@ -7,6 +12,9 @@ try:
     from astropy import units
 except ImportError:
     _APY_LOADED= False
+# Version of the format of saved grids; increase when the saved quantities 
+# change, such that old files are re-computed
+_GRID_SAVE_VERSION= 1
 class actionAngle(object):
     """Top-level class for actionAngle classes"""
     def __init__(self,ro=None,vo=None):
@@ -63,6 +71,36 @@ class actionAngle(object):
             assert m.fabs(self._vo-orb._vo) < 10.**-10., 'Physical conversion for the actionAngle object is not consistent with that of the Orbit given to it'
         return None
             
+    def _grid_savefilename(self,savedir,*params):
+        """Internal function to create the name of the file to which a grid is saved, using a hash of the potential and of the grid parameters"""
+        return os.path.join(savedir,'%s_%s.sav' % (self.__class__.__name__,
+                                                   _grid_hash(self._pot,
+                                                              params)))
+
+    def _load_grid(self,savefilename,attrs):
+        """Internal function to load the attributes attrs of a grid from savefilename; returns False if the file does not exist, was saved with a different version of the grid format, or does not contain all attributes; the file is unpickled, which can execute arbitrary code, so savefilename should only ever be in a directory that is trusted"""
+        if not os.path.exists(savefilename):
+            return False
+        savefile= open(savefilename,'rb')
+        try:
+            saved= pickle.load(savefile)
+        finally:
+            savefile.close()
+        if not isinstance(saved,dict) \
+                or saved.get('version',None) != _GRID_SAVE_VERSION \
+                or not all([attr in saved for attr in attrs]):
+            return False
+        for attr in attrs:
+            setattr(self,attr,saved[attr])
+        return True
+
+    def _save_grid(self,savefilename,attrs):
+        """Internal function to save the attributes attrs of a grid to savefilename"""
+        saved= dict([(attr,getattr(self,attr)) for attr in attrs])
+        saved['version']= _GRID_SAVE_VERSION
+        save_pickles(savefilename,saved)
+        return None
+
     def _parse_eval_args(self,*args,**kwargs):
         """
         NAME:
@@ -242,6 +280,51 @@ class actionAngle(object):
             raise NotImplementedError("'actionsFreqsAngles' method not implemented for this actionAngle module")
 
 
+def _grid_hash(pot,params):
+    """Hash of a potential, through its class and its parameters (its 
+    attributes), and of a set of grid parameters"""
+    if not isinstance(pot,list): pot= [pot]
+    md5= hashlib.md5()
+    _hash_update(md5,pot,set())
+    md5.update(numpy.array(params,dtype='<f8').tobytes())
+    return md5.hexdigest()
+
+def _hash_update(md5,obj,seen):
+    """Internal function to recursively add an object's class and attributes
+    (or its value) to an md5 hash"""
+    if isinstance(obj,numpy.ndarray):
+        md5.update(('ndarray_%s_%s_' % (obj.dtype.str,obj.shape))\
+                       .encode('utf-8'))
+        if obj.dtype.hasobject:
+            for o in obj.flatten(): _hash_update(md5,o,seen)
+        else:
+            md5.update(numpy.ascontiguousarray(obj).tobytes())
+    elif isinstance(obj,(list,tuple)):
+        md5.update(('%s_%i_' % (type(obj).__name__,len(obj))).encode('utf-8'))
+        for o in obj: _hash_update(md5,o,seen)
+    elif isinstance(obj,dict):
+        md5.update(('dict_%i_' % len(obj)).encode('utf-8'))
+        for key in sorted(obj.keys(),key=repr):
+            md5.update(('%r_' % key).encode('utf-8'))
+            _hash_update(md5,obj[key],seen)
+    elif isinstance(obj,(type,types.FunctionType,types.MethodType,
+                         types.BuiltinFunctionType)):
+        md5.update(('%s.%s_' % (getattr(obj,'__module__',''),
+                                getattr(obj,'__name__','')))\
+                       .encode('utf-8'))
+    elif hasattr(obj,'__dict__'):
+        md5.update(('%s_' % obj.__class__.__name__).encode('utf-8'))
+        if id(obj) in seen: return None # avoid infinite recursion
+        seen.add(id(obj))
+        # Leave out caches of previous evaluations
+        _hash_update(md5,dict([(key,obj.__dict__[key])
+                               for key in obj.__dict__
+                               if not key.startswith('_cached')
+                               and not key == '_force_hash']),seen)
+    else:
+        md5.update(('%r_' % obj).encode('utf-8'))
+    return None
+
 class UnboundError(Exception): #pragma: no cover
     def __init__(self, value):
         self.value = value
@@ -12,19 +12,23 @@
 ###############################################################################
 from __future__ import print_function
 import math
+import warnings
 import numpy
 from scipy import interpolate
 from galpy.actionAngle_src.actionAngleAdiabatic import actionAngleAdiabatic
 from galpy.actionAngle_src.actionAngle import actionAngle, UnboundError
 import galpy.potential
 from galpy.potential_src.Potential import _evaluatePotentials
-from galpy.util import multi
+from galpy.util import multi, galpyWarning
 _PRINTOUTSIDEGRID= False
+# Attributes that are saved to and loaded from savedir
+_SAVEDATTRS= ['_Rs','_yEz','_EzZmaxs','_jz','_jzEzzmax','_jzErr',
+              '_Lzs','_yEr','_RL','_ERRL','_ERRa','_jr','_jrERRa','_jrErr']
 class actionAngleAdiabaticGrid(actionAngle):
     """Action-angle formalism for axisymmetric potentials using the adiabatic approximation, grid-based interpolation"""
     def __init__(self,pot=None,zmax=1.,gamma=1.,Rmax=5.,
-                 nR=16,nEz=16,nEr=31,nLz=31,numcores=1,
-                 **kwargs):
+                 nR=16,nEz=16,nEr=31,nLz=31,numcores=1,savedir=None,
+                 tol=None,maxiter=5,**kwargs):
         """
         NAME:
            __init__
@@ -44,6 +48,12 @@ class actionAngleAdiabaticGrid(actionAngle):
 
            numcores= number of cpus to use to parallellize
 
+           savedir= (None) if set, save the grid to a file in this directory, or load it from there if it was saved before; the file's name is a hash of the potential, gamma, zmax, Rmax, the grid sizes, tol, and maxiter; as saved grids are loaded by unpickling them, which can execute arbitrary code, only use a directory that you trust (i.e., that only you can write to)
+
+           tol= (None) if set, adaptively refine the grids, starting from the grid sizes given above, by adding points halfway between grid points where the error of the interpolated actions (compared to their direct calculation), relative to the largest action at the same R or Lz, exceeds tol; the achieved error is returned by the gridError method; orbits for which the C calculation fails are then calculated in Python, such that they do not spoil the interpolation
+
+           maxiter= (5) maximum number of refinements when tol is set
+
            c= if True, use C to calculate actions
 
            ro= distance from vantage point to GC (kpc; can be Quantity)
@@ -60,6 +70,10 @@ class actionAngleAdiabaticGrid(actionAngle):
 
             2012-07-27 - Written - Bovy (IAS@MPIA)
 
+            2016-10-27 - Added savedir= - Bovy (UofT)
+
+            2016-11-08 - Added adaptive grid construction (tol=) - Bovy (UofT)
+
         """
         actionAngle.__init__(self,
                              ro=kwargs.get('ro',None),vo=kwargs.get('vo',None))
@@ -74,17 +88,106 @@ class actionAngleAdiabaticGrid(actionAngle):
         #Set up the actionAngleAdiabatic object that we will use to interpolate
         self._aA= actionAngleAdiabatic(pot=self._pot,gamma=self._gamma,
                                        c=self._c)
-        #Build grid for Ez, first calculate Ez(zmax;R) function
-        self._Rs= numpy.linspace(self._Rmin,self._Rmax,nR)
-        self._EzZmaxs= _evaluatePotentials(self._pot,self._Rs,
-                                           self._zmax*numpy.ones(nR))\
-                                           -_evaluatePotentials(self._pot,self._Rs,numpy.zeros(nR))
-        self._EzZmaxsInterp= interpolate.InterpolatedUnivariateSpline(self._Rs,numpy.log(self._EzZmaxs),k=3)
-        y= numpy.linspace(0.,1.,nEz)
-        jz= numpy.zeros((nR,nEz))
-        jzEzzmax= numpy.zeros(nR)
-        thisRs= (numpy.tile(self._Rs,(nEz,1)).T).flatten()
-        thisEzZmaxs= (numpy.tile(self._EzZmaxs,(nEz,1)).T).flatten()
+        self._nR= nR
+        self._nEz= nEz
+        self._nEr= nEr
+        self._nLz= nLz
+        self._Lzmin= 0.01
+        self._Ramax= 99.
+        self._tol= tol
+        self._maxiter= maxiter
+        self._jzErr= None
+        self._jrErr= None
+        #Load the grid if it has been saved before, otherwise build it
+        if savedir is None:
+            loaded= False
+        else:
+            savefilename= self._grid_savefilename(savedir,self._gamma,
+                                                  self._zmax,self._Rmax,
+                                                  nR,nEz,nEr,nLz,tol,maxiter)
+            loaded= self._load_grid(savefilename,_SAVEDATTRS)
+        if not loaded:
+            self._build_grid(numcores,**kwargs)
+            if not savedir is None:
+                self._save_grid(savefilename,_SAVEDATTRS)
+        #Set up the interpolations, first for Jz
+        self._EzZmaxsInterp, self._jzEzmaxInterp, self._jzInterp=\
+            _jz_interp(self._Rs,self._yEz,self._EzZmaxs,self._jz,
+                       self._jzEzzmax)
+        #JR grid
+        self._Lzmax= self._Lzs[-1]
+        self._RLInterp= interpolate.InterpolatedUnivariateSpline(self._Lzs,
+                                                                 self._RL,k=3)
+        self._ERRLmax, self._ERRLInterp, self._ERRamax, self._ERRaInterp,\
+            self._jrERRaInterp, self._jrInterp=\
+            _jr_interp(self._Lzs,self._yEr,self._ERRL,self._ERRa,self._jr,
+                       self._jrERRa)
+        # Check the units
+        self._check_consistent_units()
+        return None
+
+    def _build_grid(self,numcores,**kwargs):
+        """Build the grids of the normalized Jz(R,Ez) and JR(Lz,ER)"""
+        #Build grid for Ez
+        nR, nEz, nEr, nLz= self._nR, self._nEz, self._nEr, self._nLz
+        Rs= numpy.linspace(self._Rmin,self._Rmax,nR)
+        yEz= numpy.linspace(0.,1.,nEz)
+        calcjz= lambda x,y: self._calc_jz(x,y,numcores,
+                                          redo_failed=not self._tol is None,
+                                          **kwargs)
+        if self._tol is None:
+            jz= calcjz(Rs,yEz)
+        else:
+            Rs, yEz, jz, self._jzErr= _adaptive_grid(Rs,yEz,calcjz,
+                                                     self._jz_predictor,
+                                                     self._tol,self._maxiter)
+        self._Rs= Rs
+        self._yEz= yEz
+        self._EzZmaxs= self._calc_EzZmaxs(Rs)
+        self._jzEzzmax= jz[:,-1]
+        self._jz= jz/numpy.atleast_2d(self._jzEzzmax).T
+        #JR grid
+        Lzs= numpy.linspace(self._Lzmin,
+                            self._Rmax*galpy.potential.vcirc(self._pot,
+                                                             self._Rmax),
+                            nLz)
+        yEr= numpy.linspace(0.,1.,nEr)
+        calcjr= lambda x,y: self._calc_jr(x,y,numcores,
+                                          redo_failed=not self._tol is None,
+                                          **kwargs)
+        if self._tol is None:
+            jr= calcjr(Lzs,yEr)
+        else:
+            Lzs, yEr, jr, self._jrErr= _adaptive_grid(Lzs,yEr,calcjr,
+                                                      self._jr_predictor,
+                                                      self._tol,self._maxiter)
+        self._Lzs= Lzs
+        self._yEr= yEr
+        self._RL, self._ERRL, self._ERRa= self._calc_ER_limits(Lzs)
+        self._jrERRa= jr[:,0]
+        self._jr= jr/numpy.atleast_2d(self._jrERRa).T
+        return None
+
+    def _calc_EzZmaxs(self,Rs):
+        """Calculate Ez(zmax;R)"""
+        return _evaluatePotentials(self._pot,Rs,self._zmax*numpy.ones(len(Rs)))\
+            -_evaluatePotentials(self._pot,Rs,numpy.zeros(len(Rs)))
+
+    def _calc_ER_limits(self,Lzs):
+        """Calculate the guiding-center radius, ER(vr=0,R=RL), and ER(vr=0,R=Ramax) for Lz"""
+        RL= galpy.potential.rl(self._pot,Lzs)
+        ERRL= _evaluatePotentials(self._pot,RL,numpy.zeros(len(Lzs)))\
+            +Lzs**2./2./RL**2.
+        ERRa= _evaluatePotentials(self._pot,self._Ramax,0.)\
+            +Lzs**2./2./self._Ramax**2.
+        return (RL,ERRL,ERRa)
+
+    def _calc_jz(self,Rs,y,numcores,redo_failed=False,**kwargs):
+        """Calculate Jz on the grid of Rs and y= Ez/Ez(zmax;R)"""
+        nR, nEz= len(Rs), len(y)
+        EzZmaxs= self._calc_EzZmaxs(Rs)
+        thisRs= (numpy.tile(Rs,(nEz,1)).T).flatten()
+        thisEzZmaxs= (numpy.tile(EzZmaxs,(nEz,1)).T).flatten()
         thisy= (numpy.tile(y,(nR,1))).flatten()
         if self._c:
             jz= self._aA(thisRs,
@@ -93,110 +196,123 @@ class actionAngleAdiabaticGrid(actionAngle):
                          numpy.zeros(len(thisRs)),
                          numpy.sqrt(2.*thisy*thisEzZmaxs),
                          **kwargs)[2]
-            jz= numpy.reshape(jz,(nR,nEz))
-            jzEzzmax[0:nR]= jz[:,nEz-1]
+            if redo_failed:
+                # Re-do the orbits for which the C calculation fails in Python
+                for ii in numpy.arange(nR*nEz)[jz == 9999.99]:
+                    jz[ii]= self._aA(thisRs[ii],0.,1.,#these two r dummies
+                                     0.,math.sqrt(2.*thisy[ii]*thisEzZmaxs[ii]),
+                                     _justjz=True,c=False,**kwargs)[2]
+        elif numcores > 1:
+            jz= multi.parallel_map((lambda x: self._aA(thisRs[x],0.,1.,#these two r dummies
+                                                       0.,math.sqrt(2.*thisy[x]*thisEzZmaxs[x]),
+                                                       _justjz=True,
+                                                       **kwargs)[2]),
+                                   range(nR*nEz),numcores=numcores)
         else:
-            if numcores > 1:
-                jz= multi.parallel_map((lambda x: self._aA(thisRs[x],0.,1.,#these two r dummies
-                                                              0.,math.sqrt(2.*thisy[x]*thisEzZmaxs[x]),
-                                                           _justjz=True,
-                                                           **kwargs)[2]),
-                                       range(nR*nEz),numcores=numcores)
-                jz= numpy.reshape(jz,(nR,nEz))
-                jzEzzmax[0:nR]= jz[:,nEz-1]
-            else:
-                for ii in range(nR):
-                    for jj in range(nEz):
-                        #Calculate Jz
-                        jz[ii,jj]= self._aA(self._Rs[ii],0.,1.,#these two r dummies
-                                            0.,numpy.sqrt(2.*y[jj]*self._EzZmaxs[ii]),
-                                            _justjz=True,**kwargs)[2]
-                        if jj == nEz-1: 
-                            jzEzzmax[ii]= jz[ii,jj]
-        for ii in range(nR): jz[ii,:]/= jzEzzmax[ii]
-        #First interpolate Ez=Ezmax
-        self._jzEzmaxInterp= interpolate.InterpolatedUnivariateSpline(self._Rs,numpy.log(jzEzzmax+10.**-5.),k=3)
-        self._jz= jz
-        self._jzInterp= interpolate.RectBivariateSpline(self._Rs,
-                                                        y,
-                                                        jz,
-                                                        kx=3,ky=3,s=0.)
-        #JR grid
-        self._Lzmin= 0.01
-        self._Lzs= numpy.linspace(self._Lzmin,
-                                  self._Rmax\
-                                      *galpy.potential.vcirc(self._pot,
-                                                             self._Rmax),
-                                  nLz)
-        self._Lzmax= self._Lzs[-1]
-        #Calculate ER(vr=0,R=RL)
-        self._RL= numpy.array([galpy.potential.rl(self._pot,l) for l in self._Lzs])
-        self._RLInterp= interpolate.InterpolatedUnivariateSpline(self._Lzs,
-                                                                 self._RL,k=3)
-        self._ERRL= _evaluatePotentials(self._pot,self._RL,numpy.zeros(nLz)) +self._Lzs**2./2./self._RL**2.
-        self._ERRLmax= numpy.amax(self._ERRL)+1.
-        self._ERRLInterp= interpolate.InterpolatedUnivariateSpline(self._Lzs,
-                                                                   numpy.log(-(self._ERRL-self._ERRLmax)),k=3)
-        self._Ramax= 99.
-        self._ERRa= _evaluatePotentials(self._pot,self._Ramax,0.) +self._Lzs**2./2./self._Ramax**2.
-        self._ERRamax= numpy.amax(self._ERRa)+1.
-        self._ERRaInterp= interpolate.InterpolatedUnivariateSpline(self._Lzs,
-                                                                   numpy.log(-(self._ERRa-self._ERRamax)),k=3)
-        y= numpy.linspace(0.,1.,nEr)
-        jr= numpy.zeros((nLz,nEr))
-        jrERRa= numpy.zeros(nLz)
-        thisRL= (numpy.tile(self._RL,(nEr-1,1)).T).flatten()
-        thisLzs= (numpy.tile(self._Lzs,(nEr-1,1)).T).flatten()
-        thisERRL= (numpy.tile(self._ERRL,(nEr-1,1)).T).flatten()
-        thisERRa= (numpy.tile(self._ERRa,(nEr-1,1)).T).flatten()
-        thisy= (numpy.tile(y[0:-1],(nLz,1))).flatten()
+            jz= [self._aA(thisRs[ii],0.,1.,#these two r dummies
+                          0.,math.sqrt(2.*thisy[ii]*thisEzZmaxs[ii]),
+                          _justjz=True,**kwargs)[2]
+                 for ii in range(nR*nEz)]
+        return numpy.reshape(numpy.array(jz,dtype='float'),(nR,nEz))
+
+    def _calc_jr(self,Lzs,y,numcores,redo_failed=False,**kwargs):
+        """Calculate JR on the grid of Lzs and y= (ER-ER(Ramax))/(ER(RL)-ER(Ramax)); JR=0 at y=1 by construction"""
+        nLz= len(Lzs)
+        RL, ERRL, ERRa= self._calc_ER_limits(Lzs)
+        jr= numpy.zeros((nLz,len(y)))
+        yindx= y < 1.
+        nEr= numpy.sum(yindx)
+        if nEr == 0: return jr
+        thisRL= (numpy.tile(RL,(nEr,1)).T).flatten()
+        thisLzs= (numpy.tile(Lzs,(nEr,1)).T).flatten()
+        thisERRL= (numpy.tile(ERRL,(nEr,1)).T).flatten()
+        thisERRa= (numpy.tile(ERRa,(nEr,1)).T).flatten()
+        thisy= (numpy.tile(y[yindx],(nLz,1))).flatten()
         if self._c:
             mjr= self._aA(thisRL,
-                          numpy.sqrt(2.*(thisERRa+thisy*(thisERRL-thisERRa)-_evaluatePotentials(self._pot,thisRL,numpy.zeros((nEr-1)*nLz)))-thisLzs**2./thisRL**2.),
+                          numpy.sqrt(2.*(thisERRa+thisy*(thisERRL-thisERRa)-_evaluatePotentials(self._pot,thisRL,numpy.zeros(nEr*nLz)))-thisLzs**2./thisRL**2.),
                           thisLzs/thisRL,
                           numpy.zeros(len(thisRL)),
                           numpy.zeros(len(thisRL)),
                           **kwargs)[0]
-            jr[:,0:-1]= numpy.reshape(mjr,(nLz,nEr-1))
-            jrERRa[0:nLz]= jr[:,0]
+            if redo_failed:
+                # Re-do the orbits for which the C calculation fails (e.g.,
+                # apocenters beyond the C root-finding bracket) in Python
+                for ii in numpy.arange(nEr*nLz)[mjr == 9999.99]:
+                    mjr[ii]= self._aA(thisRL[ii],
+                                      numpy.sqrt(2.*(thisERRa[ii]+thisy[ii]*(thisERRL[ii]-thisERRa[ii])-_evaluatePotentials(self._pot,thisRL[ii],0.))-thisLzs[ii]**2./thisRL[ii]**2.),
+                                      thisLzs[ii]/thisRL[ii],
+                                      0.,0.,
+                                      _justjr=True,c=False,**kwargs)[0]
+        elif numcores > 1:
+            mjr= multi.parallel_map((lambda x: self._aA(thisRL[x],
+                                                        numpy.sqrt(2.*(thisERRa[x]+thisy[x]*(thisERRL[x]-thisERRa[x])-_evaluatePotentials(self._pot,thisRL[x],0.))-thisLzs[x]**2./thisRL[x]**2.),
+                                                        thisLzs[x]/thisRL[x],
+                                                        0.,0.,
+                                                        _justjr=True,
+                                                        **kwargs)[0]),
+                                    range(nEr*nLz),
+                                    numcores=numcores)
         else:
-            if numcores > 1:
-                mjr= multi.parallel_map((lambda x: self._aA(thisRL[x],
-                                                          numpy.sqrt(2.*(thisERRa[x]+thisy[x]*(thisERRL[x]-thisERRa[x])-_evaluatePotentials(self._pot,thisRL[x],0.))-thisLzs[x]**2./thisRL[x]**2.),
-                                                               thisLzs[x]/thisRL[x],
-                                                               0.,0.,
-                                                            _justjr=True,
-                                                            **kwargs)[0]),
-                                        range((nEr-1)*nLz),
-                                        numcores=numcores)
-                jr[:,0:-1]= numpy.reshape(mjr,(nLz,nEr-1))
-                jrERRa[0:nLz]= jr[:,0]
-            else:
-                for ii in range(nLz):
-                    for jj in range(nEr-1): #Last one is zero by construction
-                        try:
-                            jr[ii,jj]= self._aA(self._RL[ii],
-                                                numpy.sqrt(2.*(self._ERRa[ii]+y[jj]*(self._ERRL[ii]-self._ERRa[ii])-_evaluatePotentials(self._pot,self._RL[ii],0.))-self._Lzs[ii]**2./self._RL[ii]**2.),
-                                                self._Lzs[ii]/self._RL[ii],
-                                                0.,0.,
-                                                _justjr=True,
-                                                   **kwargs)[0]
-                        except UnboundError: #pragma: no cover
-                            raise
-                        if jj == 0: 
-                            jrERRa[ii]= jr[ii,jj]
-        for ii in range(nLz): jr[ii,:]/= jrERRa[ii]
-        #First interpolate Ez=Ezmax
-        self._jr= jr
-        self._jrERRaInterp= interpolate.InterpolatedUnivariateSpline(self._Lzs,
-                                                                     numpy.log(jrERRa+10.**-5.),k=3)
-        self._jrInterp= interpolate.RectBivariateSpline(self._Lzs,
-                                                        y,
-                                                        jr,
-                                                        kx=3,ky=3,s=0.)
-        # Check the units
-        self._check_consistent_units()
-        return None
+            mjr= [self._aA(thisRL[ii],
+                           numpy.sqrt(2.*(thisERRa[ii]+thisy[ii]*(thisERRL[ii]-thisERRa[ii])-_evaluatePotentials(self._pot,thisRL[ii],0.))-thisLzs[ii]**2./thisRL[ii]**2.),
+                           thisLzs[ii]/thisRL[ii],
+                           0.,0.,
+                           _justjr=True,
+                           **kwargs)[0]
+                  for ii in range(nEr*nLz)]
+        jr[:,yindx]= numpy.reshape(numpy.array(mjr,dtype='float'),(nLz,nEr))
+        return jr
+
+    def _jz_predictor(self,Rs,y,jz):
+        """Return a function that interpolates Jz on the grid of Rs and y, in the same way as in _evaluate"""
+        EzZmaxsInterp, jzEzmaxInterp, jzInterp=\
+            _jz_interp(Rs,y,self._calc_EzZmaxs(Rs),
+                       jz/numpy.atleast_2d(jz[:,-1]).T,jz[:,-1])
+        def predict(Rs,y):
+            thisy= numpy.outer(self._calc_EzZmaxs(Rs)\
+                                   /numpy.exp(EzZmaxsInterp(Rs)),y)
+            thisRs= numpy.tile(Rs,(len(y),1)).T
+            return numpy.reshape(jzInterp.ev(thisRs.flatten(),
+                                             thisy.flatten()),
+                                 thisy.shape)\
+                *numpy.atleast_2d(numpy.exp(jzEzmaxInterp(Rs))-10.**-5.).T
+        return predict
+
+    def _jr_predictor(self,Lzs,y,jr):
+        """Return a function that interpolates JR on the grid of Lzs and y, in the same way as in _evaluate"""
+        RL, ERRL, ERRa= self._calc_ER_limits(Lzs)
+        ERRLmax, ERRLInterp, ERRamax, ERRaInterp, jrERRaInterp, jrInterp=\
+            _jr_interp(Lzs,y,ERRL,ERRa,jr/numpy.atleast_2d(jr[:,0]).T,
+                       jr[:,0])
+        def predict(Lzs,y):
+            RL, ERRL, ERRa= self._calc_ER_limits(Lzs)
+            ER= numpy.atleast_2d(ERRa).T\
+                +numpy.outer(ERRL-ERRa,y)
+            thisERRL= numpy.atleast_2d(-numpy.exp(ERRLInterp(Lzs))+ERRLmax).T
+            thisERRa= numpy.atleast_2d(-numpy.exp(ERRaInterp(Lzs))+ERRamax).T
+            thisy= (ER-thisERRa)/(thisERRL-thisERRa)
+            thisLzs= numpy.tile(Lzs,(len(y),1)).T
+            return numpy.reshape(jrInterp.ev(thisLzs.flatten(),
+                                             thisy.flatten()),
+                                 thisy.shape)\
+                *numpy.atleast_2d(numpy.exp(jrERRaInterp(Lzs))-10.**-5.).T
+        return predict
+
+    def gridError(self):
+        """
+        NAME:
+           gridError
+        PURPOSE:
+           return the maximum error of the interpolated Jz and JR (relative to the largest action at the same R or Lz), measured at the midpoints between grid points when the grid was adaptively constructed (tol= set)
+        INPUT:
+           (none)
+        OUTPUT:
+           (Jz error,JR error); each relative to the largest action at the same R (for Jz) or Lz (for JR); None if the grid was not adaptively constructed
+        HISTORY:
+           2016-11-08 - Written - Bovy (UofT)
+        """
+        return (self._jzErr,self._jrErr)
 
     def _evaluate(self,*args,**kwargs):
         """
@@ -358,3 +474,99 @@ class actionAngleAdiabaticGrid(actionAngle):
             jz= (self._jzInterp(self._eval_R,Ez/thisEzZmax)\
                 *(numpy.exp(self._jzEzmaxInterp(self._eval_R))-10.**-5.))[0][0]
         return jz
+
+def _jz_interp(Rs,y,EzZmaxs,jz,jzEzzmax):
+    """Set up the interpolation of Ez(zmax;R), Jz(Ez=Ez(zmax);R), and the normalized Jz(R,y)"""
+    EzZmaxsInterp= interpolate.InterpolatedUnivariateSpline(Rs,numpy.log(EzZmaxs),k=3)
+    #First interpolate Ez=Ezmax
+    jzEzmaxInterp= interpolate.InterpolatedUnivariateSpline(Rs,numpy.log(jzEzzmax+10.**-5.),k=3)
+    jzInterp= interpolate.RectBivariateSpline(Rs,y,jz,kx=3,ky=3,s=0.)
+    return (EzZmaxsInterp,jzEzmaxInterp,jzInterp)
+
+def _jr_interp(Lzs,y,ERRL,ERRa,jr,jrERRa):
+    """Set up the interpolation of ER(RL), ER(Ramax), JR(ER=ER(Ramax);Lz), and the normalized JR(Lz,y)"""
+    ERRLmax= numpy.amax(ERRL)+1.
+    ERRLInterp= interpolate.InterpolatedUnivariateSpline(Lzs,
+                                                         numpy.log(-(ERRL-ERRLmax)),k=3)
+    ERRamax= numpy.amax(ERRa)+1.
+    ERRaInterp= interpolate.InterpolatedUnivariateSpline(Lzs,
+                                                         numpy.log(-(ERRa-ERRamax)),k=3)
+    #First interpolate Ez=Ezmax
+    jrERRaInterp= interpolate.InterpolatedUnivariateSpline(Lzs,
+                                                           numpy.log(jrERRa+10.**-5.),k=3)
+    jrInterp= interpolate.RectBivariateSpline(Lzs,y,jr,kx=3,ky=3,s=0.)
+    return (ERRLmax,ERRLInterp,ERRamax,ERRaInterp,jrERRaInterp,jrInterp)
+
+def _adaptive_grid(x,y,calc,predictor,tol,maxiter):
+    """
+    NAME:
+       _adaptive_grid
+    PURPOSE:
+       adaptively refine a grid of actions J(x,y) by adding points halfway between those grid points where the interpolation error exceeds tol
+    INPUT:
+       x, y - initial grid
+       calc - function calc(x,y) that directly calculates the actions on the grid (x,y)
+       predictor - function predictor(x,y,actions) that returns a function predict(x,y) that interpolates the actions on the grid (x,y)
+       tol - goal for the maximum interpolation error relative to the largest action at the same x
+       maxiter - maximum number of refinements
+    OUTPUT:
+       (x,y,actions on the grid,achieved error)
+    HISTORY:
+       2016-11-08 - Written - Bovy (UofT)
+    """
+    # Every action is only calculated once: the midpoints checked in one
+    # iteration become grid points or are checked again in the next
+    cache= {}
+    def cached_calc(x,y):
+        out= numpy.empty((len(x),len(y)))
+        known= numpy.array([[(xx,yy) in cache for yy in y] for xx in x],
+                           dtype='bool')
+        # Calculate the missing actions together for all rows that miss
+        # the same columns
+        patterns= {}
+        for ii in range(len(x)):
+            if not numpy.all(known[ii]):
+                patterns.setdefault(known[ii].tobytes(),[]).append(ii)
+        for rows in patterns.values():
+            cols= ~known[rows[0]]
+            out[numpy.ix_(rows,cols)]= calc(x[rows],y[cols])
+        for ii in range(len(x)):
+            for jj in range(len(y)):
+                if known[ii,jj]:
+                    out[ii,jj]= cache[(x[ii],y[jj])]
+                else:
+                    cache[(x[ii],y[jj])]= out[ii,jj]
+        return out
+    table= cached_calc(x,y)
+    for ii in range(maxiter+1):
+        predict= predictor(x,y,table)
+        # Compare to the direct calculation halfway between grid points
+        xmid= 0.5*(x[1:]+x[:-1])
+        ymid= 0.5*(y[1:]+y[:-1])
+        xmidtable= cached_calc(xmid,y)
+        ymidtable= cached_calc(x,ymid)
+        # Ignore intervals where the direct calculation fails (9999.99)
+        good= table != 9999.99
+        xgood= (xmidtable != 9999.99)*good[:-1]*good[1:]
+        ygood= (ymidtable != 9999.99)*good[:,:-1]*good[:,1:]
+        xerr= numpy.fabs(predict(xmid,y)-xmidtable)\
+                         /numpy.atleast_2d(numpy.amax(numpy.fabs(xmidtable)*xgood,
+                                                      axis=1)).T
+        xerr= numpy.amax(xerr*xgood,axis=1)
+        yerr= numpy.fabs(predict(x,ymid)-ymidtable)\
+                         /numpy.atleast_2d(numpy.amax(numpy.fabs(table)*good,
+                                                      axis=1)).T
+        yerr= numpy.amax(yerr*ygood,axis=0)
+        err= numpy.amax([numpy.amax(xerr),numpy.amax(yerr)])
+        if err < tol: break
+        if ii == maxiter:
+            warnings.warn("Adaptive actionAngleAdiabaticGrid construction did not reach tol=%g in maxiter=%i refinements; achieved error is %g" % (tol,maxiter,err),
+                          galpyWarning)
+            break
+        # Only split the intervals where the error is too large; all but
+        # the actions at the new (xmid,ymid) crossings are already cached
+        x= numpy.sort(numpy.concatenate((x,xmid[xerr > tol])))
+        y= numpy.sort(numpy.concatenate((y,ymid[yerr > tol])))
+        table= cached_calc(x,y)
+    return (x,y,table,err)
+
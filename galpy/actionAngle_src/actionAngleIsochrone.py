@@ -15,6 +15,8 @@ import copy
 import numpy as nu
 from galpy.actionAngle_src.actionAngle import actionAngle
 from galpy.potential import IsochronePotential
+from galpy.actionAngle_src.actionAngleIsochrone_c import _ext_loaded as ext_loaded
+from galpy.actionAngle_src import actionAngleIsochrone_c
 _APY_LOADED= True
 try:
     from astropy import units
@@ -39,12 +41,15 @@ class actionAngleIsochrone(actionAngle):
 
            vo= circular velocity at ro (km/s; can be Quantity)
 
+           c= (True) if True, use C to compute actions, frequencies, and angles in a single pass
+
         OUTPUT:
         
            instance
 
         HISTORY:
            2013-09-08 - Written - Bovy (IAS)
+           2016-11-07 - Added C implementation - Bovy (UofT)
         """
         actionAngle.__init__(self,
                              ro=kwargs.get('ro',None),vo=kwargs.get('vo',None))
@@ -65,15 +70,12 @@ class actionAngleIsochrone(actionAngle):
                 self.b= self.b.to(units.kpc).value/self._ro
             rb= nu.sqrt(self.b**2.+1.)
             self.amp= (self.b+rb)**2.*rb
-        self._c= False
-        ext_loaded= False
         if ext_loaded and (('c' in kwargs and kwargs['c'])
-                           or not 'c' in kwargs): #pragma: no cover
+                           or not 'c' in kwargs):
             self._c= True
         else:
             self._c= False
-        if not self._c:
-            self._ip= IsochronePotential(amp=self.amp,b=self.b)
+        self._ip= IsochronePotential(amp=self.amp,b=self.b)
         #Define _pot, because some functions that use actionAngle instances need this
         self._pot= IsochronePotential(amp=self.amp,b=self.b)
         # Check the units
@@ -114,8 +116,10 @@ class actionAngleIsochrone(actionAngle):
             vT= nu.array([vT])
             z= nu.array([z])
             vz= nu.array([vz])
-        if self._c: #pragma: no cover
-            pass
+        if self._c:
+            out= actionAngleIsochrone_c.actionAngleIsochrone_c(\
+                self.amp,self.b,R,vR,vT,z,vz)
+            return out[:3]
         else:
             Lz= R*vT
             Lx= -z*vT
@@ -164,8 +168,10 @@ class actionAngleIsochrone(actionAngle):
             vT= nu.array([vT])
             z= nu.array([z])
             vz= nu.array([vz])
-        if self._c: #pragma: no cover
-            pass
+        if self._c:
+            out= actionAngleIsochrone_c.actionAngleIsochrone_c(\
+                self.amp,self.b,R,vR,vT,z,vz,freqs=True)
+            return out[:6]
         else:
             Lz= R*vT
             Lx= -z*vT
@@ -199,6 +205,7 @@ class actionAngleIsochrone(actionAngle):
               b) Orbit instance: initial condition used if that's it, orbit(t)
                  if there is a time given as well
            scipy.integrate.quadrature keywords
+           _out= (None) when using C, list of 9 preallocated arrays to write the output into (see actionAngleIsochrone_c)
         OUTPUT:
             (jr,lz,jz,Omegar,Omegaphi,Omegaz,angler,anglephi,anglez)
         HISTORY:
@@ -223,8 +230,10 @@ class actionAngleIsochrone(actionAngle):
             z= nu.array([z])
             vz= nu.array([vz])
             phi= nu.array([phi])
-        if self._c: #pragma: no cover
-            pass
+        if self._c:
+            return actionAngleIsochrone_c.actionAngleIsochrone_c(\
+                self.amp,self.b,R,vR,vT,z,vz,phi=phi,freqs=True,angles=True,
+                out=kwargs.get('_out',None))
         else:
             Lz= R*vT
             Lx= -z*vT
@@ -61,6 +61,8 @@ class actionAngleIsochroneApprox(actionAngle):
 
            maxn= (default: 3) Default value for all methods when using a grid in vec(n) up to this n (zero-based)
 
+           nblockJ= (None) if set, integrate the orbits in blocks of this many time-integration points and accumulate the actions and the angle-fit block-by-block, such that memory use does not scale with ntintJ (only used for phase-space or un-integrated Orbit input)
+
            ro= distance from vantage point to GC (kpc; can be Quantity)
 
            vo= circular velocity at ro (km/s; can be Quantity)
@@ -108,6 +110,7 @@ class actionAngleIsochroneApprox(actionAngle):
         self._tsJ= nu.linspace(0.,self._tintJ,self._ntintJ)
         self._integrate_method= kwargs.get('integrate_method','dopr54_c')
         self._maxn= kwargs.get('maxn',3)
+        self._nblockJ= kwargs.get('nblockJ',None)
         self._c= False
         ext_loaded= False
         if ext_loaded and (('c' in kwargs and kwargs['c'])
@@ -140,17 +143,21 @@ class actionAngleIsochroneApprox(actionAngle):
         HISTORY:
            2013-09-10 - Written - Bovy (IAS)
         """
+        if not self._nblockJ is None and not kwargs.get('cumul',False):
+            vxvv= self._parse_args_initial(*args)
+            if not vxvv is None:
+                return self._actionsFreqsAngles_blocks(vxvv,False,self._maxn)
         R,vR,vT,z,vz,phi= self._parse_args(False,False,*args)
         if self._c: #pragma: no cover
             pass
         else:
             #Use self._aAI to calculate the actions and angles in the isochrone potential
-            acfs= self._aAI._actionsFreqsAngles(R.flatten(),
-                                                vR.flatten(),
-                                                vT.flatten(),
-                                                z.flatten(),
-                                                vz.flatten(),
-                                                phi.flatten())
+            acfs= self._aAI._actionsFreqsAngles(R.ravel(),
+                                                vR.ravel(),
+                                                vT.ravel(),
+                                                z.ravel(),
+                                                vz.ravel(),
+                                                phi.ravel())
             jrI= nu.reshape(acfs[0],R.shape)[:,:-1]
             jzI= nu.reshape(acfs[2],R.shape)[:,:-1]
             anglerI= nu.reshape(acfs[6],R.shape)
@@ -228,6 +235,13 @@ class actionAngleIsochroneApprox(actionAngle):
         """
         from galpy.orbit import Orbit
         _firstFlip= kwargs.get('_firstFlip',False)
+        if not self._nblockJ is None and not 'ts' in kwargs \
+                and not '_acfs' in kwargs \
+                and not kwargs.get('_retacfs',False):
+            vxvv= self._parse_args_initial(*args)
+            if not vxvv is None:
+                return self._actionsFreqsAngles_blocks(\
+                    vxvv,True,kwargs.get('maxn',self._maxn))
         #If the orbit was already integrated, set ts to the integration times
         if isinstance(args[0],Orbit) and hasattr(args[0]._orb,'orbit') \
                 and not 'ts' in kwargs:
@@ -253,12 +267,12 @@ class actionAngleIsochroneApprox(actionAngle):
             #Use self._aAI to calculate the actions and angles in the isochrone potential
             if '_acfs' in kwargs: acfs= kwargs['_acfs']
             else:
-                acfs= self._aAI._actionsFreqsAngles(R.flatten(),
-                                                    vR.flatten(),
-                                                    vT.flatten(),
-                                                    z.flatten(),
-                                                    vz.flatten(),
-                                                    phi.flatten())
+                acfs= self._aAI._actionsFreqsAngles(R.ravel(),
+                                                    vR.ravel(),
+                                                    vT.ravel(),
+                                                    z.ravel(),
+                                                    vz.ravel(),
+                                                    phi.ravel())
             jrI= nu.reshape(acfs[0],R.shape)[:,:-1]
             jzI= nu.reshape(acfs[2],R.shape)[:,:-1]
             anglerI= nu.reshape(acfs[6],R.shape)
@@ -397,12 +411,12 @@ class actionAngleIsochroneApprox(actionAngle):
         #Parse input
         R,vR,vT,z,vz,phi= self._parse_args('a' in type,False,*args)
         #Use self._aAI to calculate the actions and angles in the isochrone potential
-        acfs= self._aAI._actionsFreqsAngles(R.flatten(),
-                                            vR.flatten(),
-                                            vT.flatten(),
-                                            z.flatten(),
-                                            vz.flatten(),
-                                            phi.flatten())
+        acfs= self._aAI._actionsFreqsAngles(R.ravel(),
+                                            vR.ravel(),
+                                            vT.ravel(),
+                                            z.ravel(),
+                                            vz.ravel(),
+                                            phi.ravel())
         if type == 'jr' or type == 'lz' or type == 'jz':
             jrI= nu.reshape(acfs[0],R.shape)[:,:-1]
             jzI= nu.reshape(acfs[2],R.shape)[:,:-1]
@@ -577,7 +591,6 @@ class actionAngleIsochroneApprox(actionAngle):
     def _parse_args(self,freqsAngles=True,_firstFlip=False,*args):
         """Helper function to parse the arguments to the __call__ and actionsFreqsAngles functions"""
         from galpy.orbit import Orbit
-        RasOrbit= False
         integrated= True #whether the orbit was already integrated when given
         if len(args) == 5 or len(args) == 3: #pragma: no cover
             raise IOError("Must specify phi for actionAngleIsochroneApprox")
@@ -586,21 +599,23 @@ class actionAngleIsochroneApprox(actionAngle):
                 R,vR,vT, z, vz, phi= args
             else:
                 R,vR,vT, phi= args
-                z, vz= 0., 0.
-            if isinstance(R,float):
-                os= [Orbit([R,vR,vT,z,vz,phi])]
-                RasOrbit= True
-                integrated= False
-            elif len(R.shape) == 1: #not integrated yet
-                os= [Orbit([R[ii],vR[ii],vT[ii],z[ii],vz[ii],phi[ii]]) for ii in range(R.shape[0])]
-                RasOrbit= True
+                z, vz= 0.*R, 0.*R
+            if isinstance(R,float) or len(R.shape) == 1: #not integrated yet
+                # Integrate all phase-space points at once
+                vxvv= nu.atleast_2d(nu.array([R,vR,vT,z,vz,phi]).T)
+                if _firstFlip: flip= nu.array([1.,-1.,-1.,1.,-1.,1.])
+                else: flip= 1.
+                orb= self._integrate_orbits(vxvv*flip,self._tsJ)*flip
+                R= orb[:,:,0]
+                vR= orb[:,:,1]
+                vT= orb[:,:,2]
+                z= orb[:,:,3]
+                vz= orb[:,:,4]
+                phi= orb[:,:,5]
                 integrated= False
-        if isinstance(args[0],Orbit) \
-                or (isinstance(args[0],list) and isinstance(args[0][0],Orbit)) \
-                or RasOrbit:
-            if RasOrbit:
-                pass
-            elif not isinstance(args[0],list):
+        elif isinstance(args[0],Orbit) \
+                or (isinstance(args[0],list) and isinstance(args[0][0],Orbit)):
+            if not isinstance(args[0],list):
                 os= [args[0]]
                 if len(os[0]._orb.vxvv) == 3 or len(os[0]._orb.vxvv) == 5: #pragma: no cover
                     raise IOError("Must specify phi for actionAngleIsochroneApprox")
@@ -610,22 +625,22 @@ class actionAngleIsochroneApprox(actionAngle):
                     raise IOError("Must specify phi for actionAngleIsochroneApprox")
             self._check_consistent_units_orbitInput(os[0])
             if not hasattr(os[0]._orb,'orbit'): #not integrated yet
-                if _firstFlip:
-                    for o in os:
-                        o._orb.vxvv[1]= -o._orb.vxvv[1]
-                        o._orb.vxvv[2]= -o._orb.vxvv[2]
-                        o._orb.vxvv[4]= -o._orb.vxvv[4]
-                [o.integrate(self._tsJ,pot=self._pot,
-                             method=self._integrate_method,
-                             dt=self._integrate_dt) for o in os]
-                if _firstFlip:
-                    for o in os:
-                        o._orb.vxvv[1]= -o._orb.vxvv[1]
-                        o._orb.vxvv[2]= -o._orb.vxvv[2]
-                        o._orb.vxvv[4]= -o._orb.vxvv[4]
-                        o._orb.orbit[:,1]= -o._orb.orbit[:,1]
-                        o._orb.orbit[:,2]= -o._orb.orbit[:,2]
-                        o._orb.orbit[:,4]= -o._orb.orbit[:,4]
+                # Integrate all orbits at once and store the result in the
+                # Orbit instances (for _firstFlip, the orbit at -tsJ), as 
+                # Orbit.integrate would
+                if _firstFlip: flip= nu.array([1.,-1.,-1.,1.,-1.,1.])
+                else: flip= 1.
+                orb= self._integrate_orbits(_vxvv_from_orbits(os)*flip,
+                                            self._tsJ)*flip
+                for ii,o in enumerate(os):
+                    for attr in ['_orbInterp','_outfile','rs','_events']:
+                        if hasattr(o._orb,attr): delattr(o._orb,attr)
+                    o._orb.t= nu.array(self._tsJ)
+                    o._orb._pot= self._pot
+                    if len(o._orb.vxvv) == 4:
+                        o._orb.orbit= orb[ii][:,[0,1,2,5]]
+                    else:
+                        o._orb.orbit= orb[ii]
                 integrated= False
             ntJ= os[0].getOrbit().shape[0]
             no= len(os)
@@ -669,39 +684,228 @@ class actionAngleIsochroneApprox(actionAngle):
                 oz[:,nt-1:]= z
                 ovz[:,nt-1:]= vz
                 ophi[:,nt-1:]= phi
-            #load orbits
+            #integrate all orbits at once
             if _firstFlip:
-                os= [Orbit([R[ii,0],vR[ii,0],vT[ii,0],z[ii,0],vz[ii,0],phi[ii,0]]) for ii in range(R.shape[0])]
+                vxvv= nu.array([R[:,0],vR[:,0],vT[:,0],z[:,0],vz[:,0],
+                                phi[:,0]]).T
             else:
-                os= [Orbit([R[ii,0],-vR[ii,0],-vT[ii,0],z[ii,0],-vz[ii,0],phi[ii,0]]) for ii in range(R.shape[0])]
-            #integrate orbits
-            [o.integrate(self._tsJ,pot=self._pot,
-                         method=self._integrate_method,
-                         dt=self._integrate_dt) for o in os]
-            #extract phase-space points along the orbit
-            ts= self._tsJ
+                vxvv= nu.array([R[:,0],-vR[:,0],-vT[:,0],z[:,0],-vz[:,0],
+                                phi[:,0]]).T
+            orb= self._integrate_orbits(vxvv,self._tsJ)
+            #extract phase-space points along the orbit, drop t=0, which 
+            #we have already, and reverse, such that everything is in the 
+            #right order
             if _firstFlip:
-                for ii in range(no):
-                    oR[ii,nt:]= os[ii].R(ts[1:]) #drop t=0, which we have
-                    ovR[ii,nt:]= os[ii].vR(ts[1:]) #already
-                    ovT[ii,nt:]= os[ii].vT(ts[1:]) # reverse, such that 
-                    if os[ii].getOrbit().shape[1] == 6:
-                        oz[ii,nt:]= os[ii].z(ts[1:]) #everything is in the 
-                        ovz[ii,nt:]= os[ii].vz(ts[1:]) #right order
-                    ophi[ii,nt:]= os[ii].phi(ts[1:]) #!
+                oR[:,nt:]= orb[:,1:,0]
+                ovR[:,nt:]= orb[:,1:,1]
+                ovT[:,nt:]= orb[:,1:,2]
+                oz[:,nt:]= orb[:,1:,3]
+                ovz[:,nt:]= orb[:,1:,4]
+                ophi[:,nt:]= orb[:,1:,5]
             else:
-                for ii in range(no):
-                    oR[ii,:nt-1]= os[ii].R(ts[1:])[::-1] #drop t=0, which we have
-                    ovR[ii,:nt-1]= -os[ii].vR(ts[1:])[::-1] #already
-                    ovT[ii,:nt-1]= -os[ii].vT(ts[1:])[::-1] # reverse, such that 
-                    if os[ii].getOrbit().shape[1] == 6:
-                        oz[ii,:nt-1]= os[ii].z(ts[1:])[::-1] #everything is in the 
-                        ovz[ii,:nt-1]= -os[ii].vz(ts[1:])[::-1] #right order
-                    ophi[ii,:nt-1]= os[ii].phi(ts[1:])[::-1] #!
+                oR[:,:nt-1]= orb[:,:0:-1,0]
+                ovR[:,:nt-1]= -orb[:,:0:-1,1]
+                ovT[:,:nt-1]= -orb[:,:0:-1,2]
+                oz[:,:nt-1]= orb[:,:0:-1,3]
+                ovz[:,:nt-1]= -orb[:,:0:-1,4]
+                ophi[:,:nt-1]= orb[:,:0:-1,5]
             return (oR,ovR,ovT,oz,ovz,ophi)
         else:
             return (R,vR,vT,z,vz,phi)
 
+    def _parse_args_initial(self,*args):
+        """Parse the input into initial phase-space points [N,6] for the 
+        block-wise computation; returns None if the input consists of 
+        already-integrated orbits or of phase-space points at multiple times"""
+        from galpy.orbit import Orbit
+        if len(args) == 5 or len(args) == 3: #pragma: no cover
+            raise IOError("Must specify phi for actionAngleIsochroneApprox")
+        if len(args) == 6 or len(args) == 4:
+            if len(args) == 6:
+                R,vR,vT, z, vz, phi= args
+            else:
+                R,vR,vT, phi= args
+                z, vz= 0.*R, 0.*R
+            if isinstance(R,float):
+                return nu.array([[R,vR,vT,z,vz,phi]])
+            elif len(R.shape) == 1:
+                return nu.array([R,vR,vT,z,vz,phi]).T
+            else:
+                return None
+        if isinstance(args[0],Orbit): os= [args[0]]
+        else: os= args[0]
+        if hasattr(os[0]._orb,'orbit'): return None # already integrated
+        if len(os[0]._orb.vxvv) == 3 or len(os[0]._orb.vxvv) == 5: #pragma: no cover
+            raise IOError("Must specify phi for actionAngleIsochroneApprox")
+        self._check_consistent_units_orbitInput(os[0])
+        return _vxvv_from_orbits(os)
+
+    def _integrate_orbits(self,vxvv,ts):
+        """Integrate the orbits starting at vxvv [N,6] at times ts (starting 
+        at zero) and return the phase-space points along the orbits [N,nt,6];
+        all orbits are integrated together in a single call to the C 
+        integrator if possible"""
+        from galpy.orbit_src.FullOrbit import _integrateFullOrbit_multi
+        return _integrateFullOrbit_multi(vxvv,self._pot,ts,
+                                         self._integrate_method,
+                                         self._integrate_dt)
+
+    def _actionsFreqsAngles_blocks(self,vxvv,freqsAngles,maxn):
+        """Compute the actions (and frequencies and angles) by integrating 
+        the orbits in blocks of nblockJ time steps (forward and, for 
+        freqsAngles, backward from the initial point) and accumulating the 
+        averaged toy actions and the normal equations of the angle-fit 
+        block-by-block"""
+        no= vxvv.shape[0]
+        nonAxi= _isNonAxi(self._pot)
+        # Accumulators for the averaged toy actions and the angle ranges
+        sums= nu.zeros((6,no)) # jr, dar, lz, daphi, jz, daz
+        minangle= nu.zeros((3,no))+_TWOPI
+        maxangle= nu.zeros((3,no))
+        if freqsAngles:
+            grid= _angle_fit_grid(maxn,nonAxi)
+            nn= len(grid[0])
+            ATA= nu.zeros((no,2+nn,2+nn))
+            ATy= nu.zeros((3,no,2+nn))
+        directions= [1]
+        if freqsAngles: directions.append(-1)
+        flip= nu.array([1.,-1.,-1.,1.,-1.,1.])
+        negFreqIndx= None
+        # Output buffers for the isochrone actions and angles, reused for
+        # every block (only the C code writes into them)
+        if self._aAI._c:
+            acfsbuf= [nu.empty(no*(self._nblockJ+1)) for ii in range(9)]
+        for direction in directions:
+            if direction > 0: start= vxvv
+            else: start= vxvv*flip
+            lastAngle= None
+            for i0 in range(0,self._ntintJ-1,self._nblockJ):
+                i1= min(i0+self._nblockJ,self._ntintJ-1)
+                ts= self._tsJ[i0:i1+1]
+                orb= self._integrate_orbits(start,ts-ts[0])
+                start= orb[:,-1]
+                if direction < 0: orb= orb*flip # actual points at -ts
+                nt= orb.shape[1]
+                if self._aAI._c: out= [b[:no*nt] for b in acfsbuf]
+                else: out= None
+                acfs= self._aAI._actionsFreqsAngles(orb[:,:,0].ravel(),
+                                                    orb[:,:,1].ravel(),
+                                                    orb[:,:,2].ravel(),
+                                                    orb[:,:,3].ravel(),
+                                                    orb[:,:,4].ravel(),
+                                                    orb[:,:,5].ravel(),
+                                                    _out=out)
+                angles= [nu.reshape(acfs[ii],(no,nt)) for ii in [6,7,8]]
+                for ii,jj in enumerate([0,1,2]):
+                    if direction > 0:
+                        val= nu.reshape(acfs[jj],(no,nt))[:,:-1]
+                        dangle= (angles[ii][:,1:]-angles[ii][:,:-1]) % _TWOPI
+                    else: # order is reversed in time
+                        val= nu.reshape(acfs[jj],(no,nt))[:,1:]
+                        dangle= (angles[ii][:,:-1]-angles[ii][:,1:]) % _TWOPI
+                    sums[2*ii]+= nu.sum(val*dangle,axis=1)
+                    sums[2*ii+1]+= nu.sum(dangle,axis=1)
+                    minangle[ii]= nu.amin(nu.hstack((minangle[ii][:,None],
+                                                     angles[ii])),axis=1)
+                    maxangle[ii]= nu.amax(nu.hstack((maxangle[ii][:,None],
+                                                     angles[ii])),axis=1)
+                if not freqsAngles: continue
+                #Angle-fit: de-period the angles, continuing from the 
+                #previous block
+                if negFreqIndx is None: #anglephi is decreasing
+                    negFreqIndx= nu.median(angles[1][:,1:]-angles[1][:,:-1],
+                                           axis=1) < 0.
+                angles[1][negFreqIndx]= _TWOPI-angles[1][negFreqIndx]
+                if lastAngle is None:
+                    lastAngle= [angles[ii][:,0] for ii in range(3)]
+                tangles= []
+                for ii in range(3):
+                    diff= angles[ii][:,1:]-angles[ii][:,:-1]
+                    if direction > 0: addto= (diff < -6.).astype(int)
+                    else: addto= -(diff > 6.).astype(int)
+                    tangle= angles[ii]+lastAngle[ii][:,None]-angles[ii][:,:1]
+                    tangle[:,1:]+= _TWOPI*nu.cumsum(addto,axis=1)
+                    lastAngle[ii]= tangle[:,-1]
+                    tangles.append(tangle)
+                # Only use the first point for the very first block
+                if direction > 0 and i0 == 0: fitIndx= slice(0,nt)
+                else: fitIndx= slice(1,nt)
+                tts= direction*ts[fitIndx]
+                A= nu.empty((no,len(tts),2+nn))
+                A[:,:,0]= 1.
+                A[:,:,1]= tts
+                if nonAxi:
+                    A[:,:,2:]= nu.sin(grid[0]*tangles[0][:,fitIndx,None]
+                                      +grid[2]*tangles[1][:,fitIndx,None]
+                                      +grid[1]*tangles[2][:,fitIndx,None])
+                else:
+                    A[:,:,2:]= nu.sin(grid[0]*tangles[0][:,fitIndx,None]
+                                      +grid[1]*tangles[2][:,fitIndx,None])
+                ATA+= nu.einsum('ijk,ijl->ikl',A,A)
+                for ii in range(3):
+                    ATy[ii]+= nu.einsum('ijk,ij->ik',A,tangles[ii][:,fitIndx])
+        if nu.any((nu.fabs(maxangle[0]-_TWOPI) > _ANGLETOL)\
+                      *(nu.fabs(minangle[0]) > _ANGLETOL)): #pragma: no cover
+            warnings.warn("Full radial angle range not covered for at least one object; actions are likely not reliable",galpyWarning)
+        if nu.any((nu.fabs(maxangle[2]-_TWOPI) > _ANGLETOL)\
+                      *(nu.fabs(minangle[2]) > _ANGLETOL)): #pragma: no cover
+            warnings.warn("Full vertical angle range not covered for at least one object; actions are likely not reliable",galpyWarning)
+        jr= sums[0]/sums[1]
+        jz= sums[4]/sums[5]
+        if nonAxi:
+            if nu.any((nu.fabs(maxangle[1]-_TWOPI) > _ANGLETOL)\
+                          *(nu.fabs(minangle[1]) > _ANGLETOL)): #pragma: no cover
+                warnings.warn("Full azimuthal angle range not covered for at least one object; actions are likely not reliable",galpyWarning)
+            lz= sums[2]/sums[3]
+        else:
+            lz= vxvv[:,0]*vxvv[:,2]
+        if not freqsAngles:
+            return (jr,lz,jz)
+        sol= [linalg.solve(ATA,ATy[ii][:,:,None])[:,:,0] for ii in range(3)]
+        angleR, OmegaR= sol[0][:,0], sol[0][:,1]
+        anglephi, Omegaphi= sol[1][:,0], sol[1][:,1]
+        angleZ, OmegaZ= sol[2][:,0], sol[2][:,1]
+        Omegaphi[negFreqIndx]= -Omegaphi[negFreqIndx]
+        anglephi[negFreqIndx]= _TWOPI-anglephi[negFreqIndx]
+        return (jr,lz,jz,OmegaR,Omegaphi,OmegaZ,
+                angleR % _TWOPI,
+                anglephi % _TWOPI,
+                angleZ % _TWOPI)
+
+def _vxvv_from_orbits(os):
+    """Initial phase-space points [N,6] of a list of Orbit instances 
+    (z= vz= 0 for planarOrbits)"""
+    out= nu.zeros((len(os),6))
+    for ii in range(len(os)):
+        if len(os[ii]._orb.vxvv) == 4:
+            out[ii,[0,1,2,5]]= os[ii]._orb.vxvv
+        else:
+            out[ii]= os[ii]._orb.vxvv
+    return out
+
+def _angle_fit_grid(maxn,nonAxi):
+    """Grid of integer vectors (nR,nZ[,nphi]) used in the angle-fit, 
+    excluding (0,0,0) and one half-plane"""
+    phig= list(nu.arange(-maxn+1,maxn,1))
+    phig.sort(key = lambda x: abs(x))
+    phig= nu.array(phig,dtype='int')
+    if nonAxi:
+        grid= nu.meshgrid(nu.arange(maxn),phig,phig)
+    else:
+        grid= nu.meshgrid(nu.arange(maxn),phig)
+    gridR= grid[0].T.flatten()[1:] #remove 0,0,0
+    gridZ= grid[1].T.flatten()[1:]
+    mask = nu.ones(len(gridR),dtype=bool)
+    # excludes axis that is not in half-space
+    if nonAxi:
+        gridphi= grid[2].T.flatten()[1:]
+        mask= True\
+            -(gridR == 0)*((gridphi < 0)+((gridphi==0)*(gridZ < 0)))
+        return (gridR[mask],gridZ[mask],gridphi[mask])
+    else:
+        mask[:2*maxn-3:2]= False
+        return (gridR[mask],gridZ[mask])
+
 @potential_physical_input
 @physical_conversion('position',pop=True)
 def estimateBIsochrone(pot,R,z,phi=None):
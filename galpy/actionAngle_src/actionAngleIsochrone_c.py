@@ -0,0 +1,111 @@
+import os
+import sys
+import sysconfig
+import warnings
+import ctypes
+import ctypes.util
+import numpy
+from numpy.ctypeslib import ndpointer
+from galpy.util import galpyWarning
+#Find and load the library
+_lib= None
+outerr= None
+PY3= sys.version > '3'
+if PY3: #pragma: no cover
+    _ext_suffix= sysconfig.get_config_var('EXT_SUFFIX')
+else:
+    _ext_suffix= '.so'
+for path in sys.path:
+    try:
+        _lib = ctypes.CDLL(os.path.join(path,'galpy_actionAngle_c%s' % _ext_suffix))
+    except OSError as e:
+        if os.path.exists(os.path.join(path,'galpy_actionAngle_c%s' % _ext_suffix)): #pragma: no cover
+            outerr= e
+        _lib = None
+    else:
+        break
+if _lib is None: #pragma: no cover
+    if not outerr is None:
+        warnings.warn("actionAngleIsochrone_c extension module not loaded, because of error '%s' " % outerr,
+                      galpyWarning)
+    else:
+        warnings.warn("actionAngleIsochrone_c extension module not loaded, because galpy_actionAngle_c%s image was not found" % _ext_suffix,
+                      galpyWarning)
+    _ext_loaded= False
+else:
+    _ext_loaded= True
+
+def actionAngleIsochrone_c(amp,b,R,vR,vT,z,vz,phi=None,freqs=False,
+                           angles=False,out=None):
+    """
+    NAME:
+       actionAngleIsochrone_c
+    PURPOSE:
+       Use C to calculate the actions and, optionally, the frequencies and angles in the isochrone potential in a single pass
+    INPUT:
+       amp - amplitude of the isochrone potential
+       b - scale parameter of the isochrone potential
+       R, vR, vT, z, vz - coordinates (arrays)
+       phi= azimuth (array; required when angles=True)
+       freqs= (False) if True, also calculate the frequencies
+       angles= (False) if True, also calculate the angles
+       out= (None) if set, list of 9 preallocated, writeable, C-contiguous float64 arrays of the same size as R that the output is written into (ValueError if they are not)
+    OUTPUT:
+       (jr,lz,jz,Omegar,Omegaphi,Omegaz,angler,anglephi,anglez), each with the shape of R; frequencies and angles are not set when freqs=False and angles=False, respectively
+    HISTORY:
+       2016-11-07 - Written - Bovy (UofT)
+    """
+    shape= numpy.shape(R)
+    ndata= numpy.size(R)
+    if angles and phi is None: #pragma: no cover
+        raise IOError("You need to provide phi when calculating angles")
+    if phi is None: phi= R # not used
+    #Set up result arrays, which can be given; given arrays are written
+    #into directly, so they need to be C-contiguous float64 arrays
+    if out is None:
+        out= [numpy.empty(ndata) for ii in range(9)]
+    elif len(out) != 9 or numpy.any([numpy.size(o) != ndata for o in out]):
+        raise ValueError("out= should be a list of 9 arrays of the same size as the input")
+    elif not numpy.all([isinstance(o,numpy.ndarray) \
+                            and o.dtype == numpy.float64 \
+                            and o.flags['C_CONTIGUOUS'] \
+                            and o.flags['WRITEABLE'] for o in out]):
+        raise ValueError("out= arrays should be writeable, C-contiguous float64 arrays")
+
+    #Set up the C code
+    ndarrayFlags= ('C_CONTIGUOUS','WRITEABLE')
+    actionAngleIsochrone_actionsFreqsAnglesFunc=\
+        _lib.actionAngleIsochrone_actionsFreqsAngles
+    actionAngleIsochrone_actionsFreqsAnglesFunc.argtypes=\
+        [ctypes.c_int]\
+         +[ndpointer(dtype=numpy.float64,flags=ndarrayFlags)
+           for ii in range(6)]\
+         +[ctypes.c_double,
+           ctypes.c_double,
+           ctypes.c_int,
+           ctypes.c_int]\
+         +[ndpointer(dtype=numpy.float64,flags=ndarrayFlags)
+           for ii in range(9)]
+
+    #Array requirements
+    R= numpy.require(numpy.ravel(R),dtype=numpy.float64,
+                     requirements=['C','W'])
+    vR= numpy.require(numpy.ravel(vR),dtype=numpy.float64,
+                      requirements=['C','W'])
+    vT= numpy.require(numpy.ravel(vT),dtype=numpy.float64,
+                      requirements=['C','W'])
+    z= numpy.require(numpy.ravel(z),dtype=numpy.float64,
+                     requirements=['C','W'])
+    vz= numpy.require(numpy.ravel(vz),dtype=numpy.float64,
+                      requirements=['C','W'])
+    phi= numpy.require(numpy.ravel(phi),dtype=numpy.float64,
+                       requirements=['C','W'])
+    #Run the C code
+    actionAngleIsochrone_actionsFreqsAnglesFunc(ndata,
+                                                R,vR,vT,z,vz,phi,
+                                                ctypes.c_double(amp),
+                                                ctypes.c_double(b),
+                                                ctypes.c_int(freqs),
+                                                ctypes.c_int(angles),
+                                                *[numpy.reshape(o,-1) for o in out])
+    return tuple([numpy.reshape(o,shape) for o in out])
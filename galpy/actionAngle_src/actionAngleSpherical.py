@@ -11,12 +11,16 @@
 ###############################################################################
 import copy
 import math as m
+import warnings
 import numpy as nu
 from scipy import integrate
 from galpy.potential import epifreq, omegac
-from galpy.potential_src.Potential import _evaluatePotentials
+from galpy.potential_src.Potential import _evaluatePotentials, _check_c
+from galpy.util import galpyWarning
 from galpy.actionAngle_src.actionAngle import *
 from galpy.actionAngle_src.actionAngleAxi import actionAngleAxi, potentialAxi
+import galpy.actionAngle_src.actionAngleSpherical_c as actionAngleSpherical_c
+from galpy.actionAngle_src.actionAngleSpherical_c import _ext_loaded as ext_loaded
 class actionAngleSpherical(actionAngle):
     """Action-angle formalism for spherical potentials"""
     def __init__(self,*args,**kwargs):
@@ -37,6 +41,10 @@ class actionAngleSpherical(actionAngle):
 
            vo= circular velocity at ro (km/s; can be Quantity)
 
+           c= if True, use C to calculate the actions, frequencies, and angles for whole arrays at once (default: True if the C extension and the potential's C implementation are available)
+
+           order= (50) number of points to use in the Gauss-Legendre integrations in C
+
         OUTPUT:
 
            instance
@@ -45,6 +53,8 @@ class actionAngleSpherical(actionAngle):
 
            2013-12-28 - Written - Bovy (IAS)
 
+           2016-11-04 - Added C implementation - Bovy (UofT)
+
         """
         actionAngle.__init__(self,
                              ro=kwargs.get('ro',None),vo=kwargs.get('vo',None))
@@ -56,14 +66,14 @@ class actionAngleSpherical(actionAngle):
             self._2dpot= [p.toPlanar() for p in self._pot]
         else:
             self._2dpot= self._pot.toPlanar()
-        #The following for if we ever implement this code in C
-        self._c= False
-        ext_loaded= False
         if ext_loaded and (('c' in kwargs and kwargs['c'])
                            or not 'c' in kwargs):
-            self._c= True #pragma: no cover
+            self._c= _check_c(self._pot)
+            if 'c' in kwargs and kwargs['c'] and not self._c:
+                warnings.warn("C module not used because potential does not have a C implementation",galpyWarning) #pragma: no cover
         else:
             self._c= False
+        self._order= kwargs.get('order',50)
         # Check the units
         self._check_consistent_units()
         return None
@@ -80,13 +90,16 @@ class actionAngleSpherical(actionAngle):
               b) Orbit instance: initial condition used if that's it, orbit(t)
                  if there is a time given as well
            fixed_quad= (False) if True, use n=10 fixed_quad integration
+           c= True/False; overrides the object's c= keyword to use C or not
            scipy.integrate.quadrature keywords
         OUTPUT:
            (jr,lz,jz)
         HISTORY:
            2013-12-28 - Written - Bovy (IAS)
+           2016-11-04 - Added C implementation - Bovy (UofT)
         """
         fixed_quad= kwargs.pop('fixed_quad',False)
+        use_c= self._use_c(kwargs,fixed_quad)
         if len(args) == 5: #R,vR.vT, z, vz
             R,vR,vT, z, vz= args
         elif len(args) == 6: #R,vR.vT, z, vz, phi
@@ -104,8 +117,9 @@ class actionAngleSpherical(actionAngle):
             vT= nu.array([vT])
             z= nu.array([z])
             vz= nu.array([vz])
-        if self._c: #pragma: no cover
-            pass
+        if use_c:
+            return self._actionsFreqsAngles_c(R,vR,vT,z,vz,
+                                              freqs=False)
         else:
             Lz= R*vT
             Lx= -z*vT
@@ -144,13 +158,16 @@ class actionAngleSpherical(actionAngle):
               b) Orbit instance: initial condition used if that's it, orbit(t)
                  if there is a time given as well
            fixed_quad= (False) if True, use n=10 fixed_quad integration
+           c= True/False; overrides the object's c= keyword to use C or not
            scipy.integrate.quadrature keywords
         OUTPUT:
             (jr,lz,jz,Omegar,Omegaphi,Omegaz)
         HISTORY:
            2013-12-28 - Written - Bovy (IAS)
+           2016-11-04 - Added C implementation - Bovy (UofT)
         """
         fixed_quad= kwargs.pop('fixed_quad',False)
+        use_c= self._use_c(kwargs,fixed_quad)
         if len(args) == 5: #R,vR.vT, z, vz
             R,vR,vT, z, vz= args
         elif len(args) == 6: #R,vR.vT, z, vz, phi
@@ -168,8 +185,9 @@ class actionAngleSpherical(actionAngle):
             vT= nu.array([vT])
             z= nu.array([z])
             vz= nu.array([vz])
-        if self._c: #pragma: no cover
-            pass
+        if use_c:
+            return self._actionsFreqsAngles_c(R,vR,vT,z,vz,
+                                              freqs=True)
         else:
             Lz= R*vT
             Lx= -z*vT
@@ -221,13 +239,16 @@ class actionAngleSpherical(actionAngle):
               b) Orbit instance: initial condition used if that's it, orbit(t)
                  if there is a time given as well
            fixed_quad= (False) if True, use n=10 fixed_quad integration
+           c= True/False; overrides the object's c= keyword to use C or not
            scipy.integrate.quadrature keywords
         OUTPUT:
             (jr,lz,jz,Omegar,Omegaphi,Omegaz,ar,aphi,az)
         HISTORY:
            2013-12-29 - Written - Bovy (IAS)
+           2016-11-04 - Added C implementation - Bovy (UofT)
         """
         fixed_quad= kwargs.pop('fixed_quad',False)
+        use_c= self._use_c(kwargs,fixed_quad)
         if len(args) == 5: #R,vR.vT, z, vz pragma: no cover
             raise IOError("You need to provide phi when calculating angles")
         elif len(args) == 6: #R,vR.vT, z, vz, phi
@@ -247,8 +268,9 @@ class actionAngleSpherical(actionAngle):
             z= nu.array([z])
             vz= nu.array([vz])
             phi= nu.array([phi])
-        if self._c: #pragma: no cover
-            pass
+        if use_c:
+            return self._actionsFreqsAngles_c(R,vR,vT,z,vz,phi=phi,
+                                              freqs=True,angles=True)
         else:
             Lz= R*vT
             Lx= -z*vT
@@ -309,6 +331,86 @@ class actionAngleSpherical(actionAngle):
             return (nu.array(Jr),Jphi,Jz,nu.array(Or),Op,Oz,
                     ar,ap,az)
     
+    def _use_c(self,kwargs,fixed_quad):
+        """Determine whether to use C, popping the c= keyword from kwargs; the C code does not support fixed_quad or the scipy.integrate.quad keywords, so fall back to Python when these are given"""
+        c= kwargs.pop('c',None)
+        if ((self._c and not (not c is None and not c))\
+                or (ext_loaded and c)) and _check_c(self._pot):
+            if not fixed_quad and len(kwargs) == 0:
+                return True
+            warnings.warn("fixed_quad= and scipy.integrate.quad keywords are not supported by the C implementation of actionAngleSpherical; using Python instead (use c=False to avoid this warning; the integration order in C is set by order=)",galpyWarning)
+            return False
+        if c and not self._c: #pragma: no cover
+            warnings.warn("C module not used because potential does not have a C implementation",galpyWarning)
+        return False
+
+    def _actionsFreqsAngles_c(self,R,vR,vT,z,vz,phi=None,
+                              freqs=False,angles=False):
+        """Calculate the actions, and optionally the frequencies and angles, using C for the radial integrals"""
+        jr, rperi, rap, Tr, I, TrPart, IPart, err= \
+            actionAngleSpherical_c.actionAngleSpherical_c(\
+            self._pot,R,vR,vT,z,vz,order=self._order,freqs=freqs,
+            angles=angles)
+        if err != 0: #pragma: no cover
+            raise RuntimeError("C-code for calculation actions failed; try with c=False")
+        Lz= R*vT
+        Lx= -z*vT
+        Ly= z*vR-R*vz
+        L= nu.sqrt(Lx*Lx+Ly*Ly+Lz*Lz)
+        Jz= L-nu.fabs(Lz)
+        if not freqs:
+            return (jr,Lz,Jz)
+        #Frequencies, using the epicycle approximation for circular orbits
+        r= nu.sqrt(R**2.+z**2.)
+        circ= jr < 10.**-9.
+        Or= nu.empty(len(R))
+        Op= nu.empty(len(R))
+        Or[True^circ]= nu.pi/Tr[True^circ]
+        Op[True^circ]= I[True^circ]*L[True^circ]*Or[True^circ]/nu.pi
+        Or[circ]= [epifreq(self._pot,rr,use_physical=False) for rr in r[circ]]
+        Op[circ]= [omegac(self._pot,rr,use_physical=False) for rr in r[circ]]
+        if not angles:
+            Oz= copy.copy(Op)
+            Op[vT < 0.]*= -1.
+            return (jr,Lz,Jz,Or,Op,Oz)
+        #Angles
+        axivR= (R*vR+z*vz)/r
+        axivz= (z*vR-R*vz)/r
+        Rmean= nu.sqrt(rperi*rap)
+        Rmean[rperi <= 0.]= rap[rperi <= 0.]/2.
+        inner= r < Rmean
+        vrneg= axivR < 0.
+        ar= Or*TrPart
+        ar[inner*vrneg]= 2.*nu.pi-ar[inner*vrneg]
+        ar[(True^inner)*vrneg]= nu.pi+ar[(True^inner)*vrneg]
+        ar[(True^inner)*(True^vrneg)]= nu.pi-ar[(True^inner)*(True^vrneg)]
+        #psi, the angle in the orbital plane
+        i= nu.arccos(Lz/L)
+        sinpsi= z/r/nu.sin(i)
+        sinpsi[(sinpsi > 1.)*(sinpsi < (1.+10.**-7.))]= 1.
+        sinpsi[(sinpsi < -1.)*(sinpsi > (-1.-10.**-7.))]= -1.
+        psi= nu.arcsin(sinpsi)
+        psi[axivz > 0.]= nu.pi-psi[axivz > 0.]
+        psi= psi % (2.*nu.pi)
+        dpsi= Op/Or*2.*nu.pi
+        wz= L*IPart
+        wz[inner*vrneg]= dpsi[inner*vrneg]-wz[inner*vrneg]
+        wz[(True^inner)*vrneg]= dpsi[(True^inner)*vrneg]/2.\
+            +wz[(True^inner)*vrneg]
+        wz[(True^inner)*(True^vrneg)]= dpsi[(True^inner)*(True^vrneg)]/2.\
+            -wz[(True^inner)*(True^vrneg)]
+        az= -wz+psi+Op/Or*ar
+        asc= self._calc_long_asc(z,R,axivz,phi,Lz,L)
+        Oz= copy.copy(Op)
+        Op[vT < 0.]*= -1.
+        ap= copy.copy(asc)
+        ap[vT < 0.]-= az[vT < 0.]
+        ap[vT >= 0.]+= az[vT >= 0.]
+        ar= ar % (2.*nu.pi)
+        ap= ap % (2.*nu.pi)
+        az= az % (2.*nu.pi)
+        return (jr,Lz,Jz,Or,Op,Oz,ar,ap,az)
+
     def _calc_jr(self,rperi,rap,E,L,fixed_quad,**kwargs):
         if fixed_quad:
             return integrate.fixed_quad(_JrSphericalIntegrand,
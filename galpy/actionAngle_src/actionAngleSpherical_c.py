@@ -0,0 +1,130 @@
+import os
+import sys
+import sysconfig
+import warnings
+import ctypes
+import ctypes.util
+import numpy
+from numpy.ctypeslib import ndpointer
+from galpy.util import galpyWarning
+from galpy.orbit_src.integrateFullOrbit import _parse_pot
+#Find and load the library
+_lib= None
+outerr= None
+PY3= sys.version > '3'
+if PY3: #pragma: no cover
+    _ext_suffix= sysconfig.get_config_var('EXT_SUFFIX')
+else:
+    _ext_suffix= '.so'
+for path in sys.path:
+    try:
+        _lib = ctypes.CDLL(os.path.join(path,'galpy_actionAngle_c%s' % _ext_suffix))
+    except OSError as e:
+        if os.path.exists(os.path.join(path,'galpy_actionAngle_c%s' % _ext_suffix)): #pragma: no cover
+            outerr= e
+        _lib = None
+    else:
+        break
+if _lib is None: #pragma: no cover
+    if not outerr is None:
+        warnings.warn("actionAngleSpherical_c extension module not loaded, because of error '%s' " % outerr,
+                      galpyWarning)
+    else:
+        warnings.warn("actionAngleSpherical_c extension module not loaded, because galpy_actionAngle_c%s image was not found" % _ext_suffix,
+                      galpyWarning)
+    _ext_loaded= False
+else:
+    _ext_loaded= True
+
+def actionAngleSpherical_c(pot,R,vR,vT,z,vz,order=50,freqs=False,
+                           angles=False):
+    """
+    NAME:
+       actionAngleSpherical_c
+    PURPOSE:
+       Use C to calculate the radial action and the integrals required for the frequencies and angles in a spherical potential
+    INPUT:
+       pot - Potential or list of such instances
+       R, vR, vT, z, vz - coordinates (arrays)
+       order= (50) order of the Gauss-Legendre integration
+       freqs= (False) if True, also calculate the integrals for the frequencies
+       angles= (False) if True, also calculate the integrals for the angles
+    OUTPUT:
+       (jr,rperi,rap,Tr,I,TrPart,IPart,err)
+       jr - radial action
+       rperi, rap - peri- and apocenter radius
+       Tr, I - radial half-period and integral of 1/(r^2 v_r) over a half-period (zero if freqs=False)
+       TrPart, IPart - same integrals, but from the turning point closest to r (in the sense of the geometric mean of rperi and rap) to r (zero if angles=False)
+       err - non-zero if error occured
+    HISTORY:
+       2016-11-04 - Written - Bovy (UofT)
+    """
+    #Parse the potential
+    npot, pot_type, pot_args= _parse_pot(pot,potforactions=True)
+
+    #Set up result arrays
+    out= [numpy.empty(len(R)) for ii in range(7)]
+    err= ctypes.c_int(0)
+
+    #Set up the C code
+    ndarrayFlags= ('C_CONTIGUOUS','WRITEABLE')
+    actionAngleSpherical_actionsFreqsAnglesFunc=\
+        _lib.actionAngleSpherical_actionsFreqsAngles
+    actionAngleSpherical_actionsFreqsAnglesFunc.argtypes=\
+        [ctypes.c_int,
+         ndpointer(dtype=numpy.float64,flags=ndarrayFlags),
+         ndpointer(dtype=numpy.float64,flags=ndarrayFlags),
+         ndpointer(dtype=numpy.float64,flags=ndarrayFlags),
+         ndpointer(dtype=numpy.float64,flags=ndarrayFlags),
+         ndpointer(dtype=numpy.float64,flags=ndarrayFlags),
+         ctypes.c_int,
+         ndpointer(dtype=numpy.int32,flags=ndarrayFlags),
+         ndpointer(dtype=numpy.float64,flags=ndarrayFlags),
+         ctypes.c_int,
+         ctypes.c_int,
+         ctypes.c_int]\
+         +[ndpointer(dtype=numpy.float64,flags=ndarrayFlags)
+           for ii in range(7)]\
+         +[ctypes.POINTER(ctypes.c_int)]
+
+    #Array requirements, first store old order
+    f_cont= [R.flags['F_CONTIGUOUS'],
+             vR.flags['F_CONTIGUOUS'],
+             vT.flags['F_CONTIGUOUS'],
+             z.flags['F_CONTIGUOUS'],
+             vz.flags['F_CONTIGUOUS']]
+    R= numpy.require(R,dtype=numpy.float64,requirements=['C','W'])
+    vR= numpy.require(vR,dtype=numpy.float64,requirements=['C','W'])
+    vT= numpy.require(vT,dtype=numpy.float64,requirements=['C','W'])
+    z= numpy.require(z,dtype=numpy.float64,requirements=['C','W'])
+    vz= numpy.require(vz,dtype=numpy.float64,requirements=['C','W'])
+    out= [numpy.require(o,dtype=numpy.float64,requirements=['C','W'])
+          for o in out]
+
+    #Run the C code
+    actionAngleSpherical_actionsFreqsAnglesFunc(len(R),
+                                                R,
+                                                vR,
+                                                vT,
+                                                z,
+                                                vz,
+                                                ctypes.c_int(npot),
+                                                pot_type,
+                                                pot_args,
+                                                ctypes.c_int(order),
+                                                ctypes.c_int(freqs),
+                                                ctypes.c_int(angles),
+                                                out[0],out[1],out[2],
+                                                out[3],out[4],out[5],
+                                                out[6],
+                                                ctypes.byref(err))
+
+    #Reset input arrays
+    if f_cont[0]: R= numpy.asfortranarray(R)
+    if f_cont[1]: vR= numpy.asfortranarray(vR)
+    if f_cont[2]: vT= numpy.asfortranarray(vT)
+    if f_cont[3]: z= numpy.asfortranarray(z)
+    if f_cont[4]: vz= numpy.asfortranarray(vz)
+
+    out.append(err.value)
+    return tuple(out)
@@ -10,6 +10,7 @@
 #             __call__: returns (jr,lz,jz)
 #
 ###############################################################################
+import warnings
 import numpy
 from scipy import interpolate, optimize, ndimage
 import galpy.actionAngle_src.actionAngleStaeckel as actionAngleStaeckel
@@ -17,9 +18,12 @@ from galpy.actionAngle_src.actionAngle import actionAngle
 import galpy.actionAngle_src.actionAngleStaeckel_c as actionAngleStaeckel_c
 from galpy.actionAngle_src.actionAngleStaeckel_c import _ext_loaded as ext_loaded
 import galpy.potential
-from galpy.potential_src.Potential import _evaluatePotentials
-from galpy.util import multi, bovy_coords
+from galpy.potential_src.Potential import _evaluatePotentials, _check_c
+from galpy.util import multi, bovy_coords, galpyWarning
 _PRINTOUTSIDEGRID= False
+# Attributes that are saved to and loaded from savedir
+_SAVEDATTRS= ['_Lzs','_RL','_ERL','_ERa','_u0','thisv','_jr','_jz',
+              '_jrLzE','_jzLzE','_jrFiltered','_jzFiltered']
 _APY_LOADED= True
 try:
     from astropy import units
@@ -28,7 +32,7 @@ except ImportError:
 class actionAngleStaeckelGrid(actionAngle):
     """Action-angle formalism for axisymmetric potentials using Binney (2012)'s Staeckel approximation, grid-based interpolation"""
     def __init__(self,pot=None,delta=None,Rmax=5.,
-                 nE=25,npsi=25,nLz=30,numcores=1,
+                 nE=25,npsi=25,nLz=30,numcores=1,savedir=None,
                  **kwargs):
         """
         NAME:
@@ -46,6 +50,8 @@ class actionAngleStaeckelGrid(actionAngle):
 
            numcores= number of cpus to use to parallellize
 
+           savedir= (None) if set, save the grid to a file in this directory, or load it from there if it was saved before; the file's name is a hash of the potential, delta, Rmax, and the grid sizes; as saved grids are loaded by unpickling them, which can execute arbitrary code, only use a directory that you trust (i.e., that only you can write to)
+
            ro= distance from vantage point to GC (kpc; can be Quantity)
 
            vo= circular velocity at ro (km/s; can be Quantity)
@@ -58,6 +64,8 @@ class actionAngleStaeckelGrid(actionAngle):
 
             2012-11-29 - Written - Bovy (IAS)
 
+            2016-10-27 - Added savedir= - Bovy (UofT)
+
         """
         actionAngle.__init__(self,
                              ro=kwargs.get('ro',None),vo=kwargs.get('vo',None))
@@ -77,56 +85,96 @@ class actionAngleStaeckelGrid(actionAngle):
         self._Rmin= 0.01
         #Set up the actionAngleStaeckel object that we will use to interpolate
         self._aA= actionAngleStaeckel.actionAngleStaeckel(pot=self._pot,delta=self._delta,c=self._c)
-        #Build grid
+        self._nLz= nLz
+        self._nE= nE
+        self._npsi= npsi
         self._Lzmin= 0.01
-        self._Lzs= numpy.linspace(self._Lzmin,
-                                  self._Rmax\
-                                      *galpy.potential.vcirc(self._pot,
-                                                             self._Rmax),
-                                  nLz)
+        self._Ramax= 200./8.
+        #Load the grid if it has been saved before, otherwise build it
+        if savedir is None:
+            loaded= False
+        else:
+            savefilename= self._grid_savefilename(savedir,self._delta,
+                                                  self._Rmax,nE,npsi,nLz)
+            loaded= self._load_grid(savefilename,_SAVEDATTRS)
+        if not loaded:
+            self._build_grid(numcores)
+            if not savedir is None:
+                self._save_grid(savefilename,_SAVEDATTRS)
+        #Set up the interpolations
         self._Lzmax= self._Lzs[-1]
-        self._nLz= nLz
-        #Calculate E_c(R=RL), energy of circular orbit
-        self._RL= numpy.array([galpy.potential.rl(self._pot,l) for l in self._Lzs])
         self._RLInterp= interpolate.InterpolatedUnivariateSpline(self._Lzs,
                                                                  self._RL,k=3)
-        self._ERL= _evaluatePotentials(self._pot,self._RL,
-                                       numpy.zeros(self._nLz))\
-                                       +self._Lzs**2./2./self._RL**2.
         self._ERLmax= numpy.amax(self._ERL)+1.
         self._ERLInterp= interpolate.InterpolatedUnivariateSpline(self._Lzs,
                                                                   numpy.log(-(self._ERL-self._ERLmax)),k=3)
-        self._Ramax= 200./8.
-        self._ERa= _evaluatePotentials(self._pot,self._Ramax,0.) +self._Lzs**2./2./self._Ramax**2.
-        #self._EEsc= numpy.array([self._ERL[ii]+galpy.potential.vesc(self._pot,self._RL[ii])**2./4. for ii in range(nLz)])
         self._ERamax= numpy.amax(self._ERa)+1.
         self._ERaInterp= interpolate.InterpolatedUnivariateSpline(self._Lzs,
                                                                   numpy.log(-(self._ERa-self._ERamax)),k=3)
+        #First interpolate the maxima
+        self._jrLzInterp= interpolate.InterpolatedUnivariateSpline(self._Lzs,
+                                                                   numpy.log(self._jrLzE+10.**-5.),k=3)
+        self._jzLzInterp= interpolate.InterpolatedUnivariateSpline(self._Lzs,
+                                                                   numpy.log(self._jzLzE+10.**-5.),k=3)
+        #Interpolate u0
+        self._logu0Interp= interpolate.RectBivariateSpline(self._Lzs,
+                                                           numpy.linspace(0.,1.,nE),
+                                                           numpy.log(self._u0),
+                                                           kx=3,ky=3,s=0.)
+        # Check the units
+        self._check_consistent_units()
+        return None
+
+    def _build_grid(self,numcores):
+        """Build the grids of circular-orbit energies, u0, and normalized 
+        jr and jz; the spline-filtered log jr and jz are the coefficients 
+        used with ndimage.map_coordinates; if possible, the entire grid 
+        is computed in a single call to the C code"""
+        nLz, nE, npsi= self._nLz, self._nE, self._npsi
+        self._Lzs= numpy.linspace(self._Lzmin,
+                                  self._Rmax\
+                                      *galpy.potential.vcirc(self._pot,
+                                                             self._Rmax),
+                                  nLz)
         y= numpy.linspace(0.,1.,nE)
-        self._nE= nE
         psis= numpy.linspace(0.,1.,npsi)*numpy.pi/2.
-        self._npsi= npsi
-        jr= numpy.zeros((nLz,nE,npsi))
-        jz= numpy.zeros((nLz,nE,npsi))
-        u0= numpy.zeros((nLz,nE))
         jrLzE= numpy.zeros((nLz))
         jzLzE= numpy.zeros((nLz))
-        #First calculate u0
-        thisLzs= (numpy.tile(self._Lzs,(nE,1)).T).flatten()
-        thisERL= (numpy.tile(self._ERL,(nE,1)).T).flatten()
-        thisERa= (numpy.tile(self._ERa,(nE,1)).T).flatten()
-        thisy= (numpy.tile(y,(nLz,1))).flatten()
-        thisE= _invEfunc(_Efunc(thisERa,thisERL)+thisy*(_Efunc(thisERL,thisERL)-_Efunc(thisERa,thisERL)),thisERL)
         if isinstance(self._pot,galpy.potential.interpRZPotential) and hasattr(self._pot,'_origPot'):
             u0pot= self._pot._origPot
         else:
             u0pot= self._pot
-        if self._c:
-            mu0= actionAngleStaeckel_c.actionAngleStaeckel_calcu0(thisE,thisLzs,
-                                                                  u0pot,
-                                                                  self._delta)[0]
+        usecgrid= self._c and _check_c(self._pot) and _check_c(u0pot)
+        if usecgrid:
+            #Compute the entire grid in C
+            self._RL, self._ERL, self._ERa, u0, thisv, mjr, mjz, err= \
+                actionAngleStaeckel_c.actionAngleStaeckel_grid(\
+                self._Lzs,y,psis,self._Ramax,self._pot,self._delta,
+                u0pot=u0pot)
+            if err != 0:
+                warnings.warn("C-code for calculation of the actionAngleStaeckelGrid grid returned error %i; the grid may be inaccurate, try with c=False" % err,galpyWarning)
+            thisR= self._delta*numpy.sinh(u0)
+            self.thisv= thisv
+            thisLzs= numpy.tile(self._Lzs,(nE,1)).T
+            mjr= mjr.flatten()
+            mjz= mjz.flatten()
         else:
-            if numcores > 1:
+            #Calculate E_c(R=RL), energy of circular orbit
+            self._RL= galpy.potential.rl(self._pot,self._Lzs)
+            self._ERL= _evaluatePotentials(self._pot,self._RL,
+                                           numpy.zeros(self._nLz))\
+                                           +self._Lzs**2./2./self._RL**2.
+            self._ERa= _evaluatePotentials(self._pot,self._Ramax,0.) +self._Lzs**2./2./self._Ramax**2.
+            #First calculate u0
+            thisLzs= (numpy.tile(self._Lzs,(nE,1)).T).flatten()
+            thisERL= (numpy.tile(self._ERL,(nE,1)).T).flatten()
+            thisERa= (numpy.tile(self._ERa,(nE,1)).T).flatten()
+            thisy= (numpy.tile(y,(nLz,1))).flatten()
+            thisE= _invEfunc(_Efunc(thisERa,thisERL)+thisy*(_Efunc(thisERL,thisERL)-_Efunc(thisERa,thisERL)),thisERL)
+            if self._c:
+                mu0= actionAngleStaeckel_c.actionAngleStaeckel_calcu0(\
+                    thisE,thisLzs,u0pot,self._delta)[0]
+            elif numcores > 1:
                 mu0= multi.parallel_map((lambda x: self.calcu0(thisE[x],
                                                                thisLzs[x])),
                                         range(nE*nLz),
@@ -135,24 +183,25 @@ class actionAngleStaeckelGrid(actionAngle):
                 mu0= list(map((lambda x: self.calcu0(thisE[x],
                                                      thisLzs[x])),
                               range(nE*nLz)))
-        u0= numpy.reshape(mu0,(nLz,nE))
-        thisR= self._delta*numpy.sinh(u0)
-        thisv= numpy.reshape(self.vatu0(thisE.flatten(),thisLzs.flatten(),
-                                        u0.flatten(),
-                                        thisR.flatten()),(nLz,nE))
-        self.thisv= thisv
+            u0= numpy.reshape(mu0,(nLz,nE))
+            thisR= self._delta*numpy.sinh(u0)
+            thisv= numpy.reshape(self.vatu0(thisE.flatten(),thisLzs.flatten(),
+                                            u0.flatten(),
+                                            thisR.flatten()),(nLz,nE))
+            self.thisv= thisv
+            thisLzs= numpy.reshape(thisLzs,(nLz,nE))
         #reshape
-        thisLzs= numpy.reshape(thisLzs,(nLz,nE))
         thispsi= numpy.tile(psis,(nLz,nE,1)).flatten()
         thisLzs= numpy.tile(thisLzs.T,(npsi,1,1)).T.flatten()
         thisR= numpy.tile(thisR.T,(npsi,1,1)).T.flatten()
         thisv= numpy.tile(thisv.T,(npsi,1,1)).T.flatten()
-        mjr, mlz, mjz= self._aA(thisR, #R
-                                thisv*numpy.cos(thispsi), #vR
-                                thisLzs/thisR, #vT
-                                numpy.zeros(len(thisR)), #z
-                                thisv*numpy.sin(thispsi), #vz
-                                fixed_quad=True) 
+        if not usecgrid:
+            mjr, mlz, mjz= self._aA(thisR, #R
+                                    thisv*numpy.cos(thispsi), #vR
+                                    thisLzs/thisR, #vT
+                                    numpy.zeros(len(thisR)), #z
+                                    thisv*numpy.sin(thispsi), #vz
+                                    fixed_quad=True) 
         if isinstance(self._pot,galpy.potential.interpRZPotential) and hasattr(self._pot,'_origPot'):
             #Interpolated potentials have problems with extreme orbits
             indx= (mjr == 9999.99)
@@ -181,26 +230,14 @@ class actionAngleStaeckelGrid(actionAngle):
         #Deal w/ NaN
         jr[numpy.isnan(jr)]= 0.
         jz[numpy.isnan(jz)]= 0.
-        #First interpolate the maxima
         self._jr= jr
         self._jz= jz
         self._u0= u0
         self._jrLzE= jrLzE
         self._jzLzE= jzLzE
-        self._jrLzInterp= interpolate.InterpolatedUnivariateSpline(self._Lzs,
-                                                                   numpy.log(jrLzE+10.**-5.),k=3)
-        self._jzLzInterp= interpolate.InterpolatedUnivariateSpline(self._Lzs,
-                                                                   numpy.log(jzLzE+10.**-5.),k=3)
-        #Interpolate u0
-        self._logu0Interp= interpolate.RectBivariateSpline(self._Lzs,
-                                                           y,
-                                                           numpy.log(u0),
-                                                           kx=3,ky=3,s=0.)
         #spline filter jr and jz, such that they can be used with ndimage.map_coordinates
         self._jrFiltered= ndimage.spline_filter(numpy.log(self._jr+10.**-10.),order=3)
         self._jzFiltered= ndimage.spline_filter(numpy.log(self._jz+10.**-10.),order=3)
-        # Check the units
-        self._check_consistent_units()
         return None
 
     def _evaluate(self,*args,**kwargs):
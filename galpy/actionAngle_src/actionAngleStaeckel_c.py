@@ -405,3 +405,92 @@ def actionAngleFreqAngleStaeckel_c(pot,delta,R,vR,vT,z,vz,phi,u0=None):
     return (jr,jz,Omegar,Omegaphi,Omegaz,Angler,
             Anglephi,Anglez,err.value)
 
+def actionAngleStaeckel_grid(Lzs,y,psis,Ramax,pot,delta,u0pot=None):
+    """
+    NAME:
+       actionAngleStaeckel_grid
+    PURPOSE:
+       Use C to calculate the grid of actionAngleStaeckelGrid: circular-orbit radii and energies, u0 and the velocity at u0, and the actions on a grid in (Lz,E,psi)
+    INPUT:
+       Lzs - angular momenta (nLz)
+       y - scaled energies in [0,1] (nE; E is logarithmically spaced between E_c(Lz) and E(Ramax,Lz))
+       psis - angles in [0,pi/2] between vR and vz at u0 (npsi)
+       Ramax - radius used to set the maximum energy
+       pot - Potential or list of such instances
+       delta - focal length of prolate spheroidal coordinates
+       u0pot= (None) Potential or list of such instances to use to calculate u0 (default: pot)
+    OUTPUT:
+       (RL,ERL,ERa,u0,v,jr,jz,err)
+       RL, ERL, ERa : arrays, shape (nLz)
+       u0, v : arrays, shape (nLz,nE)
+       jr, jz : arrays, shape (nLz,nE,npsi)
+       err - non-zero if error occured
+    HISTORY:
+       2016-10-28 - Written - Bovy (UofT)
+    """
+    #Parse the potentials
+    npot, pot_type, pot_args= _parse_pot(pot,potforactions=True)
+    if u0pot is None:
+        npot_u0, pot_type_u0, pot_args_u0= npot, pot_type, pot_args
+    else:
+        npot_u0, pot_type_u0, pot_args_u0= _parse_pot(u0pot,
+                                                      potforactions=True)
+
+    #Set up result arrays
+    nLz, nE, npsi= len(Lzs), len(y), len(psis)
+    RL= numpy.empty(nLz)
+    ERL= numpy.empty(nLz)
+    ERa= numpy.empty(nLz)
+    u0= numpy.empty((nLz,nE))
+    v= numpy.empty((nLz,nE))
+    jr= numpy.empty((nLz,nE,npsi))
+    jz= numpy.empty((nLz,nE,npsi))
+    err= ctypes.c_int(0)
+
+    #Set up the C code
+    ndarrayFlags= ('C_CONTIGUOUS','WRITEABLE')
+    actionAngleStaeckel_gridFunc= _lib.actionAngleStaeckel_grid
+    actionAngleStaeckel_gridFunc.argtypes= [ctypes.c_int,
+                               ndpointer(dtype=numpy.float64,flags=ndarrayFlags),
+                               ctypes.c_int,
+                               ndpointer(dtype=numpy.float64,flags=ndarrayFlags),
+                               ctypes.c_int,
+                               ndpointer(dtype=numpy.float64,flags=ndarrayFlags),
+                               ctypes.c_double,
+                               ctypes.c_int,
+                               ndpointer(dtype=numpy.int32,flags=ndarrayFlags),
+                               ndpointer(dtype=numpy.float64,flags=ndarrayFlags),
+                               ctypes.c_int,
+                               ndpointer(dtype=numpy.int32,flags=ndarrayFlags),
+                               ndpointer(dtype=numpy.float64,flags=ndarrayFlags),
+                               ctypes.c_double,
+                               ndpointer(dtype=numpy.float64,flags=ndarrayFlags),
+                               ndpointer(dtype=numpy.float64,flags=ndarrayFlags),
+                               ndpointer(dtype=numpy.float64,flags=ndarrayFlags),
+                               ndpointer(dtype=numpy.float64,flags=ndarrayFlags),
+                               ndpointer(dtype=numpy.float64,flags=ndarrayFlags),
+                               ndpointer(dtype=numpy.float64,flags=ndarrayFlags),
+                               ndpointer(dtype=numpy.float64,flags=ndarrayFlags),
+                               ctypes.POINTER(ctypes.c_int)]
+
+    #Array requirements
+    Lzs= numpy.require(Lzs,dtype=numpy.float64,requirements=['C','W'])
+    y= numpy.require(y,dtype=numpy.float64,requirements=['C','W'])
+    psis= numpy.require(psis,dtype=numpy.float64,requirements=['C','W'])
+
+    #Run the C code
+    actionAngleStaeckel_gridFunc(ctypes.c_int(nLz),Lzs,
+                                 ctypes.c_int(nE),y,
+                                 ctypes.c_int(npsi),psis,
+                                 ctypes.c_double(Ramax),
+                                 ctypes.c_int(npot),
+                                 pot_type,
+                                 pot_args,
+                                 ctypes.c_int(npot_u0),
+                                 pot_type_u0,
+                                 pot_args_u0,
+                                 ctypes.c_double(delta),
+                                 RL,ERL,ERa,u0,v,jr,jz,
+                                 ctypes.byref(err))
+
+    return (RL,ERL,ERa,u0,v,jr,jz,err.value)
@@ -38,6 +38,12 @@ class actionAngleTorus(object):
 
            dJ= default action difference when computing derivatives (Hessian or Jacobian)
 
+           usecache= (False) if True, re-use previously fitted tori from the cache of fitted tori
+
+           cache_maxmem= (None) if set, maximum memory in MB used by the cache of fitted tori (default: 100 MB; <= 0 disables the cache); the cache is shared by all actionAngleTorus instances in a process
+
+           cache_quantum= (None) if set, actions are matched in the cache after rounding them to multiples of cache_quantum (default: 1e-8)
+
         OUTPUT:
 
            instance
@@ -46,6 +52,8 @@ class actionAngleTorus(object):
 
            2015-08-07 - Written - Bovy (UofT)
 
+           2016-11-05 - Added cache of fitted tori - Bovy (UofT)
+
         """
         if not 'pot' in kwargs: #pragma: no cover
             raise IOError("Must specify pot= for actionAngleTorus")
@@ -63,6 +71,14 @@ class actionAngleTorus(object):
             raise RuntimeError('actionAngleTorus instances cannot be used, because the actionAngleTorus_c extension failed to load')
         self._tol= kwargs.get('tol',0.001)
         self._dJ= kwargs.get('dJ',0.001)
+        self._usecache= kwargs.get('usecache',False)
+        if not kwargs.get('cache_maxmem',None) is None \
+                or not kwargs.get('cache_quantum',None) is None:
+            cache_maxmem= kwargs.get('cache_maxmem',None)
+            cache_quantum= kwargs.get('cache_quantum',None)
+            actionAngleTorus_c.actionAngleTorus_cacheSetup_c(\
+                quantum=1e-8 if cache_quantum is None else cache_quantum,
+                maxmem=100. if cache_maxmem is None else cache_maxmem)
         return None
     
     def __call__(self,jr,jphi,jz,angler,anglephi,anglez,**kwargs):
@@ -91,6 +107,8 @@ class actionAngleTorus(object):
 
            tol= (object-wide value) goal for |dJ|/|J| along the torus
 
+           usecache= (object-wide value) if True, re-use previously fitted tori from the cache
+
         OUTPUT:
 
            [R,vR,vT,z,vz,phi]
@@ -104,7 +122,8 @@ class actionAngleTorus(object):
             self._pot,
             jr,jphi,jz,
             angler,anglephi,anglez,
-            tol=kwargs.get('tol',self._tol))
+            tol=kwargs.get('tol',self._tol),
+            usecache=kwargs.get('usecache',self._usecache))
         if out[9] != 0:
             warnings.warn("actionAngleTorus' AutoFit exited with non-zero return status %i: %s" % (out[9],_autofit_errvals[out[9]]),
                           galpyWarning)
@@ -136,6 +155,8 @@ class actionAngleTorus(object):
 
            tol= (object-wide value) goal for |dJ|/|J| along the torus
 
+           usecache= (object-wide value) if True, re-use previously fitted tori from the cache
+
         OUTPUT:
 
            ([R,vR,vT,z,vz,phi],OmegaR,Omegaphi,Omegaz,AutoFit error message)
@@ -149,7 +170,8 @@ class actionAngleTorus(object):
             self._pot,
             jr,jphi,jz,
             angler,anglephi,anglez,
-            tol=kwargs.get('tol',self._tol))
+            tol=kwargs.get('tol',self._tol),
+            usecache=kwargs.get('usecache',self._usecache))
         if out[9] != 0:
             warnings.warn("actionAngleTorus' AutoFit exited with non-zero return status %i: %s" % (out[9],_autofit_errvals[out[9]]),
                           galpyWarning)
@@ -167,32 +189,241 @@ class actionAngleTorus(object):
 
         INPUT:
 
-           jr - radial action (scalar)
+           jr - radial action (scalar or array [N]; for arrays, the tori are fit in parallel)
 
-           jphi - azimuthal action (scalar)
+           jphi - azimuthal action (scalar or array [N])
 
-           jz - vertical action (scalar)
+           jz - vertical action (scalar or array [N])
 
            tol= (object-wide value) goal for |dJ|/|J| along the torus
 
+           usecache= (object-wide value) if True, re-use previously fitted tori from the cache
+
         OUTPUT:
 
-           (OmegaR,Omegaphi,Omegaz)
+           (OmegaR,Omegaphi,Omegaz,AutoFit error message) [each an array [N] for array input]
 
         HISTORY:
 
            2015-08-07 - Written - Bovy (UofT)
 
+           2016-11-05 - Allow array input - Bovy (UofT)
+
         """
+        if numpy.ndim(jr) > 0:
+            empty= numpy.zeros((len(jr),0))
+            out= self.xvFreqsMany(jr,jphi,jz,empty,empty,empty,**kwargs)
+            return out[1:]
         out= actionAngleTorus_c.actionAngleTorus_Freqs_c(\
             self._pot,
             jr,jphi,jz,
-            tol=kwargs.get('tol',self._tol))
+            tol=kwargs.get('tol',self._tol),
+            usecache=kwargs.get('usecache',self._usecache))
         if out[3] != 0:
             warnings.warn("actionAngleTorus' AutoFit exited with non-zero return status %i: %s" % (out[3],_autofit_errvals[out[3]]),
                           galpyWarning)
         return out
 
+    def xvFreqsMany(self,jr,jphi,jz,angler,anglephi,anglez,**kwargs):
+        """
+        NAME:
+
+           xvFreqsMany
+
+        PURPOSE:
+
+           evaluate the phase-space coordinates (x,v) for a number of angles on each of many tori as well as the frequencies, fitting the tori in parallel
+
+        INPUT:
+
+           jr - radial action (array [N])
+
+           jphi - azimuthal action (array [N])
+
+           jz - vertical action (array [N])
+
+           angler - radial angle (array [N] for one angle per torus or [N,M] for M angles per torus)
+
+           anglephi - azimuthal angle (array [N] or [N,M])
+
+           anglez - vertical angle (array [N] or [N,M])
+
+           tol= (object-wide value) goal for |dJ|/|J| along the torus
+
+           usecache= (object-wide value) if True, re-use previously fitted tori from the cache
+
+           warmstart= (False) if True, start the fit of each torus from a neighbouring torus that has already been fit; the tori are re-ordered such that tori that are close in action space are fit consecutively (in contiguous blocks per thread)
+
+        OUTPUT:
+
+           ([R,vR,vT,z,vz,phi] ([N,6] or [N,M,6] array),OmegaR,Omegaphi,Omegaz,AutoFit error messages) [frequencies and error messages are arrays [N]]
+
+        HISTORY:
+
+           2016-11-05 - Written - Bovy (UofT)
+
+           2016-11-06 - Added warmstart - Bovy (UofT)
+
+        """
+        jr= numpy.atleast_1d(jr)
+        jphi= numpy.atleast_1d(jphi)
+        jz= numpy.atleast_1d(jz)
+        oneangle= numpy.ndim(angler) == 1
+        if oneangle:
+            angler= numpy.reshape(angler,(len(jr),1))
+            anglephi= numpy.reshape(anglephi,(len(jr),1))
+            anglez= numpy.reshape(anglez,(len(jr),1))
+        out= actionAngleTorus_c.actionAngleTorus_xvFreqsMany_c(\
+            self._pot,
+            jr,jphi,jz,
+            angler,anglephi,anglez,
+            tol=kwargs.get('tol',self._tol),
+            usecache=kwargs.get('usecache',self._usecache),
+            warmstart=kwargs.get('warmstart',False),
+            _return_nevals=kwargs.get('_return_nevals',False))
+        for errval in numpy.unique(out[9][out[9] != 0]):
+            warnings.warn("actionAngleTorus' AutoFit exited with non-zero return status %i for %i tori: %s" % (errval,numpy.sum(out[9] == errval),_autofit_errvals[errval]),
+                          galpyWarning)
+        xv= numpy.rollaxis(numpy.array(out[:6]),0,3)
+        if oneangle: xv= xv[:,0]
+        if kwargs.get('_return_nevals',False):
+            return (xv,out[6],out[7],out[8],out[9],out[10])
+        return (xv,out[6],out[7],out[8],out[9])
+
+    def fitGrid(self,jr,jphi,jz,**kwargs):
+        """
+        NAME:
+
+           fitGrid
+
+        PURPOSE:
+
+           fit the tori on a regular grid in action space, starting the fit of each torus from its nearest already-fitted neighbour, and set up the interpolation of the frequencies on this grid (see interpFreqs)
+
+        INPUT:
+
+           jr - radial-action grid (array [Nr], increasing)
+
+           jphi - azimuthal-action grid (array [Nphi], increasing)
+
+           jz - vertical-action grid (array [Nz], increasing)
+
+           tol= (object-wide value) goal for |dJ|/|J| along the torus
+
+           usecache= (object-wide value) if True, re-use previously fitted tori from the cache (and add the fitted tori to the cache)
+
+        OUTPUT:
+
+           (OmegaR,Omegaphi,Omegaz,AutoFit error messages) [each an array [Nr,Nphi,Nz]]
+
+        HISTORY:
+
+           2016-11-06 - Written - Bovy (UofT)
+
+        """
+        from scipy import interpolate
+        jr= numpy.atleast_1d(jr)
+        jphi= numpy.atleast_1d(jphi)
+        jz= numpy.atleast_1d(jz)
+        grid_shape= (len(jr),len(jphi),len(jz))
+        jrs, jphis, jzs= numpy.meshgrid(jr,jphi,jz,indexing='ij')
+        empty= numpy.zeros((numpy.prod(grid_shape),0))
+        out= self.xvFreqsMany(jrs.flatten(),jphis.flatten(),jzs.flatten(),
+                              empty,empty,empty,warmstart=True,**kwargs)
+        out= [numpy.reshape(o,grid_shape) for o in out[1:]]
+        # Set up the interpolation, dropping dimensions with a single point
+        self._gridIndx= numpy.array(grid_shape) > 1
+        points= [g for g,i in zip([jr,jphi,jz],self._gridIndx) if i]
+        self._freqsInterp= [interpolate.RegularGridInterpolator(\
+                points,numpy.squeeze(o),method='linear',bounds_error=False,
+                fill_value=None) for o in out[:3]]
+        return tuple(out)
+
+    def interpFreqs(self,jr,jphi,jz):
+        """
+        NAME:
+
+           interpFreqs
+
+        PURPOSE:
+
+           interpolate the frequencies in action space on the grid of tori set up with fitGrid
+
+        INPUT:
+
+           jr - radial action (scalar or array [N])
+
+           jphi - azimuthal action (scalar or array [N])
+
+           jz - vertical action (scalar or array [N])
+
+        OUTPUT:
+
+           (OmegaR,Omegaphi,Omegaz) [each an array [N]]
+
+        HISTORY:
+
+           2016-11-06 - Written - Bovy (UofT)
+
+        """
+        if not hasattr(self,'_freqsInterp'):
+            raise RuntimeError("actionAngleTorus.interpFreqs requires a grid of tori to be fit first using fitGrid")
+        jr,jphi,jz= numpy.broadcast_arrays(numpy.atleast_1d(jr),
+                                           numpy.atleast_1d(jphi),
+                                           numpy.atleast_1d(jz))
+        points= numpy.array([jr,jphi,jz])[self._gridIndx].T
+        return tuple([interp(points) for interp in self._freqsInterp])
+
+    def cacheInfo(self):
+        """
+        NAME:
+
+           cacheInfo
+
+        PURPOSE:
+
+           return information about the cache of fitted tori (which is shared by all actionAngleTorus instances)
+
+        INPUT:
+
+           (none)
+
+        OUTPUT:
+
+           (number of cached tori,memory used in MB)
+
+        HISTORY:
+
+           2016-11-05 - Written - Bovy (UofT)
+
+        """
+        return actionAngleTorus_c.actionAngleTorus_cacheInfo_c()
+
+    def clearCache(self):
+        """
+        NAME:
+
+           clearCache
+
+        PURPOSE:
+
+           remove all tori from the cache of fitted tori (which is shared by all actionAngleTorus instances)
+
+        INPUT:
+
+           (none)
+
+        OUTPUT:
+
+           (none)
+
+        HISTORY:
+
+           2016-11-05 - Written - Bovy (UofT)
+
+        """
+        return actionAngleTorus_c.actionAngleTorus_cacheClear_c()
+
     def hessianFreqs(self,jr,jphi,jz,**kwargs):
         """
         NAME:
@@ -213,6 +444,8 @@ class actionAngleTorus(object):
 
            tol= (object-wide value) goal for |dJ|/|J| along the torus
 
+           usecache= (object-wide value) if True, re-use previously fitted tori from the cache
+
            dJ= (object-wide value) action difference when computing derivatives (Hessian or Jacobian)
 
            nosym= (False) if True, don't explicitly symmetrize the Hessian (good to check errors)
@@ -230,7 +463,8 @@ class actionAngleTorus(object):
             self._pot,
             jr,jphi,jz,
             tol=kwargs.get('tol',self._tol),
-            dJ=kwargs.get('dJ',self._dJ))
+            dJ=kwargs.get('dJ',self._dJ),
+            usecache=kwargs.get('usecache',self._usecache))
         if out[4] != 0:
             warnings.warn("actionAngleTorus' AutoFit exited with non-zero return status %i: %s" % (out[4],_autofit_errvals[out[4]]),
                           galpyWarning)
@@ -268,6 +502,8 @@ class actionAngleTorus(object):
 
            tol= (object-wide value) goal for |dJ|/|J| along the torus
 
+           usecache= (object-wide value) if True, re-use previously fitted tori from the cache
+
            dJ= (object-wide value) action difference when computing derivatives (Hessian or Jacobian)
 
            nosym= (False) if True, don't explicitly symmetrize the Hessian (good to check errors)
@@ -294,7 +530,8 @@ class actionAngleTorus(object):
             jr,jphi,jz,
             angler,anglephi,anglez,
             tol=kwargs.get('tol',self._tol),
-            dJ=kwargs.get('dJ',self._dJ))
+            dJ=kwargs.get('dJ',self._dJ),
+            usecache=kwargs.get('usecache',self._usecache))
         if out[11] != 0:
             warnings.warn("actionAngleTorus' AutoFit exited with non-zero return status %i: %s" % (out[11],_autofit_errvals[out[11]]),
                           galpyWarning)
@@ -38,7 +38,7 @@ else:
 
 def actionAngleTorus_xvFreqs_c(pot,jr,jphi,jz,
                                angler,anglephi,anglez,
-                               tol=0.003):
+                               tol=0.003,usecache=False):
     """
     NAME:
        actionAngleTorus_xvFreqs_c
@@ -53,6 +53,7 @@ def actionAngleTorus_xvFreqs_c(pot,jr,jphi,jz,
        anglephi - azimuthal angle (array [N])
        anglez - vertical angle (array [N])
        tol= (0.003) goal for |dJ|/|J| along the torus
+       usecache= (False) if True, use the cache of fitted tori
     OUTPUT:
        (R,vR,vT,z,vz,phi,Omegar,Omegaphi,Omegaz,flag)
     HISTORY:
@@ -60,6 +61,7 @@ def actionAngleTorus_xvFreqs_c(pot,jr,jphi,jz,
     """
     #Parse the potential
     npot, pot_type, pot_args= _parse_pot(pot,potfortorus=True)
+    pothash= _pot_hash(pot_type,pot_args)
 
     #Set up result arrays
     R= numpy.empty(len(angler))
@@ -88,6 +90,8 @@ def actionAngleTorus_xvFreqs_c(pot,jr,jphi,jz,
          ndpointer(dtype=numpy.int32,flags=ndarrayFlags),
          ndpointer(dtype=numpy.float64,flags=ndarrayFlags),
          ctypes.c_double,
+         ctypes.c_longlong,
+         ctypes.c_int,
          ndpointer(dtype=numpy.float64,flags=ndarrayFlags),
          ndpointer(dtype=numpy.float64,flags=ndarrayFlags),
          ndpointer(dtype=numpy.float64,flags=ndarrayFlags),
@@ -128,6 +132,8 @@ def actionAngleTorus_xvFreqs_c(pot,jr,jphi,jz,
                                  pot_type,
                                  pot_args,
                                  ctypes.c_double(tol),
+                                 ctypes.c_longlong(pothash),
+                                 ctypes.c_int(usecache),
                                  R,vR,vT,z,vz,phi,
                                  Omegar,Omegaphi,Omegaz,
                                  ctypes.byref(flag))
@@ -140,7 +146,7 @@ def actionAngleTorus_xvFreqs_c(pot,jr,jphi,jz,
     return (R,vR,vT,z,vz,phi,Omegar[0],Omegaphi[0],Omegaz[0],flag.value)
 
 def actionAngleTorus_Freqs_c(pot,jr,jphi,jz,
-                             tol=0.003):
+                             tol=0.003,usecache=False):
     """
     NAME:
        actionAngleTorus_Freqs_c
@@ -152,6 +158,7 @@ def actionAngleTorus_Freqs_c(pot,jr,jphi,jz,
        jphi - azimuthal action (scalar)
        jz - vertical action (scalar)
        tol= (0.003) goal for |dJ|/|J| along the torus
+       usecache= (False) if True, use the cache of fitted tori
     OUTPUT:
        (Omegar,Omegaphi,Omegaz,flag)
     HISTORY:
@@ -159,6 +166,7 @@ def actionAngleTorus_Freqs_c(pot,jr,jphi,jz,
     """
     #Parse the potential
     npot, pot_type, pot_args= _parse_pot(pot,potfortorus=True)
+    pothash= _pot_hash(pot_type,pot_args)
 
     #Set up result
     Omegar= numpy.empty(1)
@@ -177,6 +185,8 @@ def actionAngleTorus_Freqs_c(pot,jr,jphi,jz,
          ndpointer(dtype=numpy.int32,flags=ndarrayFlags),
          ndpointer(dtype=numpy.float64,flags=ndarrayFlags),
          ctypes.c_double,
+         ctypes.c_longlong,
+         ctypes.c_int,
          ndpointer(dtype=numpy.float64,flags=ndarrayFlags),
          ndpointer(dtype=numpy.float64,flags=ndarrayFlags),
          ndpointer(dtype=numpy.float64,flags=ndarrayFlags),
@@ -195,13 +205,15 @@ def actionAngleTorus_Freqs_c(pot,jr,jphi,jz,
                                pot_type,
                                pot_args,
                                ctypes.c_double(tol),
+                               ctypes.c_longlong(pothash),
+                               ctypes.c_int(usecache),
                                Omegar,Omegaphi,Omegaz,
                                ctypes.byref(flag))
 
     return (Omegar[0],Omegaphi[0],Omegaz[0],flag.value)
 
 def actionAngleTorus_hessian_c(pot,jr,jphi,jz,
-                               tol=0.003,dJ=0.001):
+                               tol=0.003,dJ=0.001,usecache=False):
     """
     NAME:
        actionAngleTorus_hessian_c
@@ -213,6 +225,7 @@ def actionAngleTorus_hessian_c(pot,jr,jphi,jz,
        jphi - azimuthal action (scalar)
        jz - vertical action (scalar)
        tol= (0.003) goal for |dJ|/|J| along the torus
+       usecache= (False) if True, use the cache of fitted tori
        dJ= (0.001) action difference when computing derivatives (Hessian or Jacobian)
     OUTPUT:
        (dO/dJ,Omegar,Omegaphi,Omegaz,Autofit error flag)
@@ -222,6 +235,7 @@ def actionAngleTorus_hessian_c(pot,jr,jphi,jz,
     """
     #Parse the potential
     npot, pot_type, pot_args= _parse_pot(pot,potfortorus=True)
+    pothash= _pot_hash(pot_type,pot_args)
 
     #Set up result
     dOdJT= numpy.empty(9)
@@ -241,6 +255,8 @@ def actionAngleTorus_hessian_c(pot,jr,jphi,jz,
          ndpointer(dtype=numpy.int32,flags=ndarrayFlags),
          ndpointer(dtype=numpy.float64,flags=ndarrayFlags),
          ctypes.c_double,
+         ctypes.c_longlong,
+         ctypes.c_int,
          ctypes.c_double,
          ndpointer(dtype=numpy.float64,flags=ndarrayFlags),
          ndpointer(dtype=numpy.float64,flags=ndarrayFlags),
@@ -262,6 +278,8 @@ def actionAngleTorus_hessian_c(pot,jr,jphi,jz,
                               pot_type,
                               pot_args,
                               ctypes.c_double(tol),
+                              ctypes.c_longlong(pothash),
+                              ctypes.c_int(usecache),
                               ctypes.c_double(dJ),
                               dOdJT,
                               Omegar,Omegaphi,Omegaz,
@@ -270,7 +288,7 @@ def actionAngleTorus_hessian_c(pot,jr,jphi,jz,
     return (dOdJT.reshape((3,3)).T,Omegar[0],Omegaphi[0],Omegaz[0],flag.value)
 
 def actionAngleTorus_jacobian_c(pot,jr,jphi,jz,angler,anglephi,anglez,
-                                tol=0.003,dJ=0.001):
+                                tol=0.003,dJ=0.001,usecache=False):
     """
     NAME:
        actionAngleTorus_jacobian_c
@@ -285,6 +303,7 @@ def actionAngleTorus_jacobian_c(pot,jr,jphi,jz,angler,anglephi,anglez,
        anglephi - azimuthal angle (array [N])
        anglez - vertical angle (array [N])
        tol= (0.003) goal for |dJ|/|J| along the torus
+       usecache= (False) if True, use the cache of fitted tori
        dJ= (0.001) action difference when computing derivatives (Hessian or Jacobian)
     OUTPUT:
        (d[R,vR,vT,z,vz,phi]/d[J,theta],
@@ -296,6 +315,7 @@ def actionAngleTorus_jacobian_c(pot,jr,jphi,jz,angler,anglephi,anglez,
     """
     #Parse the potential
     npot, pot_type, pot_args= _parse_pot(pot,potfortorus=True)
+    pothash= _pot_hash(pot_type,pot_args)
 
     #Set up result
     R= numpy.empty(len(angler))
@@ -326,6 +346,8 @@ def actionAngleTorus_jacobian_c(pot,jr,jphi,jz,angler,anglephi,anglez,
          ndpointer(dtype=numpy.int32,flags=ndarrayFlags),
          ndpointer(dtype=numpy.float64,flags=ndarrayFlags),
          ctypes.c_double,
+         ctypes.c_longlong,
+         ctypes.c_int,
          ctypes.c_double,
          ndpointer(dtype=numpy.float64,flags=ndarrayFlags),
          ndpointer(dtype=numpy.float64,flags=ndarrayFlags),
@@ -372,6 +394,8 @@ def actionAngleTorus_jacobian_c(pot,jr,jphi,jz,angler,anglephi,anglez,
                              pot_type,
                              pot_args,
                              ctypes.c_double(tol),
+                             ctypes.c_longlong(pothash),
+                             ctypes.c_int(usecache),
                              ctypes.c_double(dJ),
                              R,vR,vT,z,vz,phi,
                              dxvOdJaT,
@@ -392,3 +416,202 @@ def actionAngleTorus_jacobian_c(pot,jr,jphi,jz,angler,anglephi,anglez,
             dOdJT.reshape((3,3)).T,
             Omegar[0],Omegaphi[0],Omegaz[0],
             flag.value)
+
+def actionAngleTorus_xvFreqsMany_c(pot,jr,jphi,jz,
+                                   angler,anglephi,anglez,
+                                   tol=0.003,usecache=False,warmstart=False,
+                                   _return_nevals=False):
+    """
+    NAME:
+       actionAngleTorus_xvFreqsMany_c
+    PURPOSE:
+       compute configuration (x,v) and frequencies of a set of angles on each of many tori, fitting the tori in parallel
+    INPUT:
+       pot - Potential object or list thereof
+       jr - radial action (array [N])
+       jphi - azimuthal action (array [N])
+       jz - vertical action (array [N])
+       angler - radial angle (array [N,M]; M can be zero)
+       anglephi - azimuthal angle (array [N,M])
+       anglez - vertical angle (array [N,M])
+       tol= (0.003) goal for |dJ|/|J| along the torus
+       usecache= (False) if True, use the cache of fitted tori
+       warmstart= (False) if True, seed the fit of each torus with a neighbouring torus that has already been fit (the tori are re-ordered such that tori that are close in action space are fit consecutively by the same thread)
+       _return_nevals= (False) if True, also return the number of potential evaluations used to fit each torus
+    OUTPUT:
+       (R,vR,vT,z,vz,phi [each N,M],Omegar,Omegaphi,Omegaz,flag[,nevals] [each N])
+    HISTORY:
+       2016-11-05 - Written - Bovy (UofT)
+    """
+    #Parse the potential
+    npot, pot_type, pot_args= _parse_pot(pot,potfortorus=True)
+    pothash= _pot_hash(pot_type,pot_args)
+
+    #Array requirements
+    jr= numpy.require(jr,dtype=numpy.float64,requirements=['C','W'])
+    jphi= numpy.require(jphi,dtype=numpy.float64,requirements=['C','W'])
+    jz= numpy.require(jz,dtype=numpy.float64,requirements=['C','W'])
+    angler= numpy.require(angler,dtype=numpy.float64,requirements=['C','W'])
+    anglephi= numpy.require(anglephi,dtype=numpy.float64,requirements=['C','W'])
+    anglez= numpy.require(anglez,dtype=numpy.float64,requirements=['C','W'])
+    nt= len(jr)
+    na= angler.shape[1]
+    if warmstart:
+        order= _warmstart_order(jr,jphi,jz)
+    else:
+        order= numpy.arange(nt,dtype=numpy.int32)
+
+    #Set up result arrays
+    R= numpy.empty((nt,na))
+    vR= numpy.empty((nt,na))
+    vT= numpy.empty((nt,na))
+    z= numpy.empty((nt,na))
+    vz= numpy.empty((nt,na))
+    phi= numpy.empty((nt,na))
+    Omegar= numpy.empty(nt)
+    Omegaphi= numpy.empty(nt)
+    Omegaz= numpy.empty(nt)
+    flag= numpy.zeros(nt,dtype=numpy.int32)
+    nevals= numpy.zeros(nt,dtype=numpy.int64)
+
+    #Set up the C code
+    ndarrayFlags= ('C_CONTIGUOUS','WRITEABLE')
+    actionAngleTorus_xvFreqsManyFunc= _lib.actionAngleTorus_xvFreqsMany
+    actionAngleTorus_xvFreqsManyFunc.argtypes=\
+        [ctypes.c_int,
+         ndpointer(dtype=numpy.float64,flags=ndarrayFlags),
+         ndpointer(dtype=numpy.float64,flags=ndarrayFlags),
+         ndpointer(dtype=numpy.float64,flags=ndarrayFlags),
+         ndpointer(dtype=numpy.int32,flags=ndarrayFlags),
+         ctypes.c_int,
+         ndpointer(dtype=numpy.float64,flags=ndarrayFlags),
+         ndpointer(dtype=numpy.float64,flags=ndarrayFlags),
+         ndpointer(dtype=numpy.float64,flags=ndarrayFlags),
+         ctypes.c_int,
+         ndpointer(dtype=numpy.int32,flags=ndarrayFlags),
+         ndpointer(dtype=numpy.float64,flags=ndarrayFlags),
+         ctypes.c_double,
+         ctypes.c_longlong,
+         ctypes.c_int,
+         ctypes.c_int,
+         ndpointer(dtype=numpy.float64,flags=ndarrayFlags),
+         ndpointer(dtype=numpy.float64,flags=ndarrayFlags),
+         ndpointer(dtype=numpy.float64,flags=ndarrayFlags),
+         ndpointer(dtype=numpy.float64,flags=ndarrayFlags),
+         ndpointer(dtype=numpy.float64,flags=ndarrayFlags),
+         ndpointer(dtype=numpy.float64,flags=ndarrayFlags),
+         ndpointer(dtype=numpy.float64,flags=ndarrayFlags),
+         ndpointer(dtype=numpy.float64,flags=ndarrayFlags),
+         ndpointer(dtype=numpy.float64,flags=ndarrayFlags),
+         ndpointer(dtype=numpy.int32,flags=ndarrayFlags),
+         ndpointer(dtype=numpy.int64,flags=ndarrayFlags)]
+
+    #Run the C code
+    actionAngleTorus_xvFreqsManyFunc(ctypes.c_int(nt),
+                                     jr,jphi,jz,
+                                     order,
+                                     ctypes.c_int(na),
+                                     angler,
+                                     anglephi,
+                                     anglez,
+                                     ctypes.c_int(npot),
+                                     pot_type,
+                                     pot_args,
+                                     ctypes.c_double(tol),
+                                     ctypes.c_longlong(pothash),
+                                     ctypes.c_int(usecache),
+                                     ctypes.c_int(warmstart),
+                                     R,vR,vT,z,vz,phi,
+                                     Omegar,Omegaphi,Omegaz,
+                                     flag,nevals)
+
+    if _return_nevals:
+        return (R,vR,vT,z,vz,phi,Omegar,Omegaphi,Omegaz,flag,nevals)
+    return (R,vR,vT,z,vz,phi,Omegar,Omegaphi,Omegaz,flag)
+
+def actionAngleTorus_cacheSetup_c(quantum=1e-8,maxmem=100.):
+    """
+    NAME:
+       actionAngleTorus_cacheSetup_c
+    PURPOSE:
+       configure the (process-wide) cache of fitted tori
+    INPUT:
+       quantum= (1e-8) actions are matched in the cache after rounding them to multiples of quantum (changing quantum clears the cache)
+       maxmem= (100) maximum memory used by the cache in MB; the least recently used tori are dropped when this is exceeded (<= 0 disables the cache)
+    OUTPUT:
+       (none)
+    HISTORY:
+       2016-11-05 - Written - Bovy (UofT)
+    """
+    actionAngleTorus_cacheSetupFunc= _lib.actionAngleTorus_cacheSetup
+    actionAngleTorus_cacheSetupFunc.argtypes= [ctypes.c_double,
+                                               ctypes.c_double]
+    actionAngleTorus_cacheSetupFunc(ctypes.c_double(quantum),
+                                    ctypes.c_double(maxmem*1024.**2.))
+    return None
+
+def actionAngleTorus_cacheClear_c():
+    """
+    NAME:
+       actionAngleTorus_cacheClear_c
+    PURPOSE:
+       remove all tori from the cache of fitted tori
+    INPUT:
+       (none)
+    OUTPUT:
+       (none)
+    HISTORY:
+       2016-11-05 - Written - Bovy (UofT)
+    """
+    _lib.actionAngleTorus_cacheClear()
+    return None
+
+def actionAngleTorus_cacheInfo_c():
+    """
+    NAME:
+       actionAngleTorus_cacheInfo_c
+    PURPOSE:
+       return the number of tori in the cache of fitted tori and the memory they use
+    INPUT:
+       (none)
+    OUTPUT:
+       (number of tori,memory in MB)
+    HISTORY:
+       2016-11-05 - Written - Bovy (UofT)
+    """
+    ntori= ctypes.c_int(0)
+    mem= ctypes.c_double(0.)
+    actionAngleTorus_cacheInfoFunc= _lib.actionAngleTorus_cacheInfo
+    actionAngleTorus_cacheInfoFunc.argtypes= [ctypes.POINTER(ctypes.c_int),
+                                              ctypes.POINTER(ctypes.c_double)]
+    actionAngleTorus_cacheInfoFunc(ctypes.byref(ntori),ctypes.byref(mem))
+    return (ntori.value,mem.value/1024.**2.)
+
+def _warmstart_order(jr,jphi,jz):
+    """Order in which to fit tori such that consecutive tori are close in action space: the actions are binned on a grid that is traversed in boustrophedon order, reversing the direction along each axis at the end of every row"""
+    nt= len(jr)
+    nbin= max(int(numpy.ceil(nt**(1./3.))),1)
+    indx= []
+    for j in [jr,jphi,jz]:
+        jmin, jmax= numpy.amin(j), numpy.amax(j)
+        tnbin= min(nbin,len(numpy.unique(j)))
+        if jmax > jmin:
+            indx.append(numpy.minimum(((j-jmin)/(jmax-jmin)*tnbin).astype(int),
+                                      tnbin-1))
+        else:
+            indx.append(numpy.zeros(nt,dtype=int))
+        indx[-1]= (indx[-1],tnbin)
+    (ir,nr), (iphi,nphi), (iz,nz)= indx
+    iphi= numpy.where(ir % 2 == 1,nphi-1-iphi,iphi)
+    zrev= (ir*nphi+iphi) % 2 == 1
+    iz= numpy.where(zrev,nz-1-iz,iz)
+    return numpy.lexsort((numpy.where(zrev,-jz,jz),iz,iphi,ir))\
+        .astype(numpy.int32)
+
+def _pot_hash(pot_type,pot_args):
+    """Hash of the parsed potential, used to key the cache of fitted tori"""
+    h= hash((pot_type.tobytes(),pot_args.tobytes()))
+    # Map to a signed 64-bit integer
+    h&= 0xFFFFFFFFFFFFFFFF
+    if h >= 2**63: h-= 2**64
+    return h
@@ -8,6 +8,11 @@
 #include <cstdio>
 #include <ctime>
 #include <cmath>
+#include <list>
+#include <map>
+#ifdef _OPENMP
+#include <omp.h>
+#endif
 #include <gsl/gsl_spline.h>
 #include "Torus.h"
 #include "interp_2d.h"
@@ -16,14 +21,145 @@
 #include <integrateFullOrbit.h>
 #include <galpy_potentials.h>
 
+/*
+  LRU cache of fitted tori, keyed by the potential, the quantized actions,
+  and the fit tolerance; the most recently used torus is at the front
+*/
+struct TorusKey{
+  long long pothash;
+  long long jr;
+  long long jz;
+  long long jphi;
+  double tol;
+};
+struct TorusKeyCompare{
+  bool operator()(const TorusKey& a,const TorusKey& b) const
+  {
+    if ( a.pothash != b.pothash ) return a.pothash < b.pothash;
+    if ( a.jr != b.jr ) return a.jr < b.jr;
+    if ( a.jz != b.jz ) return a.jz < b.jz;
+    if ( a.jphi != b.jphi ) return a.jphi < b.jphi;
+    return a.tol < b.tol;
+  }
+};
+struct TorusCacheEntry{
+  TorusKey key;
+  Torus * T;
+  int flag;
+  double mem;
+};
+typedef std::list<TorusCacheEntry> TorusCacheList;
+typedef std::map<TorusKey,TorusCacheList::iterator,TorusKeyCompare> TorusCacheIndex;
+static TorusCacheList torus_cache;
+static TorusCacheIndex torus_cache_index;
+static double torus_cache_quantum= 1.e-8;
+static double torus_cache_maxmem= 100.*1024.*1024.; // 100 MB
+static double torus_cache_mem= 0.;
+// Approximate memory used by a fitted torus: the torus itself, the
+// generating function, and the three angle-map functions of the same size
+inline double torusMemory(Torus * T)
+{
+  return (double) sizeof(Torus)
+    + 4. * T->SN().NumberofTerms() * ( sizeof(double) + 2 * sizeof(int) );
+}
+inline void torusCacheEvict(double maxmem)
+{
+  while ( torus_cache_mem > maxmem && ! torus_cache.empty() ) {
+    TorusCacheEntry & last= torus_cache.back();
+    torus_cache_mem-= last.mem;
+    torus_cache_index.erase(last.key);
+    delete last.T;
+    torus_cache.pop_back();
+  }
+  if ( torus_cache.empty() ) torus_cache_mem= 0.;
+}
+// Fit the torus with actions J starting from the toy potential and
+// generating function of the converged torus seed (warm start), falling
+// back to a fit from scratch if the seeded fit fails
+int seededFit(Torus * T,Actions J,Potential * Phi,double tol,Torus * seed)
+{
+  int flag;
+  if ( ! seed ) return T->AutoFit(J,Phi,tol);
+  *T= *seed;
+  flag= T->FitWithFixToyPot(J,seed->TP(),Phi,tol);
+  if ( flag < 0 ) flag= T->AutoFit(J,Phi,tol);
+  return flag;
+}
+// Fit the torus with actions J, re-using a previously fitted torus if the
+// cache is enabled and contains it; seed (optional) is a neighbouring,
+// converged torus used to warm-start the fit
+int fitTorus(Torus * T,Actions J,Potential * Phi,double tol,
+	     long long pothash,int usecache,Torus * seed= NULL)
+{
+  if ( ! usecache || torus_cache_maxmem <= 0. )
+    return seededFit(T,J,Phi,tol,seed);
+  TorusKey key;
+  key.pothash= pothash;
+  key.jr= llround(J(0)/torus_cache_quantum);
+  key.jz= llround(J(1)/torus_cache_quantum);
+  key.jphi= llround(J(2)/torus_cache_quantum);
+  key.tol= tol;
+  bool found= false;
+  int flag= 0;
+  TorusCacheIndex::iterator it;
+#pragma omp critical(torus_cache)
+  {
+    it= torus_cache_index.find(key);
+    if ( it != torus_cache_index.end() ) {
+      found= true;
+      *T= *(it->second->T);
+      flag= it->second->flag;
+      // Move to the front
+      torus_cache.splice(torus_cache.begin(),torus_cache,it->second);
+    }
+  }
+  if ( found ) return flag;
+  flag= seededFit(T,J,Phi,tol,seed);
+#pragma omp critical(torus_cache)
+  {
+    // Only cache the torus if a copy of it can be allocated
+    Torus * Tcopy= NULL;
+    if ( torus_cache_index.find(key) == torus_cache_index.end() )
+      Tcopy= new(std::nothrow) Torus;
+    if ( Tcopy ) {
+      TorusCacheEntry entry;
+      entry.key= key;
+      entry.T= Tcopy;
+      *(entry.T)= *T;
+      entry.flag= flag;
+      entry.mem= torusMemory(T);
+      torus_cache.push_front(entry);
+      torus_cache_index[key]= torus_cache.begin();
+      torus_cache_mem+= entry.mem;
+      torusCacheEvict(torus_cache_maxmem);
+    }
+  }
+  return flag;
+}
 extern "C"
 {
-  // Clean up function
-  inline void cleanup(Torus * T,Potential * Phi,
-		      int npot,struct potentialArg * actionAngleArgs)
+  // Set up the cache of fitted tori: actions are quantized in units of
+  // quantum, maxmem is the maximum memory in bytes (<= 0 disables the cache)
+  void actionAngleTorus_cacheSetup(double quantum,double maxmem)
+  {
+    // Changing the quantization invalidates the cached tori
+    if ( quantum != torus_cache_quantum ) torusCacheEvict(-1.);
+    torus_cache_quantum= quantum;
+    torus_cache_maxmem= maxmem;
+    torusCacheEvict(torus_cache_maxmem);
+  }
+  void actionAngleTorus_cacheClear()
+  {
+    torusCacheEvict(-1.);
+  }
+  void actionAngleTorus_cacheInfo(int * ntori,double * mem)
+  {
+    *ntori= (int) torus_cache.size();
+    *mem= torus_cache_mem;
+  }
+  // Clean up function for the potential arguments
+  inline void cleanup_args(int npot,struct potentialArg * actionAngleArgs)
   {
-    delete Phi;
-    delete T;
     int ii;
     for (ii=0; ii < npot; ii++) {
       if ( (actionAngleArgs+ii)->i2d )
@@ -48,12 +184,22 @@ extern "C"
     }
     free(actionAngleArgs);
   }
+  // Clean up function
+  inline void cleanup(Torus * T,Potential * Phi,
+		      int npot,struct potentialArg * actionAngleArgs)
+  {
+    delete Phi;
+    delete T;
+    cleanup_args(npot,actionAngleArgs);
+  }
   // Calculate frequencies
   void actionAngleTorus_Freqs(double jr, double jphi, double jz,
 			      int npot,
 			      int * pot_type,
 			      double * pot_args,
 			      double tol,
+			      long long pothash,
+			      int usecache,
 			      double * Omegar,double * Omegaphi,double * Omegaz,
 			      int * flag)
   {
@@ -73,7 +219,7 @@ extern "C"
     J[0]= jr;
     J[1]= jz;
     J[2]= jphi;
-    *flag = T->AutoFit(J,Phi,tol);
+    *flag = fitTorus(T,J,Phi,tol,pothash,usecache);
 
     Phi->set_Lz(J(2));
 
@@ -94,6 +240,8 @@ extern "C"
 				int * pot_type,
 				double * pot_args,
 				double tol,
+				long long pothash,
+				int usecache,
 				double * R, double * vR, double * vT, 
 				double * z, double * vz, double * phi,
 				double * Omegar,double * Omegaphi,double * Omegaz,
@@ -115,7 +263,7 @@ extern "C"
     J[0]= jr;
     J[1]= jz;
     J[2]= jphi;
-    *flag = T->AutoFit(J,Phi,tol);
+    *flag = fitTorus(T,J,Phi,tol,pothash,usecache);
 
     Phi->set_Lz(J(2));
 
@@ -153,6 +301,8 @@ extern "C"
 				     int * pot_type,
 				     double * pot_args,
 				     double tol,
+				     long long pothash,
+				     int usecache,
 				     double indJ,
 				     double * dOdJT,
 				     double * Omegar,
@@ -179,7 +329,7 @@ extern "C"
     J[0]= jr;
     J[1]= jz;
     J[2]= jphi;
-    *flag = T->AutoFit(J,Phi,tol);
+    *flag = fitTorus(T,J,Phi,tol,pothash,usecache);
 
     Phi->set_Lz(J(2));
 
@@ -195,7 +345,7 @@ extern "C"
       dJ= J[ii]+indJ;
       dJ= dJ-J[ii];
       JdJ[ii]= J[ii]+dJ;
-      T->AutoFit(JdJ,Phi,tol);
+      fitTorus(T,JdJ,Phi,tol,pothash,usecache);
       Phi->set_Lz(JdJ(2));
       omdom=T->omega();
       for (jj=0;jj<3;jj++) *(dOdJT+ii*3+jj)= (omdom(jj)-om(jj)) / dJ;
@@ -212,6 +362,8 @@ extern "C"
 				      int * pot_type,
 				      double * pot_args,
 				      double tol,
+				      long long pothash,
+				      int usecache,
 				      double indJ,
 				      double * R, double * vR, double * vT, 
 				      double * z, double * vz, double * phi,
@@ -243,7 +395,7 @@ extern "C"
     J[0]= jr;
     J[1]= jz;
     J[2]= jphi;
-    *flag = T->AutoFit(J,Phi,tol);
+    *flag = fitTorus(T,J,Phi,tol,pothash,usecache);
 
     Phi->set_Lz(J(2));
 
@@ -286,7 +438,7 @@ extern "C"
       dJ= J[jj]+indJ;
       dJ= dJ-J[jj];
       JdJ[jj]= J[jj]+dJ;
-      T->AutoFit(JdJ,Phi,tol);
+      fitTorus(T,JdJ,Phi,tol,pothash,usecache);
       Phi->set_Lz(JdJ(2));
       for (ii=0;ii < na;ii++){
 	// Load angles and get phase-space point
@@ -306,4 +458,122 @@ extern "C"
     free(Qs);
     cleanup(T,Phi,npot,actionAngleArgs);
   }
+  // Calculate (x,v) for a set of angles on each of many tori, as well as
+  // the frequencies of each torus, fitting the tori in parallel in the
+  // order given by order; if warmstart, each thread fits a contiguous block
+  // of this order, seeding each fit with the last torus that the thread has
+  // fit successfully (the order should therefore put tori that are close
+  // in action space next to each other); nevals returns the number of
+  // potential evaluations used to fit each torus
+  void actionAngleTorus_xvFreqsMany(int nt,
+				    double * jr, double * jphi, double * jz,
+				    int * order,
+				    int na,
+				    double * angler, double * anglephi,
+				    double * anglez,
+				    int npot,
+				    int * pot_type,
+				    double * pot_args,
+				    double tol,
+				    long long pothash,
+				    int usecache,
+				    int warmstart,
+				    double * R, double * vR, double * vT, 
+				    double * z, double * vz, double * phi,
+				    double * Omegar,double * Omegaphi,
+				    double * Omegaz,
+				    int * flag,
+				    long long * nevals)
+  {
+    int ii, io, jj, tid, nthreads;
+    long long nevals0;
+#ifdef _OPENMP
+    nthreads = omp_get_max_threads();
+#else
+    nthreads = 1;
+#endif
+    // set up a torus and potential for each thread
+    Torus ** T= (Torus **) malloc ( nthreads * sizeof (Torus *) );
+    galpyPotential ** Phi= (galpyPotential **) malloc ( nthreads * sizeof (galpyPotential *) );
+    struct potentialArg * actionAngleArgs= (struct potentialArg *) malloc ( nthreads * npot * sizeof (struct potentialArg) );
+    for (tid=0; tid < nthreads; tid++) {
+      T[tid]= new(std::nothrow) Torus;
+      parse_actionAngleArgs(npot,actionAngleArgs+tid*npot,pot_type,pot_args,
+			    true);
+      Phi[tid]= new(std::nothrow) galpyPotential(npot,
+						 actionAngleArgs+tid*npot);
+    }
+    // last converged torus of each thread, used to seed its next fit
+    Torus ** seed= (Torus **) malloc ( nthreads * sizeof (Torus *) );
+    for (tid=0; tid < nthreads; tid++) *(seed+tid)= NULL;
+    Actions J;
+    Angles A;
+    PSPT Q;
+    Frequencies om;
+    // contiguous blocks per thread when warm-starting, otherwise balance;
+    // the schedule is process-wide, so restore the previous one afterwards
+#ifdef _OPENMP
+    omp_sched_t prev_sched;
+    int prev_chunk;
+    omp_get_schedule(&prev_sched,&prev_chunk);
+    if ( warmstart ) omp_set_schedule(omp_sched_static,0);
+    else omp_set_schedule(omp_sched_dynamic,1);
+#endif
+#pragma omp parallel for schedule(runtime) private(ii,io,jj,tid,J,A,Q,om,nevals0)
+    for (ii=0; ii < nt; ii++) {
+#ifdef _OPENMP
+      tid= omp_get_thread_num();
+#else
+      tid = 0;
+#endif
+      io= *(order+ii);
+      // Load actions
+      J[0]= *(jr+io);
+      J[1]= *(jz+io);
+      J[2]= *(jphi+io);
+      // Fit Torus
+      nevals0= Phi[tid]->nevals;
+      *(flag+io)= fitTorus(T[tid],J,Phi[tid],tol,pothash,usecache,
+			   warmstart ? *(seed+tid) : NULL);
+      *(nevals+io)= Phi[tid]->nevals-nevals0;
+      if ( warmstart && *(flag+io) == 0 ) {
+	// If the seed cannot be allocated, the next fit starts from scratch
+	if ( ! *(seed+tid) ) *(seed+tid)= new(std::nothrow) Torus;
+	if ( *(seed+tid) ) *(*(seed+tid))= *T[tid];
+      }
+      Phi[tid]->set_Lz(J(2));
+      // Load angles and get (x,v)
+      for (jj=0; jj < na; jj++) {
+	A[0]= *(angler+io*na+jj);
+	A[1]= *(anglez+io*na+jj);
+	A[2]= *(anglephi+io*na+jj);
+	Q= T[tid]->Map3D(A);
+	*(R+io*na+jj)= Q(0);
+	*(z+io*na+jj)= Q(1);
+	*(phi+io*na+jj)= Q(2);
+	*(vR+io*na+jj)= Q(3);
+	*(vz+io*na+jj)= Q(4);
+	*(vT+io*na+jj)= Q(5);
+      }
+      // Grab the frequencies
+      om= T[tid]->omega();
+      *(Omegar+io)= om(0);
+      *(Omegaz+io)= om(1);
+      *(Omegaphi+io)= om(2);
+    }
+#ifdef _OPENMP
+    omp_set_schedule(prev_sched,prev_chunk);
+#endif
+
+    // Clean up
+    for (tid=0; tid < nthreads; tid++) {
+      if ( *(seed+tid) ) delete *(seed+tid);
+      delete Phi[tid];
+      delete T[tid];
+    }
+    free(seed);
+    free(T);
+    free(Phi);
+    cleanup_args(nthreads*npot,actionAngleArgs);
+  }
 }
@@ -21,6 +21,7 @@ void  galpyPotential::error(const char* msgs) const
 
 double galpyPotential::operator() (double R, double z) const
 {
+  nevals++;
   return evaluatePotentials(R,z,nargs,potentialArgs);
 }
 // LCOV_EXCL_STOP
@@ -28,6 +29,7 @@ double galpyPotential::operator() (double R, double z) const
 double galpyPotential::operator() (double R, double z,
 				   double& dPdR,double& dPdz) const
 {
+  nevals++;
   dPdR= -calcRforce(R,z,0.,0.,nargs,potentialArgs);
   dPdz= -calczforce(R,z,0.,0.,nargs,potentialArgs);
   return evaluatePotentials(R,z,nargs,potentialArgs);
@@ -21,6 +21,7 @@ class galpyPotential : public Potential {
   struct potentialArg * potentialArgs;
   void  error(const char*) const;
  public:
+  mutable long long nevals; // number of potential evaluations
   galpyPotential(int,struct potentialArg *);
   double operator() (const double, const double) const;
   double operator() (const double, double&, double&) const;//??
@@ -35,7 +36,7 @@ class galpyPotential : public Potential {
 
 inline galpyPotential::galpyPotential(int na,
 				      struct potentialArg * inPotentialArgs) :
-		      nargs(na), potentialArgs(inPotentialArgs)
+		      nargs(na), potentialArgs(inPotentialArgs), nevals(0)
 { 
 
 }
@@ -237,6 +237,15 @@ void parse_actionAngleArgs(int npot,
       potentialArgs->accx= NULL;
       potentialArgs->accy= NULL;
       break;
+    case 25: //interp3DPotential, many arguments
+      potentialArgs->potentialEval= &interp3DPotentialEval;
+      potentialArgs->Rforce= &interp3DPotentialRforce;
+      potentialArgs->zforce= &interp3DPotentialzforce;
+      potentialArgs->nargs= 16; // + shared B-spline coefficients, see below
+      potentialArgs->i2d= NULL;
+      potentialArgs->accx= NULL;
+      potentialArgs->accy= NULL;
+      break;
     }
     potentialArgs->args= (double *) malloc( potentialArgs->nargs * sizeof(double));
     for (jj=0; jj < potentialArgs->nargs; jj++){
@@ -244,6 +253,11 @@ void parse_actionAngleArgs(int npot,
       potentialArgs->args++;
     }
     potentialArgs->args-= potentialArgs->nargs;
+    if ( *(pot_type-1) == 25 ) { //interp3DPotential: share the coefficients
+      potentialArgs->coeffs= pot_args;
+      pot_args+= (int) (4 * *(potentialArgs->args+1)
+			* *(potentialArgs->args+2) * *(potentialArgs->args+3));
+    }
     potentialArgs++;
   }
   potentialArgs-= npot;
@@ -0,0 +1,132 @@
+/*
+  C code for actions, frequencies, and angles in the isochrone potential
+*/
+#include <stdio.h>
+#include <stdlib.h>
+#include <math.h>
+#ifdef _OPENMP
+#include <omp.h>
+#endif
+#define CHUNKSIZE 1000
+//Potentials
+#include <galpy_potentials.h>
+#include <actionAngle.h>
+#ifndef M_PI
+#define M_PI 3.14159265358979323846
+#endif
+/*
+  Function Declarations
+*/
+void actionAngleIsochrone_actionsFreqsAngles(int,double *,double *,double *,
+					     double *,double *,double *,
+					     double,double,int,int,
+					     double *,double *,double *,
+					     double *,double *,double *,
+					     double *,double *,double *);
+/*
+  Actual functions, inlines first
+*/
+//Values just outside of [-1,1] because of round-off are set to +/-1
+static inline double clip_unit(double x){
+  if ( x > 1. && x < 1.0000001 ) return 1.;
+  else if ( x < -1. && x > -1.0000001 ) return -1.;
+  else return x;
+}
+static inline double mod_2pi(double x){
+  x= fmod(x,2. * M_PI);
+  return ( x < 0. ) ? x + 2. * M_PI : x;
+}
+/*
+  MAIN FUNCTIONS
+ */
+void actionAngleIsochrone_actionsFreqsAngles(int ndata,
+					     double *R,
+					     double *vR,
+					     double *vT,
+					     double *z,
+					     double *vz,
+					     double *phi,
+					     double amp,
+					     double b,
+					     int doFreqs,
+					     int doAngles,
+					     double *jr,
+					     double *jphi,
+					     double *jz,
+					     double *Omegar,
+					     double *Omegaphi,
+					     double *Omegaz,
+					     double *angler,
+					     double *anglephi,
+					     double *anglez){
+  //Calculates the actions and, optionally, the frequencies and angles in a
+  //single pass over the data; frequencies are required for the angles
+  int ii;
+  double r2, r, Lz, Lx, Ly, L2, L, E, sqL2amp, Or, Oz;
+  double c, e, coseta, eta, costheta, sintheta, tanhalfeta, tan11, tan12;
+  double i, psi, u, ar, az;
+  int vzindx;
+  UNUSED int chunk= CHUNKSIZE;
+#pragma omp parallel for schedule(static,chunk)				\
+  private(ii,r2,r,Lz,Lx,Ly,L2,L,E,sqL2amp,Or,Oz,c,e,coseta,eta,costheta, \
+	  sintheta,tanhalfeta,tan11,tan12,i,psi,u,ar,az,vzindx)
+  for (ii=0; ii < ndata; ii++){
+    r2= *(R+ii) * *(R+ii) + *(z+ii) * *(z+ii);
+    Lz= *(R+ii) * *(vT+ii);
+    Lx= - *(z+ii) * *(vT+ii);
+    Ly= *(z+ii) * *(vR+ii) - *(R+ii) * *(vz+ii);
+    L2= Lx * Lx + Ly * Ly + Lz * Lz;
+    L= sqrt(L2);
+    E= - amp / ( b + sqrt( r2 + b * b ) )
+      + 0.5 * ( *(vR+ii) * *(vR+ii) + *(vT+ii) * *(vT+ii)
+		+ *(vz+ii) * *(vz+ii) );
+    sqL2amp= sqrt( L2 + 4. * amp * b );
+    //Actions
+    *(jz+ii)= L - fabs(Lz);
+    *(jr+ii)= amp / sqrt( -2. * E ) - 0.5 * ( L + sqL2amp );
+    if ( doAngles ) { //Lz may be clipped to +/-L below
+      if ( Lz / L > 1. && Lz / L < 1.0000001 ) Lz= L;
+      else if ( Lz / L < -1. && Lz / L > -1.0000001 ) Lz= -L;
+    }
+    *(jphi+ii)= Lz;
+    if ( ! doFreqs && ! doAngles ) continue;
+    //Frequencies
+    Or= pow( -2. * E,1.5) / amp;
+    Oz= 0.5 * ( 1. + L / sqL2amp ) * Or;
+    if ( doFreqs ) {
+      *(Omegar+ii)= Or;
+      *(Omegaz+ii)= Oz;
+      *(Omegaphi+ii)= ( Lz < 0. ) ? -Oz : Oz;
+    }
+    if ( ! doAngles ) continue;
+    //Angles
+    c= - 0.5 * amp / E - b;
+    e= sqrt( 1. - L2 / amp / c * ( 1. + b / c ) );
+    r= sqrt(r2);
+    coseta= clip_unit( ( 1. - b / c * ( sqrt( 1. + r2 / b / b ) - 1. ) ) / e );
+    eta= acos(coseta);
+    costheta= *(z+ii) / r;
+    sintheta= *(R+ii) / r;
+    if ( *(vR+ii) * sintheta + *(vz+ii) * costheta < 0. )
+      eta= 2. * M_PI - eta;
+    ar= eta - e * c / ( c + b ) * sin(eta);
+    tanhalfeta= tan( 0.5 * eta );
+    tan11= atan( sqrt( ( 1. + e ) / ( 1. - e ) ) * tanhalfeta );
+    tan12= atan( sqrt( ( 1. + e + 2. * b / c ) / ( 1. - e + 2. * b / c ) )
+		 * tanhalfeta );
+    if ( tan11 < 0. ) tan11+= M_PI;
+    if ( tan12 < 0. ) tan12+= M_PI;
+    vzindx= ( - *(vz+ii) * sintheta + *(vR+ii) * costheta ) > 0.;
+    i= acos(Lz / L);
+    psi= asin( clip_unit( costheta / sin(i) ) );
+    if ( vzindx ) psi= M_PI - psi;
+    psi= mod_2pi(psi);
+    az= psi + Oz / Or * ar - tan11 - tan12 / sqrt( 1. + 4. * amp * b / L2 );
+    u= asin( clip_unit( *(z+ii) / *(R+ii) / tan(i) ) );
+    if ( vzindx ) u= M_PI - u;
+    *(angler+ii)= mod_2pi(ar);
+    *(anglez+ii)= mod_2pi(az);
+    *(anglephi+ii)= mod_2pi( ( Lz < 0. ) ? *(phi+ii) - u - az
+			     : *(phi+ii) - u + az );
+  }
+}
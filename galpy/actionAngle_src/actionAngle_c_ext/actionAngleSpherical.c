@@ -0,0 +1,267 @@
+/*
+  C code for actions, frequencies, and angles in spherical potentials
+*/
+#include <stdio.h>
+#include <stdlib.h>
+#include <stdbool.h>
+#include <math.h>
+#include <gsl/gsl_math.h>
+#include <gsl/gsl_errno.h>
+#include <gsl/gsl_roots.h>
+#include <gsl/gsl_integration.h>
+#ifdef _OPENMP
+#include <omp.h>
+#endif
+#define CHUNKSIZE 10
+//Potentials
+#include <galpy_potentials.h>
+#include <actionAngle.h>
+#ifndef M_PI
+#define M_PI 3.14159265358979323846
+#endif
+/*
+  Structure Declarations
+*/
+struct JRSphericalArg{
+  double E;
+  double L22;
+  double rturn; //rperi or rap, the turning point that the integral starts at
+  int nargs;
+  struct potentialArg * actionAngleArgs;
+};
+/*
+  Function Declarations
+*/
+void actionAngleSpherical_actionsFreqsAngles(int,double *,double *,double *,
+					     double *,double *,int,int *,
+					     double *,int,int,int,double *,
+					     double *,double *,double *,
+					     double *,double *,double *,
+					     int *);
+//rperi and rap are found using the adiabatic code, with ER --> E and Lz --> L
+void calcRapRperi(int,double *,double *,double *,double *,double *,
+		  int,struct potentialArg *);
+double JRSphericalIntegrandSquared(double,void *);
+double JRSphericalIntegrandSmall(double,void *);
+double JRSphericalIntegrandLarge(double,void *);
+double TrSphericalIntegrandSmall(double,void *);
+double TrSphericalIntegrandLarge(double,void *);
+double ISphericalIntegrandSmall(double,void *);
+double ISphericalIntegrandLarge(double,void *);
+/*
+  Actual functions, inlines first
+*/
+inline void calcSphericalEL(int ndata,
+			    double *R,
+			    double *vR,
+			    double *vT,
+			    double *z,
+			    double *vz,
+			    double *r,
+			    double *E,
+			    double *L,
+			    int nargs,
+			    struct potentialArg * actionAngleArgs){
+  int ii;
+  double Lx, Ly, Lz;
+  UNUSED int chunk= CHUNKSIZE;
+#pragma omp parallel for schedule(static,chunk) private(ii,Lx,Ly,Lz)
+  for (ii=0; ii < ndata; ii++){
+    *(r+ii)= sqrt( *(R+ii) * *(R+ii) + *(z+ii) * *(z+ii) );
+    *(E+ii)= evaluatePotentials(*(r+ii),0.,nargs,actionAngleArgs)
+      + 0.5 * *(vR+ii) * *(vR+ii)
+      + 0.5 * *(vT+ii) * *(vT+ii)
+      + 0.5 * *(vz+ii) * *(vz+ii);
+    Lz= *(R+ii) * *(vT+ii);
+    Lx= - *(z+ii) * *(vT+ii);
+    Ly= *(z+ii) * *(vR+ii) - *(R+ii) * *(vz+ii);
+    *(L+ii)= sqrt( Lx * Lx + Ly * Ly + Lz * Lz );
+  }
+}
+/*
+  MAIN FUNCTIONS
+ */
+void actionAngleSpherical_actionsFreqsAngles(int ndata,
+					     double *R,
+					     double *vR,
+					     double *vT,
+					     double *z,
+					     double *vz,
+					     int npot,
+					     int * pot_type,
+					     double * pot_args,
+					     int order,
+					     int doFreqs,
+					     int doAngles,
+					     double *jr,
+					     double *rperi,
+					     double *rap,
+					     double *Tr,
+					     double *I,
+					     double *TrPart,
+					     double *IPart,
+					     int * err){
+  //Calculates Jr and, optionally, the integrals needed for the frequencies
+  //(Tr, I, integrated over a full radial half-period) and angles (TrPart,
+  //IPart, integrated from the turning point closest to the current radius,
+  //in the sense of the geometric mean of rperi and rap); all integrals use
+  //r= rperi+t^2 or r= rap-t^2 to remove the turning-point singularities
+  int ii, tid, nthreads;
+#ifdef _OPENMP
+  nthreads = omp_get_max_threads();
+#else
+  nthreads = 1;
+#endif
+  double Rmean, r_ii;
+  //Set up the potentials
+  struct potentialArg * actionAngleArgs= (struct potentialArg *) malloc ( npot * sizeof (struct potentialArg) );
+  parse_actionAngleArgs(npot,actionAngleArgs,pot_type,pot_args,false);
+  //r, E, L
+  double *r= (double *) malloc ( ndata * sizeof(double) );
+  double *E= (double *) malloc ( ndata * sizeof(double) );
+  double *L= (double *) malloc ( ndata * sizeof(double) );
+  calcSphericalEL(ndata,R,vR,vT,z,vz,r,E,L,npot,actionAngleArgs);
+  //Calculate peri and apocenters
+  calcRapRperi(ndata,rperi,rap,r,E,L,npot,actionAngleArgs);
+  //Set up the integrals
+  gsl_function * JRInt= (gsl_function *) malloc ( nthreads * sizeof(gsl_function) );
+  struct JRSphericalArg * params= (struct JRSphericalArg *) malloc ( nthreads * sizeof (struct JRSphericalArg) );
+  for (tid=0; tid < nthreads; tid++){
+    (params+tid)->nargs= npot;
+    (params+tid)->actionAngleArgs= actionAngleArgs;
+    (JRInt+tid)->params = params+tid;
+  }
+  gsl_integration_glfixed_table * T= gsl_integration_glfixed_table_alloc (order);
+  UNUSED int chunk= CHUNKSIZE;
+#pragma omp parallel for schedule(static,chunk)				\
+  private(tid,ii,Rmean,r_ii)						\
+  shared(jr,rperi,rap,Tr,I,TrPart,IPart,JRInt,params,T,E,L,r)
+  for (ii=0; ii < ndata; ii++){
+#ifdef _OPENMP
+    tid= omp_get_thread_num();
+#else
+    tid = 0;
+#endif
+    *(Tr+ii)= 0.;
+    *(I+ii)= 0.;
+    *(TrPart+ii)= 0.;
+    *(IPart+ii)= 0.;
+    if ( *(rperi+ii) == -9999.99 || *(rap+ii) == -9999.99 ){
+      *(jr+ii)= 9999.99;
+      continue;
+    }
+    if ( (*(rap+ii) - *(rperi+ii)) / *(rap+ii) < 0.000001 ){//circular
+      *(jr+ii) = 0.;
+      continue;
+    }
+    //Setup function
+    (params+tid)->E= *(E+ii);
+    (params+tid)->L22= 0.5 * *(L+ii) * *(L+ii);
+    Rmean= ( *(rperi+ii) > 0. ) ? sqrt( *(rperi+ii) * *(rap+ii) )
+      : 0.5 * *(rap+ii);
+    //Integrate
+    (params+tid)->rturn= *(rperi+ii);
+    (JRInt+tid)->function = &JRSphericalIntegrandSmall;
+    *(jr+ii)= gsl_integration_glfixed (JRInt+tid,0.,
+				       sqrt( Rmean - *(rperi+ii) ),T);
+    if ( doFreqs ) {
+      (JRInt+tid)->function = &TrSphericalIntegrandSmall;
+      *(Tr+ii)= gsl_integration_glfixed (JRInt+tid,0.,
+					 sqrt( Rmean - *(rperi+ii) ),T);
+      (JRInt+tid)->function = &ISphericalIntegrandSmall;
+      *(I+ii)= gsl_integration_glfixed (JRInt+tid,0.,
+					sqrt( Rmean - *(rperi+ii) ),T);
+    }
+    r_ii= *(r+ii);
+    if ( doAngles && r_ii < Rmean && r_ii > *(rperi+ii) ) {
+      (JRInt+tid)->function = &TrSphericalIntegrandSmall;
+      *(TrPart+ii)= gsl_integration_glfixed (JRInt+tid,0.,
+					     sqrt( r_ii - *(rperi+ii) ),T);
+      (JRInt+tid)->function = &ISphericalIntegrandSmall;
+      *(IPart+ii)= gsl_integration_glfixed (JRInt+tid,0.,
+					    sqrt( r_ii - *(rperi+ii) ),T);
+    }
+    (params+tid)->rturn= *(rap+ii);
+    (JRInt+tid)->function = &JRSphericalIntegrandLarge;
+    *(jr+ii)+= gsl_integration_glfixed (JRInt+tid,0.,
+					sqrt( *(rap+ii) - Rmean ),T);
+    *(jr+ii)/= M_PI;
+    if ( doFreqs ) {
+      (JRInt+tid)->function = &TrSphericalIntegrandLarge;
+      *(Tr+ii)+= gsl_integration_glfixed (JRInt+tid,0.,
+					  sqrt( *(rap+ii) - Rmean ),T);
+      (JRInt+tid)->function = &ISphericalIntegrandLarge;
+      *(I+ii)+= gsl_integration_glfixed (JRInt+tid,0.,
+					 sqrt( *(rap+ii) - Rmean ),T);
+    }
+    if ( doAngles && r_ii >= Rmean && r_ii < *(rap+ii) ) {
+      (JRInt+tid)->function = &TrSphericalIntegrandLarge;
+      *(TrPart+ii)= gsl_integration_glfixed (JRInt+tid,0.,
+					     sqrt( *(rap+ii) - r_ii ),T);
+      (JRInt+tid)->function = &ISphericalIntegrandLarge;
+      *(IPart+ii)= gsl_integration_glfixed (JRInt+tid,0.,
+					    sqrt( *(rap+ii) - r_ii ),T);
+    }
+  }
+  for (ii=0; ii < npot; ii++) {
+    if ( (actionAngleArgs+ii)->i2d )
+      interp_2d_free((actionAngleArgs+ii)->i2d) ;
+    if ((actionAngleArgs+ii)->accx )
+      gsl_interp_accel_free ((actionAngleArgs+ii)->accx);
+    if ((actionAngleArgs+ii)->accy )
+      gsl_interp_accel_free ((actionAngleArgs+ii)->accy);
+    free((actionAngleArgs+ii)->args);
+  }
+  free(actionAngleArgs);
+  free(JRInt);
+  free(params);
+  gsl_integration_glfixed_table_free ( T );
+  free(r);
+  free(E);
+  free(L);
+}
+double JRSphericalIntegrandSquared(double r,
+				   void * p){
+  struct JRSphericalArg * params= (struct JRSphericalArg *) p;
+  return params->E - evaluatePotentials(r,0.,params->nargs,
+					params->actionAngleArgs)
+    - params->L22 / r / r;
+}
+//The integrands below include the Jacobian of r= rperi+t^2 (Small) or
+//r= rap-t^2 (Large); sqrt(2 JRSphericalIntegrandSquared) = |v_r|
+double JRSphericalIntegrandSmall(double t,
+				 void * p){
+  struct JRSphericalArg * params= (struct JRSphericalArg *) p;
+  double sq= JRSphericalIntegrandSquared(params->rturn + t * t,p);
+  return ( sq > 0. ) ? 2. * t * sqrt( 2. * sq ): 0.;
+}
+double JRSphericalIntegrandLarge(double t,
+				 void * p){
+  struct JRSphericalArg * params= (struct JRSphericalArg *) p;
+  double sq= JRSphericalIntegrandSquared(params->rturn - t * t,p);
+  return ( sq > 0. ) ? 2. * t * sqrt( 2. * sq ): 0.;
+}
+double TrSphericalIntegrandSmall(double t,
+				 void * p){
+  struct JRSphericalArg * params= (struct JRSphericalArg *) p;
+  return 2. * t / sqrt( 2. * JRSphericalIntegrandSquared(params->rturn
+							  + t * t,p) );
+}
+double TrSphericalIntegrandLarge(double t,
+				 void * p){
+  struct JRSphericalArg * params= (struct JRSphericalArg *) p;
+  return 2. * t / sqrt( 2. * JRSphericalIntegrandSquared(params->rturn
+							  - t * t,p) );
+}
+double ISphericalIntegrandSmall(double t,
+				void * p){
+  struct JRSphericalArg * params= (struct JRSphericalArg *) p;
+  double r= params->rturn + t * t;
+  return 2. * t / sqrt( 2. * JRSphericalIntegrandSquared(r,p) ) / r / r;
+}
+double ISphericalIntegrandLarge(double t,
+				void * p){
+  struct JRSphericalArg * params= (struct JRSphericalArg *) p;
+  double r= params->rturn - t * t;
+  return 2. * t / sqrt( 2. * JRSphericalIntegrandSquared(r,p) ) / r / r;
+}
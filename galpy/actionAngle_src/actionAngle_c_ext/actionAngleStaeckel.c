@@ -83,10 +83,22 @@ struct u0EqArg{
   int nargs;
   struct potentialArg * actionAngleArgs;
 };
+struct RLEqArg{
+  double Lz22;
+  int nargs;
+  struct potentialArg * actionAngleArgs;
+};
 /*
   Function Declarations
 */
+double calcu0_single(double,double,double,gsl_min_fminimizer *,
+		     struct u0EqArg *,int *);
+double calcRL_single(double,gsl_min_fminimizer *,struct RLEqArg *,int *);
 void calcu0(int,double *,double *,int,int *,double *,double,double *,int *);
+void actionAngleStaeckel_grid(int,double *,int,double *,int,double *,double,
+			      int,int *,double *,int,int *,double *,double,
+			      double *,double *,double *,double *,double *,
+			      double *,double *,int *);
 void actionAngleStaeckel_actions(int,double *,double *,double *,double *,
 				 double *,double *,int,int *,double *,double,
 				 double *,double *,int *);
@@ -154,6 +166,7 @@ double dJzdI3StaeckelIntegrand(double,void *);
 double dJzdI3LowStaeckelIntegrand(double,void *);
 double dJzdI3HighStaeckelIntegrand(double,void *);
 double u0Equation(double,void *);
+double RLEquation(double,void *);
 double evaluatePotentials(double,double,int, struct potentialArg *);
 double evaluatePotentialsUV(double,double,double,int,struct potentialArg *);
 /*
@@ -202,6 +215,107 @@ inline void calcEL(int ndata,
     *(Lz+ii)= *(R+ii) * *(vT+ii);
   }
 }
+double calcu0_single(double E,
+		     double Lz,
+		     double delta,
+		     gsl_min_fminimizer *s,
+		     struct u0EqArg * params,
+		     int * status){
+  // Minimize u0Equation for a single (E,Lz); the caller is responsible for
+  // turning off the gsl error handler
+  int iter, max_iter = 100;
+  double u_guess, u_lo, u_hi;
+  gsl_function u0Eq;
+  u0Eq.function = &u0Equation;
+  params->E= E;
+  params->Lz22delta= 0.5 * Lz * Lz / delta / delta;
+  u0Eq.params = params;
+  //Find starting points for minimum
+  u_guess= 1.;
+  u_lo= 0.001;
+  u_hi= 100.;
+  *status = gsl_min_fminimizer_set (s, &u0Eq, u_guess, u_lo, u_hi);
+  if (*status == GSL_EINVAL)
+    return u_hi;
+  iter= 0;
+  do
+    {
+      iter++;
+      *status = gsl_min_fminimizer_iterate (s);
+      u_guess = gsl_min_fminimizer_x_minimum (s);
+      u_lo = gsl_min_fminimizer_x_lower (s);
+      u_hi = gsl_min_fminimizer_x_upper (s);
+      *status = gsl_min_test_interval (u_lo, u_hi,
+				       9.9999999999999998e-13,
+				       4.4408920985006262e-16);
+    }
+  while (*status == GSL_CONTINUE && iter < max_iter);
+  return gsl_min_fminimizer_x_minimum (s);
+}
+double calcRL_single(double Lz,
+		     gsl_min_fminimizer *s,
+		     struct RLEqArg * params,
+		     int * status){
+  // Find the radius of the circular orbit with angular momentum Lz by
+  // minimizing the effective potential in ln R; the caller is responsible
+  // for turning off the gsl error handler
+  int iter, max_iter = 100;
+  double lnR_a, lnR_b, lnR_c, f_a, f_b, f_c, h;
+  double lnR_lo, lnR_hi;
+  gsl_function RLEq;
+  RLEq.function = &RLEquation;
+  params->Lz22= 0.5 * Lz * Lz;
+  RLEq.params = params;
+  //Bracket the minimum by stepping downhill from R=1
+  h= M_LN2;
+  lnR_a= 0.;
+  lnR_b= h;
+  f_a= RLEquation(lnR_a,params);
+  f_b= RLEquation(lnR_b,params);
+  if ( f_b > f_a ) {
+    h*= -1.;
+    lnR_c= lnR_a;
+    lnR_a= lnR_b;
+    lnR_b= lnR_c;
+    f_c= f_a;
+    f_a= f_b;
+    f_b= f_c;
+  }
+  lnR_c= lnR_b+h;
+  f_c= RLEquation(lnR_c,params);
+  iter= 0;
+  while ( f_c < f_b && iter < max_iter ) {
+    iter++;
+    lnR_a= lnR_b;
+    f_a= f_b;
+    lnR_b= lnR_c;
+    f_b= f_c;
+    lnR_c= lnR_b+h;
+    f_c= RLEquation(lnR_c,params);
+  }
+  if ( iter == max_iter ) {
+    *status= GSL_EMAXITER;
+    return exp(lnR_b);
+  }
+  lnR_lo= ( h > 0. ) ? lnR_a : lnR_c;
+  lnR_hi= ( h > 0. ) ? lnR_c : lnR_a;
+  *status = gsl_min_fminimizer_set (s, &RLEq, lnR_b, lnR_lo, lnR_hi);
+  if (*status == GSL_EINVAL)
+    return exp(lnR_b);
+  iter= 0;
+  do
+    {
+      iter++;
+      *status = gsl_min_fminimizer_iterate (s);
+      lnR_lo = gsl_min_fminimizer_x_lower (s);
+      lnR_hi = gsl_min_fminimizer_x_upper (s);
+      *status = gsl_min_test_interval (lnR_lo, lnR_hi,
+				       9.9999999999999998e-13,
+				       4.4408920985006262e-16);
+    }
+  while (*status == GSL_CONTINUE && iter < max_iter);
+  return exp(gsl_min_fminimizer_x_minimum (s));
+}
 /*
   MAIN FUNCTIONS
  */
@@ -219,51 +333,17 @@ void calcu0(int ndata,
   struct potentialArg * actionAngleArgs= (struct potentialArg *) malloc ( npot * sizeof (struct potentialArg) );
   parse_actionAngleArgs(npot,actionAngleArgs,pot_type,pot_args,false);
   //setup the function to be minimized
-  gsl_function u0Eq;
   struct u0EqArg * params= (struct u0EqArg *) malloc ( sizeof (struct u0EqArg) );
   params->delta= delta;
   params->nargs= npot;
   params->actionAngleArgs= actionAngleArgs;
   //Setup solver
-  int status;
-  int iter, max_iter = 100;
-  const gsl_min_fminimizer_type *T;
-  gsl_min_fminimizer *s;
-  double u_guess, u_lo, u_hi;
-  T = gsl_min_fminimizer_brent;
-  s = gsl_min_fminimizer_alloc (T);
-  u0Eq.function = &u0Equation;
+  int status= 0;
+  gsl_min_fminimizer *s= gsl_min_fminimizer_alloc (gsl_min_fminimizer_brent);
   for (ii=0; ii < ndata; ii++){
-    //Setup function
-    params->E= *(E+ii);
-    params->Lz22delta= 0.5 * *(Lz+ii) * *(Lz+ii) / delta / delta;
-    u0Eq.params = params;
-    //Find starting points for minimum
-    u_guess= 1.;
-    u_lo= 0.001;
-    u_hi= 100.;
     gsl_set_error_handler_off();
-    status = gsl_min_fminimizer_set (s, &u0Eq, u_guess, u_lo, u_hi);
-    if (status == GSL_EINVAL) {
-      *(u0+ii)= u_hi;
-      gsl_set_error_handler (NULL);
-      continue;
-    }
+    *(u0+ii)= calcu0_single(*(E+ii),*(Lz+ii),delta,s,params,&status);
     gsl_set_error_handler (NULL);
-    iter= 0;
-    do
-      {
-	iter++;
-	status = gsl_min_fminimizer_iterate (s);
-	u_guess = gsl_min_fminimizer_x_minimum (s);
-	u_lo = gsl_min_fminimizer_x_lower (s);
-	u_hi = gsl_min_fminimizer_x_upper (s);
-	status = gsl_min_test_interval (u_lo, u_hi,
-					 9.9999999999999998e-13,
-					 4.4408920985006262e-16);
-      }
-    while (status == GSL_CONTINUE && iter < max_iter);
-    *(u0+ii)= gsl_min_fminimizer_x_minimum (s);
   }
   gsl_min_fminimizer_free (s);
   free(params);
@@ -279,6 +359,152 @@ void calcu0(int ndata,
   free(actionAngleArgs);
   *err= status;
 }
+void actionAngleStaeckel_grid(int nLz,
+			      double *Lz,
+			      int nE,
+			      double *y,
+			      int npsi,
+			      double *psi,
+			      double Ramax,
+			      int npot,
+			      int * pot_type,
+			      double * pot_args,
+			      int npot_u0,
+			      int * pot_type_u0,
+			      double * pot_args_u0,
+			      double delta,
+			      double *RL,
+			      double *ERL,
+			      double *ERa,
+			      double *u0,
+			      double *v,
+			      double *jr,
+			      double *jz,
+			      int * err){
+  /*
+    Compute the full (Lz,E,psi) grid of actionAngleStaeckelGrid: the radii 
+    and energies of circular orbits, the energy at Ramax, u0 and the velocity
+    at u0 for each (Lz,E), and the actions for each (Lz,E,psi); the 
+    potential in pot_*_u0 is used to compute u0
+  */
+  int ii, jj, kk, tid, nthreads;
+#ifdef _OPENMP
+  nthreads = omp_get_max_threads();
+#else
+  nthreads = 1;
+#endif
+  if ( nthreads > nLz ) nthreads= nLz;
+  //Set up the potentials, one copy per thread
+  struct potentialArg * actionAngleArgs= (struct potentialArg *) malloc ( nthreads * npot * sizeof (struct potentialArg) );
+  struct potentialArg * u0Args= (struct potentialArg *) malloc ( nthreads * npot_u0 * sizeof (struct potentialArg) );
+  struct RLEqArg * RLparams= (struct RLEqArg *) malloc ( nthreads * sizeof (struct RLEqArg) );
+  struct u0EqArg * u0params= (struct u0EqArg *) malloc ( nthreads * sizeof (struct u0EqArg) );
+  gsl_min_fminimizer ** s= (gsl_min_fminimizer **) malloc ( nthreads * sizeof (gsl_min_fminimizer *) );
+  int * status= (int *) malloc ( nthreads * sizeof(int) );
+  for (tid=0; tid < nthreads; tid++) {
+    parse_actionAngleArgs(npot,actionAngleArgs+tid*npot,
+			  pot_type,pot_args,false);
+    parse_actionAngleArgs(npot_u0,u0Args+tid*npot_u0,
+			  pot_type_u0,pot_args_u0,false);
+    (RLparams+tid)->nargs= npot;
+    (RLparams+tid)->actionAngleArgs= actionAngleArgs+tid*npot;
+    (u0params+tid)->delta= delta;
+    (u0params+tid)->nargs= npot_u0;
+    (u0params+tid)->actionAngleArgs= u0Args+tid*npot_u0;
+    *(s+tid)= gsl_min_fminimizer_alloc (gsl_min_fminimizer_brent);
+    *(status+tid)= 0;
+  }
+  //Energy grid, velocity at u0, and the phase-space points on the grid
+  int ngrid= nLz * nE * npsi;
+  double *E= (double *) malloc ( nLz * nE * sizeof(double) );
+  double *thisR= (double *) malloc ( ngrid * sizeof(double) );
+  double *thisvR= (double *) malloc ( ngrid * sizeof(double) );
+  double *thisvT= (double *) malloc ( ngrid * sizeof(double) );
+  double *thisz= (double *) malloc ( ngrid * sizeof(double) );
+  double *thisvz= (double *) malloc ( ngrid * sizeof(double) );
+  double *thisu0= (double *) malloc ( ngrid * sizeof(double) );
+  double lnEmax, lnEmin, R, v2;
+  gsl_set_error_handler_off();
+  UNUSED int chunk= CHUNKSIZE;
+#pragma omp parallel for schedule(dynamic,1)				\
+  private(ii,jj,kk,tid,lnEmax,lnEmin,R,v2) num_threads(nthreads)
+  for (ii=0; ii < nLz; ii++){
+#ifdef _OPENMP
+    tid= omp_get_thread_num();
+#else
+    tid = 0;
+#endif
+    //Circular orbit and energy at Ramax
+    *(RL+ii)= calcRL_single(*(Lz+ii),*(s+tid),RLparams+tid,status+tid);
+    *(ERL+ii)= RLEquation(log(*(RL+ii)),RLparams+tid);
+    *(ERa+ii)= RLEquation(log(Ramax),RLparams+tid);
+    //Energy grid, logarithmically spaced in E-ERL
+    lnEmax= log(*(ERa+ii) - *(ERL+ii) + 1.e-10);
+    lnEmin= log(1.e-10);
+    for (jj=0; jj < nE; jj++){
+      *(E+ii*nE+jj)= exp(lnEmax+*(y+jj)*(lnEmin-lnEmax))+*(ERL+ii)-1.e-10;
+      *(u0+ii*nE+jj)= calcu0_single(*(E+ii*nE+jj),*(Lz+ii),delta,
+				    *(s+tid),u0params+tid,status+tid);
+      R= delta * sinh(*(u0+ii*nE+jj));
+      v2= 2. * ( *(E+ii*nE+jj) 
+		 - evaluatePotentials(R,0.,npot,actionAngleArgs+tid*npot))
+	- *(Lz+ii) * *(Lz+ii) / R / R;
+      if ( v2 < 0. && v2 > -1.e-7 ) v2= 0.;
+      *(v+ii*nE+jj)= sqrt(v2);
+      for (kk=0; kk < npsi; kk++){
+	*(thisR+(ii*nE+jj)*npsi+kk)= R;
+	*(thisvR+(ii*nE+jj)*npsi+kk)= *(v+ii*nE+jj) * cos(*(psi+kk));
+	*(thisvT+(ii*nE+jj)*npsi+kk)= *(Lz+ii) / R;
+	*(thisz+(ii*nE+jj)*npsi+kk)= 0.;
+	*(thisvz+(ii*nE+jj)*npsi+kk)= *(v+ii*nE+jj) * sin(*(psi+kk));
+	*(thisu0+(ii*nE+jj)*npsi+kk)= *(u0+ii*nE+jj);
+      }
+    }
+  }
+  gsl_set_error_handler (NULL);
+  *err= 0;
+  for (tid=0; tid < nthreads; tid++)
+    if ( *(status+tid) ) *err= *(status+tid);
+  //Free
+  for (tid=0; tid < nthreads; tid++)
+    gsl_min_fminimizer_free (*(s+tid));
+  for (ii=0; ii < nthreads * npot; ii++) {
+    if ( (actionAngleArgs+ii)->i2d )
+      interp_2d_free((actionAngleArgs+ii)->i2d) ;
+    if ((actionAngleArgs+ii)->accx )
+      gsl_interp_accel_free ((actionAngleArgs+ii)->accx);
+    if ((actionAngleArgs+ii)->accy )
+      gsl_interp_accel_free ((actionAngleArgs+ii)->accy);
+    free((actionAngleArgs+ii)->args);
+  }
+  for (ii=0; ii < nthreads * npot_u0; ii++) {
+    if ( (u0Args+ii)->i2d )
+      interp_2d_free((u0Args+ii)->i2d) ;
+    if ((u0Args+ii)->accx )
+      gsl_interp_accel_free ((u0Args+ii)->accx);
+    if ((u0Args+ii)->accy )
+      gsl_interp_accel_free ((u0Args+ii)->accy);
+    free((u0Args+ii)->args);
+  }
+  free(actionAngleArgs);
+  free(u0Args);
+  free(RLparams);
+  free(u0params);
+  free(s);
+  free(status);
+  //Actions for the entire grid at once
+  int err_actions= 0;
+  actionAngleStaeckel_actions(ngrid,thisR,thisvR,thisvT,thisz,thisvz,thisu0,
+			      npot,pot_type,pot_args,delta,jr,jz,&err_actions);
+  if ( err_actions ) *err= err_actions;
+  free(E);
+  free(thisR);
+  free(thisvR);
+  free(thisvT);
+  free(thisz);
+  free(thisvz);
+  free(thisu0);
+}
 void actionAngleStaeckel_actions(int ndata,
 				 double *R,
 				 double *vR,
@@ -1846,6 +2072,12 @@ double u0Equation(double u, void * p){
 				    params->nargs,params->actionAngleArgs);
   return -(params->E*sinh2u-dU-params->Lz22delta/sinh2u);
 }  
+double RLEquation(double lnR, void * p){
+  struct RLEqArg * params= (struct RLEqArg *) p;
+  double R= exp(lnR);
+  return evaluatePotentials(R,0.,params->nargs,params->actionAngleArgs)
+    + params->Lz22 / R / R;
+}
 double evaluatePotentialsUV(double u, double v, double delta,
 			    int nargs, 
 			    struct potentialArg * actionAngleArgs){
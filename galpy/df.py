@@ -4,6 +4,7 @@ from galpy.df_src import evolveddiskdf
 from galpy.df_src import quasiisothermaldf
 from galpy.df_src import streamdf
 from galpy.df_src import streamgapdf
+from galpy.df_src import streampepperdf
 #
 # Functions
 #
@@ -13,6 +14,12 @@ impulse_deltav_hernquist= streamgapdf.impulse_deltav_hernquist
 impulse_deltav_hernquist_curvedstream= streamgapdf.impulse_deltav_hernquist_curvedstream
 impulse_deltav_general= streamgapdf.impulse_deltav_general
 impulse_deltav_general_curvedstream= streamgapdf.impulse_deltav_general_curvedstream
+impulse_deltav_plummer_multi= streamgapdf.impulse_deltav_plummer_multi
+impulse_deltav_plummer_curvedstream_multi= streamgapdf.impulse_deltav_plummer_curvedstream_multi
+impulse_deltav_hernquist_multi= streamgapdf.impulse_deltav_hernquist_multi
+impulse_deltav_hernquist_curvedstream_multi= streamgapdf.impulse_deltav_hernquist_curvedstream_multi
+impulse_deltav_general_multi= streamgapdf.impulse_deltav_general_multi
+impulse_deltav_general_curvedstream_multi= streamgapdf.impulse_deltav_general_curvedstream_multi
 impulse_deltav_general_orbitintegration= streamgapdf.impulse_deltav_general_orbitintegration
 impulse_deltav_general_fullplummerintegration= streamgapdf.impulse_deltav_general_fullplummerintegration
 impulse_deltav_plummerstream= streamgapdf.impulse_deltav_plummerstream
@@ -30,3 +37,4 @@ surfaceSigmaProfile= surfaceSigmaProfile.surfaceSigmaProfile
 quasiisothermaldf= quasiisothermaldf.quasiisothermaldf
 streamdf= streamdf.streamdf
 streamgapdf= streamgapdf.streamgapdf
+streampepperdf= streampepperdf.streampepperdf
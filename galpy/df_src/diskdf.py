@@ -15,12 +15,14 @@ _EPSREL=10.**-14.
 _NSIGMA= 4.
 _INTERPDEGREE= 3
 _RMIN=10.**-10.
+_TRGLORDER= 50 # order of the Gauss-Legendre quadrature for the radial period
 _MAXD_REJECTLOS= 4.
 _PROFILE= False
 import copy
 import re
 import os, os.path
 import pickle
+import hashlib
 import math
 import numpy as nu
 import scipy as sc
@@ -31,12 +33,13 @@ from scipy import stats
 from scipy import optimize
 from galpy.df_src.surfaceSigmaProfile import *
 from galpy.orbit import Orbit
-from galpy.util.bovy_ars import bovy_ars
-from galpy.util import save_pickles
+from galpy.orbit_src.FullOrbit import _integrateFullOrbit_multi
+from galpy.util.bovy_ars import bovy_ars_batch
+from galpy.util import save_pickles, multi
 from galpy.util.bovy_conversion import physical_conversion, \
     potential_physical_input, _APY_UNITS, surfdens_in_msolpc2
 from galpy.potential import PowerSphericalPotential
-from galpy.actionAngle import actionAngleAdiabatic, actionAngleAxi
+from galpy.potential_src.Potential import _rootfind_vec
 from galpy.df_src.df import df, _APY_LOADED
 if _APY_LOADED:
     from astropy import units
@@ -104,9 +107,6 @@ class diskdf(df):
                                      beta=beta,**kwargs)
         else:
             self._correct= False
-        #Setup aA objects for frequency and rap,rperi calculation
-        self._aA= actionAngleAdiabatic(pot=PowerSphericalPotential(normalize=1.,
-                                                                   alpha=2.-2.*self._beta),gamma=0.)
         return None
     
     @physical_conversion('phasespacedensity2d',pop=True)
@@ -1550,26 +1550,159 @@ class diskdf(df):
            _ELtowRRapRperi
         PURPOSE:
            calculate the radial frequency based on E,L, also return rap and 
-           rperi
+           rperi (for the orbit starting at xE(E) with vR=0 and vT=L/xE)
         INPUT:
-           E - energy
-           L - angular momentum
+           E - energy (can be array)
+           L - angular momentum (can be array)
         OUTPUT:
-           wR(E.L)
+           (wR(E.L),rap,rperi)
         HISTORY:
            2010-07-11 - Written - Bovy (NYU)
+           2016-12-08 - Vectorized, using a vectorized root finder for rap and rperi and Gauss-Legendre quadrature for TR - Bovy (UofT)
         """
+        scalarOut= not isinstance(E,nu.ndarray) \
+            and not isinstance(L,nu.ndarray)
+        E, L= nu.broadcast_arrays(nu.atleast_1d(E).astype('float'),
+                                  nu.fabs(nu.atleast_1d(L).astype('float')))
         if self._beta == 0.:
-            xE= sc.exp(E-.5)
+            xE= nu.exp(E-.5)
         else: #non-flat rotation curve                                      
             xE= (2.*E/(1.+1./self._beta))**(1./2./self._beta)
-        rperi,rap= self._aA.calcRapRperi(xE,0.,L/xE,0.,0.)
-        #Replace the above w/
-        aA= actionAngleAxi(xE,0.,L/xE,
-                           pot=PowerSphericalPotential(normalize=1.,
-                                                       alpha=2.-2.*self._beta).toPlanar())
-        TR= aA.TR()
-        return (2.*math.pi/TR,rap,rperi)
+        # xE is a turning point of the orbit, find the other one between 
+        # 0 (inf) and the guiding-center radius rL
+        Eorb= _ELtowRRapRperiEq(xE,0.,L,self._beta)
+        rL= L**(1./(1.+self._beta))
+        rap= copy.copy(xE)
+        rperi= copy.copy(xE)
+        circ= nu.fabs(L/xE-xE**self._beta) < 10.**-15.
+        atapo= (L < xE**(1.+self._beta))*(True^circ)
+        atperi= (L > xE**(1.+self._beta))*(True^circ)
+        rperi[atapo*(L == 0.)]= 0.
+        atapo*= L > 0.
+        if nu.any(atapo):
+            rlo= rL[atapo]/2.
+            indx= _ELtowRRapRperiEq(rlo,Eorb[atapo],L[atapo],self._beta) <= 0.
+            while nu.any(indx):
+                rlo[indx]/= 2.
+                indx[indx]= _ELtowRRapRperiEq(rlo[indx],Eorb[atapo][indx],
+                                              L[atapo][indx],self._beta) <= 0.
+            rperi[atapo]= _rootfind_vec(_ELtowRRapRperiEq,rlo,rL[atapo],
+                                        args=(Eorb[atapo],L[atapo],
+                                              self._beta))
+        if nu.any(atperi):
+            rhi= 2.*rL[atperi]
+            indx= _ELtowRRapRperiEq(rhi,Eorb[atperi],L[atperi],self._beta) <= 0.
+            while nu.any(indx):
+                rhi[indx]*= 2.
+                indx[indx]= _ELtowRRapRperiEq(rhi[indx],Eorb[atperi][indx],
+                                              L[atperi][indx],self._beta) <= 0.
+            rap[atperi]= _rootfind_vec(_ELtowRRapRperiEq,rL[atperi],rhi,
+                                       args=(Eorb[atperi],L[atperi],
+                                             self._beta))
+        # Radial period, using R= Rmean-DeltaR cos(theta) to remove the 
+        # turning-point singularities; 2pi/kappa for near-circular orbits
+        TR= 2.*math.pi/_kappa(xE,self._beta)
+        indx= nu.fabs(rap-rperi)/rap >= 10.**-4.
+        if nu.any(indx):
+            glx, glw= nu.polynomial.legendre.leggauss(_TRGLORDER)
+            theta= math.pi/2.*(glx+1.)
+            Rmean= (rap[indx]+rperi[indx])/2.
+            DeltaR= (rap[indx]-rperi[indx])/2.
+            R= nu.outer(Rmean,nu.ones(_TRGLORDER))\
+                -nu.outer(DeltaR,nu.cos(theta))
+            TR[indx]= math.pi*DeltaR\
+                *nu.sum(glw*nu.sin(theta)\
+                            /nu.sqrt(-2.*_ELtowRRapRperiEq(\
+                            R,nu.atleast_2d(Eorb[indx]).T,
+                            nu.atleast_2d(L[indx]).T,self._beta)),axis=1)
+        if scalarOut:
+            return (2.*math.pi/TR[0],rap[0],rperi[0])
+        else:
+            return (2.*math.pi/TR,rap,rperi)
+
+    def _sample_ars(self,n):
+        """
+        NAME:
+           _sample_ars
+        PURPOSE:
+           sample radii from the (corrected) surface-mass profile using 
+           batched adaptive-rejection sampling, re-using the hull between 
+           calls
+        INPUT:
+           n - number of samples
+        OUTPUT:
+           array of n radii
+        HISTORY:
+           2016-10-20 - Written - Bovy (UofT)
+        """
+        if self._correct:
+            hxparams= (self._surfaceSigmaProfile,self._corr)
+        else:
+            hxparams= (self._surfaceSigmaProfile,None)
+        out, self._ars_hull= bovy_ars_batch([0.,0.],[True,False],[0.05,2.],
+                                            _ars_hx,_ars_hpx,nsamples=n,
+                                            hxparams=hxparams,
+                                            hull=getattr(self,'_ars_hull',
+                                                         None),
+                                            return_hull=True)
+        return out
+
+    def _sample_vxvv(self,E,Lz,rrange,returnOrbit,nphi):
+        """
+        NAME:
+           _sample_vxvv
+        PURPOSE:
+           sample the radial phase (and azimuth) of orbits with energies E 
+           and angular momenta Lz, returning their phase-space coordinates 
+           without setting up Orbit instances
+        INPUT:
+           E - energies
+           Lz - angular momenta
+           rrange - if not None, only return points within this range in R
+           returnOrbit - if True, also sample the azimuth
+           nphi - number of azimuths to sample for each E,L
+        OUTPUT:
+           list of [R,vR,vT(,phi)]
+        HISTORY:
+           2016-10-20 - Written based on sample - Bovy (UofT)
+           2016-12-08 - Vectorized, integrating all orbits in a single call - Bovy (UofT)
+        """
+        if not hasattr(self,'_psp'):
+            self._psp= PowerSphericalPotential(alpha=2.-2.*self._beta,normalize=True)
+        wR, rap, rperi= self._ELtowRRapRperi(E,Lz)
+        indx= nu.isfinite(wR)*nu.isfinite(rap)*nu.isfinite(rperi)
+        Lz, wR, rap, rperi= Lz[indx], wR[indx], rap[indx], rperi[indx]
+        nobj= len(Lz)
+        # Sample the time since the last turning point, together with the
+        # uniform deviate that is used below to accept the last copy
+        TR= 2.*math.pi/wR
+        u= stats.uniform.rvs(size=(nobj,2))
+        tr= u[:,0]*TR
+        atperi= tr > TR/2.
+        tr[atperi]-= TR[atperi]/2.
+        vxvv= nu.zeros((nobj,6))
+        vxvv[:,0]= rap
+        vxvv[atperi,0]= rperi[atperi]
+        vxvv[:,2]= Lz/vxvv[:,0]
+        ts= nu.zeros((nobj,2))
+        ts[:,1]= tr
+        vxvv= _integrateFullOrbit_multi(vxvv,self._psp,ts,'symplec4_c',
+                                        None)[:,-1,:3]
+        u= u[:,1]
+        if not rrange is None:
+            indx= (vxvv[:,0] >= rrange[0])*(vxvv[:,0] <= rrange[1])
+            vxvv, wR, u= vxvv[indx], wR[indx], u[indx]
+        # Each orbit is returned ceil(kappa/wR*nphi)-1 times, plus once more
+        # with probability kappa/wR*nphi-(ceil(kappa/wR*nphi)-1)
+        kappawR= _kappa(vxvv[:,0],self._beta)/wR*nphi
+        mult= nu.ceil(kappawR)-1.
+        kappawR-= mult
+        nrep= (mult+(u <= kappawR)).astype('int')
+        vxvv= nu.repeat(vxvv,nrep,axis=0)
+        if returnOrbit:
+            vxvv= nu.hstack((vxvv,stats.uniform.rvs(size=(len(vxvv),1))\
+                                 *math.pi*2.))
+        return list(vxvv)
 
     def sample(self,n=1,rrange=None,returnROrbit=True,returnOrbit=False,
                nphi=1.,los=None,losdeg=True,nsigma=None,maxd=None,target=True):
@@ -1805,7 +1938,7 @@ class dehnendf(diskdf):
     def sample(self,n=1,rrange=None,returnROrbit=True,returnOrbit=False,
                nphi=1.,los=None,losdeg=True,nsigma=None,targetSurfmass=True,
                targetSigma2=True,
-               maxd=None,**kwargs):
+               maxd=None,returnArray=False,**kwargs):
         """
         NAME:
            sample
@@ -1826,28 +1959,21 @@ class dehnendf(diskdf):
                    (default=True)
            nsigma= number of sigma to rejection-sample on
            maxd= maximum distance to consider (for the rejection sampling)
+           returnArray= (False) if True, return a numpy array rather than a list (of [E,Lz] with shape [n*nphi,2], or of the phase-space coordinates of the orbits [R,vR,vT(,phi)] with shape [n*nphi,3/4])
         OUTPUT:
-           n*nphi list of [[E,Lz],...] or list of planar(R)Orbits
+           n*nphi list of [[E,Lz],...] or list of planar(R)Orbits (or arrays for returnArray=True)
            CAUTION: lists of EL need to be post-processed to account for the 
                     \kappa/\omega_R discrepancy; EL not returned in physical units        
         HISTORY:
            2010-07-10 - Started  - Bovy (NYU)
+           2016-10-20 - Batched ARS sampling and returnArray - Bovy (UofT)
         """
         if not los is None:
             return self.sampleLOS(los,deg=losdeg,n=n,maxd=maxd,
                                   nsigma=nsigma,targetSurfmass=targetSurfmass,
                                   targetSigma2=targetSigma2)
         #First sample xE
-        if self._correct:
-            xE= sc.array(bovy_ars([0.,0.],[True,False],[0.05,2.],_ars_hx,
-                                  _ars_hpx,nsamples=n,
-                                  hxparams=(self._surfaceSigmaProfile,
-                                            self._corr)))
-        else:
-            xE= sc.array(bovy_ars([0.,0.],[True,False],[0.05,2.],_ars_hx,
-                                  _ars_hpx,nsamples=n,
-                                  hxparams=(self._surfaceSigmaProfile,
-                                            None)))
+        xE= self._sample_ars(n)
         #Calculate E
         if self._beta == 0.:
             E= sc.log(xE)+0.5
@@ -1867,61 +1993,31 @@ class dehnendf(diskdf):
                     and _APY_LOADED and isinstance(rrange[0],units.Quantity):
                 rrange[0]= rrange[0].to(units.kpc).value/self._ro
                 rrange[1]= rrange[1].to(units.kpc).value/self._ro
-            if not hasattr(self,'_psp'):
-                self._psp= PowerSphericalPotential(alpha=2.-self._beta,normalize=True).toPlanar()
-            out= []
-            for ii in range(int(n)):
-                try:
-                    wR, rap, rperi= self._ELtowRRapRperi(E[ii],Lz[ii])
-                except ValueError:
-                    continue
-                TR= 2.*math.pi/wR
-                tr= stats.uniform.rvs()*TR
-                if tr > TR/2.:
-                    tr-= TR/2.
-                    thisOrbit= Orbit([rperi,0.,Lz[ii]/rperi])
-                else:
-                    thisOrbit= Orbit([rap,0.,Lz[ii]/rap])
-                thisOrbit.integrate(sc.array([0.,tr]),self._psp)
-                if returnOrbit:
-                    vxvv= thisOrbit(tr)._orb.vxvv
-                    thisOrbit= Orbit(vxvv=sc.array([vxvv[0],vxvv[1],vxvv[2],
-                                                    stats.uniform.rvs()\
-                                                        *math.pi*2.])\
-                                         .reshape(4))
-                else:
-                    thisOrbit= thisOrbit(tr)
-                kappa= _kappa(thisOrbit._orb.vxvv[0],self._beta)
-                if not rrange == None:
-                    if thisOrbit._orb.vxvv[0] < rrange[0] \
-                            or thisOrbit._orb.vxvv[0] > rrange[1]:
-                        continue
-                mult= sc.ceil(kappa/wR*nphi)-1.
-                kappawR= kappa/wR*nphi-mult
-                while mult > 0:
-                    if returnOrbit:
-                        out.append(Orbit(vxvv=sc.array([vxvv[0],vxvv[1],
-                                                            vxvv[2],
-                                                            stats.uniform.rvs()*math.pi*2.]).reshape(4)))
-                    else:
-                        out.append(thisOrbit)
-                    mult-= 1
-                if stats.uniform.rvs() > kappawR:
-                    continue
-                out.append(thisOrbit)
+            out= self._sample_vxvv(E,Lz,rrange,returnOrbit,nphi)
         #Recurse to get enough
         if len(out) < n*nphi:
             out.extend(self.sample(n=int(n-len(out)/nphi),rrange=rrange,
                                    returnROrbit=returnROrbit,
                                    returnOrbit=returnOrbit,nphi=int(nphi),
-                                   los=los,losdeg=losdeg))
+                                   los=los,losdeg=losdeg,
+                                   returnArray=True,
+                                   use_physical=False).tolist())
         if len(out) > n*nphi:
-            print(n, nphi, n*nphi)
             out= out[0:int(n*nphi)]
+        if not returnROrbit and not returnOrbit:
+            if returnArray: return nu.array(out)
+            else: return out
+        if returnArray:
+            out= nu.array(out)
+            if kwargs.get('use_physical',True) and \
+                    self._roSet and self._voSet:
+                out[:,0]*= self._ro
+                out[:,1:3]*= self._vo
+            return out
+        out= [Orbit(vxvv=vxvv) for vxvv in out]
         if kwargs.get('use_physical',True) and \
                 self._roSet and self._voSet:
-            if isinstance(out[0],Orbit):
-                dum= [o.turn_physical_on(ro=self._ro,vo=self._vo) for o in out]
+            dum= [o.turn_physical_on(ro=self._ro,vo=self._vo) for o in out]
         return out
 
 class shudf(diskdf):
@@ -2011,7 +2107,8 @@ class shudf(diskdf):
 
     def sample(self,n=1,rrange=None,returnROrbit=True,returnOrbit=False,
                nphi=1.,los=None,losdeg=True,nsigma=None,maxd=None,
-               targetSurfmass=True,targetSigma2=True,**kwargs):
+               targetSurfmass=True,targetSigma2=True,returnArray=False,
+               **kwargs):
         """
         NAME:
            sample
@@ -2032,28 +2129,21 @@ class shudf(diskdf):
                    (default=True)
            nsigma= number of sigma to rejection-sample on
            maxd= maximum distance to consider (for the rejection sampling)
+           returnArray= (False) if True, return a numpy array rather than a list (of [E,Lz] with shape [n*nphi,2], or of the phase-space coordinates of the orbits [R,vR,vT(,phi)] with shape [n*nphi,3/4])
         OUTPUT:
-           n*nphi list of [[E,Lz],...] or list of planar(R)Orbits
+           n*nphi list of [[E,Lz],...] or list of planar(R)Orbits (or arrays for returnArray=True)
            CAUTION: lists of EL need to be post-processed to account for the 
                     \kappa/\omega_R discrepancy
         HISTORY:
            2010-07-10 - Started  - Bovy (NYU)
+           2016-10-20 - Batched ARS sampling and returnArray - Bovy (UofT)
         """
         if not los is None:
             return self.sampleLOS(los,n=n,maxd=maxd,
                                   nsigma=nsigma,targetSurfmass=targetSurfmass,
                                   targetSigma2=targetSigma2)
         #First sample xL
-        if self._correct:
-            xL= sc.array(bovy_ars([0.,0.],[True,False],[0.05,2.],_ars_hx,
-                                  _ars_hpx,nsamples=n,
-                                  hxparams=(self._surfaceSigmaProfile,
-                                            self._corr)))
-        else:
-            xL= sc.array(bovy_ars([0.,0.],[True,False],[0.05,2.],_ars_hx,
-                                  _ars_hpx,nsamples=n,
-                                  hxparams=(self._surfaceSigmaProfile,
-                                            None)))
+        xL= self._sample_ars(n)
         #Calculate Lz
         Lz= xL**(self._beta+1.)
         #Then sample E
@@ -2072,57 +2162,30 @@ class shudf(diskdf):
                     and _APY_LOADED and isinstance(rrange[0],units.Quantity):
                 rrange[0]= rrange[0].to(units.kpc).value/self._ro
                 rrange[1]= rrange[1].to(units.kpc).value/self._ro
-            if not hasattr(self,'_psp'):
-                self._psp= PowerSphericalPotential(alpha=2.-self._beta,normalize=True).toPlanar()
-            out= []
-            for ii in range(n):
-                try:
-                    wR, rap, rperi= self._ELtowRRapRperi(E[ii],Lz[ii])
-                except ValueError: #pragma: no cover
-                    continue
-                TR= 2.*math.pi/wR
-                tr= stats.uniform.rvs()*TR
-                if tr > TR/2.:
-                    tr-= TR/2.
-                    thisOrbit= Orbit([rperi,0.,Lz[ii]/rperi])
-                else:
-                    thisOrbit= Orbit([rap,0.,Lz[ii]/rap])
-                thisOrbit.integrate(sc.array([0.,tr]),self._psp)
-                if returnOrbit:
-                    vxvv= thisOrbit(tr)._orb.vxvv
-                    thisOrbit= Orbit(vxvv=sc.array([vxvv[0],vxvv[1],vxvv[2],
-                                                    stats.uniform.rvs()*math.pi*2.]).reshape(4))
-                else:
-                    thisOrbit= thisOrbit(tr)
-                kappa= _kappa(thisOrbit._orb.vxvv[0],self._beta)
-                if not rrange == None:
-                    if thisOrbit._orb.vxvv[0] < rrange[0] \
-                            or thisOrbit._orb.vxvv[0] > rrange[1]:
-                        continue
-                mult= sc.ceil(kappa/wR*nphi)-1.
-                kappawR= kappa/wR*nphi-mult
-                while mult > 0:
-                    if returnOrbit:
-                        out.append(Orbit(vxvv=sc.array([vxvv[0],vxvv[1],
-                                                        vxvv[2],
-                                                        stats.uniform.rvs()*math.pi*2.]).reshape(4)))
-                    else:
-                        out.append(thisOrbit)
-                    mult-= 1
-                if stats.uniform.rvs() > kappawR:
-                    continue
-                out.append(thisOrbit)
+            out= self._sample_vxvv(E,Lz,rrange,returnOrbit,nphi)
         #Recurse to get enough
         if len(out) < n*nphi:
             out.extend(self.sample(n=int(n-len(out)/nphi),rrange=rrange,
                                    returnROrbit=returnROrbit,
-                                   returnOrbit=returnOrbit,nphi=nphi))
+                                   returnOrbit=returnOrbit,nphi=nphi,
+                                   returnArray=True,
+                                   use_physical=False).tolist())
         if len(out) > n*nphi:
             out= out[0:int(n*nphi)]
+        if not returnROrbit and not returnOrbit:
+            if returnArray: return nu.array(out)
+            else: return out
+        if returnArray:
+            out= nu.array(out)
+            if kwargs.get('use_physical',True) and \
+                    self._roSet and self._voSet:
+                out[:,0]*= self._ro
+                out[:,1:3]*= self._vo
+            return out
+        out= [Orbit(vxvv=vxvv) for vxvv in out]
         if kwargs.get('use_physical',True) and \
                 self._roSet and self._voSet:
-            if isinstance(out[0],Orbit):
-                dum= [o.turn_physical_on(ro=self._ro,vo=self._vo) for o in out]
+            dum= [o.turn_physical_on(ro=self._ro,vo=self._vo) for o in out]
         return out
 
 def _surfaceIntegrand(vR,vT,R,df,logSigmaR,logsigmaR2,sigmaR1,gamma):
@@ -2202,9 +2265,11 @@ class DFcorrection(object):
            dftype - classname of the DF
            niter - number of iterations to perform to calculate the corrections
            interp_k - 'k' keyword to give to InterpolatedUnivariateSpline
+           numcores - number of cores to use to compute the corrections at the different radii in parallel (default: 1)
         OUTPUT:
         HISTORY:
            2010-03-10 - Written - Bovy (NYU)
+           2016-10-21 - Added numcores and parameter-hash-based save files - Bovy (UofT)
         """
         if not 'surfaceSigmaProfile' in kwargs:
             raise DFcorrectionError("surfaceSigmaProfile not given")
@@ -2223,6 +2288,7 @@ class DFcorrection(object):
         self._beta= kwargs.get('beta',0.)
         self._rs= sc.linspace(_RMIN,self._rmax,self._npoints)
         self._interp_k= kwargs.get('interp_k',_INTERPDEGREE)
+        self._numcores= kwargs.get('numcores',1)
         if 'corrections' in kwargs:
             self._corrections= kwargs['corrections']
             if not len(self._corrections) == self._npoints:
@@ -2230,10 +2296,9 @@ class DFcorrection(object):
         else:
             self._savedir= kwargs.get('savedir',_CORRECTIONSDIR)
             self._savefilename= self._createSavefilename(self._niter)
-            if os.path.exists(self._savefilename):
-                savefile= open(self._savefilename,'rb')
-                self._corrections= sc.array(pickle.load(savefile))
-                savefile.close()
+            corrections= self._load_corrections(self._niter)
+            if not corrections is None:
+                self._corrections= corrections
             else: #Calculate the corrections
                 self._corrections= self._calc_corrections()
         #Interpolation; smoothly go to zero
@@ -2251,7 +2316,7 @@ class DFcorrection(object):
         self._sigma2DerivSmallR= sigma2InterpolateSmallR.derivatives(interpRs[0])[1]
         return None
 
-    def _createSavefilename(self,niter):
+    def _createFormattedSavefilename(self,niter):
         #Form surfaceSigmaProfile string
         sspFormat= self._surfaceSigmaProfile.formatStringParams()
         sspString= ''
@@ -2264,6 +2329,48 @@ class DFcorrection(object):
                             '%6.4f_%i_%6.4f_%i.sav'
                             % (self._beta,self._npoints,self._rmax,niter))
 
+    def _createSavefilename(self,niter):
+        # Name the file using a hash of all parameters, such that it is unique
+        # for arbitrary parameters (the formatted parameters in 
+        # _createFormattedSavefilename are rounded)
+        params= nu.array(list(self._surfaceSigmaProfile.outputParams())
+                         +[self._beta,self._npoints,self._rmax,
+                           self._interp_k],dtype='<f8')
+        return os.path.join(self._savedir,'dfcorrection_'+
+                            self._dftype.__name__+'_'+
+                            self._surfaceSigmaProfile.__class__.__name__+'_'+
+                            hashlib.md5(params).hexdigest()+
+                            '_%i.sav' % niter)
+
+    def _formattedSavefilenameIsExact(self):
+        """Whether the parameters are exactly represented in the 
+        formatted-parameters (legacy) save-file name: the file name stores 
+        the parameters rounded to four decimals and does not store interp_k,
+        so legacy files may only be used when nothing is lost in the name"""
+        if self._interp_k != _INTERPDEGREE: return False
+        sspFormat= self._surfaceSigmaProfile.formatStringParams()
+        for format,param in zip(list(sspFormat)+['%6.4f','%6.4f'],
+                                list(self._surfaceSigmaProfile.outputParams())
+                                +[self._beta,self._rmax]):
+            if float(format % param) != param: return False
+        return True
+
+    def _load_corrections(self,niter):
+        """Load the corrections after niter iterations from a hash-based or 
+        (for older files, if their parameters match exactly) a 
+        formatted-parameters save file, returns None if neither exists"""
+        savefilenames= [self._createSavefilename(niter)]
+        if self._formattedSavefilenameIsExact():
+            savefilenames.append(self._createFormattedSavefilename(niter))
+        for savefilename in savefilenames:
+            if os.path.exists(savefilename):
+                savefile= open(savefilename,'rb')
+                corrections= sc.array(pickle.load(savefile))
+                savefile.close()
+                if corrections.shape != (self._npoints,2): continue
+                return corrections
+        return None
+
     def correct(self,R,log=False):
         """
         NAME:
@@ -2349,11 +2456,8 @@ class DFcorrection(object):
         """Internal function that calculates the corrections"""     
         searchIter= self._niter-1
         while searchIter > 0:
-            trySavefilename= self._createSavefilename(searchIter)
-            if os.path.exists(trySavefilename):
-                trySavefile= open(trySavefilename,'rb')
-                corrections= sc.array(pickle.load(trySavefile))
-                trySavefile.close()
+            corrections= self._load_corrections(searchIter)
+            if not corrections is None:
                 break
             else:
                 searchIter-= 1
@@ -2371,15 +2475,16 @@ class DFcorrection(object):
                                         rmax=self._rmax,
                                         savedir=self._savedir,
                                         interp_k=self._interp_k)
-            newcorrections= sc.zeros((self._npoints,2))
-            for jj in range(self._npoints):
-                thisSurface= currentDF.surfacemass(self._rs[jj],
-                                                   use_physical=False)
-                newcorrections[jj,0]= currentDF.targetSurfacemass(self._rs[jj],use_physical=False)/thisSurface
-                newcorrections[jj,1]= currentDF.targetSigma2(self._rs[jj],use_physical=False)*thisSurface\
-                    /currentDF.sigma2surfacemass(self._rs[jj],
-                                                 use_physical=False)
-                #print(jj, newcorrections[jj,:])
+            if self._numcores > 1:
+                newcorrections= sc.array(multi.parallel_map(\
+                        (lambda x: _calc_one_correction(currentDF,
+                                                        self._rs[x])),
+                        range(self._npoints),numcores=self._numcores))
+            else:
+                newcorrections= sc.array(list(map(\
+                        (lambda x: _calc_one_correction(currentDF,
+                                                        self._rs[x])),
+                        range(self._npoints))))
             corrections*= newcorrections
         #Save
         picklethis= []
@@ -2388,6 +2493,14 @@ class DFcorrection(object):
         save_pickles(self._savefilename,picklethis) #We pickle a list for platform-independence)
         return corrections
     
+def _calc_one_correction(currentDF,R):
+    """Internal function that computes the correction for one iteration at 
+    one radius"""
+    thisSurface= currentDF.surfacemass(R,use_physical=False)
+    return [currentDF.targetSurfacemass(R,use_physical=False)/thisSurface,
+            currentDF.targetSigma2(R,use_physical=False)*thisSurface\
+                /currentDF.sigma2surfacemass(R,use_physical=False)]
+
 class DFcorrectionError(Exception):
     def __init__(self, value):
         self.value = value
@@ -2442,7 +2555,7 @@ def _ars_hx(x,args):
     PURPOSE:
        h(x) for ARS sampling of the input surfacemass profile
     INPUT:
-       x - R(/ro)
+       x - R(/ro) (can be array)
        args= (surfaceSigma, dfcorr)
           surfaceSigma - surfaceSigmaProfile instance
           dfcorr - DFcorrection instance
@@ -2450,12 +2563,13 @@ def _ars_hx(x,args):
        log(x)+log surface(x) + log(correction)
     HISTORY:
        2010-07-11 - Written - Bovy (NYU)
+       2016-10-20 - Allow array input - Bovy (UofT)
     """
     surfaceSigma, dfcorr= args
     if dfcorr is None:
-        return math.log(x)+surfaceSigma.surfacemass(x,log=True)
+        return nu.log(x)+surfaceSigma.surfacemass(x,log=True)
     else:
-        return math.log(x)+surfaceSigma.surfacemass(x,log=True)+dfcorr.correct(x)[0]
+        return nu.log(x)+surfaceSigma.surfacemass(x,log=True)+dfcorr.correct(x)[0]
 
 def _ars_hpx(x,args):
     """
@@ -2479,6 +2593,13 @@ def _ars_hpx(x,args):
     else:
         return 1./x+surfaceSigma.surfacemassDerivative(x,log=True)+dfcorr.derivLogcorrect(x)[0]
 
+def _ELtowRRapRperiEq(R,E,L,beta):
+    """Internal function that is zero at the turning points of an orbit with energy E and angular momentum L in the power-law potential (negative between them)"""
+    if beta == 0.:
+        return nu.log(R)+L**2./2./R**2.-E
+    else:
+        return R**(2.*beta)/2./beta+L**2./2./R**2.-E
+
 def _kappa(R,beta):
     """Internal function to give kappa(r)"""
     return math.sqrt(2.*(1.+beta))*R**(beta-1)
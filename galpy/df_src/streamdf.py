@@ -871,20 +871,16 @@ class streamdf(df):
         model_operp= numpy.dot(self._ObsTrackAA[:,:3]-self._progenitor_Omega,
                                self._dsigomeanProgDirection)\
                                *self._sigMeanSign
-        #Then calculate the track's frequency-angle coordinates
-        if self._multi is None:
-            aatrack= numpy.empty((self._nTrackChunks,6))
-            for ii in range(self._nTrackChunks):
-                aatrack[ii]= self._aA.actionsFreqsAngles(Orbit(self._ObsTrack[ii,:]),
-                                                         use_physical=False)[3:]
-        else:
-            aatrack= numpy.reshape(\
-                multi.parallel_map(
-                    (lambda x: self._aA.actionsFreqsAngles(Orbit(self._ObsTrack[x,:]),use_physical=False)[3:]),
-                    range(self._nTrackChunks),
-                    numcores=numpy.amin([self._nTrackChunks,
-                                         multiprocessing.cpu_count(),
-                                         self._multi])),(self._nTrackChunks,6))
+        #Then calculate the track's frequency-angle coordinates, for all
+        #points on the track at once
+        aatrack= numpy.array(\
+            self._aA.actionsFreqsAngles(self._ObsTrack[:,0],
+                                        self._ObsTrack[:,1],
+                                        self._ObsTrack[:,2],
+                                        self._ObsTrack[:,3],
+                                        self._ObsTrack[:,4],
+                                        self._ObsTrack[:,5],
+                                        use_physical=False)[3:]).T
         track_adiff= (aatrack[:,3:]-self._progenitor_angle)[:,0]\
             *self._sigMeanSign
         track_operp= numpy.dot(aatrack[:,:3]-self._progenitor_Omega,
@@ -1075,6 +1071,11 @@ class streamdf(df):
 
     def _determine_stream_track_TM(self):
         # With TM, can get the track in a single shot
+        # Each track point needs the Jacobian d(x,v)/d(J,theta), which
+        # xvJacobianFreqs obtains by differencing the (x,v) of the same
+        # angles on the tori at J and J+dJ; the warm-started batch fits
+        # (xvFreqsMany/fitGrid) only return (x,v) and frequencies, so the
+        # track points are fit one at a time (in parallel using multi=)
         #Now calculate the actions, frequencies, and angles + Jacobian for each chunk
         thetasTrack= numpy.linspace(0.,self._deltaAngleTrack,
                                     self._nTrackChunks)
@@ -1424,8 +1425,8 @@ class streamdf(df):
         #Calculate 1D meanOmega on a fine grid in angle and interpolate
         if not hasattr(self,'_interpolatedThetasTrack'):
             self._interpolate_stream_track()
-        dmOs= numpy.array([self.meanOmega(da,oned=True,use_physical=False) 
-                          for da in self._interpolatedThetasTrack])
+        dmOs= self.meanOmega(self._interpolatedThetasTrack,oned=True,
+                             use_physical=False)
         self._interpTrackAAdmeanOmegaOneD=\
             interpolate.InterpolatedUnivariateSpline(\
             self._interpolatedThetasTrack,dmOs,k=3)
@@ -1816,20 +1817,24 @@ class streamdf(df):
 
         INPUT:
 
-           dangle - parallel angle offset for this coordinate value
+           dangle - parallel angle offset for this coordinate value (can be array)
 
            coord - coordinate to return the density in ('apar' [default],
                    'll','ra','customra','phi')
 
         OUTPUT:
 
-           density(angle)
+           density(angle) (array for array dangle)
 
         HISTORY:
 
            2015-11-17 - Written - Bovy (UofT)
 
+           2016-12-01 - Vectorized over dangle - Bovy (UofT)
+
         """
+        scalarOut= not isinstance(dangle,numpy.ndarray)
+        dangle= numpy.atleast_1d(dangle).astype('float')
         if coord.lower() != 'apar':
             # Need to compute the Jacobian for this coordinate value
             ddangle= dangle+10.**-7.
@@ -1850,40 +1855,42 @@ class streamdf(df):
                     self._interpTrackX(dangle+ddangle)*self._ro,
                     self._interpTrackY(dangle+ddangle)*self._ro,
                     self._interpTrackZ(dangle+ddangle)*self._ro,
-                    Xsun=self._R0,Zsun=self._Zsun)
+                    Xsun=self._R0,Zsun=self._Zsun).T
                 lbd_h= bovy_coords.XYZ_to_lbd(XYZ_h[0],XYZ_h[1],XYZ_h[2],
-                                              degree=True)
+                                              degree=True).T
                 XYZ= bovy_coords.galcenrect_to_XYZ(\
                     self._interpTrackX(dangle)*self._ro,
                     self._interpTrackY(dangle)*self._ro,
                     self._interpTrackZ(dangle)*self._ro,
-                    Xsun=self._R0,Zsun=self._Zsun)
+                    Xsun=self._R0,Zsun=self._Zsun).T
                 lbd= bovy_coords.XYZ_to_lbd(XYZ[0],XYZ[1],XYZ[2],
-                                            degree=True)
+                                            degree=True).T
                 if coord.lower() == 'll':
                     jac= numpy.fabs(lbd_h[0]-lbd[0])/ddangle
                 else:
                     radec_h= bovy_coords.lb_to_radec(lbd_h[0],
                                                      lbd_h[1],
-                                                     degree=True)
+                                                     degree=True).T
                     radec= bovy_coords.lb_to_radec(lbd[0],
                                                    lbd[1],
-                                                   degree=True)
+                                                   degree=True).T
                     if coord.lower() == 'ra':
                         jac= numpy.fabs(radec_h[0]-radec[0])/ddangle
                     else:
                         xieta_h= bovy_coords.radec_to_custom(\
                             radec_h[0],radec_h[1],T=self._custom_transform,
-                            degree=True)
+                            degree=True).T
                         xieta= bovy_coords.radec_to_custom(\
                             radec[0],radec[1],T=self._custom_transform,
-                            degree=True)
+                            degree=True).T
                         jac= numpy.fabs(xieta_h[0]-xieta[0])/ddangle
             else:
                 raise ValueError('Coordinate input %s not supported by density_par' % coord)
         else:
             jac= 1.
-        return self._density_par(dangle,tdisrupt=tdisrupt,**kwargs)/jac
+        out= self._density_par(dangle,tdisrupt=tdisrupt,**kwargs)/jac
+        if scalarOut: return out[0]
+        else: return out
 
     def _density_par(self,dangle,tdisrupt=None):
         """The raw density as a function of parallel angle"""
@@ -1981,7 +1988,7 @@ class streamdf(df):
 
         INPUT:
 
-           dangle - angle offset
+           dangle - angle offset (can be array)
 
            oned= (False) if True, return the 1D offset from the progenitor (along the direction of disruption)
 
@@ -1989,7 +1996,7 @@ class streamdf(df):
 
         OUTPUT:
 
-           mean Omega
+           mean Omega (shape (3) or (N,3) for array dangle)
 
         HISTORY:
 
@@ -2007,6 +2014,9 @@ class streamdf(df):
                                     /numpy.sqrt(2.*self._sortedSigOEig[2]))))\
                    +meandO)
         if oned: return dO1D
+        elif isinstance(dangle,numpy.ndarray):
+            return self._progenitor_Omega\
+                +numpy.outer(dO1D,self._dsigomeanProgDirection)*offset_sign
         else:
             return self._progenitor_Omega+dO1D*self._dsigomeanProgDirection\
                 *offset_sign
@@ -1,6 +1,7 @@
 # The DF of a gap in a tidal stream
 from functools import wraps
 import copy
+from collections import OrderedDict
 import numpy
 import warnings
 import multiprocessing
@@ -15,6 +16,11 @@ import galpy.df_src.streamdf
 from galpy.df_src.streamdf import _determine_stream_track_single
 if _APY_LOADED:
     from astropy import units
+# Maximum number of (star,encounter,node) triples evaluated at once in the
+# vectorized general kick calculation
+_DELTAV_MULTI_MAXSIZE= 2**20
+# Number of sets of breakpoints kept in the approx. density/meanOmega cache
+_APPROX_CACHE_MAXSIZE= 16
 def impact_check_range(func):
     """Decorator to check the range of interpolated kicks"""
     @wraps(func)
@@ -224,12 +230,16 @@ class streamgapdf(galpy.df_src.streamdf.streamdf):
                      higherorder=None):
         """The raw density as a function of parallel angle,
         approx= use faster method that directly integrates the spline
-        representation"""
+        representation; dangle can be an array"""
         if higherorder is None: higherorder= self._higherorderTrack
         if tdisrupt is None: tdisrupt= self._tdisrupt
         if approx:
             return self._density_par_approx(dangle,tdisrupt,
                                             higherorder=higherorder)
+        elif isinstance(dangle,numpy.ndarray):
+            return numpy.array([self._density_par(da,tdisrupt=tdisrupt,
+                                                  approx=False)
+                                for da in dangle])
         else:
             return integrate.quad(lambda T: numpy.sqrt(self._sortedSigOEig[2])\
                                       *(1+T*T)/(1-T*T)**2.\
@@ -241,29 +251,67 @@ class streamgapdf(galpy.df_src.streamdf.streamdf):
     def _density_par_approx(self,dangle,tdisrupt,_return_array=False,
                             higherorder=False):
         """Compute the density as a function of parallel angle using the 
-        spline representation + approximations"""
-        # First construct the breakpoints for this dangle
-        Oparb= (dangle-self._kick_interpdOpar_poly.x)/self._timpact
-        # Find the lower limit of the integration in the pw-linear-kick approx.
-        lowbindx,lowx= self.minOpar(dangle,tdisrupt,_return_raw=True)
-        lowbindx= numpy.arange(len(Oparb)-1)[lowbindx]
-        Oparb[lowbindx+1]= Oparb[lowbindx]-lowx
+        spline representation + approximations; dangle can be an array, 
+        in which case all angles are computed at once"""
+        scalarOut= not isinstance(dangle,numpy.ndarray)
+        Oparb, lowbindx= self._approx_breakpoints(dangle,tdisrupt)
         # Now integrate between breakpoints
-        out= (0.5/(1.+self._kick_interpdOpar_poly.c[-2]*self._timpact)\
-                           *(special.erf(1./numpy.sqrt(2.*self._sortedSigOEig[2])\
-                                             *(Oparb[:-1]-self._kick_interpdOpar_poly.c[-1]-self._meandO))\
-                                 -special.erf(1./numpy.sqrt(2.*self._sortedSigOEig[2])*(numpy.roll(Oparb,-1)[:-1]-self._kick_interpdOpar_poly.c[-1]-self._meandO\
-                                                                                             -self._kick_interpdOpar_poly.c[-2]*self._timpact*(Oparb-numpy.roll(Oparb,-1))[:-1]))))
+        out= self._density_par_approx_intervals(Oparb)
         if _return_array:
-            return out
-        out= numpy.sum(out[:lowbindx+1])
+            if scalarOut: return out[0]
+            else: return out
+        out= self._sum_intervals(out,lowbindx)
         if higherorder:
             # Add higher-order contribution
             out+= self._density_par_approx_higherorder(Oparb,lowbindx)
         # Add integration to infinity
-        out+= 0.5*(1.+special.erf((self._meandO-Oparb[0])\
+        out+= 0.5*(1.+special.erf((self._meandO-Oparb[:,0])\
                                   /numpy.sqrt(2.*self._sortedSigOEig[2])))
-        return out
+        if scalarOut: return out[0]
+        else: return out
+
+    def _approx_breakpoints(self,dangle,tdisrupt):
+        """Construct the breakpoints in Opar for the integration for all
+        dangle (N,nbreak), with the lower limit of the integration in the
+        pw-linear-kick approx. inserted"""
+        dangle= numpy.atleast_1d(dangle).astype('float')
+        # Same breakpoints are used by the numerator and denominator of 
+        # meanOmega and when re-evaluating profiles, so keep an LRU cache
+        # keyed on tdisrupt and the angles
+        key= (tdisrupt,dangle.tobytes())
+        if key in self._approx_breakpoints_cache:
+            out= self._approx_breakpoints_cache.pop(key)
+            self._approx_breakpoints_cache[key]= out
+            return out
+        Oparb= (dangle[:,numpy.newaxis]-self._kick_interpdOpar_poly.x)\
+            /self._timpact
+        # Find the lower limit of the integration in the pw-linear-kick approx.
+        lowbindx,lowx= self.minOpar(dangle,tdisrupt,_return_raw=True)
+        rIndx= numpy.arange(len(dangle))
+        Oparb[rIndx,lowbindx+1]= Oparb[rIndx,lowbindx]-lowx
+        self._approx_breakpoints_cache[key]= (Oparb,lowbindx)
+        if len(self._approx_breakpoints_cache) > _APPROX_CACHE_MAXSIZE:
+            self._approx_breakpoints_cache.popitem(last=False)
+        return (Oparb,lowbindx)
+
+    def _sum_intervals(self,out,lowbindx):
+        """Sum the contributions from the intervals up to and including 
+        lowbindx for each row of out"""
+        return numpy.sum(numpy.where(numpy.arange(out.shape[1])\
+                                         <= lowbindx[:,numpy.newaxis],
+                                     out,0.),axis=1)
+
+    def _density_par_approx_intervals(self,Oparb):
+        """Integral of the pw-linear-kick approx. between all breakpoints"""
+        return 0.5/(1.+self._kick_interpdOpar_poly.c[-2]*self._timpact)\
+            *(special.erf(1./numpy.sqrt(2.*self._sortedSigOEig[2])\
+                              *(Oparb[:,:-1]-self._kick_interpdOpar_poly.c[-1]
+                                -self._meandO))
+              -special.erf(1./numpy.sqrt(2.*self._sortedSigOEig[2])\
+                               *(Oparb[:,1:]-self._kick_interpdOpar_poly.c[-1]
+                                 -self._meandO
+                                 -self._kick_interpdOpar_poly.c[-2]
+                                 *self._timpact*(Oparb[:,:-1]-Oparb[:,1:]))))
 
     def _density_par_approx_higherorder(self,Oparb,lowbindx,
                                         _return_array=False,
@@ -272,42 +320,59 @@ class streamgapdf(galpy.df_src.streamdf.streamdf):
         spline_order= self._kick_interpdOpar_raw._eval_args[2]
         if spline_order == 1: return 0.
         # Form all Gaussian-like integrals necessary
-        ll= (numpy.roll(Oparb,-1)[:-1]-self._kick_interpdOpar_poly.c[-1]\
+        ll= (Oparb[:,1:]-self._kick_interpdOpar_poly.c[-1]\
             -self._meandO\
             -self._kick_interpdOpar_poly.c[-2]*self._timpact\
-            *(Oparb-numpy.roll(Oparb,-1))[:-1])\
+            *(Oparb[:,:-1]-Oparb[:,1:]))\
             /numpy.sqrt(2.*self._sortedSigOEig[2])
-        ul= (Oparb[:-1]-self._kick_interpdOpar_poly.c[-1]-self._meandO)\
+        ul= (Oparb[:,:-1]-self._kick_interpdOpar_poly.c[-1]-self._meandO)\
             /numpy.sqrt(2.*self._sortedSigOEig[2])
         if gaussxpolyInt is None:
             gaussxpolyInt=\
                 self._densMoments_approx_higherorder_gaussxpolyInts(\
                 ll,ul,spline_order+1)
         # Now multiply in the coefficients for each order
-        powers= numpy.tile(numpy.arange(spline_order+1)[::-1],
-                           (len(ul),1)).T
-        gaussxpolyInt*= -0.5*(-numpy.sqrt(2.))**(powers+1)\
-            *self._sortedSigOEig[2]**(0.5*(powers-1))
-        powers= numpy.tile(numpy.arange(spline_order+1)[::-1][:-2],
-                           (len(ul),1)).T
+        powers= numpy.arange(spline_order+1)[::-1]
+        gaussxpolyInt*= (-0.5*(-numpy.sqrt(2.))**(powers+1)\
+            *self._sortedSigOEig[2]**(0.5*(powers-1)))\
+            [:,numpy.newaxis,numpy.newaxis]
+        powers= numpy.arange(spline_order+1)[::-1][:-2]
+        coeffs= self._higherorder_coeffs(spline_order,meanOmega=False)
+        dOparb= Oparb[:,:-1]-self._kick_interpdOpar_poly.c[-1]-self._meandO
         for jj in range(spline_order+1):
             gaussxpolyInt[-jj-1]*= numpy.sum(\
-                self._kick_interpdOpar_poly.c[:-2]
-                *self._timpact**powers
-                /(1.+self._kick_interpdOpar_poly.c[-2]*self._timpact)
-                **(powers+1)
-                *special.binom(powers,jj)
-                *(Oparb[:-1]-self._kick_interpdOpar_poly.c[-1]-self._meandO)
-                **(powers-jj),axis=0)
+                coeffs[jj][:,numpy.newaxis,:]
+                *dOparb**(powers-jj)[:,numpy.newaxis,numpy.newaxis],axis=0)
         if _return_array:
             return numpy.sum(gaussxpolyInt,axis=0)
         else:
-            return numpy.sum(gaussxpolyInt[:,:lowbindx+1])
+            return self._sum_intervals(numpy.sum(gaussxpolyInt,axis=0),
+                                       lowbindx)
+
+    def _higherorder_coeffs(self,spline_order,meanOmega=False):
+        """Coefficients of the higher-order terms for each interval, which 
+        do not depend on the angle, so they are computed once and cached"""
+        if meanOmega in self._higherorder_coeffs_cache:
+            return self._higherorder_coeffs_cache[meanOmega]
+        powers= numpy.tile(numpy.arange(spline_order+1)[::-1][:-2],
+                           (self._kick_interpdOpar_poly.c.shape[1],1)).T
+        if meanOmega: 
+            pshift= 1
+        else: 
+            pshift= 0
+        out= numpy.array([self._kick_interpdOpar_poly.c[:-2]
+                          *self._timpact**powers
+                          /(1.+self._kick_interpdOpar_poly.c[-2]
+                            *self._timpact)**(powers+1+pshift)
+                          *special.binom(powers+pshift,jj)
+                          for jj in range(spline_order+1+pshift)])
+        self._higherorder_coeffs_cache[meanOmega]= out
+        return out
 
     def _densMoments_approx_higherorder_gaussxpolyInts(self,ll,ul,maxj):
         """Calculate all of the polynomial x Gaussian integrals occuring 
         in the higher-order terms, recursively"""
-        gaussxpolyInt= numpy.zeros((maxj,len(ul)))
+        gaussxpolyInt= numpy.zeros((maxj,)+ul.shape)
         gaussxpolyInt[-1]= 1./numpy.sqrt(numpy.pi)\
             *(numpy.exp(-ll**2.)-numpy.exp(-ul**2.))
         gaussxpolyInt[-2]= 1./numpy.sqrt(numpy.pi)\
@@ -331,7 +396,7 @@ class streamgapdf(galpy.df_src.streamdf.streamdf):
 
         INPUT:
 
-           dangle - parallel angle
+           dangle - parallel angle (can be array)
 
         OUTPUT:
 
@@ -343,20 +408,27 @@ class streamgapdf(galpy.df_src.streamdf.streamdf):
 
         """
         if tdisrupt is None: tdisrupt= self._tdisrupt
+        scalarOut= not isinstance(dangle,numpy.ndarray)
+        dangle= numpy.atleast_1d(dangle)
         # First construct the breakpoints for this dangle
-        Oparb= (dangle-self._kick_interpdOpar_poly.x[:-1])/self._timpact
+        Oparb= (dangle[:,numpy.newaxis]-self._kick_interpdOpar_poly.x[:-1])\
+            /self._timpact
         # Find the lower limit of the integration in the pw-linear-kick approx.
         lowx= ((Oparb-self._kick_interpdOpar_poly.c[-1])\
-                   *(tdisrupt-self._timpact)+Oparb*self._timpact-dangle)\
+                   *(tdisrupt-self._timpact)+Oparb*self._timpact
+               -dangle[:,numpy.newaxis])\
                    /((tdisrupt-self._timpact)\
                          *(1.+self._kick_interpdOpar_poly.c[-2]*self._timpact)\
                          +self._timpact)
         lowx[lowx < 0.]= numpy.inf
-        lowbindx= numpy.argmin(lowx)
+        lowbindx= numpy.argmin(lowx,axis=1)
+        rIndx= numpy.arange(len(dangle))
         if _return_raw:
-            return (lowbindx,lowx[lowbindx])
+            return (lowbindx,lowx[rIndx,lowbindx])
+        elif scalarOut:
+            return (Oparb[rIndx,lowbindx]-lowx[rIndx,lowbindx])[0]
         else:
-            return Oparb[lowbindx]-lowx[lowbindx]
+            return Oparb[rIndx,lowbindx]-lowx[rIndx,lowbindx]
 
     @physical_conversion('frequency',pop=True)
     def meanOmega(self,dangle,oned=False,tdisrupt=None,approx=True,
@@ -372,7 +444,7 @@ class streamgapdf(galpy.df_src.streamdf.streamdf):
 
         INPUT:
 
-           dangle - angle offset
+           dangle - angle offset (can be array)
 
            oned= (False) if True, return the 1D offset from the progenitor (along the direction of disruption)
 
@@ -382,7 +454,7 @@ class streamgapdf(galpy.df_src.streamdf.streamdf):
 
         OUTPUT:
 
-           mean Omega
+           mean Omega (shape (3) or (N,3) for array dangle)
 
         HISTORY:
 
@@ -394,101 +466,103 @@ class streamgapdf(galpy.df_src.streamdf.streamdf):
         if approx:
             num= self._meanOmega_num_approx(dangle,tdisrupt,
                                             higherorder=higherorder)
+        elif isinstance(dangle,numpy.ndarray):
+            num= numpy.array([self._meanOmega_num(da) for da in dangle])
         else:
-            num=\
-                integrate.quad(lambda T: (T/(1-T*T)\
-                                              *numpy.sqrt(self._sortedSigOEig[2])\
-                                              +self._meandO)\
-                                   *numpy.sqrt(self._sortedSigOEig[2])\
-                                   *(1+T*T)/(1-T*T)**2.\
-                                   *self.pOparapar(T/(1-T*T)\
-                                                       *numpy.sqrt(self._sortedSigOEig[2])\
-                                                       +self._meandO,dangle),
-                               -1.,1.)[0]
+            num= self._meanOmega_num(dangle)
         denom= self._density_par(dangle,tdisrupt=tdisrupt,approx=approx,
                                  higherorder=higherorder)
         dO1D= num/denom
         if oned: return dO1D
+        elif isinstance(dangle,numpy.ndarray):
+            return self._progenitor_Omega\
+                +numpy.outer(dO1D,self._dsigomeanProgDirection)\
+                *self._sigMeanSign
         else:
             return self._progenitor_Omega+dO1D*self._dsigomeanProgDirection\
                 *self._sigMeanSign
 
+    def _meanOmega_num(self,dangle):
+        """Compute the numerator going into meanOmega using direct numerical integration of pOparapar"""
+        return integrate.quad(lambda T: (T/(1-T*T)\
+                                             *numpy.sqrt(self._sortedSigOEig[2])\
+                                             +self._meandO)\
+                                  *numpy.sqrt(self._sortedSigOEig[2])\
+                                  *(1+T*T)/(1-T*T)**2.\
+                                  *self.pOparapar(T/(1-T*T)\
+                                                      *numpy.sqrt(self._sortedSigOEig[2])\
+                                                      +self._meandO,dangle),
+                              -1.,1.)[0]
+
     def _meanOmega_num_approx(self,dangle,tdisrupt,higherorder=False):
-        """Compute the numerator going into meanOmega using the direct integration of the spline representation"""
-        # First construct the breakpoints for this dangle
-        Oparb= (dangle-self._kick_interpdOpar_poly.x)/self._timpact
-        # Find the lower limit of the integration in the pw-linear-kick approx.
-        lowbindx,lowx= self.minOpar(dangle,tdisrupt,_return_raw=True)
-        lowbindx= numpy.arange(len(Oparb)-1)[lowbindx]
-        Oparb[lowbindx+1]= Oparb[lowbindx]-lowx
+        """Compute the numerator going into meanOmega using the direct integration of the spline representation; dangle can be an array, in which case all angles are computed at once"""
+        scalarOut= not isinstance(dangle,numpy.ndarray)
+        Oparb, lowbindx= self._approx_breakpoints(dangle,tdisrupt)
         # Now integrate between breakpoints
-        out= numpy.sum(((Oparb[:-1]
-                         +(self._meandO+self._kick_interpdOpar_poly.c[-1]
-                           -Oparb[:-1])/
-                         (1.+self._kick_interpdOpar_poly.c[-2]*self._timpact))
-                        *self._density_par_approx(dangle,tdisrupt,
-                                                  _return_array=True)
-                        +numpy.sqrt(self._sortedSigOEig[2]/2./numpy.pi)/
-                        (1.+self._kick_interpdOpar_poly.c[-2]*self._timpact)**2.
-                        *(numpy.exp(-0.5*(Oparb[:-1]
-                                      -self._kick_interpdOpar_poly.c[-1]
-                                      -(1.+self._kick_interpdOpar_poly.c[-2]*self._timpact)
-                                      *(Oparb-numpy.roll(Oparb,-1))[:-1]
-                                      -self._meandO)**2.
-                                     /self._sortedSigOEig[2])
-                          -numpy.exp(-0.5*(Oparb[:-1]-self._kick_interpdOpar_poly.c[-1]
-                                       -self._meandO)**2.
-                                      /self._sortedSigOEig[2])))[:lowbindx+1])
+        out= self._sum_intervals(\
+            ((Oparb[:,:-1]
+              +(self._meandO+self._kick_interpdOpar_poly.c[-1]
+                -Oparb[:,:-1])/
+              (1.+self._kick_interpdOpar_poly.c[-2]*self._timpact))
+             *self._density_par_approx_intervals(Oparb)
+             +numpy.sqrt(self._sortedSigOEig[2]/2./numpy.pi)/
+             (1.+self._kick_interpdOpar_poly.c[-2]*self._timpact)**2.
+             *(numpy.exp(-0.5*(Oparb[:,:-1]
+                               -self._kick_interpdOpar_poly.c[-1]
+                               -(1.+self._kick_interpdOpar_poly.c[-2]*self._timpact)
+                               *(Oparb[:,:-1]-Oparb[:,1:])
+                               -self._meandO)**2.
+                         /self._sortedSigOEig[2])
+               -numpy.exp(-0.5*(Oparb[:,:-1]-self._kick_interpdOpar_poly.c[-1]
+                                -self._meandO)**2.
+                          /self._sortedSigOEig[2]))),lowbindx)
         if higherorder:
             # Add higher-order contribution
             out+= self._meanOmega_num_approx_higherorder(Oparb,lowbindx)
         # Add integration to infinity
         out+= 0.5*(numpy.sqrt(2./numpy.pi)*numpy.sqrt(self._sortedSigOEig[2])\
-                        *numpy.exp(-0.5*(self._meandO-Oparb[0])**2.\
+                        *numpy.exp(-0.5*(self._meandO-Oparb[:,0])**2.\
                                         /self._sortedSigOEig[2])
                    +self._meandO
-                   *(1.+special.erf((self._meandO-Oparb[0])
+                   *(1.+special.erf((self._meandO-Oparb[:,0])
                                     /numpy.sqrt(2.*self._sortedSigOEig[2]))))
-        return out
+        if scalarOut: return out[0]
+        else: return out
 
     def _meanOmega_num_approx_higherorder(self,Oparb,lowbindx):
         """Contribution from non-linear spline terms"""
         spline_order= self._kick_interpdOpar_raw._eval_args[2]
         if spline_order == 1: return 0.
         # Form all Gaussian-like integrals necessary
-        ll= (numpy.roll(Oparb,-1)[:-1]-self._kick_interpdOpar_poly.c[-1]\
+        ll= (Oparb[:,1:]-self._kick_interpdOpar_poly.c[-1]\
             -self._meandO\
             -self._kick_interpdOpar_poly.c[-2]*self._timpact\
-            *(Oparb-numpy.roll(Oparb,-1))[:-1])\
+            *(Oparb[:,:-1]-Oparb[:,1:]))\
             /numpy.sqrt(2.*self._sortedSigOEig[2])
-        ul= (Oparb[:-1]-self._kick_interpdOpar_poly.c[-1]-self._meandO)\
+        ul= (Oparb[:,:-1]-self._kick_interpdOpar_poly.c[-1]-self._meandO)\
             /numpy.sqrt(2.*self._sortedSigOEig[2])
         gaussxpolyInt=\
             self._densMoments_approx_higherorder_gaussxpolyInts(ll,ul,
                                                                spline_order+2)
-        firstTerm= Oparb[:-1]\
+        firstTerm= Oparb[:,:-1]\
             *self._density_par_approx_higherorder(\
             Oparb,lowbindx,_return_array=True,
             gaussxpolyInt=copy.copy(gaussxpolyInt[1:]))
         # Now multiply in the coefficients for each order
-        powers= numpy.tile(numpy.arange(spline_order+2)[::-1],
-                           (len(ul),1)).T
-        gaussxpolyInt*= -0.5*(-numpy.sqrt(2.))**(powers+1)\
-            *self._sortedSigOEig[2]**(0.5*(powers-1))
-        powers= numpy.tile(numpy.arange(spline_order+1)[::-1][:-2],
-                           (len(ul),1)).T
+        powers= numpy.arange(spline_order+2)[::-1]
+        gaussxpolyInt*= (-0.5*(-numpy.sqrt(2.))**(powers+1)\
+            *self._sortedSigOEig[2]**(0.5*(powers-1)))\
+            [:,numpy.newaxis,numpy.newaxis]
+        powers= numpy.arange(spline_order+1)[::-1][:-2]
+        coeffs= self._higherorder_coeffs(spline_order,meanOmega=True)
+        dOparb= Oparb[:,:-1]-self._kick_interpdOpar_poly.c[-1]-self._meandO
         for jj in range(spline_order+2):
             gaussxpolyInt[-jj-1]*= numpy.sum(\
-                self._kick_interpdOpar_poly.c[:-2]
-                *self._timpact**powers
-                /(1.+self._kick_interpdOpar_poly.c[-2]*self._timpact)
-                **(powers+2)
-                *special.binom(powers+1,jj)
-                *(Oparb[:-1]-self._kick_interpdOpar_poly.c[-1]-self._meandO)
-                **(powers-jj+1),axis=0)
+                coeffs[jj][:,numpy.newaxis,:]
+                *dOparb**(powers-jj+1)[:,numpy.newaxis,numpy.newaxis],axis=0)
         out= numpy.sum(gaussxpolyInt,axis=0)
         out+= firstTerm
-        return numpy.sum(out[:lowbindx+1])
+        return self._sum_intervals(out,lowbindx)
 
     def _determine_deltav_kick(self,impact_angle,impactb,subhalovel,
                                GM,rs,subhalopot,
@@ -634,6 +708,9 @@ class streamgapdf(galpy.df_src.streamdf.streamdf):
                               *(numpy.arange(len(ppoly.x)) >= len(ppoly.x)//2))
         self._kick_interpdOpar_poly= interpolate.PPoly(\
             ppoly.c[:,nzIndx[0][:-1]],ppoly.x[nzIndx[0]])
+        # Reset caches of quantities that depend on the kick
+        self._higherorder_coeffs_cache= {}
+        self._approx_breakpoints_cache= OrderedDict()
         return None
 
     # Functions that evaluate the interpolated kicks, but also check the range
@@ -753,12 +830,9 @@ class streamgapdf(galpy.df_src.streamdf.streamdf):
         if hasattr(self,'_kick_interpolatedObsTrackAA'): #pragma: no cover
             return None #Already did this
         #Calculate 1D meanOmega on a fine grid in angle and interpolate
-        dmOs= numpy.array([\
-                super(streamgapdf,self).meanOmega(da,oned=True,
-                                                  tdisrupt=self._tdisrupt
-                                                  -self._timpact,
-                                                  use_physical=False)
-                for da in self._kick_interpolatedThetasTrack])
+        dmOs= super(streamgapdf,self).meanOmega(\
+            self._kick_interpolatedThetasTrack,oned=True,
+            tdisrupt=self._tdisrupt-self._timpact,use_physical=False)
         self._kick_interpTrackAAdmeanOmegaOneD=\
             interpolate.InterpolatedUnivariateSpline(\
             self._kick_interpolatedThetasTrack,dmOs,k=3)
@@ -1338,6 +1412,431 @@ def impulse_deltav_general_curvedstream(v,x,b,w,x0,v0,pot):
     return numpy.array(list(map(lambda i:_deltav_integrate(0.,i[1],i[0],pot)
                         ,zip(w-v,b_))))
 
+def impulse_deltav_plummer_multi(v,y,b,w,GM,rs):
+    """
+    NAME:
+
+       impulse_deltav_plummer_multi
+
+    PURPOSE:
+
+       calculate the delta velocity to due encounters with many Plummer spheres in the impulse approximation at once; allows for arbitrary velocity vectors, but y is input as the position along the stream
+
+    INPUT:
+
+       v - velocity of the stream (nstar,3)
+
+       y - position along the stream (nstar)
+
+       b - impact parameters (nenc)
+
+       w - velocities of the Plummer spheres (nenc,3)
+
+       GM - masses of the Plummer spheres (in natural units) (nenc)
+
+       rs - sizes of the Plummer spheres (nenc)
+
+    OUTPUT:
+
+       deltav (nstar,nenc,3)
+
+    HISTORY:
+
+       2016-10-18 - Written based on impulse_deltav_plummer - Bovy (UofT)
+
+    """
+    v,y= _parse_multi_stream(v,y)
+    b,w,GM,rs= _parse_multi_encounter(b,w,GM,rs)
+    # Build the rotation matrices and their inverse
+    rot= _rotation_vy(v)
+    rotinv= _rotation_vy(v,inv=True)
+    # Rotate the Plummer spheres' velocities to the stream frames
+    tilew= numpy.einsum('sij,ej->sei',rot,w)
+    wperp,wpar,wmag2,e0,e2= _multi_stream_frame_w(v,tilew)
+    wmag= numpy.sqrt(wmag2)
+    y= y[:,numpy.newaxis]
+    denom= wmag*((b**2.+rs**2.)*wmag2+wperp**2.*y**2.)
+    out= numpy.empty_like(tilew)
+    out[:,:,0]= (b*wmag2*e2-y*wpar*tilew[:,:,0])/denom
+    out[:,:,1]= -wperp**2.*y/denom
+    out[:,:,2]= -(b*wmag2*e0+y*wpar*tilew[:,:,2])/denom
+    # Rotate back to the original frame
+    return 2.0*GM[:,numpy.newaxis]*numpy.einsum('sij,sej->sei',rotinv,out)
+
+def impulse_deltav_plummer_curvedstream_multi(v,x,b,w,x0,v0,GM,rs):
+    """
+    NAME:
+
+       impulse_deltav_plummer_curvedstream_multi
+
+    PURPOSE:
+
+       calculate the delta velocity to due encounters with many Plummer spheres in the impulse approximation at once; allows for arbitrary velocity vectors, and arbitrary position along the stream
+
+    INPUT:
+
+       v - velocity of the stream (nstar,3)
+
+       x - position along the stream (nstar,3)
+
+       b - impact parameters (nenc)
+
+       w - velocities of the Plummer spheres (nenc,3)
+
+       x0 - points of closest approach (nenc,3)
+
+       v0 - velocities of the points of closest approach (nenc,3)
+
+       GM - masses of the Plummer spheres (in natural units) (nenc)
+
+       rs - sizes of the Plummer spheres (nenc)
+
+    OUTPUT:
+
+       deltav (nstar,nenc,3)
+
+    HISTORY:
+
+       2016-10-18 - Written based on impulse_deltav_plummer_curvedstream - Bovy (UofT)
+
+    """
+    b_,w= _multi_curvedstream_bw(v,x,b,w,x0,v0,
+                                 nenc=numpy.amax([len(numpy.atleast_1d(GM)),
+                                                  len(numpy.atleast_1d(rs))]))
+    GM= _parse_multi_param(GM,w.shape[1])
+    rs= _parse_multi_param(rs,w.shape[1])
+    wmag= numpy.sqrt(numpy.sum(w**2,axis=-1))
+    bdotw= numpy.sum(b_*w,axis=-1)/wmag
+    denom= 1./(wmag*(numpy.sum(b_**2,axis=-1)+rs**2-bdotw**2))
+    return -2.0*(GM*denom)[:,:,numpy.newaxis]\
+        *(b_-(bdotw/wmag)[:,:,numpy.newaxis]*w)
+
+def impulse_deltav_hernquist_multi(v,y,b,w,GM,rs):
+    """
+    NAME:
+
+       impulse_deltav_hernquist_multi
+
+    PURPOSE:
+
+       calculate the delta velocity to due encounters with many Hernquist spheres in the impulse approximation at once; allows for arbitrary velocity vectors, but y is input as the position along the stream
+
+    INPUT:
+
+       v - velocity of the stream (nstar,3)
+
+       y - position along the stream (nstar)
+
+       b - impact parameters (nenc)
+
+       w - velocities of the Hernquist spheres (nenc,3)
+
+       GM - masses of the Hernquist spheres (in natural units) (nenc)
+
+       rs - sizes of the Hernquist spheres (nenc)
+
+    OUTPUT:
+
+       deltav (nstar,nenc,3)
+
+    HISTORY:
+
+       2016-10-18 - Written based on impulse_deltav_hernquist - Bovy (UofT)
+
+    """
+    v,y= _parse_multi_stream(v,y)
+    b,w,GM,rs= _parse_multi_encounter(b,w,GM,rs)
+    # Build the rotation matrices and their inverse
+    rot= _rotation_vy(v)
+    rotinv= _rotation_vy(v,inv=True)
+    # Rotate the Hernquist spheres' velocities to the stream frames
+    tilew= numpy.einsum('sij,ej->sei',rot,w)
+    wperp,wpar,wmag2,e0,e2= _multi_stream_frame_w(v,tilew)
+    wmag= numpy.sqrt(wmag2)
+    y= y[:,numpy.newaxis]
+    B= numpy.sqrt(b**2.+wperp**2.*y**2./wmag2)
+    denom= 1./(wmag*(B**2-rs**2))
+    Xfac= (1.-2.*rs/(rs+B)*_HernquistX_array(numpy.sqrt(2.*B/(rs+B))))\
+        *denom
+    out= numpy.empty_like(tilew)
+    out[:,:,0]= (b*e2-y*wpar*tilew[:,:,0]/wmag2)*Xfac
+    out[:,:,1]= -wperp**2.*y*Xfac/wmag2
+    out[:,:,2]= -(b*e0+y*wpar*tilew[:,:,2]/wmag2)*Xfac
+    # Rotate back to the original frame
+    return 2.0*GM[:,numpy.newaxis]*numpy.einsum('sij,sej->sei',rotinv,out)
+
+def impulse_deltav_hernquist_curvedstream_multi(v,x,b,w,x0,v0,GM,rs):
+    """
+    NAME:
+
+       impulse_deltav_hernquist_curvedstream_multi
+
+    PURPOSE:
+
+       calculate the delta velocity to due encounters with many Hernquist spheres in the impulse approximation at once; allows for arbitrary velocity vectors, and arbitrary position along the stream
+
+    INPUT:
+
+       v - velocity of the stream (nstar,3)
+
+       x - position along the stream (nstar,3)
+
+       b - impact parameters (nenc)
+
+       w - velocities of the Hernquist spheres (nenc,3)
+
+       x0 - points of closest approach (nenc,3)
+
+       v0 - velocities of the points of closest approach (nenc,3)
+
+       GM - masses of the Hernquist spheres (in natural units) (nenc)
+
+       rs - sizes of the Hernquist spheres (nenc)
+
+    OUTPUT:
+
+       deltav (nstar,nenc,3)
+
+    HISTORY:
+
+       2016-10-18 - Written based on impulse_deltav_hernquist_curvedstream - Bovy (UofT)
+
+    """
+    b_,w= _multi_curvedstream_bw(v,x,b,w,x0,v0,
+                                 nenc=numpy.amax([len(numpy.atleast_1d(GM)),
+                                                  len(numpy.atleast_1d(rs))]))
+    GM= _parse_multi_param(GM,w.shape[1])
+    rs= _parse_multi_param(rs,w.shape[1])
+    wmag= numpy.sqrt(numpy.sum(w**2,axis=-1))
+    bdotw= numpy.sum(b_*w,axis=-1)/wmag
+    B= numpy.sqrt(numpy.sum(b_**2,axis=-1)-bdotw**2)
+    denom= 1./(wmag*(B**2-rs**2))
+    Xfac= 1.-2.*rs/(rs+B)*_HernquistX_array(numpy.sqrt(2.*B/(rs+B)))
+    return -2.0*(GM*Xfac*denom)[:,:,numpy.newaxis]\
+        *(b_-(bdotw/wmag)[:,:,numpy.newaxis]*w)
+
+def impulse_deltav_general_multi(v,y,b,w,pot=None,nquad=50,pots=None):
+    """
+    NAME:
+
+       impulse_deltav_general_multi
+
+    PURPOSE:
+
+       calculate the delta velocity to due encounters with many general spherical potentials in the impulse approximation at once, using fixed-order, vectorized Gauss-Legendre quadrature; allows for arbitrary velocity vectors, but y is input as the position along the stream
+
+    INPUT:
+
+       v - velocity of the stream (nstar,3)
+
+       y - position along the stream (nstar)
+
+       b - impact parameters (nenc)
+
+       w - velocities of the subhalos (nenc,3)
+
+       pot= (None) Potential object or list thereof (should be spherical), used for all encounters
+
+       nquad= (50) number of Gauss-Legendre points to use in the integration over time
+
+       pots= (None) list of nenc Potential objects or lists thereof (should be spherical), one for each encounter (instead of pot=)
+
+    OUTPUT:
+
+       deltav (nstar,nenc,3)
+
+    HISTORY:
+
+       2016-10-18 - Written based on impulse_deltav_general - Bovy (UofT)
+
+    """
+    v,y= _parse_multi_stream(v,y)
+    b,w,pots= _parse_multi_encounter_pot(b,w,pot,pots)
+    # Build the rotation matrices and their inverse
+    rot= _rotation_vy(v)
+    rotinv= _rotation_vy(v,inv=True)
+    # Rotate the subhalos' velocities to the stream frames
+    tilew= numpy.einsum('sij,ej->sei',rot,w)
+    tilew[:,:,1]-= numpy.sqrt(numpy.sum(v**2.,axis=1))[:,numpy.newaxis]
+    wmag= numpy.sqrt(tilew[:,:,0]**2+tilew[:,:,2]**2)
+    X0= numpy.empty_like(tilew)
+    X0[:,:,0]= -b*tilew[:,:,2]/wmag
+    X0[:,:,1]= y[:,numpy.newaxis]
+    X0[:,:,2]= b*tilew[:,:,0]/wmag
+    out= _deltav_integrate_multi(X0,tilew,pots,nquad)
+    # Rotate back to the original frame
+    return numpy.einsum('sij,sej->sei',rotinv,out)
+
+def impulse_deltav_general_curvedstream_multi(v,x,b,w,x0,v0,pot=None,nquad=50,
+                                              pots=None):
+    """
+    NAME:
+
+       impulse_deltav_general_curvedstream_multi
+
+    PURPOSE:
+
+       calculate the delta velocity to due encounters with many general spherical potentials in the impulse approximation at once, using fixed-order, vectorized Gauss-Legendre quadrature; allows for arbitrary velocity vectors and arbitrary shaped streams
+
+    INPUT:
+
+       v - velocity of the stream (nstar,3)
+
+       x - position along the stream (nstar,3)
+
+       b - impact parameters (nenc)
+
+       w - velocities of the subhalos (nenc,3)
+
+       x0 - positions of closest approach (nenc,3)
+
+       v0 - velocities of the stream at closest approach (nenc,3)
+
+       pot= (None) Potential object or list thereof (should be spherical), used for all encounters
+
+       nquad= (50) number of Gauss-Legendre points to use in the integration over time
+
+       pots= (None) list of nenc Potential objects or lists thereof (should be spherical), one for each encounter (instead of pot=)
+
+    OUTPUT:
+
+       deltav (nstar,nenc,3)
+
+    HISTORY:
+
+       2016-10-18 - Written based on impulse_deltav_general_curvedstream - Bovy (UofT)
+
+    """
+    b_,w= _multi_curvedstream_bw(v,x,b,w,x0,v0,
+                                 nenc=None if pots is None else len(pots))
+    pots= _parse_multi_pot(pot,pots,w.shape[1])
+    return _deltav_integrate_multi(b_,w,pots,nquad)
+
+def _parse_multi_stream(v,y):
+    if len(v.shape) == 1: v= numpy.reshape(v,(1,3))
+    y= numpy.atleast_1d(y).flatten()
+    return (v,y)
+
+def _parse_multi_param(p,nenc):
+    """Parse a per-encounter parameter, which can be given for all encounters at once (length 1) or for each encounter (length nenc)"""
+    p= numpy.atleast_1d(p).astype('float')
+    if len(p) == 1: p= numpy.tile(p,nenc)
+    elif len(p) != nenc:
+        raise ValueError("Encounter parameters need to have length 1 or the number of encounters (%i), but one has length %i" % (nenc,len(p)))
+    return p
+
+def _parse_multi_vector(w,nenc):
+    """Parse a per-encounter vector, which can be given for all encounters at once (1,3) or for each encounter (nenc,3)"""
+    w= numpy.atleast_2d(w).astype('float')
+    if w.shape[0] == 1: w= numpy.tile(w,(nenc,1))
+    elif w.shape[0] != nenc:
+        raise ValueError("Encounter vectors need to have length 1 or the number of encounters (%i), but one has length %i" % (nenc,w.shape[0]))
+    return w
+
+def _parse_multi_pot(pot,pots,nenc):
+    """Parse the potential used for all encounters (pot) or the list of potentials for each encounter (pots) into a list of nenc potentials"""
+    if (pot is None) == (pots is None):
+        raise ValueError("Exactly one of pot= (one potential for all encounters) or pots= (one potential for each encounter) needs to be set")
+    if pots is None: return [pot for ii in range(nenc)]
+    if len(pots) != nenc:
+        raise ValueError("pots= needs to have one potential for each encounter (%i), but has length %i" % (nenc,len(pots)))
+    return pots
+
+def _parse_multi_encounter(b,w,GM,rs):
+    b= numpy.atleast_1d(b)
+    w= numpy.atleast_2d(w)
+    nenc= numpy.amax([len(b),w.shape[0],
+                      len(numpy.atleast_1d(GM)),len(numpy.atleast_1d(rs))])
+    return (_parse_multi_param(b,nenc),_parse_multi_vector(w,nenc),
+            _parse_multi_param(GM,nenc),_parse_multi_param(rs,nenc))
+
+def _parse_multi_encounter_pot(b,w,pot,pots):
+    b= numpy.atleast_1d(b)
+    w= numpy.atleast_2d(w)
+    nenc= numpy.amax([len(b),w.shape[0],1 if pots is None else len(pots)])
+    return (_parse_multi_param(b,nenc),_parse_multi_vector(w,nenc),
+            _parse_multi_pot(pot,pots,nenc))
+
+def _multi_stream_frame_w(v,tilew):
+    """Parallel and perpendicular components of the encounter velocities in the stream frames (nstar,nenc), including the directions of the impact parameter; perpendicular impacts are dealt with as in the single-encounter functions"""
+    wperp= numpy.sqrt(tilew[:,:,0]**2.+tilew[:,:,2]**2.)
+    wpar= numpy.sqrt(numpy.sum(v**2.,axis=1))[:,numpy.newaxis]-tilew[:,:,1]
+    wmag2= wpar**2.+wperp**2.
+    wperp0Indx= numpy.fabs(wperp) < 10.**-10.
+    safe_wperp= copy.copy(wperp)
+    safe_wperp[wperp0Indx]= 1.
+    e0= tilew[:,:,0]/safe_wperp
+    e2= tilew[:,:,2]/safe_wperp
+    e0[wperp0Indx]= 1.
+    e2[wperp0Indx]= 1.
+    return (wperp,wpar,wmag2,e0,e2)
+
+def _multi_curvedstream_bw(v,x,b,w,x0,v0,nenc=None):
+    """Impact-parameter vectors and relative velocities (nstar,nenc,3) for the curved-stream functions; nenc= sets the number of encounters if known from other inputs"""
+    if len(v.shape) == 1: v= numpy.reshape(v,(1,3))
+    if len(x.shape) == 1: x= numpy.reshape(x,(1,3))
+    w= numpy.atleast_2d(w)
+    x0= numpy.atleast_2d(x0)
+    v0= numpy.atleast_2d(v0)
+    nenc= numpy.amax([len(numpy.atleast_1d(b)),w.shape[0],
+                      x0.shape[0],v0.shape[0],
+                      1 if nenc is None else nenc])
+    b= _parse_multi_param(b,nenc)
+    w= _parse_multi_vector(w,nenc)
+    x0= _parse_multi_vector(x0,nenc)
+    v0= _parse_multi_vector(v0,nenc)
+    b0= numpy.cross(w,v0)
+    b0*= (b/numpy.sqrt(numpy.sum(b0**2,axis=1)))[:,numpy.newaxis]
+    b_= b0[numpy.newaxis,:,:]+x[:,numpy.newaxis,:]-x0[numpy.newaxis,:,:]
+    return (b_,w[numpy.newaxis,:,:]-v[:,numpy.newaxis,:])
+
+def _HernquistX_array(s):
+    """Vectorized version of HernquistX"""
+    if numpy.any(s < 0.):
+        raise ValueError("s must be positive in Hernquist X function")
+    out= numpy.ones_like(s)
+    lowIndx= s < 1.
+    out[lowIndx]= numpy.log((1+numpy.sqrt(1-s[lowIndx]**2.))/s[lowIndx])\
+        /numpy.sqrt(1-s[lowIndx]**2.)
+    highIndx= s > 1.
+    out[highIndx]= numpy.arccos(1./s[highIndx])\
+        /numpy.sqrt(s[highIndx]**2.-1)
+    return out
+
+def _deltav_integrate_multi(X0,w,pots,nquad):
+    """Integrate the force along the straight-line trajectories X0+w t (nstar,nenc,3) for all stars and encounters at once, using Gauss-Legendre quadrature in T, where t = tc + tau T/(1-T^2), centered on the time of closest approach tc and scaled by the closest-approach crossing time tau"""
+    nstar, nenc= X0.shape[:2]
+    pot_ids= numpy.array([id(p) for p in pots])
+    T,weights= numpy.polynomial.legendre.leggauss(nquad)
+    jac= weights*(1+T*T)/(1-T*T)**2
+    w2= numpy.sum(w**2,axis=-1)
+    tc= -numpy.sum(X0*w,axis=-1)/w2
+    Xc= X0+tc[:,:,numpy.newaxis]*w
+    tau= numpy.sqrt(numpy.sum(Xc**2,axis=-1)/w2)
+    tau[tau < 10.**-10.]= 10.**-10.
+    # Work in chunks of stars to limit the size of the temporary arrays
+    out= numpy.empty_like(X0)
+    nchunk= numpy.amax([1,_DELTAV_MULTI_MAXSIZE//(nenc*nquad)])
+    for ii in range(0,nstar,nchunk):
+        # Positions at all nodes (nchunk,nenc,nquad,3)
+        X= Xc[ii:ii+nchunk,:,numpy.newaxis,:]\
+            +(tau[ii:ii+nchunk,:,numpy.newaxis]*(T/(1-T*T)))\
+            [:,:,:,numpy.newaxis]*w[ii:ii+nchunk,:,numpy.newaxis,:]
+        r= numpy.sqrt(numpy.sum(X**2,axis=-1))
+        # Evaluate the force for each distinct potential, all nodes at once
+        Fr= numpy.empty_like(r)
+        for pid in numpy.unique(pot_ids):
+            eIndx= pot_ids == pid
+            Fr[:,eIndx]=\
+                numpy.reshape(\
+                evaluateRforces(pots[numpy.arange(nenc)[eIndx][0]],
+                                r[:,eIndx].flatten(),0.),
+                r[:,eIndx].shape)
+        out[ii:ii+nchunk]=\
+            numpy.sum((tau[ii:ii+nchunk,:,numpy.newaxis]*jac*Fr/r)\
+                          [:,:,:,numpy.newaxis]*X,axis=2)
+    return out
+
 def impulse_deltav_general_orbitintegration(v,x,b,w,x0,v0,pot,tmax,galpot,
                                             tmaxfac=10.,nsamp=1000,
                                             integrate_method='symplec4_c'):
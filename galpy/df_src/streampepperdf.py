@@ -0,0 +1,393 @@
+# The DF of a tidal stream peppered with impacts
+import copy
+import numpy
+from galpy.util import bovy_conversion
+from galpy.df_src.df import df, _APY_LOADED
+import galpy.df_src.streamdf
+import galpy.df_src.streamgapdf
+if _APY_LOADED:
+    from astropy import units
+# Nodes and weights of the composite Gauss-Legendre quadrature over
+# T in (-1,1) used to compute the density along the stream; p(Opar,apar) is
+# discontinuous, so many low-order segments are used (accurate to ~0.1%)
+_DENSPAR_NSEG= 1000
+_glx, _glw= numpy.polynomial.legendre.leggauss(4)
+_DENSPAR_T= (-1.+(numpy.arange(_DENSPAR_NSEG)[:,None]+0.5*(_glx+1.))\
+                 *2./_DENSPAR_NSEG).flatten()
+_DENSPAR_W= numpy.tile(_glw,_DENSPAR_NSEG)/_DENSPAR_NSEG
+# Maximum number of (angle,T) pairs to evaluate p(Opar,apar) for at once
+_DENSPAR_MAXSIZE= 2**20
+class streampepperdf(galpy.df_src.streamdf.streamdf):
+    """The DF of a tidal stream peppered with impacts"""
+    def __init__(self,*args,**kwargs):
+        """
+        NAME:
+
+           __init__
+
+        PURPOSE:
+
+           Initialize the DF of a stellar stream peppered with impacts
+
+        INPUT:
+
+           streamdf args and kwargs
+
+           Subhalo and impact parameters, for all impacts:
+
+              impactb= impact parameter ([nimpact]) (can be Quantity)
+
+              subhalovel= velocity of the subhalo shape=(nimpact,3) (can be Quantity)
+
+              timpact time since impact ([nimpact]) (can be Quantity); the coordinate transformation at the time of impact is set up once for each unique time in this list, so using a small number of distinct impact times (e.g., a grid) is much faster
+
+              impact_angle= angle offset from progenitor at which the impact occurred (rad) ([nimpact]) (can be Quantity)
+
+              Subhalo: specify either 1( mass and size of Plummer sphere or 2( general spherical-potential object (kick is numerically computed); all impacts need to choose the same option
+
+                 1( GM= mass of the subhalo ([nimpact]) (can be Quantity)
+
+                    rs= size parameter of the subhalo ([nimpact]) (can be Quantity)
+
+                 2( subhalopot= galpy potential object or list thereof (should be spherical); list of nimpact of these
+
+                 3( hernquist= (False) if True, use Hernquist kicks for GM/rs
+
+           deltaAngleTrackImpact= (None) angle to estimate the stream track over to determine the effect of the impact [similar to deltaAngleTrack] (rad)
+
+           nTrackChunksImpact= (floor(deltaAngleTrack/0.15)+1) number of chunks to divide the progenitor track in near the impact [similar to nTrackChunks]
+
+           nKickPoints= (30xnTrackChunksImpact) number of points along the stream to compute the kicks at (kicks are then interpolated)
+
+           spline_order= (3) order of the spline to interpolate the kicks with
+
+        OUTPUT:
+
+           object
+
+        HISTORY:
+
+           2016-10-20 - Started based on streamgapdf - Bovy (UofT)
+
+        """
+        df.__init__(self,ro=kwargs.get('ro',None),vo=kwargs.get('vo',None))
+        # Parse kwargs, everything except for timpact can be arrays
+        impactb= kwargs.pop('impactb',[1.])
+        subhalovel= kwargs.pop('subhalovel',numpy.array([[0.,1.,0.]]))
+        hernquist= kwargs.pop('hernquist',False)
+        GM= kwargs.pop('GM',None)
+        rs= kwargs.pop('rs',None)
+        subhalopot= kwargs.pop('subhalopot',None)
+        timpact= kwargs.pop('timpact',[1.])
+        impact_angle= kwargs.pop('impact_angle',[1.])
+        deltaAngleTrackImpact= kwargs.pop('deltaAngleTrackImpact',None)
+        nTrackChunksImpact= kwargs.pop('nTrackChunksImpact',None)
+        nKickPoints= kwargs.pop('nKickPoints',None)
+        spline_order= kwargs.pop('spline_order',3)
+        self._spline_order= spline_order
+        self._hernquist= hernquist
+        timpact= self._parse_timpact(timpact)
+        impact_angle= self._parse_impact_angle(impact_angle)
+        if len(numpy.atleast_1d(impact_angle)) != len(timpact):
+            raise ValueError('impact_angle= and timpact= need to have the same length')
+        # Run the regular, smooth streamdf setup, which includes the
+        # present-day stream track used to convert (Omega,angle) to (x,v)
+        super(streampepperdf,self).__init__(*args,**kwargs)
+        # Setup the machinery to go between (x,v) and (Omega,theta) near
+        # the impacts, once for each unique impact time, in streamgapdf
+        # objects that start from the smooth-stream state computed above
+        # (rather than re-running the streamdf setup). The transformation
+        # only depends on the impact angle through its sign, which has to
+        # be that of the arm of the stream (checked when computing the
+        # kicks), so it is shared by all impacts at the same time; the
+        # point of closest approach is set for each impact in set_impacts
+        smooth_state= copy.copy(self.__dict__)
+        if self._leading: impact_sign= 1.
+        else: impact_sign= -1.
+        self._uniq_timpact= sorted(list(set(timpact)))
+        self._sgapdfs_coordtransform= {}
+        for ti in self._uniq_timpact:
+            sgdf= galpy.df_src.streamgapdf.streamgapdf.__new__(\
+                galpy.df_src.streamgapdf.streamgapdf)
+            sgdf.__dict__.update(smooth_state)
+            sgdf._determine_deltaAngleTrackImpact(deltaAngleTrackImpact,ti)
+            sgdf._determine_impact_coordtransform(\
+                sgdf._deltaAngleTrackImpact,nTrackChunksImpact,
+                ti,impact_sign)
+            if nKickPoints is None:
+                sgdf._nKickPoints= 30*sgdf._nTrackChunksImpact
+            else:
+                sgdf._nKickPoints= nKickPoints
+            # Pre-compute the interpolated track near the impact, which
+            # does not depend on the impact parameters
+            sgdf._impact_angle= numpy.fabs(impact_angle[timpact.index(ti)])
+            sgdf._interpolate_stream_track_kick()
+            sgdf._interpolate_stream_track_kick_aA()
+            self._sgapdfs_coordtransform[ti]= sgdf
+        self._gap_sigMeanSign= sgdf._gap_sigMeanSign
+        # Compute all kicks
+        self.set_impacts(impactb=impactb,subhalovel=subhalovel,
+                         impact_angle=impact_angle,timpact=timpact,
+                         GM=GM,rs=rs,subhalopot=subhalopot)
+        return None
+
+    def set_impacts(self,**kwargs):
+        """
+        NAME:
+
+           set_impacts
+
+        PURPOSE:
+
+           Setup a new set of impacts, re-using the coordinate transformations at the impact times that were set up when the object was initialized
+
+        INPUT:
+
+           Subhalo and impact parameters, for all impacts:
+
+              impactb= impact parameter ([nimpact]) (can be Quantity)
+
+              subhalovel= velocity of the subhalo shape=(nimpact,3) (can be Quantity)
+
+              timpact time since impact ([nimpact]); needs to be in the list of impact times used to initialize the object (can be Quantity)
+
+              impact_angle= angle offset from progenitor at which the impact occurred (rad) ([nimpact]) (can be Quantity)
+
+              Subhalo: specify either 1( mass and size of Plummer sphere or 2( general spherical-potential object (kick is numerically computed); all impacts need to choose the same option
+
+                 1( GM= mass of the subhalo ([nimpact]) (can be Quantity)
+
+                    rs= size parameter of the subhalo ([nimpact]) (can be Quantity)
+
+                 2( subhalopot= galpy potential object or list thereof (should be spherical); list of nimpact of these
+
+        OUTPUT:
+
+           (none; just sets up new set of impacts)
+
+        HISTORY:
+
+           2016-10-20 - Written - Bovy (UofT)
+
+        """
+        impactb= kwargs.pop('impactb',None)
+        subhalovel= kwargs.pop('subhalovel',None)
+        timpact= kwargs.pop('timpact',None)
+        impact_angle= kwargs.pop('impact_angle',None)
+        GM= kwargs.pop('GM',None)
+        rs= kwargs.pop('rs',None)
+        subhalopot= kwargs.pop('subhalopot',None)
+        if impactb is None or subhalovel is None or timpact is None \
+                or impact_angle is None:
+            raise IOError("impactb=, subhalovel=, timpact=, and impact_angle= need to be set")
+        general_kick= GM is None or rs is None
+        if general_kick and subhalopot is None:
+            raise IOError("One of (GM=, rs=) or subhalopot= needs to be set to specify the subhalo's structure")
+        # Parse and check the inputs
+        timpact= self._parse_timpact(timpact)
+        for ti in timpact:
+            if not ti in self._uniq_timpact:
+                raise ValueError('timpact=%g not in the set of impact times used to setup the streampepperdf instance' % ti)
+        nimpact= len(timpact)
+        impact_angle= self._parse_impact_angle(impact_angle)
+        if _APY_LOADED and isinstance(impactb,units.Quantity):
+            impactb= impactb.to(units.kpc).value/self._ro
+        impactb= numpy.atleast_1d(impactb)
+        if _APY_LOADED and isinstance(subhalovel,units.Quantity):
+            subhalovel= subhalovel.to(units.km/units.s).value/self._vo
+        subhalovel= numpy.atleast_2d(subhalovel)
+        if general_kick:
+            GM= [None for ii in range(nimpact)]
+            rs= [None for ii in range(nimpact)]
+            if not isinstance(subhalopot,list) \
+                    or len(subhalopot) != nimpact:
+                raise ValueError('subhalopot= needs to be a list with one potential for each impact')
+        else:
+            GM= self._parse_GM(GM)
+            if _APY_LOADED and isinstance(rs,units.Quantity):
+                rs= rs.to(units.kpc).value/self._ro
+            rs= numpy.atleast_1d(rs)
+            subhalopot= [None for ii in range(nimpact)]
+        if len(impactb) != nimpact or subhalovel.shape[0] != nimpact \
+                or len(impact_angle) != nimpact \
+                or len(GM) != nimpact or len(rs) != nimpact:
+            raise ValueError('All impact parameters need to have the same length as timpact=')
+        # Sort the impacts from the most recent to the oldest
+        sortIndx= numpy.argsort(timpact)
+        self._timpact= numpy.array(timpact)[sortIndx]
+        self._impactb= impactb[sortIndx]
+        self._subhalovel= subhalovel[sortIndx]
+        self._impact_angle= impact_angle[sortIndx]
+        self._GM= [GM[ii] for ii in sortIndx]
+        self._rs= [rs[ii] for ii in sortIndx]
+        self._subhalopot= [subhalopot[ii] for ii in sortIndx]
+        # Compute the kicks for each impact, re-using the coordinate
+        # transformation and the interpolated track near the impact
+        self._sgapdfs= []
+        for kk in range(nimpact):
+            sgdf= copy.copy(self._sgapdfs_coordtransform[self._timpact[kk]])
+            sgdf._general_kick= general_kick
+            sgdf._determine_deltav_kick(self._impact_angle[kk],
+                                        self._impactb[kk],
+                                        self._subhalovel[kk],
+                                        self._GM[kk],self._rs[kk],
+                                        self._subhalopot[kk],
+                                        self._spline_order,
+                                        self._hernquist)
+            sgdf._determine_deltaOmegaTheta_kick(self._spline_order)
+            self._sgapdfs.append(sgdf)
+        return None
+
+    def _parse_timpact(self,timpact):
+        if _APY_LOADED and isinstance(timpact,units.Quantity):
+            timpact= timpact.to(units.Gyr).value\
+                /bovy_conversion.time_in_Gyr(self._vo,self._ro)
+        return list(numpy.atleast_1d(timpact))
+
+    def _parse_impact_angle(self,impact_angle):
+        if _APY_LOADED and isinstance(impact_angle,units.Quantity):
+            impact_angle= impact_angle.to(units.rad).value
+        return numpy.atleast_1d(impact_angle)
+
+    def _parse_GM(self,GM):
+        if _APY_LOADED and isinstance(GM,units.Quantity):
+            # GM can be GM or M
+            try:
+                GM= GM.to(units.pc*units.km**2/units.s**2)\
+                    .value\
+                    /bovy_conversion.mass_in_msol(self._vo,self._ro)\
+                    /bovy_conversion._G
+            except units.UnitConversionError:
+                GM= GM.to(units.Msun).value\
+                    /bovy_conversion.mass_in_msol(self._vo,self._ro)
+        return numpy.atleast_1d(GM)
+
+    def pOparapar(self,Opar,apar):
+        """
+        NAME:
+
+           pOparapar
+
+        PURPOSE:
+
+           return the probability of a given parallel (frequency,angle) offset pair
+
+        INPUT:
+
+           Opar - parallel frequency offset (array) (can be Quantity)
+
+           apar - parallel angle offset along the stream (scalar or array with the same length as Opar) (can be Quantity)
+
+        OUTPUT:
+
+           p(Opar,apar)
+
+        HISTORY:
+
+           2016-10-20 - Written based on streamgapdf.pOparapar - Bovy (UofT)
+
+        """
+        if _APY_LOADED and isinstance(Opar,units.Quantity):
+            Opar= Opar.to(1/units.Gyr).value\
+                /bovy_conversion.freq_in_Gyr(self._vo,self._ro)
+        if _APY_LOADED and isinstance(apar,units.Quantity):
+            apar= apar.to(units.rad).value
+        if isinstance(Opar,(int,float,numpy.float32,numpy.float64)):
+            Opar= numpy.array([Opar])
+        out= numpy.zeros(len(Opar))
+        # Go back through the impacts from the most recent to the oldest,
+        # removing the kick of each impact; points that were stripped after
+        # an impact are evaluated using the smooth model
+        Opar= copy.copy(Opar)
+        apar= apar*numpy.ones(len(Opar))
+        todo= numpy.ones(len(Opar),dtype='bool')
+        tprev= 0.
+        for kk,timpact in enumerate(self._timpact):
+            ts= apar/Opar
+            afterIndx= todo*(ts < timpact-tprev)*(ts >= 0.)
+            out[afterIndx]= self._pOparapar_smooth(Opar[afterIndx],
+                                                   apar[afterIndx],
+                                                   self._tdisrupt-tprev)
+            todo*= True^afterIndx
+            apar-= Opar*(timpact-tprev)
+            Opar-= self._sgapdfs[kk]._kick_interpdOpar(apar)
+            tprev= timpact
+        out[todo]= self._pOparapar_smooth(Opar[todo],apar[todo],
+                                          self._tdisrupt-tprev)
+        return out
+
+    def _pOparapar_smooth(self,Opar,apar,tdisrupt):
+        """Smooth p(Opar,apar) for arrays of both Opar and apar"""
+        out= numpy.zeros(len(Opar))
+        ts= apar/Opar
+        indx= (ts < tdisrupt)*(ts >= 0.)
+        out[indx]= numpy.exp(-0.5*(Opar[indx]-self._meandO)**2.\
+                                  /self._sortedSigOEig[2])/\
+                                  numpy.sqrt(self._sortedSigOEig[2])
+        return out
+
+    def _density_par(self,dangle,tdisrupt=None):
+        """The raw density as a function of parallel angle; dangle can be an array, for which the integral over Opar is done for all angles at once"""
+        scalarOut= isinstance(dangle,(int,float,numpy.float32,numpy.float64))
+        dangle= numpy.atleast_1d(dangle)
+        # Integrate over Opar= T/(1-T^2) sigOpar + meandO, T in (-1,1),
+        # using composite Gauss-Legendre quadrature in T
+        sigOpar= numpy.sqrt(self._sortedSigOEig[2])
+        Opar= _DENSPAR_T/(1.-_DENSPAR_T**2.)*sigOpar+self._meandO
+        jac= sigOpar*(1.+_DENSPAR_T**2.)/(1.-_DENSPAR_T**2.)**2.
+        nT= len(_DENSPAR_T)
+        out= numpy.empty(len(dangle))
+        chunk= max(1,_DENSPAR_MAXSIZE//nT)
+        for ii in range(0,len(dangle),chunk):
+            tdangle= dangle[ii:ii+chunk]
+            pOa= numpy.reshape(self.pOparapar(numpy.tile(Opar,len(tdangle)),
+                                              numpy.repeat(tdangle,nT)),
+                               (len(tdangle),nT))
+            out[ii:ii+chunk]= numpy.sum(pOa*jac*_DENSPAR_W,axis=1)
+        if scalarOut: return out[0]
+        else: return out
+
+################################SAMPLE THE DF##################################
+    def _sample_aAt(self,n):
+        """Sampling frequencies, angles, and times part of sampling, for stream with multiple impacts"""
+        # Use streamdf's _sample_aAt to generate unperturbed frequencies,
+        # angles
+        Om,angle,dt= super(streampepperdf,self)._sample_aAt(n)
+        # Now rewind angles to the oldest impact, then apply all kicks in
+        # order, moving the parallel angle forward between impacts, and
+        # propagate the frequency kicks to the present
+        dangle_at_impact= angle-numpy.tile(self._progenitor_angle.T,(n,1)).T\
+            -(Om-numpy.tile(self._progenitor_Omega.T,(n,1)).T)\
+            *self._timpact[-1]
+        dangle_par_at_impact= numpy.dot(dangle_at_impact.T,
+                                        self._dsigomeanProgDirection)\
+                                        *self._gap_sigMeanSign
+        dOpar= numpy.dot((Om-numpy.tile(self._progenitor_Omega.T,(n,1)).T).T,
+                         self._dsigomeanProgDirection)\
+                         *self._gap_sigMeanSign
+        for kk in range(len(self._timpact)-1,-1,-1):
+            sgdf= self._sgapdfs[kk]
+            timpact= self._timpact[kk]
+            # Calculate and apply kicks (points not yet released have
+            # zero kick)
+            dOr= sgdf._kick_interpdOr(dangle_par_at_impact)
+            dOp= sgdf._kick_interpdOp(dangle_par_at_impact)
+            dOz= sgdf._kick_interpdOz(dangle_par_at_impact)
+            dar= sgdf._kick_interpdar(dangle_par_at_impact)
+            dap= sgdf._kick_interpdap(dangle_par_at_impact)
+            daz= sgdf._kick_interpdaz(dangle_par_at_impact)
+            Om[0,:]+= dOr
+            Om[1,:]+= dOp
+            Om[2,:]+= dOz
+            angle[0,:]+= dar+dOr*timpact
+            angle[1,:]+= dap+dOp*timpact
+            angle[2,:]+= daz+dOz*timpact
+            # Move the parallel angle forward to the next impact
+            if kk > 0: run_to_timpact= self._timpact[kk-1]
+            else: break
+            dOpar+= sgdf._kick_interpdOpar(dangle_par_at_impact)
+            dangle_par_at_impact+= numpy.dot(numpy.array([dar,dap,daz]).T,
+                                             self._dsigomeanProgDirection)\
+                                             *self._gap_sigMeanSign\
+                                             +dOpar*(timpact-run_to_timpact)
+        return (Om,angle,dt)
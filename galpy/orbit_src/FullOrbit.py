@@ -14,7 +14,9 @@ import galpy.util.bovy_plot as plot
 import galpy.util.bovy_symplecticode as symplecticode
 import galpy.util.bovy_coords as coords
 #try:
-from galpy.orbit_src.integrateFullOrbit import integrateFullOrbit_c, _ext_loaded
+from galpy.orbit_src.integrateFullOrbit import integrateFullOrbit_c, \
+    integrateFullOrbit_events_c, integrateFullOrbit_reduce_c, _ext_loaded, \
+    _hasCEval
 ext_loaded= _ext_loaded
 from galpy.util.bovy_conversion import physical_conversion
 from galpy.orbit_src.OrbitTop import OrbitTop
@@ -62,7 +64,8 @@ class FullOrbit(OrbitTop):
                           ro=ro,zo=zo,vo=vo,solarmotion=solarmotion)
         return None
 
-    def integrate(self,t,pot,method='symplec4_c',dt=None):
+    def integrate(self,t,pot,method='symplec4_c',dt=None,outfile=None,
+                  resume=False,checkpoint_every=None):
         """
         NAME:
            integrate
@@ -78,6 +81,9 @@ class FullOrbit(OrbitTop):
                    'rk6_c' for a 6-th order Runge-Kutta integrator in C
                    'dopr54_c' for a Dormand-Prince integrator in C (generally the fastest)
            dt= (None) if set, force the integrator to use this basic stepsize; must be an integer divisor of output stepsize
+           outfile= (None) if set, write the orbit to this .npy file in blocks as the integration progresses and memory-map the orbit from this file (for orbits that do not fit in memory)
+           resume= (False) if True, resume an interrupted integration into outfile from its last checkpoint
+           checkpoint_every= (None) number of output times after which to write a checkpoint when using outfile (default: 10000)
         OUTPUT:
            (none) (get the actual orbit using getOrbit()
         HISTORY:
@@ -85,10 +91,96 @@ class FullOrbit(OrbitTop):
         """
         #Reset things that may have been defined by a previous integration
         if hasattr(self,'_orbInterp'): delattr(self,'_orbInterp')
+        if hasattr(self,'_outfile'): delattr(self,'_outfile')
         if hasattr(self,'rs'): delattr(self,'rs')
+        if hasattr(self,'_events'): delattr(self,'_events')
         self.t= nu.array(t)
         self._pot= pot
-        self.orbit= _integrateFullOrbit(self.vxvv,pot,t,method,dt)
+        if outfile is None:
+            self.orbit= _integrateFullOrbit(self.vxvv,pot,t,method,dt)
+        else:
+            self.orbit, msg= self._integrate_outfile(\
+                lambda *args: (_integrateFullOrbit(*args),0),
+                t,pot,method,dt,outfile,resume=resume,
+                checkpoint_every=checkpoint_every)
+
+    def integrate_events(self,t,pot,events,method='symplec4_c',dt=None,
+                         maxevents=1000):
+        """
+        NAME:
+           integrate_events
+        PURPOSE:
+           integrate the orbit, only storing the times and phase-space points of events
+        INPUT:
+           t - list of (equally-spaced) times over which to integrate (0 has to be in this!); the orbit is not stored at these times, but only one event of each kind can be found in each interval
+           pot - potential instance or list of instances
+           events - list of events, each one of 'peri' (pericenter), 'apo' (apocenter), 'zcross' (crossing of z=0), 'zturn' (vertical turning point), or ('plane',(nx,ny,nz,d)) (crossing of the plane nx x + ny y + nz z = d)
+           method= one of the C integrators ('leapfrog_c', 'symplec4_c', 'symplec6_c', 'rk4_c', 'rk6_c', 'dopr54_c')
+           dt= (None) if set, force the integrator to use this basic stepsize; must be an integer divisor of output stepsize
+           maxevents= (1000) maximum number of events to store; the integration stops once this number is reached
+        OUTPUT:
+           (none) (get the events using getEvents())
+        HISTORY:
+           2016-11-09 - Written - Bovy (UofT)
+        """
+        #Reset things that may have been defined by a previous integration
+        if hasattr(self,'_orbInterp'): delattr(self,'_orbInterp')
+        if hasattr(self,'rs'): delattr(self,'rs')
+        if hasattr(self,'orbit'): delattr(self,'orbit')
+        if hasattr(self,'t'): delattr(self,'t')
+        if hasattr(self,'_outfile'): delattr(self,'_outfile')
+        self._pot= pot
+        tev, vxvvev, iev, nev= _integrateFullOrbit_events(\
+            nu.array([self.vxvv]),pot,t,method,events,maxevents,dt)
+        self._events= (tev[0,:nev[0]],vxvvev[0,:nev[0]],iev[0,:nev[0]])
+        self._eventNames= events
+        return None
+
+    def integrate_reduce(self,t,pot,reductions,method='symplec4_c',dt=None):
+        """
+        NAME:
+           integrate_reduce
+        PURPOSE:
+           integrate the orbit, only returning reductions of quantities along the orbit
+        INPUT:
+           t - list of (equally-spaced) times at which the orbit is sampled for the reductions (0 has to be in this!); the orbit is not stored
+           pot - potential instance or list of instances
+           reductions - list of reductions (see _integrateFullOrbit_reduce)
+           method= one of the C integrators ('leapfrog_c', 'symplec4_c', 'symplec6_c', 'rk4_c', 'rk6_c', 'dopr54_c')
+           dt= (None) if set, force the integrator to use this basic stepsize; must be an integer divisor of output stepsize
+        OUTPUT:
+           array of reductions
+        HISTORY:
+           2016-11-10 - Written - Bovy (UofT)
+        """
+        return _integrateFullOrbit_reduce(nu.array([self.vxvv]),pot,t,method,
+                                          reductions,dt)[0][0]
+
+    def getEvents(self):
+        """
+        NAME:
+           getEvents
+        PURPOSE:
+           return the events of a previous integrate_events call
+        INPUT:
+           (none)
+        OUTPUT:
+           (t,vxvv,indx): times [nevent], phase-space points [nevent,6], and index in the list of events [nevent]
+        HISTORY:
+           2016-11-09 - Written - Bovy (UofT)
+        """
+        if not hasattr(self,'_events'):
+            raise AttributeError("Integrate the orbit with integrate_events first")
+        return self._events
+
+    def _eventPoints(self,name):
+        """Return the phase-space points of the events with this name from integrate_events, together with the initial condition"""
+        indx= [ii for ii,event in enumerate(self._eventNames)
+               if isinstance(event,str) and event.lower() == name]
+        if len(indx) == 0:
+            raise AttributeError("Orbit was integrated with integrate_events without '%s' events" % name)
+        return nu.vstack((nu.atleast_2d(self.vxvv),
+                          self._events[1][self._events[2] == indx[0]]))
 
     @physical_conversion('energy')
     def Jacobi(self,*args,**kwargs):
@@ -290,11 +382,16 @@ class FullOrbit(OrbitTop):
            eccentricity
         HISTORY:
            2010-09-15 - Written - Bovy (NYU)
+           2016-11-09 - Use the events from integrate_events if the orbit was integrated that way - Bovy (UofT)
         """
         if analytic:
             self._setupaA(pot=pot,type='adiabatic')
             (rperi,rap)= self._aA.calcRapRperi(self)
             return (rap-rperi)/(rap+rperi)
+        if not hasattr(self,'orbit') and hasattr(self,'_events'):
+            rap= self.rap(use_physical=False)
+            rperi= self.rperi(use_physical=False)
+            return (rap-rperi)/(rap+rperi)
         if not hasattr(self,'orbit'):
             raise AttributeError("Integrate the orbit first")
         if not hasattr(self,'rs'):
@@ -315,11 +412,15 @@ class FullOrbit(OrbitTop):
            R_ap
         HISTORY:
            2010-09-20 - Written - Bovy (NYU)
+           2016-11-09 - Use the events from integrate_events if the orbit was integrated that way - Bovy (UofT)
         """
         if analytic:
             self._setupaA(pot=pot,type='adiabatic')
             (rperi,rap)= self._aA.calcRapRperi(self)
             return rap
+        if not hasattr(self,'orbit') and hasattr(self,'_events'):
+            vxvv= self._eventPoints('apo')
+            return nu.amax(nu.sqrt(vxvv[:,0]**2.+vxvv[:,3]**2.))
         if not hasattr(self,'orbit'):
             raise AttributeError("Integrate the orbit first")
         if not hasattr(self,'rs'):
@@ -340,11 +441,15 @@ class FullOrbit(OrbitTop):
            R_peri
         HISTORY:
            2010-09-20 - Written - Bovy (NYU)
+           2016-11-09 - Use the events from integrate_events if the orbit was integrated that way - Bovy (UofT)
         """
         if analytic:
             self._setupaA(pot=pot,type='adiabatic')
             (rperi,rap)= self._aA.calcRapRperi(self)
             return rperi
+        if not hasattr(self,'orbit') and hasattr(self,'_events'):
+            vxvv= self._eventPoints('peri')
+            return nu.amin(nu.sqrt(vxvv[:,0]**2.+vxvv[:,3]**2.))
         if not hasattr(self,'orbit'):
             raise AttributeError("Integrate the orbit first")
         if not hasattr(self,'rs'):
@@ -366,11 +471,14 @@ class FullOrbit(OrbitTop):
         HISTORY:
            2010-09-20 - Written - Bovy (NYU)
            2012-06-01 - Added analytic calculation - Bovy (IAS)
+           2016-11-09 - Use the events from integrate_events if the orbit was integrated that way - Bovy (UofT)
         """
         if analytic:
             self._setupaA(pot=pot,type='adiabatic')
             zmax= self._aA.calczmax(self)
             return zmax
+        if not hasattr(self,'orbit') and hasattr(self,'_events'):
+            return nu.amax(nu.fabs(self._eventPoints('zturn')[:,3]))
         if not hasattr(self,'orbit'):
             raise AttributeError("Integrate the orbit first")
         return nu.amax(nu.fabs(self.orbit[:,3]))
@@ -640,6 +748,204 @@ def _integrateFullOrbit(vxvv,pot,t,method,dt):
     out[neg_radii,5]+= m.pi
     return out
 
+def _integrateFullOrbit_multi(vxvv,pot,t,method,dt):
+    """
+    NAME:
+       _integrateFullOrbit_multi
+    PURPOSE:
+       integrate multiple orbits in a Phi(R,z,phi) potential at once, 
+       using a single (parallel) call to the C integrator if possible
+    INPUT:
+       vxvv - array with the initial conditions [nobj,6] stacked like
+              [R,vR,vT,z,vz,phi]; vR outward!
+       pot - Potential instance
+       t - list of times at which to output (0 has to be in this!), or [nobj,nt] array of a separate set of times for each orbit
+       method - 'odeint', 'leapfrog', or one of the C integrators
+       dt - if set, force the integrator to use this basic stepsize; must be an integer divisor of output stepsize
+    OUTPUT:
+       [nobj,nt,6] array of [R,vR,vT,z,vz,phi] at each t
+    HISTORY:
+       2016-10-26 - Written - Bovy (UofT)
+       2016-12-08 - Allow a separate set of times for each orbit - Bovy (UofT)
+    """
+    t= nu.array(t)
+    #First check that the potential has C
+    if '_c' in method:
+        if isinstance(pot,list):
+            allHasC= nu.prod([p.hasC for p in pot])
+        else:
+            allHasC= pot.hasC
+    else:
+        allHasC= False
+    if not allHasC or not ext_loaded \
+            or not method.lower() in ['leapfrog_c','rk4_c','rk6_c',
+                                      'symplec4_c','symplec6_c','dopr54_c']:
+        return nu.array([_integrateFullOrbit(vxvv[ii],pot,
+                                             t[ii] if len(t.shape) == 2 else t,
+                                             method,dt)
+                         for ii in range(vxvv.shape[0])])
+    warnings.warn("Using C implementation to integrate orbits",
+                  galpyWarning)
+    #go to the rectangular frame
+    cosphi= nu.cos(vxvv[:,5])
+    sinphi= nu.sin(vxvv[:,5])
+    this_vxvv= nu.array([vxvv[:,0]*cosphi,
+                         vxvv[:,0]*sinphi,
+                         vxvv[:,3],
+                         vxvv[:,1]*cosphi-vxvv[:,2]*sinphi,
+                         vxvv[:,2]*cosphi+vxvv[:,1]*sinphi,
+                         vxvv[:,4]]).T
+    #integrate all orbits at once
+    tmp_out, msg= integrateFullOrbit_c(pot,this_vxvv,t,method,dt=dt)
+    #go back to the cylindrical frame
+    R= nu.sqrt(tmp_out[:,:,0]**2.+tmp_out[:,:,1]**2.)
+    phi= nu.arccos(tmp_out[:,:,0]/R)
+    phi[(tmp_out[:,:,1] < 0.)]= 2.*nu.pi-phi[(tmp_out[:,:,1] < 0.)]
+    vR= tmp_out[:,:,3]*nu.cos(phi)+tmp_out[:,:,4]*nu.sin(phi)
+    vT= tmp_out[:,:,4]*nu.cos(phi)-tmp_out[:,:,3]*nu.sin(phi)
+    out= nu.zeros((vxvv.shape[0],t.shape[-1],6))
+    out[:,:,0]= R
+    out[:,:,1]= vR
+    out[:,:,2]= vT
+    out[:,:,5]= phi
+    out[:,:,3]= tmp_out[:,:,2]
+    out[:,:,4]= tmp_out[:,:,5]
+    return out
+
+def _integrateFullOrbit_events(vxvv,pot,t,method,events,maxevents,dt):
+    """
+    NAME:
+       _integrateFullOrbit_events
+    PURPOSE:
+       integrate multiple orbits in a Phi(R,z,phi) potential at once, only returning the times and phase-space points of events
+    INPUT:
+       vxvv - array with the initial conditions [nobj,6] stacked like
+              [R,vR,vT,z,vz,phi]; vR outward!
+       pot - Potential instance
+       t - list of (equally-spaced) times over which to integrate (0 has to be in this!)
+       method - one of the C integrators
+       events - list of events (see integrateFullOrbit_events_c)
+       maxevents - maximum number of events per orbit
+       dt - if set, force the integrator to use this basic stepsize; must be an integer divisor of output stepsize
+    OUTPUT:
+       (t[nobj,maxevents],vxvv[nobj,maxevents,6],indx[nobj,maxevents],nevent[nobj]) with vxvv stacked like [R,vR,vT,z,vz,phi]
+    HISTORY:
+       2016-11-09 - Written - Bovy (UofT)
+    """
+    #First check that the potential has C
+    if isinstance(pot,list):
+        allHasC= nu.prod([p.hasC for p in pot])
+    else:
+        allHasC= pot.hasC
+    if not allHasC or not ext_loaded \
+            or not method.lower() in ['leapfrog_c','rk4_c','rk6_c',
+                                      'symplec4_c','symplec6_c','dopr54_c']:
+        raise RuntimeError("Event detection requires one of the C integrators and a potential with a C implementation")
+    #go to the rectangular frame
+    cosphi= nu.cos(vxvv[:,5])
+    sinphi= nu.sin(vxvv[:,5])
+    this_vxvv= nu.array([vxvv[:,0]*cosphi,
+                         vxvv[:,0]*sinphi,
+                         vxvv[:,3],
+                         vxvv[:,1]*cosphi-vxvv[:,2]*sinphi,
+                         vxvv[:,2]*cosphi+vxvv[:,1]*sinphi,
+                         vxvv[:,4]]).T
+    tev, yev, iev, nev, msg= integrateFullOrbit_events_c(pot,this_vxvv,
+                                                         nu.array(t),method,
+                                                         events,
+                                                         maxevents=maxevents,
+                                                         dt=dt)
+    #go back to the cylindrical frame
+    R= nu.sqrt(yev[:,:,0]**2.+yev[:,:,1]**2.)
+    phi= nu.arctan2(yev[:,:,1],yev[:,:,0])
+    phi[phi < 0.]+= 2.*nu.pi
+    out= nu.empty_like(yev)
+    out[:,:,0]= R
+    out[:,:,1]= yev[:,:,3]*nu.cos(phi)+yev[:,:,4]*nu.sin(phi)
+    out[:,:,2]= yev[:,:,4]*nu.cos(phi)-yev[:,:,3]*nu.sin(phi)
+    out[:,:,3]= yev[:,:,2]
+    out[:,:,4]= yev[:,:,5]
+    out[:,:,5]= phi
+    return (tev,out,iev,nev)
+
+def _integrateFullOrbit_reduce(vxvv,pot,t,method,reductions,dt):
+    """
+    NAME:
+       _integrateFullOrbit_reduce
+    PURPOSE:
+       integrate multiple orbits in a Phi(R,z,phi) potential at once, only returning reductions of quantities along the orbit and the final phase-space point
+    INPUT:
+       vxvv - array with the initial conditions [nobj,6] stacked like
+              [R,vR,vT,z,vz,phi]; vR outward!
+       pot - Potential instance
+       t - list of (equally-spaced) times at which the orbit is sampled for the reductions (0 has to be in this!)
+       method - one of the C integrators
+       reductions - list of reductions, each one of those of integrateFullOrbit_reduce_c, including 'Eerr' for the maximum relative energy error |E[t]-E[t[0]]|/|E[t[0]]| over the times t; for potentials that cannot be evaluated in C (interpRZPotential), 'Eerr' is the relative energy error (E[t[-1]]-E[t[0]])/|E[t[0]]| at the final time instead
+       dt - if set, force the integrator to use this basic stepsize; must be an integer divisor of output stepsize
+    OUTPUT:
+       (reductions[nobj,nred],vxvv[nobj,6]) with the final phase-space point vxvv stacked like [R,vR,vT,z,vz,phi]
+    HISTORY:
+       2016-11-10 - Written - Bovy (UofT)
+       2016-12-08 - Track the maximum energy error in C - Bovy (UofT)
+    """
+    #First check that the potential has C
+    if isinstance(pot,list):
+        allHasC= nu.prod([p.hasC for p in pot])
+    else:
+        allHasC= pot.hasC
+    if not allHasC or not ext_loaded \
+            or not method.lower() in ['leapfrog_c','rk4_c','rk6_c',
+                                      'symplec4_c','symplec6_c','dopr54_c']:
+        raise RuntimeError("Reduction-only orbit integration requires one of the C integrators and a potential with a C implementation")
+    #go to the rectangular frame
+    cosphi= nu.cos(vxvv[:,5])
+    sinphi= nu.sin(vxvv[:,5])
+    this_vxvv= nu.array([vxvv[:,0]*cosphi,
+                         vxvv[:,0]*sinphi,
+                         vxvv[:,3],
+                         vxvv[:,1]*cosphi-vxvv[:,2]*sinphi,
+                         vxvv[:,2]*cosphi+vxvv[:,1]*sinphi,
+                         vxvv[:,4]]).T
+    #If the potential cannot be evaluated in C, the energy error is computed
+    #here at the final time, the rest in C
+    if _hasCEval(pot):
+        Eerr_indx= []
+    else:
+        Eerr_indx= [ii for ii,red in enumerate(reductions)
+                    if isinstance(red,str) and red == 'Eerr']
+        if len(Eerr_indx) > 0:
+            warnings.warn("The potential cannot be evaluated in C, so the 'Eerr' reduction is the energy error at the final time rather than the maximum energy error along the orbit",galpyWarning)
+    c_reductions= [red for ii,red in enumerate(reductions)
+                   if not ii in Eerr_indx]
+    t= nu.array(t)
+    c_red, yfinal, msg= integrateFullOrbit_reduce_c(pot,this_vxvv,t,method,
+                                                    c_reductions,dt=dt)
+    #go back to the cylindrical frame
+    out= nu.empty_like(yfinal)
+    out[:,0]= nu.sqrt(yfinal[:,0]**2.+yfinal[:,1]**2.)
+    phi= nu.arctan2(yfinal[:,1],yfinal[:,0])
+    phi[phi < 0.]+= 2.*nu.pi
+    out[:,1]= yfinal[:,3]*nu.cos(phi)+yfinal[:,4]*nu.sin(phi)
+    out[:,2]= yfinal[:,4]*nu.cos(phi)-yfinal[:,3]*nu.sin(phi)
+    out[:,3]= yfinal[:,2]
+    out[:,4]= yfinal[:,5]
+    out[:,5]= phi
+    red= nu.empty((vxvv.shape[0],len(reductions)))
+    red[:,[ii for ii in range(len(reductions)) if not ii in Eerr_indx]]= c_red
+    if len(Eerr_indx) > 0:
+        Eo= nu.array([evaluatePotentials(pot,vxvv[ii,0],vxvv[ii,3],
+                                         phi=vxvv[ii,5],t=t[0],
+                                         use_physical=False)
+                      for ii in range(vxvv.shape[0])])\
+                      +(vxvv[:,1]**2.+vxvv[:,2]**2.+vxvv[:,4]**2.)/2.
+        Ef= nu.array([evaluatePotentials(pot,out[ii,0],out[ii,3],
+                                         phi=out[ii,5],t=t[-1],
+                                         use_physical=False)
+                      for ii in range(vxvv.shape[0])])\
+                      +(out[:,1]**2.+out[:,2]**2.+out[:,4]**2.)/2.
+        red[:,Eerr_indx]= nu.atleast_2d((Ef-Eo)/nu.fabs(Eo)).T
+    return (red,out)
+
 def _FullEOM(y,t,pot):
     """
     NAME:
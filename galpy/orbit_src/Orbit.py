@@ -365,7 +365,8 @@ class Orbit(object):
             self._vo= vo
         self._orb.turn_physical_on(ro=ro,vo=vo)
 
-    def integrate(self,t,pot,method='symplec4_c',dt=None):
+    def integrate(self,t,pot,method='symplec4_c',dt=None,outfile=None,
+                  resume=False,checkpoint_every=None):
         """
         NAME:
 
@@ -392,6 +393,12 @@ class Orbit(object):
 
            dt= (None) if set, force the integrator to use this basic stepsize; must be an integer divisor of output stepsize (only works for the C integrators that use a fixed stepsize) (can be Quantity)
 
+           outfile= (None) if set, write the orbit to this .npy file in blocks as the integration progresses; the orbit is then memory-mapped from this file, such that getOrbit() and the orbit's methods read it lazily from disk (useful for orbits that do not fit in memory; read it back using numpy.load(outfile,mmap_mode='r')); each block restarts the integrator from the state at the end of the previous block (including the estimate of the step size when dt is not set), such that the orbit can differ slightly from that obtained without outfile (up to ~1e-5 for leapfrog and odeint); set dt to make the fixed-step C integrators (leapfrog_c, symplec*_c, rk*_c) agree to round-off
+
+           resume= (False) if True and outfile is set, resume an integration into outfile that was interrupted (e.g., killed by a batch scheduler) from its last checkpoint; the state after each block of the integration is saved in outfile+'.checkpoint.npz', and the resumed orbit is identical to that of an uninterrupted integration (the times, potential, method, and dt need to be the same as for the interrupted integration; starts from scratch when no checkpoint exists)
+
+           checkpoint_every= (None) if outfile is set, number of output times that are integrated between checkpoints (default: 10000); a smaller value loses less work when the integration is interrupted, at the cost of more frequent writes
+
         OUTPUT:
 
            (none) (get the actual orbit using getOrbit()
@@ -402,6 +409,10 @@ class Orbit(object):
 
            2015-06-28 - Added dt keyword - Bovy (IAS)
 
+           2016-12-05 - Added outfile keyword - Bovy (UofT)
+
+           2016-12-07 - Added resume and checkpoint_every keywords - Bovy (UofT)
+
         """
         _check_potential_dim(self,pot)
         _check_consistent_units(self,pot)
@@ -419,7 +430,145 @@ class Orbit(object):
                           galpyWarning)
         if not _check_integrate_dt(t,dt):
             raise ValueError('dt input (integrator stepsize) for Orbit.integrate must be an integer divisor of the output stepsize')
-        self._orb.integrate(t,pot,method=method,dt=dt)
+        if resume and outfile is None:
+            raise ValueError('resume=True in Orbit.integrate requires outfile= to be set')
+        self._orb.integrate(t,pot,method=method,dt=dt,outfile=outfile,
+                            resume=resume,checkpoint_every=checkpoint_every)
+
+    def integrate_events(self,t,pot,events=['peri','apo','zturn'],
+                         method='symplec4_c',dt=None,maxevents=1000):
+        """
+        NAME:
+
+           integrate_events
+
+        PURPOSE:
+
+           integrate the orbit, only storing the times and phase-space points of events (such as peri- and apocenters); rperi, rap, zmax, and e are then computed from the events
+
+        INPUT:
+
+           t - list of equally-spaced times over which to integrate (0 has to be in this!) (can be Quantity); the orbit is not stored at these times, so they can be finely spaced, but only one event of each kind can be found in each interval
+
+           pot - potential instance or list of instances
+
+           events= (['peri','apo','zturn']) list of events, each one of
+
+                   'peri' for pericenters (minima in spherical r)
+                   'apo' for apocenters (maxima in spherical r)
+                   'zcross' for crossings of z=0
+                   'zturn' for vertical turning points (vz=0)
+                   ('plane',(nx,ny,nz,d)) for crossings of the plane nx x + ny y + nz z = d (rectangular Galactocentric coordinates, natural units)
+
+           method= one of the C integrators: 'leapfrog_c', 'symplec4_c', 'symplec6_c', 'rk4_c', 'rk6_c', 'dopr54_c'
+
+           dt= (None) if set, force the integrator to use this basic stepsize; must be an integer divisor of output stepsize (can be Quantity)
+
+           maxevents= (1000) maximum number of events to store; the integration stops once this number is reached
+
+        OUTPUT:
+
+           (none) (get the events using getEvents(); any previous regular orbit integration will be erased!)
+
+        HISTORY:
+
+           2016-11-09 - Written - Bovy (UofT)
+
+        """
+        if not isinstance(self._orb,FullOrbit):
+            raise AttributeError("integrate_events is only supported for full (R,vR,vT,z,vz,phi) orbits")
+        _check_potential_dim(self,pot)
+        _check_consistent_units(self,pot)
+        # Parse t
+        if _APY_LOADED and isinstance(t,units.Quantity):
+            t= t.to(units.Gyr).value\
+                /bovy_conversion.time_in_Gyr(self._vo,self._ro)
+        if _APY_LOADED and not dt is None and isinstance(dt,units.Quantity):
+            dt= dt.to(units.Gyr).value\
+                /bovy_conversion.time_in_Gyr(self._vo,self._ro)
+        if not _check_integrate_dt(t,dt):
+            raise ValueError('dt input (integrator stepsize) for Orbit.integrate_events must be an integer divisor of the output stepsize')
+        self._orb.integrate_events(t,pot,events,method=method,dt=dt,
+                                   maxevents=maxevents)
+
+    def integrate_reduce(self,t,pot,reductions,method='symplec4_c',dt=None):
+        """
+        NAME:
+
+           integrate_reduce
+
+        PURPOSE:
+
+           integrate the orbit, only returning summary statistics (reductions) of quantities along the orbit, which are accumulated during the C integration without storing the orbit
+
+        INPUT:
+
+           t - list of equally-spaced times at which the orbit is sampled for the reductions (0 has to be in this!) (can be Quantity)
+
+           pot - potential instance or list of instances
+
+           reductions - list of reductions, each one of
+
+                   ('mean',quantity[,power]) for the time average of quantity^power (default power=1)
+                   ('min',quantity[,power]) or ('max',quantity[,power]) for the minimum or maximum of quantity^power
+                   ('frac',quantity,lo,hi) for the fraction of the time that lo <= quantity < hi
+                   'Eerr' for the maximum relative energy error |E[t]-E[t[0]]|/|E[t[0]]| over the times t (for interpRZPotential, which cannot be evaluated in C, the relative energy error at the final time)
+
+                   where quantity is one of 'x', 'y', 'z', 'vx', 'vy', 'vz', 'R', 'r' (spherical radius), 'vR', 'vT', or 'Lz' (natural units)
+
+           method= one of the C integrators: 'leapfrog_c', 'symplec4_c', 'symplec6_c', 'rk4_c', 'rk6_c', 'dopr54_c'
+
+           dt= (None) if set, force the integrator to use this basic stepsize; must be an integer divisor of output stepsize (can be Quantity)
+
+        OUTPUT:
+
+           array of reductions (natural units); a previous regular orbit integration is not affected
+
+        HISTORY:
+
+           2016-11-10 - Written - Bovy (UofT)
+
+        """
+        if not isinstance(self._orb,FullOrbit):
+            raise AttributeError("integrate_reduce is only supported for full (R,vR,vT,z,vz,phi) orbits")
+        _check_potential_dim(self,pot)
+        _check_consistent_units(self,pot)
+        # Parse t
+        if _APY_LOADED and isinstance(t,units.Quantity):
+            t= t.to(units.Gyr).value\
+                /bovy_conversion.time_in_Gyr(self._vo,self._ro)
+        if _APY_LOADED and not dt is None and isinstance(dt,units.Quantity):
+            dt= dt.to(units.Gyr).value\
+                /bovy_conversion.time_in_Gyr(self._vo,self._ro)
+        if not _check_integrate_dt(t,dt):
+            raise ValueError('dt input (integrator stepsize) for Orbit.integrate_reduce must be an integer divisor of the output stepsize')
+        return self._orb.integrate_reduce(t,pot,reductions,method=method,dt=dt)
+
+    def getEvents(self):
+        """
+
+        NAME:
+
+           getEvents
+
+        PURPOSE:
+
+           return the events found by a previous integrate_events call
+
+        INPUT:
+
+           (none)
+
+        OUTPUT:
+
+           (t,vxvv,indx): times t[nevent], phase-space points vxvv[nevent,6] ([R,vR,vT,z,vz,phi]), and the index of each event in the events list given to integrate_events, indx[nevent]
+
+        HISTORY:
+
+           2016-11-09 - Written - Bovy (UofT)
+
+        """
+        return self._orb.getEvents()
 
     def integrate_dxdv(self,dxdv,t,pot,method='dopr54_c',
                        rectIn=False,rectOut=False):
@@ -497,7 +646,7 @@ class Orbit(object):
         HISTORY:
            2011-04-13 - Written - Bovy (NYU)
         """
-        if hasattr(self,'_orbInterp'): delattr(self,'_orbInterp')
+        if hasattr(self._orb,'_orbInterp'): delattr(self._orb,'_orbInterp')
         if hasattr(self,'rs'): delattr(self,'rs')
         sortindx = list(range(len(self._orb.t)))
         sortindx.sort(key=lambda x: self._orb.t[x],reverse=True)
@@ -1,26 +1,26 @@
+import os
 import warnings
 import math as m
 import numpy as nu
-import scipy
-from scipy import interpolate
 _APY_LOADED= True
 try:
     from astropy import units, coordinates
 except ImportError:
     _APY_LOADED= False
 from galpy import actionAngle
+from galpy.actionAngle_src.actionAngle import _grid_hash
 import galpy.util.bovy_plot as plot
 import galpy.util.bovy_coords as coords
 from galpy.util.bovy_conversion import physical_conversion
 from galpy.util import bovy_conversion, galpyWarning
 from galpy.util import config
-if int(scipy.__version__.split('.')[0]) < 1 and \
-        int(scipy.__version__.split('.')[1]) < 15: #pragma: no cover
-    _OLD_SCIPY= True
-    _KWINTERP= {}  #for scipy version <1.15
-else:
-    _OLD_SCIPY= False
-    _KWINTERP= {'ext':2}  #for scipy version >=1.15
+from galpy.potential_src.Potential import _evaluateRforces, \
+    _evaluatezforces, _evaluatephiforces
+from galpy.potential_src.planarPotential import _evaluateplanarRforces, \
+    _evaluateplanarphiforces
+from galpy.potential_src.linearPotential import _evaluatelinearForces
+# Number of output times integrated at once when writing the orbit to a file
+_OUTFILE_BLOCKSIZE= 10000
 class OrbitTop(object):
     """General class that holds orbits and integrates them"""
     def __init__(self,vxvv=None,vo=None,ro=None,zo=0.025,
@@ -113,7 +113,8 @@ class OrbitTop(object):
             self._vo= vo
         return None
 
-    def integrate(self,t,pot,method='symplec4_c',dt=None):
+    def integrate(self,t,pot,method='symplec4_c',dt=None,outfile=None,
+                  resume=False,checkpoint_every=None):
         """
         NAME:
            integrate
@@ -122,6 +123,9 @@ class OrbitTop(object):
         INPUT:
            t - list of times at which to output (0 has to be in this!)
            pot - Potential instance or list of instances
+           outfile= (None) if set, write the orbit to this .npy file and memory-map it
+           resume= (False) if True, resume an interrupted integration into outfile from its last checkpoint
+           checkpoint_every= (None) number of output times after which to write a checkpoint when using outfile (default: 10000)
         OUTPUT:
            (none) (get the actual orbit using self.getOrbit()
         HISTORY:
@@ -199,10 +203,7 @@ class OrbitTop(object):
         HISTORY:
            2010-09-21 - Written - Bovy (NYU)
         """
-        thiso= self(*args,**kwargs)
-        onet= (len(thiso.shape) == 1)
-        if onet: return thiso[0]
-        else: return thiso[0,:]
+        return self._evaluate([0],*args)[0]
 
     @physical_conversion('position')
     def r(self,*args,**kwargs):
@@ -220,10 +221,8 @@ class OrbitTop(object):
         HISTORY:
            2016-04-19 - Written - Bovy (UofT)
         """
-        thiso= self(*args,**kwargs)
-        onet= (len(thiso.shape) == 1)
-        if onet: return nu.sqrt(thiso[0]**2.+thiso[3]**2.)
-        else: return nu.sqrt(thiso[0,:]**2.+thiso[3,:]**2.)
+        thiso= self._evaluate([0,3],*args)
+        return nu.sqrt(thiso[0]**2.+thiso[1]**2.)
 
     @physical_conversion('velocity')
     def vR(self,*args,**kwargs):
@@ -241,10 +240,7 @@ class OrbitTop(object):
         HISTORY:
            2010-09-21 - Written - Bovy (NYU)
         """
-        thiso= self(*args,**kwargs)
-        onet= (len(thiso.shape) == 1)
-        if onet: return thiso[1]
-        else: return thiso[1,:]
+        return self._evaluate([1],*args)[0]
 
     @physical_conversion('velocity')
     def vT(self,*args,**kwargs):
@@ -262,10 +258,7 @@ class OrbitTop(object):
         HISTORY:
            2010-09-21 - Written - Bovy (NYU)
         """
-        thiso= self(*args,**kwargs)
-        onet= (len(thiso.shape) == 1)
-        if onet: return thiso[2]
-        else: return thiso[2,:]
+        return self._evaluate([2],*args)[0]
 
     @physical_conversion('position')
     def z(self,*args,**kwargs):
@@ -285,10 +278,7 @@ class OrbitTop(object):
         """
         if len(self.vxvv) < 5:
             raise AttributeError("linear and planar orbits do not have z()")
-        thiso= self(*args,**kwargs)
-        onet= (len(thiso.shape) == 1)
-        if onet: return thiso[3]
-        else: return thiso[3,:]
+        return self._evaluate([3],*args)[0]
 
     @physical_conversion('velocity')
     def vz(self,*args,**kwargs):
@@ -308,10 +298,7 @@ class OrbitTop(object):
         """
         if len(self.vxvv) < 5:
             raise AttributeError("linear and planar orbits do not have vz()")
-        thiso= self(*args,**kwargs)
-        onet= (len(thiso.shape) == 1)
-        if onet: return thiso[4]
-        else: return thiso[4,:]
+        return self._evaluate([4],*args)[0]
         
     @physical_conversion('angle')
     def phi(self,*args,**kwargs):
@@ -329,10 +316,7 @@ class OrbitTop(object):
         """
         if len(self.vxvv) != 4 and len(self.vxvv) != 6:
             raise AttributeError("orbit must track azimuth to use phi()")
-        thiso= self(*args,**kwargs)
-        onet= (len(thiso.shape) == 1)
-        if onet: return thiso[-1]
-        else: return thiso[-1,:]
+        return self._evaluate([len(self.vxvv)-1],*args)[0]
 
     @physical_conversion('position')
     def x(self,*args,**kwargs):
@@ -1273,8 +1257,24 @@ class OrbitTop(object):
         HISTORY:
            2010-07-10 - Written - Bovy (NYU)
         """
+        return self._evaluate(list(range(len(self.vxvv))),*args)
+
+    def _evaluate(self,indx,*args):
+        """
+        NAME:
+           _evaluate
+        PURPOSE:
+           return the coordinates indx of the orbit vector at time t; the interpolation is only set up for the requested coordinates
+        INPUT:
+           indx - list of indices of the coordinates in the orbit vector
+           t - (optional) desired time
+        OUTPUT:
+           coordinates indx of [R,vR,vT,z,vz(,phi)] or [R,vR,vT(,phi)] depending on the orbit
+        HISTORY:
+           2016-12-12 - Written - Bovy (UofT)
+        """
         if len(args) == 0:
-            return nu.array(self.vxvv)
+            return nu.array(self.vxvv)[indx]
         else:
             t= args[0]
         # Parse t
@@ -1285,53 +1285,24 @@ class OrbitTop(object):
                     and self._integrate_t_asQuantity \
                     and not nu.all(t == self.t):
             warnings.warn("You specified integration times as a Quantity, but are evaluating at times not specified as a Quantity; assuming that time given is in natural (internal) units (multiply time by unit to get output at physical time)",galpyWarning)
-        if isinstance(t,(int,float)) and hasattr(self,'t') \
-                and t in list(self.t):
-            return self.orbit[list(self.t).index(t),:]
-        else:
-            if isinstance(t,(int,float)): 
-                nt= 1
-                t= [t]
-            else: 
-                nt= len(t)
-            dim= len(self.vxvv)
-            try:
-                self._setupOrbitInterp()
-            except:
-                out= nu.zeros((dim,nt))
-                for jj in range(nt):
-                    try:
-                        indx= list(self.t).index(t[jj])
-                    except ValueError:
-                        raise LookupError("Orbit interpolaton failed; integrate on finer grid")
-                    for ii in range(dim):
-                        out[ii,jj]= self.orbit[indx,ii]
-                return out #should always have nt > 1, bc otherwise covered by above
-            out= []
-            if _OLD_SCIPY and not isinstance(self._orbInterp[0],_fakeInterp) \
-                    and nu.any((nu.array(t) < self._orbInterp[0]._data[3])\
-                               +(nu.array(t) > self._orbInterp[0]._data[4])): #pragma: no cover
-                raise ValueError("One or more requested time is not within the integrated range")
-            if dim == 4 or dim == 6:
-                #Unpack interpolated x and y to R and phi
-                x= self._orbInterp[0](t)
-                y= self._orbInterp[-1](t)
-                R= nu.sqrt(x*x+y*y)
-                phi= nu.arctan2(y,x) % (2.*nu.pi)
-                for ii in range(dim):
-                    if ii == 0:
-                        out.append(R) 
-                    elif ii == dim-1:
-                        out.append(phi) 
-                    else:
-                        out.append(self._orbInterp[ii](t))
-            else:
-                for ii in range(dim):
-                    out.append(self._orbInterp[ii](t))
-            if nt == 1:
-                return nu.array(out).reshape(dim)
-            else:
-                return nu.array(out).reshape((dim,nt))
+        if not hasattr(self,'t'): #Orbit has not been integrated
+            if nu.any(nu.array(t) != 0.):
+                raise ValueError("Integrate instance before evaluating it at non-zero time")
+            out= nu.tile(nu.array(self.vxvv)[indx],
+                         (len(nu.atleast_1d(t)),1)).T
+            if len(self.vxvv) == 4 or len(self.vxvv) == 6:
+                out[nu.array(indx) == len(self.vxvv)-1]%= 2.*nu.pi
+            if out.shape[1] == 1: return out[:,0]
+            else: return out
+        self._setupOrbitInterp()
+        if isinstance(t,(int,float)):
+            tindx= self._orbInterp.node(t)
+            if not tindx is None:
+                return nu.array(self.orbit[tindx])[indx]
+        t= nu.atleast_1d(nu.array(t,dtype='float'))
+        out= self._orbInterp(t,indx)
+        if len(t) == 1: return out[:,0]
+        else: return out
 
     def plot(self,*args,**kwargs):
         """
@@ -2054,56 +2025,262 @@ class OrbitTop(object):
             kwargs['d2']= 'Jacobi'
         self.plot(*args,**kwargs)
         
+    def _integrate_outfile(self,integrator,t,pot,method,dt,outfile,
+                           resume=False,checkpoint_every=None):
+        """
+        NAME:
+           _integrate_outfile
+        PURPOSE:
+           integrate the orbit in blocks of output times, writing each block to a memory-mapped .npy file as the integration progresses and checkpointing the state after each block
+           (each block restarts the integrator, including its step-size estimate when dt is None, so the orbit can differ slightly from a single in-memory integration; for the fixed-step C integrators with dt set the two agree to round-off)
+        INPUT:
+           integrator - function(vxvv,pot,t,method,dt) that returns (orbit,msg)
+           t - list of times at which to output (0 has to be in this!)
+           pot - potential instance or list of instances
+           method - integration method
+           dt - basic stepsize (or None)
+           outfile - name of the .npy file to write the orbit to
+           resume= (False) if True, resume from the checkpoint of a previous integration into outfile
+           checkpoint_every= (None) number of output times integrated in each block, after which the state is checkpointed (default: _OUTFILE_BLOCKSIZE)
+        OUTPUT:
+           (orbit,msg): orbit is the memory-mapped [nt,dim] array, msg the first non-zero error message of any block
+        HISTORY:
+           2016-12-05 - Written - Bovy (UofT)
+           2016-12-07 - Added checkpointing and resume - Bovy (UofT)
+        """
+        if checkpoint_every is None: checkpoint_every= _OUTFILE_BLOCKSIZE
+        if int(checkpoint_every) < 1:
+            raise ValueError('checkpoint_every= in Orbit.integrate must be a positive integer')
+        checkpoint_every= int(checkpoint_every)
+        t= nu.array(t)
+        self._outfile= outfile
+        chkfile= _checkpoint_filename(outfile)
+        pothash= _grid_hash(pot,[])
+        if resume and os.path.exists(chkfile):
+            chk= nu.load(chkfile)
+            chkt, ii, vxvv= chk['t'], int(chk['indx']), chk['vxvv']
+            chkmethod= str(chk['method'])
+            chkdt= None if nu.isnan(chk['dt']) else float(chk['dt'])
+            chkpot= str(chk['pot']) if 'pot' in chk.files else None
+            chk.close()
+            if not chkt.shape == t.shape or not nu.all(chkt == t) \
+                    or not chkmethod == method or not chkdt == dt \
+                    or not chkpot == pothash:
+                raise ValueError("Checkpoint %s does not correspond to the requested integration (times, potential, method, or dt differ)" % chkfile)
+            orbit= nu.lib.format.open_memmap(outfile,mode='r+')
+            if not orbit.shape == (len(t),len(self.vxvv)) \
+                    or not nu.all(orbit[0] == self.vxvv):
+                raise ValueError("Orbit in %s does not correspond to this orbit's initial condition" % outfile)
+        else:
+            orbit= nu.lib.format.open_memmap(outfile,mode='w+',
+                                             dtype=nu.float64,
+                                             shape=(len(t),len(self.vxvv)))
+            orbit[0]= self.vxvv
+            ii= 0
+            vxvv= self.vxvv
+        msg= 0
+        while ii < len(t)-1:
+            jj= min(ii+checkpoint_every,len(t)-1)
+            out, thismsg= integrator(vxvv,pot,t[ii:jj+1],method,dt)
+            orbit[ii+1:jj+1]= out[1:]
+            orbit.flush()
+            if msg == 0: msg= thismsg
+            # Start the next block from the last point of this block
+            vxvv= out[-1]
+            ii= jj
+            _write_checkpoint(chkfile,t,ii,vxvv,pothash,method,dt)
+        return (orbit,msg)
+
     def _setupOrbitInterp(self):
         if not hasattr(self,"_orbInterp"):
-            # First check that times increase
-            if hasattr(self,"t"): #Orbit has been integrated
-                if self.t[1] < self.t[0]: #must be backward
-                    sindx= nu.argsort(self.t)
-                    # sort
-                    self.t= self.t[sindx]
-                    self.orbit= self.orbit[sindx]
-                    usindx= nu.argsort(sindx) # to later unsort
-            orbInterp= []
-            for ii in range(len(self.vxvv)):
-                if (len(self.vxvv) == 4 or len(self.vxvv) == 6) and ii == 0:
-                   #Interpolate x and y rather than R and phi to avoid issues w/ phase wrapping
-                    if not hasattr(self,"t"): #Orbit has not been integrated
-                        orbInterp.append(_fakeInterp(self.vxvv[0]*nu.cos(self.vxvv[-1])))
-                    else:
-                        orbInterp.append(interpolate.InterpolatedUnivariateSpline(\
-                                self.t,self.orbit[:,0]*nu.cos(self.orbit[:,-1]),
-                                **_KWINTERP))
-                elif (len(self.vxvv) == 4 or len(self.vxvv) == 6) and \
-                        ii == len(self.vxvv)-1:
-                    if not hasattr(self,"t"): #Orbit has not been integrated
-                        orbInterp.append(_fakeInterp(self.vxvv[0]*nu.sin(self.vxvv[-1])))
-                    else:
-                        orbInterp.append(interpolate.InterpolatedUnivariateSpline(\
-                                self.t,self.orbit[:,0]*nu.sin(self.orbit[:,-1]),**_KWINTERP))
-                else:
-                    if not hasattr(self,"t"): #Orbit has not been integrated
-                        orbInterp.append(_fakeInterp(self.vxvv[ii]))
-                    else:
-                        orbInterp.append(interpolate.InterpolatedUnivariateSpline(\
-                                self.t,self.orbit[:,ii],**_KWINTERP))
-            self._orbInterp= orbInterp
-            try: #unsort
-                self.t= self.t[usindx]
-                self.orbit= self.orbit[usindx]
-            except: pass
+            self._orbInterp= _orbitInterp(self.t,self.orbit,
+                                          pot=getattr(self,'_pot',None))
+        return None
+
+
+class _orbitInterp(object):
+    """Piecewise cubic Hermite interpolation of an integrated orbit, using the velocities and forces along the orbit as derivatives; the forces are only computed when and where they are needed"""
+    def __init__(self,t,orbit,pot=None):
+        """
+        NAME:
+           __init__
+        PURPOSE:
+           set up the interpolation of an integrated orbit
+        INPUT:
+           t - times at which the orbit is sampled
+           orbit - [nt,dim] orbit (not copied, such that memory-mapped orbits stay on disk)
+           pot= (None) potential that the orbit was integrated in, used for the derivatives of the velocities (if None or if the forces cannot be evaluated, finite differences are used)
+        OUTPUT:
+           instance
+        HISTORY:
+           2016-12-12 - Written - Bovy (UofT)
+        """
+        self._orbit= orbit
+        self._pot= pot
+        self._dim= orbit.shape[1]
+        # Nodes in order of increasing time, sindx maps them to the orbit
+        if nu.all(t[1:] > t[:-1]):
+            self._sindx= None
+            self._t= t
+        else:
+            self._sindx= nu.argsort(t)
+            self._t= t[self._sindx]
+        # Derivatives of the velocities, computed lazily at the nodes
+        self._vderivs= {}
         return None
 
+    def _rows(self,nodes):
+        """Return the orbit at (sorted) nodes"""
+        if self._sindx is None: return nu.array(self._orbit[nodes])
+        else: return nu.array(self._orbit[self._sindx[nodes]])
+
+    def node(self,t):
+        """Return the index in the orbit of the node at time t (or None if t is not a node)"""
+        node= nu.searchsorted(self._t,t)
+        if node == len(self._t) or not self._t[node] == t: return None
+        elif self._sindx is None: return node
+        else: return self._sindx[node]
 
-class _fakeInterp(object): 
-    """Fake class to simulate interpolation when orbit was not integrated"""
-    def __init__(self,x):
-        self.x= x
-    def __call__(self,t):
-        if nu.any(nu.array(t) != 0.):
-            raise ValueError("Integrate instance before evaluating it at non-zero time")
+    def __call__(self,t,indx):
+        """
+        NAME:
+           __call__
+        PURPOSE:
+           evaluate the interpolated orbit
+        INPUT:
+           t - array of times
+           indx - list of indices of the coordinates in the orbit vector
+        OUTPUT:
+           [len(indx),nt] array
+        HISTORY:
+           2016-12-12 - Written - Bovy (UofT)
+        """
+        if nu.any(t < self._t[0]) or nu.any(t > self._t[-1]):
+            raise ValueError("One or more requested time is not within the integrated range")
+        # Left nodes of the intervals that contain t, using O(log n) lookups
+        node= nu.searchsorted(self._t,t,side='right')-1
+        node[node > len(self._t)-2]= len(self._t)-2
+        node[node < 0]= 0
+        if len(self._t) == 1: # Only t= t[0] can be requested
+            return self._rows(node)[:,indx].T
+        h= self._t[node+1]-self._t[node]
+        u= (t-self._t[node])/h
+        if len(self._t) < 4 and not nu.all((u == 0.)+(u == 1.)):
+            raise LookupError("Orbit interpolaton failed; integrate on finer grid")
+        # Hermite basis functions, multiplied by h for the derivatives
+        u2= u*u
+        u3= u2*u
+        h00= 2.*u3-3.*u2+1.
+        h10= (u3-2.*u2+u)*h
+        h01= -2.*u3+3.*u2
+        h11= (u3-u2)*h
+        o0= self._rows(node)
+        o1= self._rows(node+1)
+        dim= self._dim
+        out= nu.empty((len(indx),len(t)))
+        xy= None
+        for jj,ii in enumerate(indx):
+            if (dim == 4 or dim == 6) and (ii == 0 or ii == dim-1):
+                #Interpolate x and y rather than R and phi to avoid issues w/ phase wrapping
+                if xy is None:
+                    cp0, sp0= nu.cos(o0[:,-1]), nu.sin(o0[:,-1])
+                    cp1, sp1= nu.cos(o1[:,-1]), nu.sin(o1[:,-1])
+                    xy= (h00*o0[:,0]*cp0+h10*(o0[:,1]*cp0-o0[:,2]*sp0)
+                         +h01*o1[:,0]*cp1+h11*(o1[:,1]*cp1-o1[:,2]*sp1),
+                         h00*o0[:,0]*sp0+h10*(o0[:,1]*sp0+o0[:,2]*cp0)
+                         +h01*o1[:,0]*sp1+h11*(o1[:,1]*sp1+o1[:,2]*cp1))
+                if ii == 0:
+                    out[jj]= nu.sqrt(xy[0]**2.+xy[1]**2.)
+                else:
+                    out[jj]= nu.arctan2(xy[1],xy[0])
+            elif ii == 0 or ii == 3: # positions: derivatives are velocities
+                out[jj]= h00*o0[:,ii]+h10*o0[:,ii+1]\
+                    +h01*o1[:,ii]+h11*o1[:,ii+1]
+            else: # velocities: derivatives are forces
+                vderiv= self._vderiv(ii,nu.hstack((node,node+1)))
+                out[jj]= h00*o0[:,ii]+h10*vderiv[:len(t)]\
+                    +h01*o1[:,ii]+h11*vderiv[len(t):]
+        # Return the orbit itself at the nodes
+        onnode0= (u == 0.)
+        if nu.any(onnode0): out[:,onnode0]= o0[onnode0][:,indx].T
+        onnode1= (u == 1.)
+        if nu.any(onnode1): out[:,onnode1]= o1[onnode1][:,indx].T
+        if dim == 4 or dim == 6:
+            out[nu.array(indx) == dim-1]%= 2.*nu.pi
+        return out
+
+    def _vderiv(self,ii,nodes):
+        """Return the time derivative of velocity coordinate ii at (sorted) nodes, computing and caching it where necessary"""
+        if not ii in self._vderivs:
+            self._vderivs[ii]= nu.zeros(len(self._t))+nu.nan
+        vderiv= self._vderivs[ii]
+        out= vderiv[nodes]
+        if not nu.any(nu.isnan(out)): return out
+        new= nu.unique(nodes[nu.isnan(out)])
+        try:
+            vderiv[new]= _orbitVelocityDerivative(self._pot,ii,
+                                                  self._rows(new),
+                                                  self._t[new])
+        except (TypeError,ValueError):
+            # Potential cannot be evaluated for arrays, try one by one
+            try:
+                for node in new:
+                    vderiv[node]= _orbitVelocityDerivative(\
+                        self._pot,ii,self._rows([node]),self._t[node])
+            except (TypeError,ValueError):
+                # Use finite differences
+                warnings.warn("Could not evaluate the forces to interpolate the orbit with velocity derivatives; using less accurate finite differences of the velocities instead",galpyWarning)
+                nodem= nu.amax([new-1,nu.zeros_like(new)],axis=0)
+                nodep= nu.amin([new+1,nu.zeros_like(new)+len(self._t)-1],
+                               axis=0)
+                vderiv[new]= (self._rows(nodep)[:,ii]
+                              -self._rows(nodem)[:,ii])\
+                              /(self._t[nodep]-self._t[nodem])
+        return vderiv[nodes]
+
+def _orbitVelocityDerivative(pot,ii,orbit,t):
+    """Time derivative of velocity coordinate ii along the [n,dim] orbit at times t"""
+    if pot is None:
+        raise ValueError("Potential required to compute the derivatives of the velocities")
+    dim= orbit.shape[1]
+    if dim == 2:
+        return _evaluatelinearForces(pot,orbit[:,0],t=t)
+    R, vR, vT= orbit[:,0], orbit[:,1], orbit[:,2]
+    if dim == 4 or dim == 6: phi= orbit[:,-1]
+    else: phi= None
+    if dim < 5:
+        if ii == 1:
+            return _evaluateplanarRforces(pot,R,phi=phi,t=t)+vT**2./R
+        elif dim == 4:
+            return _evaluateplanarphiforces(pot,R,phi=phi,t=t)/R-vR*vT/R
         else:
-            return nu.array([self.x for i in t])
+            return -vR*vT/R
+    z= orbit[:,3]
+    if ii == 1:
+        return _evaluateRforces(pot,R,z,phi=phi,t=t)+vT**2./R
+    elif ii == 4:
+        return _evaluatezforces(pot,R,z,phi=phi,t=t)
+    elif dim == 6:
+        return _evaluatephiforces(pot,R,z,phi=phi,t=t)/R-vR*vT/R
+    else:
+        return -vR*vT/R
+
+def _checkpoint_filename(outfile):
+    """Name of the checkpoint file of an orbit integrated into outfile"""
+    return outfile+'.checkpoint.npz'
+
+def _write_checkpoint(chkfile,t,indx,vxvv,pothash,method,dt):
+    """Write the state after the integration up to t[indx] to chkfile, such that an interrupted integration can be resumed; the file is replaced atomically"""
+    tmpfile= chkfile+'.tmp'
+    with open(tmpfile,'wb') as savefile:
+        nu.savez(savefile,t=t,indx=indx,vxvv=vxvv,pot=pothash,method=method,
+                 dt=nu.nan if dt is None else dt)
+    try:
+        os.rename(tmpfile,chkfile)
+    except OSError: #pragma: no cover (Windows cannot rename onto a file)
+        os.remove(chkfile)
+        os.rename(tmpfile,chkfile)
+    return None
 
 def _check_roSet(orb,kwargs,funcName):
     """Function to check whether ro is set, because it's required for funcName"""
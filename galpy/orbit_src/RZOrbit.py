@@ -49,7 +49,8 @@ class RZOrbit(OrbitTop):
                           ro=ro,zo=zo,vo=vo,solarmotion=solarmotion)
         return None
 
-    def integrate(self,t,pot,method='symplec4_c',dt=None):
+    def integrate(self,t,pot,method='symplec4_c',dt=None,outfile=None,
+                  resume=False,checkpoint_every=None):
         """
         NAME:
            integrate
@@ -65,16 +66,26 @@ class RZOrbit(OrbitTop):
                    'rk6_c' for a 6-th order Runge-Kutta integrator in C
                    'dopr54_c' for a Dormand-Prince integrator in C (generally the fastest)
            dt= (None) if set, force the integrator to use this basic stepsize; must be an integer divisor of output stepsize
+           outfile= (None) if set, write the orbit to this .npy file in blocks as the integration progresses and memory-map the orbit from this file (for orbits that do not fit in memory)
+           resume= (False) if True, resume an interrupted integration into outfile from its last checkpoint
+           checkpoint_every= (None) number of output times after which to write a checkpoint when using outfile (default: 10000)
         OUTPUT:
            (none) (get the actual orbit using getOrbit()
         HISTORY:
            2010-07-10
         """
         if hasattr(self,'_orbInterp'): delattr(self,'_orbInterp')
+        if hasattr(self,'_outfile'): delattr(self,'_outfile')
         if hasattr(self,'rs'): delattr(self,'rs')
         self.t= nu.array(t)
         self._pot= pot
-        self.orbit= _integrateRZOrbit(self.vxvv,pot,t,method,dt)
+        if outfile is None:
+            self.orbit= _integrateRZOrbit(self.vxvv,pot,t,method,dt)
+        else:
+            self.orbit, msg= self._integrate_outfile(\
+                lambda *args: (_integrateRZOrbit(*args),0),
+                t,pot,method,dt,outfile,resume=resume,
+                checkpoint_every=checkpoint_every)
 
     @physical_conversion('energy')
     def E(self,*args,**kwargs):
@@ -8,7 +8,8 @@ from numpy.ctypeslib import ndpointer
 import os
 from galpy import potential
 from galpy.util import galpyWarning
-from galpy.orbit_src.integratePlanarOrbit import _parse_integrator, _parse_tol
+from galpy.orbit_src.integratePlanarOrbit import _parse_integrator, _parse_tol, \
+    _check_outsidegrid
 #Find and load the library
 _lib= None
 outerr= None
@@ -153,6 +154,17 @@ def _parse_pot(pot,potforactions=False,potfortorus=False):
             if isNonAxi:
                 pot_args.extend(p._amp*p._Asin.flatten(order='C'))   
             pot_args.extend([-1., 0, 0, 0, 0, 0, 0])    
+        elif isinstance(p,potential.interp3DPotential):
+            pot_type.append(25)
+            pot_args.extend([p._amp,len(p._xgrid),len(p._ygrid),len(p._zgrid),
+                             p._xgrid[0],p._ygrid[0],p._zgrid[0],
+                             p._xgrid[1]-p._xgrid[0],p._ygrid[1]-p._ygrid[0],
+                             p._zgrid[1]-p._zgrid[0]])
+            pot_args.extend([nu.nan,nu.nan,nu.nan,0.,0.,0.]) # cache
+            pot_args.extend(p._potGrid_splinecoeffs.flatten(order='C'))
+            pot_args.extend(p._xforceGrid_splinecoeffs.flatten(order='C'))
+            pot_args.extend(p._yforceGrid_splinecoeffs.flatten(order='C'))
+            pot_args.extend(p._zforceGrid_splinecoeffs.flatten(order='C'))
     pot_type= nu.array(pot_type,dtype=nu.int32,order='C')
     pot_args= nu.array(pot_args,dtype=nu.float64,order='C')
     return (npot,pot_type,pot_args)
@@ -165,35 +177,43 @@ def integrateFullOrbit_c(pot,yo,t,int_method,rtol=None,atol=None,dt=None):
        C integrate an ode for a FullOrbit
     INPUT:
        pot - Potential or list of such instances
-       yo - initial condition [q,p]
-       t - set of times at which one wants the result
+       yo - initial condition [q,p], or initial conditions for multiple orbits [nobj,6]
+       t - set of times at which one wants the result, or [nobj,nt] array of a separate set of times for each of multiple orbits
        int_method= 'leapfrog_c', 'rk4_c', 'rk6_c', 'symplec4_c'
        rtol, atol
        dt= (None) force integrator to use this stepsize (default is to automatically determine one))
     OUTPUT:
        (y,err)
-       y : array, shape (len(y0), len(t))
+       y : array, shape (nt,6) or (nobj,nt,6) for multiple orbits
        Array containing the value of y for each desired time in t, \
        with the initial value y0 in the first row.
-       err: error message, if not zero: 1 means maximum step reduction happened for adaptive integrators
+       err: error message, if not zero: 1 means maximum step reduction happened for adaptive integrators (array [nobj] for multiple orbits)
     HISTORY:
        2011-11-13 - Written - Bovy (IAS)
+       2016-10-26 - Integrate multiple orbits at once, in parallel - Bovy (UofT)
+       2016-12-08 - Allow a separate set of times for each orbit - Bovy (UofT)
     """
     rtol, atol= _parse_tol(rtol,atol)
     npot, pot_type, pot_args= _parse_pot(pot)
     int_method_c= _parse_integrator(int_method)
     if dt is None: 
         dt= -9999.99
+    multi= len(yo.shape) == 2
+    nobj= yo.shape[0] if multi else 1
+    nt= t.shape[-1]
+    tstride= nt if len(t.shape) == 2 else 0
 
     #Set up result array
-    result= nu.empty((len(t),6))
-    err= ctypes.c_int(0)
+    result= nu.empty((nobj,nt,6))
+    err= nu.zeros(nobj,dtype=nu.int32)
 
     #Set up the C code
     ndarrayFlags= ('C_CONTIGUOUS','WRITEABLE')
     integrationFunc= _lib.integrateFullOrbit
-    integrationFunc.argtypes= [ndpointer(dtype=nu.float64,flags=ndarrayFlags),
+    integrationFunc.argtypes= [ctypes.c_int,
+                               ndpointer(dtype=nu.float64,flags=ndarrayFlags),
                                ctypes.c_int,                             
+                               ctypes.c_int,
                                ndpointer(dtype=nu.float64,flags=ndarrayFlags),
                                ctypes.c_int,
                                ndpointer(dtype=nu.int32,flags=ndarrayFlags),
@@ -202,7 +222,7 @@ def integrateFullOrbit_c(pot,yo,t,int_method,rtol=None,atol=None,dt=None):
                                ctypes.c_double,
                                ctypes.c_double,
                                ndpointer(dtype=nu.float64,flags=ndarrayFlags),
-                               ctypes.POINTER(ctypes.c_int),
+                               ndpointer(dtype=nu.int32,flags=ndarrayFlags),
                                ctypes.c_int]
 
     #Array requirements, first store old order
@@ -211,10 +231,14 @@ def integrateFullOrbit_c(pot,yo,t,int_method,rtol=None,atol=None,dt=None):
     yo= nu.require(yo,dtype=nu.float64,requirements=['C','W'])
     t= nu.require(t,dtype=nu.float64,requirements=['C','W'])
     result= nu.require(result,dtype=nu.float64,requirements=['C','W'])
+    err= nu.require(err,dtype=nu.int32,requirements=['C','W'])
 
     #Run the C code
-    integrationFunc(yo,
-                    ctypes.c_int(len(t)),
+    _check_outsidegrid(pot_type,reset=True)
+    integrationFunc(ctypes.c_int(nobj),
+                    yo,
+                    ctypes.c_int(nt),
+                    ctypes.c_int(tstride),
                     t,
                     ctypes.c_int(npot),
                     pot_type,
@@ -222,17 +246,317 @@ def integrateFullOrbit_c(pot,yo,t,int_method,rtol=None,atol=None,dt=None):
                     ctypes.c_double(dt),
                     ctypes.c_double(rtol),ctypes.c_double(atol),
                     result,
-                    ctypes.byref(err),
+                    err,
                     ctypes.c_int(int_method_c))
     
-    if int(err.value) == -10: #pragma: no cover
+    if nu.any(err == -10): #pragma: no cover
         raise KeyboardInterrupt("Orbit integration interrupted by CTRL-C (SIGINT)")
+    _check_outsidegrid(pot_type)
 
     #Reset input arrays
     if f_cont[0]: yo= nu.asfortranarray(yo)
     if f_cont[1]: t= nu.asfortranarray(t)
 
-    return (result,err.value)
+    if multi:
+        return (result,err)
+    else:
+        return (result[0],int(err[0]))
+
+def _parse_events(events):
+    """Parse the event specifications so they can be fed to C"""
+    event_type= []
+    event_dir= []
+    event_args= []
+    for event in events:
+        if isinstance(event,str):
+            name, args= event, [0.,0.,0.,0.]
+        else:
+            name, args= event[0], list(event[1])
+        name= name.lower()
+        if name == 'peri':
+            event_type.append(0)
+            event_dir.append(1)
+        elif name == 'apo':
+            event_type.append(1)
+            event_dir.append(-1)
+        elif name == 'zcross':
+            event_type.append(2)
+            event_dir.append(0)
+        elif name == 'zturn':
+            event_type.append(3)
+            event_dir.append(0)
+        elif name == 'plane':
+            if len(args) != 4:
+                raise ValueError("'plane' event requires (nx,ny,nz,d) for the plane nx x + ny y + nz z = d")
+            event_type.append(4)
+            event_dir.append(0)
+        else:
+            raise ValueError("Event '%s' not recognized; should be one of 'peri', 'apo', 'zcross', 'zturn', or ('plane',(nx,ny,nz,d))" % name)
+        event_args.extend(args)
+    return (nu.array(event_type,dtype=nu.int32,order='C'),
+            nu.array(event_dir,dtype=nu.int32,order='C'),
+            nu.array(event_args,dtype=nu.float64,order='C'))
+
+def integrateFullOrbit_events_c(pot,yo,t,int_method,events,maxevents=100,
+                                rtol=None,atol=None,dt=None):
+    """
+    NAME:
+       integrateFullOrbit_events_c
+    PURPOSE:
+       C integrate an ode for a FullOrbit, only returning the times and phase-space points of events
+    INPUT:
+       pot - Potential or list of such instances
+       yo - initial condition [q,p], or initial conditions for multiple orbits [nobj,6]
+       t - set of (equally-spaced) times over which to integrate; the orbit is not stored at these times, but events are only guaranteed to be found when there is at most one of each kind in each interval
+       int_method= 'leapfrog_c', 'rk4_c', 'rk6_c', 'symplec4_c'
+       events - list of events to detect, each one of
+          'peri': pericenter (minimum in spherical r)
+          'apo': apocenter (maximum in spherical r)
+          'zcross': crossing of z=0
+          'zturn': vertical turning point (vz=0)
+          ('plane',(nx,ny,nz,d)): crossing of the plane nx x + ny y + nz z = d
+       maxevents= (100) maximum number of events to return per orbit; the integration of an orbit stops once this number is reached
+       rtol, atol
+       dt= (None) force integrator to use this stepsize (default is to automatically determine one))
+    OUTPUT:
+       (tev,yev,iev,nev,err)
+       tev : array, shape (maxevents) or (nobj,maxevents) for multiple orbits, times of the events (nan when not filled)
+       yev : array, shape (maxevents,6) or (nobj,maxevents,6), phase-space points of the events (nan when not filled)
+       iev : array, shape (maxevents) or (nobj,maxevents), index into events of each event (-1 when not filled)
+       nev : number of events found (array [nobj] for multiple orbits)
+       err: error message, if not zero: 1 means maximum step reduction happened for adaptive integrators (array [nobj] for multiple orbits)
+    HISTORY:
+       2016-11-09 - Written - Bovy (UofT)
+    """
+    rtol, atol= _parse_tol(rtol,atol)
+    npot, pot_type, pot_args= _parse_pot(pot)
+    int_method_c= _parse_integrator(int_method)
+    event_type, event_dir, event_args= _parse_events(events)
+    if dt is None: 
+        dt= -9999.99
+    multi= len(yo.shape) == 2
+    nobj= yo.shape[0] if multi else 1
+
+    #Set up result arrays
+    event_t= nu.empty((nobj,maxevents))+nu.nan
+    event_y= nu.empty((nobj,maxevents,6))+nu.nan
+    event_indx= -nu.ones((nobj,maxevents),dtype=nu.int32)
+    nevents= nu.zeros(nobj,dtype=nu.int32)
+    err= nu.zeros(nobj,dtype=nu.int32)
+
+    #Set up the C code
+    ndarrayFlags= ('C_CONTIGUOUS','WRITEABLE')
+    integrationFunc= _lib.integrateFullOrbit_events
+    integrationFunc.argtypes= [ctypes.c_int,
+                               ndpointer(dtype=nu.float64,flags=ndarrayFlags),
+                               ctypes.c_int,                             
+                               ndpointer(dtype=nu.float64,flags=ndarrayFlags),
+                               ctypes.c_int,
+                               ndpointer(dtype=nu.int32,flags=ndarrayFlags),
+                               ndpointer(dtype=nu.float64,flags=ndarrayFlags),
+                               ctypes.c_double,
+                               ctypes.c_double,
+                               ctypes.c_double,
+                               ctypes.c_int,
+                               ndpointer(dtype=nu.int32,flags=ndarrayFlags),
+                               ndpointer(dtype=nu.int32,flags=ndarrayFlags),
+                               ndpointer(dtype=nu.float64,flags=ndarrayFlags),
+                               ctypes.c_int,
+                               ndpointer(dtype=nu.float64,flags=ndarrayFlags),
+                               ndpointer(dtype=nu.float64,flags=ndarrayFlags),
+                               ndpointer(dtype=nu.int32,flags=ndarrayFlags),
+                               ndpointer(dtype=nu.int32,flags=ndarrayFlags),
+                               ndpointer(dtype=nu.int32,flags=ndarrayFlags),
+                               ctypes.c_int]
+
+    #Array requirements, first store old order
+    f_cont= [yo.flags['F_CONTIGUOUS'],
+             t.flags['F_CONTIGUOUS']]
+    yo= nu.require(yo,dtype=nu.float64,requirements=['C','W'])
+    t= nu.require(t,dtype=nu.float64,requirements=['C','W'])
+
+    #Run the C code
+    _check_outsidegrid(pot_type,reset=True)
+    integrationFunc(ctypes.c_int(nobj),
+                    yo,
+                    ctypes.c_int(len(t)),
+                    t,
+                    ctypes.c_int(npot),
+                    pot_type,
+                    pot_args,
+                    ctypes.c_double(dt),
+                    ctypes.c_double(rtol),ctypes.c_double(atol),
+                    ctypes.c_int(len(event_type)),
+                    event_type,
+                    event_dir,
+                    event_args,
+                    ctypes.c_int(maxevents),
+                    event_t,
+                    event_y,
+                    event_indx,
+                    nevents,
+                    err,
+                    ctypes.c_int(int_method_c))
+    
+    if nu.any(err == -10): #pragma: no cover
+        raise KeyboardInterrupt("Orbit integration interrupted by CTRL-C (SIGINT)")
+    _check_outsidegrid(pot_type)
+
+    #Reset input arrays
+    if f_cont[0]: yo= nu.asfortranarray(yo)
+    if f_cont[1]: t= nu.asfortranarray(t)
+
+    if multi:
+        return (event_t,event_y,event_indx,nevents,err)
+    else:
+        return (event_t[0],event_y[0],event_indx[0],int(nevents[0]),
+                int(err[0]))
+
+_REDUCTION_TYPES= {'mean':0,'min':1,'max':2,'frac':3}
+_REDUCTION_QUANTITIES= {'x':0,'y':1,'z':2,'vx':3,'vy':4,'vz':5,
+                        'R':6,'r':7,'vR':8,'vT':9,'Lz':10}
+def _hasCEval(pot):
+    """Whether the C orbit integrator can evaluate the potential itself (interpRZPotential only passes its force grids)"""
+    if not isinstance(pot,list):
+        pot= [pot]
+    return not nu.any([isinstance(p,potential.interpRZPotential)
+                       for p in pot])
+
+def _parse_reductions(reductions):
+    """Parse the reduction specifications so they can be fed to C"""
+    red_type= []
+    red_quantity= []
+    red_args= []
+    for red in reductions:
+        if isinstance(red,str) and red == 'Eerr':
+            red_type.append(4)
+            red_quantity.append(0) # not used
+            red_args.extend([0.,0.])
+            continue
+        op= red[0].lower()
+        if not op in _REDUCTION_TYPES:
+            raise ValueError("Reduction '%s' not recognized; should be one of 'mean', 'min', 'max', 'frac', or 'Eerr'" % red[0])
+        if not red[1] in _REDUCTION_QUANTITIES:
+            raise ValueError("Quantity '%s' for reductions not recognized; should be one of 'x', 'y', 'z', 'vx', 'vy', 'vz', 'R', 'r' (spherical radius), 'vR', 'vT', or 'Lz'" % red[1])
+        quantity= _REDUCTION_QUANTITIES[red[1]]
+        if op == 'frac':
+            if len(red) != 4:
+                raise ValueError("'frac' reduction requires (quantity,lo,hi)")
+            args= [red[2],red[3]]
+        else:
+            args= [red[2] if len(red) > 2 else 1.,0.]
+        red_type.append(_REDUCTION_TYPES[op])
+        red_quantity.append(quantity)
+        red_args.extend(args)
+    return (nu.array(red_type,dtype=nu.int32,order='C'),
+            nu.array(red_quantity,dtype=nu.int32,order='C'),
+            nu.array(red_args,dtype=nu.float64,order='C'))
+
+def integrateFullOrbit_reduce_c(pot,yo,t,int_method,reductions,
+                                rtol=None,atol=None,dt=None):
+    """
+    NAME:
+       integrateFullOrbit_reduce_c
+    PURPOSE:
+       C integrate an ode for a FullOrbit, only returning reductions (means, extrema, fraction of time in a range) of quantities along the orbit and the final phase-space point
+    INPUT:
+       pot - Potential or list of such instances
+       yo - initial condition [q,p], or initial conditions for multiple orbits [nobj,6]
+       t - set of (equally-spaced) times at which the orbit is sampled for the reductions; the orbit is not stored at these times
+       int_method= 'leapfrog_c', 'rk4_c', 'rk6_c', 'symplec4_c'
+       reductions - list of reductions, each one of
+          ('mean',quantity[,power]): mean of quantity^power (default power=1)
+          ('min',quantity[,power]), ('max',quantity[,power]): minimum or maximum of quantity^power
+          ('frac',quantity,lo,hi): fraction of the time that lo <= quantity < hi
+          'Eerr': maximum relative energy error |E[t]-E[t[0]]|/|E[t[0]]| over the times t (not for interpRZPotential)
+          where quantity is one of 'x', 'y', 'z', 'vx', 'vy', 'vz', 'R', 'r' (spherical radius), 'vR', 'vT', or 'Lz'
+       rtol, atol
+       dt= (None) force integrator to use this stepsize (default is to automatically determine one))
+    OUTPUT:
+       (red,yfinal,err)
+       red : array, shape (nred) or (nobj,nred) for multiple orbits, the reductions
+       yfinal : array, shape (6) or (nobj,6), phase-space point at the final time
+       err: error message, if not zero: 1 means maximum step reduction happened for adaptive integrators (array [nobj] for multiple orbits)
+    HISTORY:
+       2016-11-10 - Written - Bovy (UofT)
+       2016-12-08 - Added the maximum energy error 'Eerr' - Bovy (UofT)
+    """
+    rtol, atol= _parse_tol(rtol,atol)
+    npot, pot_type, pot_args= _parse_pot(pot)
+    int_method_c= _parse_integrator(int_method)
+    red_type, red_quantity, red_args= _parse_reductions(reductions)
+    if nu.any(red_type == 4) and not _hasCEval(pot):
+        raise ValueError("'Eerr' reduction requires a potential whose C implementation can evaluate the potential (not interpRZPotential)")
+    if dt is None: 
+        dt= -9999.99
+    multi= len(yo.shape) == 2
+    nobj= yo.shape[0] if multi else 1
+
+    #Set up result arrays
+    red= nu.empty((nobj,len(red_type)))
+    yfinal= nu.empty((nobj,6))
+    err= nu.zeros(nobj,dtype=nu.int32)
+
+    #Set up the C code
+    ndarrayFlags= ('C_CONTIGUOUS','WRITEABLE')
+    integrationFunc= _lib.integrateFullOrbit_reduce
+    integrationFunc.argtypes= [ctypes.c_int,
+                               ndpointer(dtype=nu.float64,flags=ndarrayFlags),
+                               ctypes.c_int,                             
+                               ndpointer(dtype=nu.float64,flags=ndarrayFlags),
+                               ctypes.c_int,
+                               ndpointer(dtype=nu.int32,flags=ndarrayFlags),
+                               ndpointer(dtype=nu.float64,flags=ndarrayFlags),
+                               ctypes.c_double,
+                               ctypes.c_double,
+                               ctypes.c_double,
+                               ctypes.c_int,
+                               ndpointer(dtype=nu.int32,flags=ndarrayFlags),
+                               ndpointer(dtype=nu.int32,flags=ndarrayFlags),
+                               ndpointer(dtype=nu.float64,flags=ndarrayFlags),
+                               ndpointer(dtype=nu.float64,flags=ndarrayFlags),
+                               ndpointer(dtype=nu.float64,flags=ndarrayFlags),
+                               ndpointer(dtype=nu.int32,flags=ndarrayFlags),
+                               ctypes.c_int]
+
+    #Array requirements, first store old order
+    f_cont= [yo.flags['F_CONTIGUOUS'],
+             t.flags['F_CONTIGUOUS']]
+    yo= nu.require(yo,dtype=nu.float64,requirements=['C','W'])
+    t= nu.require(t,dtype=nu.float64,requirements=['C','W'])
+
+    #Run the C code
+    _check_outsidegrid(pot_type,reset=True)
+    integrationFunc(ctypes.c_int(nobj),
+                    yo,
+                    ctypes.c_int(len(t)),
+                    t,
+                    ctypes.c_int(npot),
+                    pot_type,
+                    pot_args,
+                    ctypes.c_double(dt),
+                    ctypes.c_double(rtol),ctypes.c_double(atol),
+                    ctypes.c_int(len(red_type)),
+                    red_type,
+                    red_quantity,
+                    red_args,
+                    red,
+                    yfinal,
+                    err,
+                    ctypes.c_int(int_method_c))
+    
+    if nu.any(err == -10): #pragma: no cover
+        raise KeyboardInterrupt("Orbit integration interrupted by CTRL-C (SIGINT)")
+    _check_outsidegrid(pot_type)
+
+    #Reset input arrays
+    if f_cont[0]: yo= nu.asfortranarray(yo)
+    if f_cont[1]: t= nu.asfortranarray(t)
+
+    if multi:
+        return (red,yfinal,err)
+    else:
+        return (red[0],yfinal[0],int(err[0]))
 
 def integrateFullOrbit_dxdv_c(pot,yo,dyo,t,int_method,rtol=None,atol=None): #pragma: no cover because not included in v1, uncover when included
     """
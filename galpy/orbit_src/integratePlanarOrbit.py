@@ -193,6 +193,21 @@ def _parse_pot(pot):
             if isNonAxi:
                 pot_args.extend(p._Pot._amp*p._Pot._Asin.flatten(order='C'))  
             pot_args.extend([-1., 0, 0, 0, 0, 0, 0])   
+        elif (isinstance(p,potential_src.planarPotential.planarPotentialFromFullPotential) or isinstance(p,potential_src.planarPotential.planarPotentialFromRZPotential)) \
+                 and isinstance(p._Pot,potential.interp3DPotential):
+            pot_type.append(25)
+            pot_args.extend([p._Pot._amp,len(p._Pot._xgrid),
+                             len(p._Pot._ygrid),len(p._Pot._zgrid),
+                             p._Pot._xgrid[0],p._Pot._ygrid[0],
+                             p._Pot._zgrid[0],
+                             p._Pot._xgrid[1]-p._Pot._xgrid[0],
+                             p._Pot._ygrid[1]-p._Pot._ygrid[0],
+                             p._Pot._zgrid[1]-p._Pot._zgrid[0]])
+            pot_args.extend([nu.nan,nu.nan,nu.nan,0.,0.,0.]) # cache
+            pot_args.extend(p._Pot._potGrid_splinecoeffs.flatten(order='C'))
+            pot_args.extend(p._Pot._xforceGrid_splinecoeffs.flatten(order='C'))
+            pot_args.extend(p._Pot._yforceGrid_splinecoeffs.flatten(order='C'))
+            pot_args.extend(p._Pot._zforceGrid_splinecoeffs.flatten(order='C'))
     pot_type= nu.array(pot_type,dtype=nu.int32,order='C')
     pot_args= nu.array(pot_args,dtype=nu.float64,order='C')
     return (npot,pot_type,pot_args)
@@ -227,6 +242,14 @@ def _parse_tol(rtol,atol):
         atol= nu.log(atol)
     return (rtol,atol)
 
+def _check_outsidegrid(pot_type,reset=False):
+    """Internal function to reset (reset=True) or check whether the C code has evaluated an interp3DPotential outside of its grid, warning if it has"""
+    if not 25 in pot_type: return None
+    outside= _lib.interp3DPotential_outsideGrid(ctypes.c_int(reset))
+    if outside and not reset:
+        warnings.warn("Orbit integration in C left the grid of an interp3DPotential; outside of the grid, the C code uses the potential and forces at the nearest point on the edge of the grid, while the python code uses the original potential; use a larger grid or integrate the orbit in python",galpyWarning)
+    return None
+
 def integratePlanarOrbit_c(pot,yo,t,int_method,rtol=None,atol=None,
                            dt=None):
     """
@@ -284,6 +307,7 @@ def integratePlanarOrbit_c(pot,yo,t,int_method,rtol=None,atol=None,
     result= nu.require(result,dtype=nu.float64,requirements=['C','W'])
 
     #Run the C code
+    _check_outsidegrid(pot_type,reset=True)
     integrationFunc(yo,
                     ctypes.c_int(len(t)),
                     t,
@@ -298,6 +322,7 @@ def integratePlanarOrbit_c(pot,yo,t,int_method,rtol=None,atol=None,
 
     if err.value == -10: #pragma: no cover
         raise KeyboardInterrupt("Orbit integration interrupted by CTRL-C (SIGINT)")
+    _check_outsidegrid(pot_type)
 
     #Reset input arrays
     if f_cont[0]: yo= nu.asfortranarray(yo)
@@ -365,6 +390,7 @@ def integratePlanarOrbit_dxdv_c(pot,yo,dyo,t,int_method,rtol=None,atol=None,
     result= nu.require(result,dtype=nu.float64,requirements=['C','W'])
 
     #Run the C code
+    _check_outsidegrid(pot_type,reset=True)
     integrationFunc(yo,
                     ctypes.c_int(len(t)),
                     t,
@@ -379,6 +405,7 @@ def integratePlanarOrbit_dxdv_c(pot,yo,dyo,t,int_method,rtol=None,atol=None,
 
     if err.value == -10: #pragma: no cover
         raise KeyboardInterrupt("Orbit integration interrupted by CTRL-C (SIGINT)")
+    _check_outsidegrid(pot_type)
 
     #Reset input arrays
     if f_cont[0]: yo= nu.asfortranarray(yo)
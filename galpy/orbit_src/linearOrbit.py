@@ -39,7 +39,8 @@ class linearOrbit(OrbitTop):
                           ro=ro,zo=None,vo=vo,solarmotion=None)
         return None
 
-    def integrate(self,t,pot,method='odeint',dt=None):
+    def integrate(self,t,pot,method='odeint',dt=None,outfile=None,
+                  resume=False,checkpoint_every=None):
         """
         NAME:
            integrate
@@ -50,15 +51,26 @@ class linearOrbit(OrbitTop):
            pot - potential instance or list of instances
            method= 'odeint'= scipy's odeint, or 'leapfrog'
            dt= (None) if set, force the integrator to use this basic stepsize; must be an integer divisor of output stepsize (NOT USED FOR LINEAR ORBIT SO FAR)
+           outfile= (None) if set, write the orbit to this .npy file in blocks as the integration progresses and memory-map the orbit from this file (for orbits that do not fit in memory)
+           resume= (False) if True, resume an interrupted integration into outfile from its last checkpoint
+           checkpoint_every= (None) number of output times after which to write a checkpoint when using outfile (default: 10000)
         OUTPUT:
            (none) (get the actual orbit using getOrbit()
         HISTORY:
            2010-07-13 - Written - Bovy (NYU)
         """
         if hasattr(self,'_orbInterp'): delattr(self,'_orbInterp')
+        if hasattr(self,'_outfile'): delattr(self,'_outfile')
         self.t= nu.array(t)
         self._pot= pot
-        self.orbit= _integrateLinearOrbit(self.vxvv,pot,t,method)
+        if outfile is None:
+            self.orbit= _integrateLinearOrbit(self.vxvv,pot,t,method)
+        else:
+            self.orbit, msg= self._integrate_outfile(\
+                lambda vxvv,pot,t,method,dt: \
+                    (_integrateLinearOrbit(vxvv,pot,t,method),0),
+                t,pot,method,dt,outfile,resume=resume,
+                checkpoint_every=checkpoint_every)
 
     @physical_conversion('energy')
     def E(self,*args,**kwargs):
@@ -5,6 +5,9 @@
 #include <stdlib.h>
 #include <stdbool.h>
 #include <math.h>
+#ifdef _OPENMP
+#include <omp.h>
+#endif
 #include <bovy_symplecticode.h>
 #include <bovy_rk.h>
 //Potentials
@@ -12,6 +15,19 @@
 #ifndef M_PI
 #define M_PI 3.14159265358979323846
 #endif
+#define CHUNKSIZE 1
+/*
+  Macro for dealing with potentially unused variables due to OpenMP
+ */
+/* If we're not using GNU C, elide __attribute__ if it doesn't exist*/
+#ifndef __has_attribute      // Compatibility with non-clang compilers. 
+#define __has_attribute(x) 0  
+#endif
+#if defined(__GNUC__) || __has_attribute(unused)
+#  define UNUSED __attribute__((unused))
+#else
+#  define UNUSED /*NOTHING*/
+#endif
 /*
   Function Declarations
 */
@@ -21,6 +37,16 @@ void evalRectDeriv(double, double *, double *,
 			 int, struct potentialArg *);
 void evalRectDeriv_dxdv(double,double *, double *,
 			      int, struct potentialArg *);
+typedef void (*odeint_func_type)(void (*func)(double, double *, double *,
+						int, struct potentialArg *),
+				 int,
+				 double *,
+				 int, double, double *,
+				 int, struct potentialArg *,
+				 double, double,
+				 double *,int *);
+typedef void (*odeint_deriv_func_type)(double, double *, double *,
+				       int,struct potentialArg *);
 /*
   Actual functions
 */
@@ -32,6 +58,7 @@ void parse_leapFuncArgs_Full(int npot,
   int nR, nz;
   double * Rgrid, * zgrid, * potGrid_splinecoeffs;
   for (ii=0; ii < npot; ii++){
+    potentialArgs->potentialEval= NULL;
     potentialArgs->i2drforce= NULL;
     potentialArgs->accxrforce= NULL;
     potentialArgs->accyrforce= NULL;
@@ -40,6 +67,7 @@ void parse_leapFuncArgs_Full(int npot,
     potentialArgs->accyzforce= NULL;
     switch ( *pot_type++ ) {
     case 0: //LogarithmicHaloPotential, 2 arguments
+      potentialArgs->potentialEval= &LogarithmicHaloPotentialEval;
       potentialArgs->Rforce= &LogarithmicHaloPotentialRforce;
       potentialArgs->zforce= &LogarithmicHaloPotentialzforce;
       potentialArgs->phiforce= &ZeroForce;
@@ -49,6 +77,7 @@ void parse_leapFuncArgs_Full(int npot,
       potentialArgs->nargs= 3;
       break;
     case 5: //MiyamotoNagaiPotential, 3 arguments
+      potentialArgs->potentialEval= &MiyamotoNagaiPotentialEval;
       potentialArgs->Rforce= &MiyamotoNagaiPotentialRforce;
       potentialArgs->zforce= &MiyamotoNagaiPotentialzforce;
       potentialArgs->phiforce= &ZeroForce;
@@ -58,6 +87,7 @@ void parse_leapFuncArgs_Full(int npot,
       potentialArgs->nargs= 3;
       break;
     case 7: //PowerSphericalPotential, 2 arguments
+      potentialArgs->potentialEval= &PowerSphericalPotentialEval;
       potentialArgs->Rforce= &PowerSphericalPotentialRforce;
       potentialArgs->zforce= &PowerSphericalPotentialzforce;
       potentialArgs->phiforce= &ZeroForce;
@@ -67,6 +97,7 @@ void parse_leapFuncArgs_Full(int npot,
       potentialArgs->nargs= 2;
       break;
     case 8: //HernquistPotential, 2 arguments
+      potentialArgs->potentialEval= &HernquistPotentialEval;
       potentialArgs->Rforce= &HernquistPotentialRforce;
       potentialArgs->zforce= &HernquistPotentialzforce;
       potentialArgs->phiforce= &ZeroForce;
@@ -76,6 +107,7 @@ void parse_leapFuncArgs_Full(int npot,
       potentialArgs->nargs= 2;
       break;
     case 9: //NFWPotential, 2 arguments
+      potentialArgs->potentialEval= &NFWPotentialEval;
       potentialArgs->Rforce= &NFWPotentialRforce;
       potentialArgs->zforce= &NFWPotentialzforce;
       potentialArgs->phiforce= &ZeroForce;
@@ -85,6 +117,7 @@ void parse_leapFuncArgs_Full(int npot,
       potentialArgs->nargs= 2;
       break;
     case 10: //JaffePotential, 2 arguments
+      potentialArgs->potentialEval= &JaffePotentialEval;
       potentialArgs->Rforce= &JaffePotentialRforce;
       potentialArgs->zforce= &JaffePotentialzforce;
       potentialArgs->phiforce= &ZeroForce;
@@ -94,6 +127,7 @@ void parse_leapFuncArgs_Full(int npot,
       potentialArgs->nargs= 2;
       break;
     case 11: //DoubleExponentialDiskPotential, XX arguments
+      potentialArgs->potentialEval= &DoubleExponentialDiskPotentialEval;
       potentialArgs->Rforce= &DoubleExponentialDiskPotentialRforce;
       potentialArgs->zforce= &DoubleExponentialDiskPotentialzforce;
       potentialArgs->phiforce= &ZeroForce;
@@ -101,6 +135,7 @@ void parse_leapFuncArgs_Full(int npot,
       potentialArgs->nargs= (int) (8 + 2 * *(pot_args+5) + 4 * ( *(pot_args+4) + 1 ));
       break;
     case 12: //FlattenedPowerPotential, 4 arguments
+      potentialArgs->potentialEval= &FlattenedPowerPotentialEval;
       potentialArgs->Rforce= &FlattenedPowerPotentialRforce;
       potentialArgs->zforce= &FlattenedPowerPotentialzforce;
       potentialArgs->phiforce= &ZeroForce;
@@ -143,12 +178,14 @@ void parse_leapFuncArgs_Full(int npot,
       free(potGrid_splinecoeffs);
       break;
     case 14: //IsochronePotential, 2 arguments
+      potentialArgs->potentialEval= &IsochronePotentialEval;
       potentialArgs->Rforce= &IsochronePotentialRforce;
       potentialArgs->zforce= &IsochronePotentialzforce;
       potentialArgs->phiforce= &ZeroForce;
       potentialArgs->nargs= 2;
       break;
     case 15: //PowerSphericalwCutoffPotential, 3 arguments
+      potentialArgs->potentialEval= &PowerSphericalPotentialwCutoffEval;
       potentialArgs->Rforce= &PowerSphericalPotentialwCutoffRforce;
       potentialArgs->zforce= &PowerSphericalPotentialwCutoffzforce;
       potentialArgs->phiforce= &ZeroForce;
@@ -158,6 +195,7 @@ void parse_leapFuncArgs_Full(int npot,
       potentialArgs->nargs= 3;
       break;
     case 16: //KuzminKutuzovStaeckelPotential, 3 arguments
+      potentialArgs->potentialEval= &KuzminKutuzovStaeckelPotentialEval;
       potentialArgs->Rforce= &KuzminKutuzovStaeckelPotentialRforce;
       potentialArgs->zforce= &KuzminKutuzovStaeckelPotentialzforce;
       potentialArgs->phiforce= &ZeroForce;
@@ -165,6 +203,7 @@ void parse_leapFuncArgs_Full(int npot,
       potentialArgs->nargs= 3;
       break;
     case 17: //PlummerPotential, 2 arguments
+      potentialArgs->potentialEval= &PlummerPotentialEval;
       potentialArgs->Rforce= &PlummerPotentialRforce;
       potentialArgs->zforce= &PlummerPotentialzforce;
       potentialArgs->phiforce= &ZeroForce;
@@ -172,6 +211,7 @@ void parse_leapFuncArgs_Full(int npot,
       potentialArgs->nargs= 2;
       break;
     case 18: //PseudoIsothermalPotential, 2 arguments
+      potentialArgs->potentialEval= &PseudoIsothermalPotentialEval;
       potentialArgs->Rforce= &PseudoIsothermalPotentialRforce;
       potentialArgs->zforce= &PseudoIsothermalPotentialzforce;
       potentialArgs->phiforce= &ZeroForce;
@@ -179,41 +219,54 @@ void parse_leapFuncArgs_Full(int npot,
       potentialArgs->nargs= 2;
       break;
     case 19: //KuzminDiskPotential, 2 arguments
+      potentialArgs->potentialEval= &KuzminDiskPotentialEval;
       potentialArgs->Rforce= &KuzminDiskPotentialRforce;
       potentialArgs->zforce= &KuzminDiskPotentialzforce;
       potentialArgs->phiforce= &ZeroForce;
       potentialArgs->nargs= 2;
       break;
     case 20: //BurkertPotential, 2 arguments
+      potentialArgs->potentialEval= &BurkertPotentialEval;
       potentialArgs->Rforce= &BurkertPotentialRforce;
       potentialArgs->zforce= &BurkertPotentialzforce;
       potentialArgs->phiforce= &ZeroForce;
       potentialArgs->nargs= 2;
       break;
     case 21: //TriaxialHernquistPotential, lots of arguments
+      potentialArgs->potentialEval= &TriaxialHernquistPotentialEval;
       potentialArgs->Rforce= &TriaxialHernquistPotentialRforce;
       potentialArgs->zforce= &TriaxialHernquistPotentialzforce;
       potentialArgs->phiforce= &TriaxialHernquistPotentialphiforce;
       potentialArgs->nargs= (int) (21 + 2 * *(pot_args+14));
       break;
     case 22: //TriaxialNFWPotential, lots of arguments
+      potentialArgs->potentialEval= &TriaxialNFWPotentialEval;
       potentialArgs->Rforce= &TriaxialNFWPotentialRforce;
       potentialArgs->zforce= &TriaxialNFWPotentialzforce;
       potentialArgs->phiforce= &TriaxialNFWPotentialphiforce;
       potentialArgs->nargs= (int) (21 + 2 * *(pot_args+14));
       break;
     case 23: //TriaxialJaffePotential, lots of arguments
+      potentialArgs->potentialEval= &TriaxialJaffePotentialEval;
       potentialArgs->Rforce= &TriaxialJaffePotentialRforce;
       potentialArgs->zforce= &TriaxialJaffePotentialzforce;
       potentialArgs->phiforce= &TriaxialJaffePotentialphiforce;
       potentialArgs->nargs= (int) (21 + 2 * *(pot_args+14));
       break;      
     case 24: //SCFPotential, many arguments
+      potentialArgs->potentialEval= &SCFPotentialEval;
       potentialArgs->Rforce= &SCFPotentialRforce;
       potentialArgs->zforce= &SCFPotentialzforce;
       potentialArgs->phiforce= &SCFPotentialphiforce;
       potentialArgs->nargs= (int) (5 + (1 + *(pot_args + 1)) * *(pot_args+2) * *(pot_args+3)* *(pot_args+4) + 7);
       break;
+    case 25: //interp3DPotential, many arguments
+      potentialArgs->potentialEval= &interp3DPotentialEval;
+      potentialArgs->Rforce= &interp3DPotentialRforce;
+      potentialArgs->zforce= &interp3DPotentialzforce;
+      potentialArgs->phiforce= &interp3DPotentialphiforce;
+      potentialArgs->nargs= 16; // + shared B-spline coefficients, see below
+      break;
     }
     potentialArgs->args= (double *) malloc( potentialArgs->nargs * sizeof(double));
     for (jj=0; jj < potentialArgs->nargs; jj++){
@@ -221,12 +274,56 @@ void parse_leapFuncArgs_Full(int npot,
       potentialArgs->args++;
     }
     potentialArgs->args-= potentialArgs->nargs;
+    if ( *(pot_type-1) == 25 ) { //interp3DPotential: share the coefficients
+      potentialArgs->coeffs= pot_args;
+      pot_args+= (int) (4 * *(potentialArgs->args+1)
+			* *(potentialArgs->args+2) * *(potentialArgs->args+3));
+    }
     potentialArgs++;
   }
   potentialArgs-= npot;
 }
-void integrateFullOrbit(double *yo,
+//Set the integrator, the function that it integrates, and the dimension of
+//the integrated state (3 for the symplectic integrators, 6 for the others)
+//for odeint_type; dxdv also integrates the phase-space deviations
+static void select_odeint_Full(int odeint_type,bool dxdv,
+			       odeint_func_type * odeint_func,
+			       odeint_deriv_func_type * odeint_deriv_func,
+			       int * dim){
+  switch ( odeint_type ) {
+  case 0: //leapfrog
+    *odeint_func= &leapfrog;
+    break;
+  case 1: //RK4
+    *odeint_func= &bovy_rk4;
+    break;
+  case 2: //RK6
+    *odeint_func= &bovy_rk6;
+    break;
+  case 3: //symplec4
+    *odeint_func= &symplec4;
+    break;
+  case 4: //symplec6
+    *odeint_func= &symplec6;
+    break;
+  case 5: //DOPR54
+    *odeint_func= &bovy_dopr54;
+    break;
+  }
+  if ( odeint_type == 0 || odeint_type == 3 || odeint_type == 4 ) {
+    *odeint_deriv_func= &evalRectForce;
+    *dim= 3;
+  }
+  else {
+    *odeint_deriv_func= dxdv ? &evalRectDeriv_dxdv : &evalRectDeriv;
+    *dim= 6;
+  }
+  if ( dxdv ) *dim*= 2;
+}
+void integrateFullOrbit(int nobj,
+			double *yo,
 			int nt, 
+			int tstride,
 			double *t,
 			int npot,
 			int * pot_type,
@@ -238,63 +335,438 @@ void integrateFullOrbit(double *yo,
 			int * err,
 			int odeint_type){
   //Set up the forces, first count
-  int ii;
+  int ii,jj;
   int dim;
-  struct potentialArg * potentialArgs= (struct potentialArg *) malloc ( npot * sizeof (struct potentialArg) );
-  parse_leapFuncArgs_Full(npot,potentialArgs,pot_type,pot_args);
+  int tid, nthreads;
+#ifdef _OPENMP
+  nthreads= ( nobj < omp_get_max_threads() ) ? nobj : omp_get_max_threads();
+#else
+  nthreads= 1;
+#endif
+  if ( nthreads < 1 ) nthreads= 1;
+  //Each thread gets its own copy of the potential arguments, because some
+  //potentials carry state (e.g., the interpolation accelerators)
+  struct potentialArg * potentialArgs= (struct potentialArg *) malloc ( nthreads * npot * sizeof (struct potentialArg) );
+  for (tid=0; tid < nthreads; tid++)
+    parse_leapFuncArgs_Full(npot,potentialArgs+tid*npot,pot_type,pot_args);
   //Integrate
-  void (*odeint_func)(void (*func)(double, double *, double *,
-			   int, struct potentialArg *),
-		      int,
-		      double *,
-		      int, double, double *,
-		      int, struct potentialArg *,
-		      double, double,
-		      double *,int *);
-  void (*odeint_deriv_func)(double, double *, double *,
-			    int,struct potentialArg *);
+  odeint_func_type odeint_func;
+  odeint_deriv_func_type odeint_deriv_func;
+  select_odeint_Full(odeint_type,false,&odeint_func,&odeint_deriv_func,&dim);
+  //Integrate all of the orbits, each one writing directly into its part of
+  //the result array; tstride is 0 when all orbits share the times in t and
+  //nt when t contains a separate set of nt times for each orbit
+  UNUSED int chunk= CHUNKSIZE;
+#pragma omp parallel for schedule(dynamic,chunk) num_threads(nthreads)	\
+  private(tid,ii)							\
+  shared(yo,t,result,err,potentialArgs,odeint_func,odeint_deriv_func,dim,nt,tstride,npot,dt,rtol,atol)
+  for (ii=0; ii < nobj; ii++){
+#ifdef _OPENMP
+    tid= omp_get_thread_num();
+#else
+    tid = 0;
+#endif
+    odeint_func(odeint_deriv_func,dim,yo+6*ii,nt,dt,t+tstride*ii,npot,
+		potentialArgs+tid*npot,rtol,atol,result+6*nt*ii,err+ii);
+  }
+  //Reset the interrupt flag only once all threads are done, such that
+  //every orbit sees the interrupt
+  interrupted= 0; // need to reset, bc library and vars stay in memory
+  //Free allocated memory
+  for (jj=0; jj < nthreads * npot; jj++) {
+    free(potentialArgs->args);
+    potentialArgs++;
+  }
+  potentialArgs-= nthreads * npot;
+  free(potentialArgs);
+  //Done!
+}
+/*
+  Event detection: the orbit is integrated one output interval at a time,
+  only the state at the current output time is kept, and the times and
+  phase-space points at which event functions cross zero are refined and
+  returned
+*/
+static double estimate_step_Full(int odeint_type,
+				 void (*func)(double, double *, double *,
+					      int, struct potentialArg *),
+				 int dim,double *yo,double *t,
+				 int npot,struct potentialArg * potentialArgs,
+				 double rtol,double atol){
+  double init_dt= (*(t+1))-(*t);
   switch ( odeint_type ) {
   case 0: //leapfrog
-    odeint_func= &leapfrog;
-    odeint_deriv_func= &evalRectForce;
-    dim= 3;
-    break;
-  case 1: //RK4
-    odeint_func= &bovy_rk4;
-    odeint_deriv_func= &evalRectDeriv;
-    dim= 6;
-    break;
+    return leapfrog_estimate_step(func,dim,yo,yo+dim,init_dt,t,
+				  npot,potentialArgs,rtol,atol);
   case 2: //RK6
-    odeint_func= &bovy_rk6;
-    odeint_deriv_func= &evalRectDeriv;
-    dim= 6;
-    break;
+    return rk6_estimate_step(func,dim,yo,init_dt,t,
+			     npot,potentialArgs,rtol,atol);
   case 3: //symplec4
-    odeint_func= &symplec4;
-    odeint_deriv_func= &evalRectForce;
-    dim= 3;
-    break;
+    return symplec4_estimate_step(func,dim,yo,yo+dim,init_dt,t,
+				  npot,potentialArgs,rtol,atol);
   case 4: //symplec6
-    odeint_func= &symplec6;
-    odeint_deriv_func= &evalRectForce;
-    dim= 3;
-    break;
-  case 5: //DOPR54
-    odeint_func= &bovy_dopr54;
-    odeint_deriv_func= &evalRectDeriv;
-    dim= 6;
-    break;
+    return symplec6_estimate_step(func,dim,yo,yo+dim,init_dt,t,
+				  npot,potentialArgs,rtol,atol);
+  default: //RK4 and DOPR54 (initial step)
+    return rk4_estimate_step(func,dim,yo,init_dt,t,
+			     npot,potentialArgs,rtol,atol);
   }
-  odeint_func(odeint_deriv_func,dim,yo,nt,dt,t,npot,potentialArgs,rtol,atol,
-	      result,err);
+}
+//Event functions: 0= pericenter, 1= apocenter (x.v), 2= z crossing (z),
+//3= vertical turning point (vz), 4= plane crossing (n.x-d)
+static inline double evalEventFull(int event_type,double *y,double *args){
+  switch ( event_type ) {
+  case 0:
+  case 1:
+    return *y * *(y+3) + *(y+1) * *(y+4) + *(y+2) * *(y+5);
+  case 2:
+    return *(y+2);
+  case 3:
+    return *(y+5);
+  default:
+    return *args * *y + *(args+1) * *(y+1) + *(args+2) * *(y+2) - *(args+3);
+  }
+}
+//Event direction: 1= from negative to positive, -1= from positive to
+//negative, 0= both
+static inline bool isEventFull(int event_dir,double gprev,double gnext){
+  return ( event_dir >= 0 && gprev < 0. && gnext >= 0. )
+    || ( event_dir <= 0 && gprev > 0. && gnext <= 0. );
+}
+//Integrate from yo at to over a time h, using a stepsize <= dt that evenly
+//divides h (h is not necessarily a multiple of dt, e.g., because of
+//round-off in the output times or for partial output steps)
+static void integrate_partial_Full(odeint_func_type odeint_func,
+				   odeint_deriv_func_type odeint_deriv_func,
+				   int dim,double *yo,double to,double h,
+				   double dt,int npot,
+				   struct potentialArg * potentialArgs,
+				   double rtol,double atol,
+				   double *result,int *err){
+  double t[2];
+  *t= to;
+  *(t+1)= to + h;
+  h= *(t+1) - *t; //what the integrators will use
+  long ndt= (long) ceil( fabs(h / dt) - 0.000001 );
+  if ( ndt < 1 ) ndt= 1;
+  double dt_sub= h / ndt;
+  //Make sure that the integrators take exactly ndt steps
+  while ( (long) (h / dt_sub) < ndt ) dt_sub= nextafter(dt_sub,0.);
+  odeint_func(odeint_deriv_func,dim,yo,2,dt_sub,t,npot,potentialArgs,
+	      rtol,atol,result,err);
+}
+void integrateFullOrbit_events(int nobj,
+			       double *yo,
+			       int nt, 
+			       double *t,
+			       int npot,
+			       int * pot_type,
+			       double * pot_args,
+			       double dt,
+			       double rtol,
+			       double atol,
+			       int nevent,
+			       int * event_type,
+			       int * event_dir,
+			       double * event_args,
+			       int maxevents,
+			       double *event_t,
+			       double *event_y,
+			       int * event_indx,
+			       int * nevents,
+			       int * err,
+			       int odeint_type){
+  int ii,jj,kk,ll,mm,tid,nthreads,dim,nnew,thiserr;
+  double dt_ii, a, b, c, ga, gb, gc, xtol, tmp_t;
+#ifdef _OPENMP
+  nthreads= ( nobj < omp_get_max_threads() ) ? nobj : omp_get_max_threads();
+#else
+  nthreads= 1;
+#endif
+  if ( nthreads < 1 ) nthreads= 1;
+  struct potentialArg * potentialArgs= (struct potentialArg *) malloc ( nthreads * npot * sizeof (struct potentialArg) );
+  for (tid=0; tid < nthreads; tid++)
+    parse_leapFuncArgs_Full(npot,potentialArgs+tid*npot,pot_type,pot_args);
+  //Per-thread work space: current state, two output steps, root state,
+  //event functions at the previous and next output time
+  double *ycur= (double *) malloc ( nthreads * 6 * sizeof(double) );
+  double *ybuf= (double *) malloc ( nthreads * 12 * sizeof(double) );
+  double *yroot= (double *) malloc ( nthreads * 12 * sizeof(double) );
+  double *gprev= (double *) malloc ( nthreads * nevent * sizeof(double) );
+  double *gnext= (double *) malloc ( nthreads * nevent * sizeof(double) );
+  odeint_func_type odeint_func;
+  odeint_deriv_func_type odeint_deriv_func;
+  select_odeint_Full(odeint_type,false,&odeint_func,&odeint_deriv_func,&dim);
+  UNUSED int chunk= CHUNKSIZE;
+#pragma omp parallel for schedule(dynamic,chunk) num_threads(nthreads)	\
+  private(tid,ii,jj,kk,ll,mm,nnew,thiserr,dt_ii,a,b,c,ga,gb,gc,xtol,tmp_t)	\
+  shared(yo,t,event_t,event_y,event_indx,nevents,err,potentialArgs,ycur,ybuf,yroot,gprev,gnext,odeint_func,odeint_deriv_func,dim,nt,npot,dt,rtol,atol,nevent,event_type,event_dir,event_args,maxevents)
+  for (ii=0; ii < nobj; ii++){
+#ifdef _OPENMP
+    tid= omp_get_thread_num();
+#else
+    tid = 0;
+#endif
+    *(nevents+ii)= 0;
+    *(err+ii)= 0;
+    for (kk=0; kk < 6; kk++) *(ycur+6*tid+kk)= *(yo+6*ii+kk);
+    if ( dt == -9999.99 )
+      dt_ii= estimate_step_Full(odeint_type,odeint_deriv_func,dim,
+				ycur+6*tid,t,npot,potentialArgs+tid*npot,
+				rtol,atol);
+    else
+      dt_ii= dt;
+    xtol= 0.0000000001 * fabs( *(t+1) - *t );
+    for (jj=0; jj < nevent; jj++)
+      *(gprev+tid*nevent+jj)= evalEventFull(*(event_type+jj),ycur+6*tid,
+					    event_args+4*jj);
+    for (kk=0; kk < nt-1; kk++){
+      integrate_partial_Full(odeint_func,odeint_deriv_func,dim,
+			     ycur+6*tid,*(t+kk),*(t+kk+1) - *(t+kk),dt_ii,
+			     npot,potentialArgs+tid*npot,rtol,atol,
+			     ybuf+12*tid,&thiserr);
+      if ( thiserr != 0 ) *(err+ii)= thiserr;
+      if ( thiserr == -10 ) break;
+      nnew= 0;
+      for (jj=0; jj < nevent; jj++){
+	*(gnext+tid*nevent+jj)= evalEventFull(*(event_type+jj),
+					      ybuf+12*tid+6,event_args+4*jj);
+	if ( *(nevents+ii) + nnew >= maxevents
+	     || ! isEventFull(*(event_dir+jj),*(gprev+tid*nevent+jj),
+			      *(gnext+tid*nevent+jj)) )
+	  continue;
+	//Refine the root using the Illinois variant of regula falsi, on
+	//the integrated orbit
+	a= 0.;
+	b= *(t+kk+1) - *(t+kk);
+	ga= *(gprev+tid*nevent+jj);
+	gb= *(gnext+tid*nevent+jj);
+	for (ll=0; ll < 6; ll++) *(yroot+12*tid+6+ll)= *(ybuf+12*tid+6+ll);
+	for (mm=0; mm < 100 && fabs(b-a) > xtol && gb != 0.; mm++){
+	  c= b - gb * (b - a) / (gb - ga);
+	  integrate_partial_Full(odeint_func,odeint_deriv_func,dim,
+				 ycur+6*tid,*(t+kk),c,dt_ii,
+				 npot,potentialArgs+tid*npot,rtol,atol,
+				 yroot+12*tid,&thiserr);
+	  if ( thiserr != 0 ) *(err+ii)= thiserr;
+	  gc= evalEventFull(*(event_type+jj),yroot+12*tid+6,event_args+4*jj);
+	  if ( gc * gb < 0. ) {
+	    a= b;
+	    ga= gb;
+	  }
+	  else
+	    ga*= 0.5;
+	  b= c;
+	  gb= gc;
+	}
+	//Store, keeping the events in this output interval sorted in time
+	ll= *(nevents+ii) + nnew;
+	while ( ll > *(nevents+ii)
+		&& fabs(*(event_t+ii*maxevents+ll-1) - *(t+kk)) > fabs(b) ) {
+	  *(event_t+ii*maxevents+ll)= *(event_t+ii*maxevents+ll-1);
+	  *(event_indx+ii*maxevents+ll)= *(event_indx+ii*maxevents+ll-1);
+	  for (mm=0; mm < 6; mm++)
+	    *(event_y+6*(ii*maxevents+ll)+mm)=
+	      *(event_y+6*(ii*maxevents+ll-1)+mm);
+	  ll--;
+	}
+	tmp_t= *(t+kk) + b;
+	*(event_t+ii*maxevents+ll)= tmp_t;
+	*(event_indx+ii*maxevents+ll)= jj;
+	for (mm=0; mm < 6; mm++)
+	  *(event_y+6*(ii*maxevents+ll)+mm)= *(yroot+12*tid+6+mm);
+	nnew++;
+      }
+      *(nevents+ii)+= nnew;
+      if ( *(nevents+ii) >= maxevents ) break;
+      for (ll=0; ll < 6; ll++) *(ycur+6*tid+ll)= *(ybuf+12*tid+6+ll);
+      for (jj=0; jj < nevent; jj++)
+	*(gprev+tid*nevent+jj)= *(gnext+tid*nevent+jj);
+    }
+  }
+  interrupted= 0; // need to reset, bc library and vars stay in memory
   //Free allocated memory
-  for (ii=0; ii < npot; ii++) {
+  for (jj=0; jj < nthreads * npot; jj++) {
     free(potentialArgs->args);
     potentialArgs++;
   }
-  potentialArgs-= npot;
+  potentialArgs-= nthreads * npot;
   free(potentialArgs);
-  //Done!
+  free(ycur);
+  free(ybuf);
+  free(yroot);
+  free(gprev);
+  free(gnext);
+}
+/*
+  Reductions: the orbit is integrated one output interval at a time and
+  only summary statistics of the orbit at the output times are kept
+*/
+//Quantities: 0-5= x,y,z,vx,vy,vz, 6= R, 7= r, 8= vR, 9= vT, 10= Lz
+static inline double evalQuantityFull(int quantity,double *y){
+  double R;
+  if ( quantity < 6 ) return *(y+quantity);
+  R= sqrt( *y * *y + *(y+1) * *(y+1) );
+  switch ( quantity ) {
+  case 6:
+    return R;
+  case 7:
+    return sqrt( R * R + *(y+2) * *(y+2) );
+  case 8:
+    return ( *y * *(y+3) + *(y+1) * *(y+4) ) / R;
+  case 9:
+    return ( *y * *(y+4) - *(y+1) * *(y+3) ) / R;
+  default:
+    return *y * *(y+4) - *(y+1) * *(y+3);
+  }
+}
+//Energy, for potentials that all have a potentialEval
+static inline double evalEnergyFull(double *y,double t,
+				    int npot,struct potentialArg * potentialArgs){
+  int ii;
+  double R= sqrt( *y * *y + *(y+1) * *(y+1) );
+  double phi= atan2( *(y+1), *y );
+  double E= 0.5 * ( *(y+3) * *(y+3) + *(y+4) * *(y+4) + *(y+5) * *(y+5) );
+  for (ii=0; ii < npot; ii++)
+    E+= (potentialArgs+ii)->potentialEval(R,*(y+2),phi,t,potentialArgs+ii);
+  return E;
+}
+//Reduction operations: 0= mean, 1= min, 2= max, 3= fraction of the time
+//that lo <= quantity < hi, 4= maximum relative energy error |E-Eo|/|Eo|
+//(quantity is not used); args= power (0-2), or lo,hi (3)
+static inline void accumulateReductionsFull(int nred,int * red_type,
+					    int * red_quantity,
+					    double * red_args,
+					    double *y,double t,double Eo,
+					    int npot,
+					    struct potentialArg * potentialArgs,
+					    double *red){
+  int jj;
+  double q;
+  for (jj=0; jj < nred; jj++){
+    if ( *(red_type+jj) == 4 ) {
+      q= fabs( ( evalEnergyFull(y,t,npot,potentialArgs) - Eo ) / Eo );
+      if ( q > *(red+jj) ) *(red+jj)= q;
+      continue;
+    }
+    q= evalQuantityFull(*(red_quantity+jj),y);
+    switch ( *(red_type+jj) ) {
+    case 0:
+      *(red+jj)+= ( *(red_args+2*jj) == 1. ) ? q : pow(q,*(red_args+2*jj));
+      break;
+    case 1:
+      q= ( *(red_args+2*jj) == 1. ) ? q : pow(q,*(red_args+2*jj));
+      if ( q < *(red+jj) ) *(red+jj)= q;
+      break;
+    case 2:
+      q= ( *(red_args+2*jj) == 1. ) ? q : pow(q,*(red_args+2*jj));
+      if ( q > *(red+jj) ) *(red+jj)= q;
+      break;
+    case 3:
+      if ( q >= *(red_args+2*jj) && q < *(red_args+2*jj+1) ) *(red+jj)+= 1.;
+      break;
+    }
+  }
+}
+void integrateFullOrbit_reduce(int nobj,
+			       double *yo,
+			       int nt, 
+			       double *t,
+			       int npot,
+			       int * pot_type,
+			       double * pot_args,
+			       double dt,
+			       double rtol,
+			       double atol,
+			       int nred,
+			       int * red_type,
+			       int * red_quantity,
+			       double * red_args,
+			       double *red,
+			       double *yfinal,
+			       int * err,
+			       int odeint_type){
+  int ii,jj,kk,ll,tid,nthreads,dim,thiserr,nsample;
+  double dt_ii, Eo;
+  bool needE= false;
+#ifdef _OPENMP
+  nthreads= ( nobj < omp_get_max_threads() ) ? nobj : omp_get_max_threads();
+#else
+  nthreads= 1;
+#endif
+  if ( nthreads < 1 ) nthreads= 1;
+  struct potentialArg * potentialArgs= (struct potentialArg *) malloc ( nthreads * npot * sizeof (struct potentialArg) );
+  for (tid=0; tid < nthreads; tid++)
+    parse_leapFuncArgs_Full(npot,potentialArgs+tid*npot,pot_type,pot_args);
+  for (jj=0; jj < nred; jj++)
+    if ( *(red_type+jj) == 4 ) needE= true;
+  //Per-thread work space: two output steps
+  double *ybuf= (double *) malloc ( nthreads * 12 * sizeof(double) );
+  odeint_func_type odeint_func;
+  odeint_deriv_func_type odeint_deriv_func;
+  select_odeint_Full(odeint_type,false,&odeint_func,&odeint_deriv_func,&dim);
+  UNUSED int chunk= CHUNKSIZE;
+#pragma omp parallel for schedule(dynamic,chunk) num_threads(nthreads)	\
+  private(tid,ii,jj,kk,ll,thiserr,nsample,dt_ii,Eo)			\
+  shared(yo,t,red,yfinal,err,potentialArgs,ybuf,odeint_func,odeint_deriv_func,dim,nt,npot,dt,rtol,atol,nred,red_type,red_quantity,red_args,needE)
+  for (ii=0; ii < nobj; ii++){
+#ifdef _OPENMP
+    tid= omp_get_thread_num();
+#else
+    tid = 0;
+#endif
+    *(err+ii)= 0;
+    for (jj=0; jj < nred; jj++)
+      switch ( *(red_type+jj) ) {
+      case 1:
+	*(red+ii*nred+jj)= INFINITY;
+	break;
+      case 2:
+	*(red+ii*nred+jj)= -INFINITY;
+	break;
+      default:
+	*(red+ii*nred+jj)= 0.;
+      }
+    for (ll=0; ll < 6; ll++) *(yfinal+6*ii+ll)= *(yo+6*ii+ll);
+    Eo= needE ? evalEnergyFull(yfinal+6*ii,*t,npot,potentialArgs+tid*npot)
+      : 0.;
+    accumulateReductionsFull(nred,red_type,red_quantity,red_args,
+			     yfinal+6*ii,*t,Eo,npot,potentialArgs+tid*npot,
+			     red+ii*nred);
+    nsample= 1;
+    if ( dt == -9999.99 )
+      dt_ii= estimate_step_Full(odeint_type,odeint_deriv_func,dim,
+				yfinal+6*ii,t,npot,potentialArgs+tid*npot,
+				rtol,atol);
+    else
+      dt_ii= dt;
+    for (kk=0; kk < nt-1; kk++){
+      integrate_partial_Full(odeint_func,odeint_deriv_func,dim,
+			     yfinal+6*ii,*(t+kk),*(t+kk+1) - *(t+kk),dt_ii,
+			     npot,potentialArgs+tid*npot,rtol,atol,
+			     ybuf+12*tid,&thiserr);
+      if ( thiserr != 0 ) *(err+ii)= thiserr;
+      if ( thiserr == -10 ) break;
+      for (ll=0; ll < 6; ll++) *(yfinal+6*ii+ll)= *(ybuf+12*tid+6+ll);
+      accumulateReductionsFull(nred,red_type,red_quantity,red_args,
+			       yfinal+6*ii,*(t+kk+1),Eo,npot,
+			       potentialArgs+tid*npot,red+ii*nred);
+      nsample++;
+    }
+    //Means and fractions
+    for (jj=0; jj < nred; jj++)
+      if ( *(red_type+jj) == 0 || *(red_type+jj) == 3 )
+	*(red+ii*nred+jj)/= nsample;
+  }
+  interrupted= 0; // need to reset, bc library and vars stay in memory
+  //Free allocated memory
+  for (jj=0; jj < nthreads * npot; jj++) {
+    free(potentialArgs->args);
+    potentialArgs++;
+  }
+  potentialArgs-= nthreads * npot;
+  free(potentialArgs);
+  free(ybuf);
 }
 // LCOV_EXCL_START
 void integrateOrbit_dxdv(double *yo,
@@ -314,50 +786,12 @@ void integrateOrbit_dxdv(double *yo,
   struct potentialArg * potentialArgs= (struct potentialArg *) malloc ( npot * sizeof (struct potentialArg) );
   parse_leapFuncArgs_Full(npot,potentialArgs,pot_type,pot_args);
   //Integrate
-  void (*odeint_func)(void (*func)(double, double *, double *,
-			   int, struct potentialArg *),
-		      int,
-		      double *,
-		      int, double, double *,
-		      int, struct potentialArg *,
-		      double, double,
-		      double *,int *);
-  void (*odeint_deriv_func)(double, double *, double *,
-			    int,struct potentialArg *);
-  switch ( odeint_type ) {
-  case 0: //leapfrog
-    odeint_func= &leapfrog;
-    odeint_deriv_func= &evalRectForce;
-    dim= 6;
-    break;
-  case 1: //RK4
-    odeint_func= &bovy_rk4;
-    odeint_deriv_func= &evalRectDeriv_dxdv;
-    dim= 12;
-    break;
-  case 2: //RK6
-    odeint_func= &bovy_rk6;
-    odeint_deriv_func= &evalRectDeriv_dxdv;
-    dim= 12;
-    break;
-  case 3: //symplec4
-    odeint_func= &symplec4;
-    odeint_deriv_func= &evalRectForce;
-    dim= 6;
-    break;
-  case 4: //symplec6
-    odeint_func= &symplec6;
-    odeint_deriv_func= &evalRectForce;
-    dim= 6;
-    break;
-  case 5: //DOPR54
-    odeint_func= &bovy_dopr54;
-    odeint_deriv_func= &evalRectDeriv_dxdv;
-    dim= 12;
-    break;
-  }
+  odeint_func_type odeint_func;
+  odeint_deriv_func_type odeint_deriv_func;
+  select_odeint_Full(odeint_type,true,&odeint_func,&odeint_deriv_func,&dim);
   odeint_func(odeint_deriv_func,dim,yo,nt,-9999.99,t,npot,potentialArgs,
 	      rtol,atol,result,err);
+  interrupted= 0; // need to reset, bc library and vars stay in memory
   //Free allocated memory
   for (ii=0; ii < npot; ii++) {
     free(potentialArgs->args);
@@ -208,6 +208,11 @@ void parse_leapFuncArgs(int npot,struct potentialArg * potentialArgs,
       potentialArgs->planarRphideriv= &SCFPotentialPlanarRphideriv;
       potentialArgs->nargs= (int) (5 + (1 + *(pot_args + 1)) * *(pot_args+2) * *(pot_args+3)* *(pot_args+4) + 7);
       break;
+    case 25: //interp3DPotential, many arguments
+      potentialArgs->planarRforce= &interp3DPotentialPlanarRforce;
+      potentialArgs->planarphiforce= &interp3DPotentialPlanarphiforce;
+      potentialArgs->nargs= 16; // + shared B-spline coefficients, see below
+      break;
     }
     potentialArgs->args= (double *) malloc( potentialArgs->nargs * sizeof(double));
     for (jj=0; jj < potentialArgs->nargs; jj++){
@@ -215,6 +220,11 @@ void parse_leapFuncArgs(int npot,struct potentialArg * potentialArgs,
       potentialArgs->args++;
     }
     potentialArgs->args-= potentialArgs->nargs;
+    if ( *(pot_type-1) == 25 ) { //interp3DPotential: share the coefficients
+      potentialArgs->coeffs= pot_args;
+      pot_args+= (int) (4 * *(potentialArgs->args+1)
+			* *(potentialArgs->args+2) * *(potentialArgs->args+3));
+    }
     potentialArgs++;
   }
   potentialArgs-= npot;
@@ -281,6 +291,7 @@ void integratePlanarOrbit(double *yo,
   }
   odeint_func(odeint_deriv_func,dim,yo,nt,dt,t,npot,potentialArgs,rtol,atol,
 	      result,err);
+  interrupted= 0; // need to reset, bc library and vars stay in memory
   //Free allocated memory
   for (ii=0; ii < npot; ii++) {
     free(potentialArgs->args);
@@ -338,6 +349,7 @@ void integratePlanarOrbit_dxdv(double *yo,
   }
   odeint_func(odeint_deriv_func,dim,yo,nt,dt,t,npot,potentialArgs,rtol,atol,
 	      result,err);
+  interrupted= 0; // need to reset, bc library and vars stay in memory
   //Free allocated memory
   for (ii=0; ii < npot; ii++) {
     free(potentialArgs->args);
@@ -217,7 +217,8 @@ class planarROrbit(planarOrbitTop):
                           ro=ro,zo=zo,vo=vo,solarmotion=solarmotion)
         return None
 
-    def integrate(self,t,pot,method='symplec4_c',dt=None):
+    def integrate(self,t,pot,method='symplec4_c',dt=None,outfile=None,
+                  resume=False,checkpoint_every=None):
         """
         NAME:
            integrate
@@ -233,17 +234,27 @@ class planarROrbit(planarOrbitTop):
                    'rk6_c' for a 6-th order Runge-Kutta integrator in C
                    'dopr54_c' for a Dormand-Prince integrator in C (generally the fastest)
            dt= (None) if set, force the integrator to use this basic stepsize; must be an integer divisor of output stepsize
+           outfile= (None) if set, write the orbit to this .npy file in blocks as the integration progresses and memory-map the orbit from this file (for orbits that do not fit in memory)
+           resume= (False) if True, resume an interrupted integration into outfile from its last checkpoint
+           checkpoint_every= (None) number of output times after which to write a checkpoint when using outfile (default: 10000)
         OUTPUT:
            error message number (get the actual orbit using getOrbit()
         HISTORY:
            2010-07-20
         """
         if hasattr(self,'_orbInterp'): delattr(self,'_orbInterp')
+        if hasattr(self,'_outfile'): delattr(self,'_outfile')
         if hasattr(self,'rs'): delattr(self,'rs')
         thispot= RZToplanarPotential(pot)
         self.t= nu.array(t)
         self._pot= thispot
-        self.orbit, msg= _integrateROrbit(self.vxvv,thispot,t,method,dt)
+        if outfile is None:
+            self.orbit, msg= _integrateROrbit(self.vxvv,thispot,t,method,dt)
+        else:
+            self.orbit, msg= self._integrate_outfile(_integrateROrbit,
+                                                     t,thispot,method,dt,
+                                                     outfile,resume=resume,
+                                                     checkpoint_every=checkpoint_every)
         return msg
 
     @physical_conversion('energy')
@@ -338,7 +349,8 @@ class planarOrbit(planarOrbitTop):
                           ro=ro,zo=zo,vo=vo,solarmotion=solarmotion)
         return None
 
-    def integrate(self,t,pot,method='symplec4_c',dt=None):
+    def integrate(self,t,pot,method='symplec4_c',dt=None,outfile=None,
+                  resume=False,checkpoint_every=None):
         """
         NAME:
            integrate
@@ -354,17 +366,27 @@ class planarOrbit(planarOrbitTop):
                    'rk6_c' for a 6-th order Runge-Kutta integrator in C
                    'dopr54_c' for a Dormand-Prince integrator in C (generally the fastest)
            dt= (None) if set, force the integrator to use this basic stepsize; must be an integer divisor of output stepsize
+           outfile= (None) if set, write the orbit to this .npy file in blocks as the integration progresses and memory-map the orbit from this file (for orbits that do not fit in memory)
+           resume= (False) if True, resume an interrupted integration into outfile from its last checkpoint
+           checkpoint_every= (None) number of output times after which to write a checkpoint when using outfile (default: 10000)
         OUTPUT:
            (none) (get the actual orbit using getOrbit()
         HISTORY:
            2010-07-20
         """
         if hasattr(self,'_orbInterp'): delattr(self,'_orbInterp')
+        if hasattr(self,'_outfile'): delattr(self,'_outfile')
         if hasattr(self,'rs'): delattr(self,'rs')
         thispot= toPlanarPotential(pot)
         self.t= nu.array(t)
         self._pot= thispot
-        self.orbit, msg= _integrateOrbit(self.vxvv,thispot,t,method,dt)
+        if outfile is None:
+            self.orbit, msg= _integrateOrbit(self.vxvv,thispot,t,method,dt)
+        else:
+            self.orbit, msg= self._integrate_outfile(_integrateOrbit,
+                                                     t,thispot,method,dt,
+                                                     outfile,resume=resume,
+                                                     checkpoint_every=checkpoint_every)
         return msg
 
     def integrate_dxdv(self,dxdv,t,pot,method='dopr54_c',
@@ -391,6 +413,7 @@ class planarOrbit(planarOrbitTop):
            2014-06-29 - Added rectIn and rectOut - Bovy (IAS)
         """
         if hasattr(self,'_orbInterp'): delattr(self,'_orbInterp')
+        if hasattr(self,'_outfile'): delattr(self,'_outfile')
         if hasattr(self,'rs'): delattr(self,'rs')
         thispot= toPlanarPotential(pot)
         self.t= nu.array(t)
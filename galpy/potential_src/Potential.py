@@ -2284,7 +2284,7 @@ def rl(Pot,lz):
 
        Pot - Potential instance or list thereof
 
-       lz - Angular momentum (can be Quantity)
+       lz - Angular momentum (can be Quantity; can be an array, in which case all radii are found simultaneously)
 
     OUTPUT:
 
@@ -2294,6 +2294,8 @@ def rl(Pot,lz):
 
        2012-07-30 - Written - Bovy (IAS@MPIA)
 
+       2016-10-29 - Vectorized for array lz - Bovy (UofT)
+
     NOTE:
 
        seems to take about ~0.5 ms for a Miyamoto-Nagai potential; 
@@ -2305,6 +2307,8 @@ def rl(Pot,lz):
             lz= lz.to(units.km/units.s*units.kpc).value/Pot._vo/Pot._ro
         elif hasattr(Pot[0],'_ro'):
             lz= lz.to(units.km/units.s*units.kpc).value/Pot[0]._vo/Pot[0]._ro
+    if isinstance(lz,nu.ndarray):
+        return _rl_vec(Pot,lz)
     #Find interval
     rstart= _rlFindStart(math.fabs(lz),#assumes vo=1.
                          math.fabs(lz),
@@ -2338,6 +2342,83 @@ def _rlFindStart(rl,lz,pot,lower=False):
             rtry*= 2.
     return rtry
 
+def _rl_vec(pot,lz,maxiter=200):
+    """rl for an array of lz, bracketing and solving for all radii at once"""
+    lz= nu.fabs(lz.astype('float'))
+    shape= lz.shape
+    lz= lz.flatten()
+    out= nu.zeros(len(lz)) # rl= 0 for lz= 0
+    nonzero= lz > 0.
+    lz= lz[nonzero]
+    #Find intervals, as in the scalar rl
+    rhi= 2.*lz
+    fhi= _rlfunc(rhi,lz,pot)
+    indx= fhi < 0.
+    niter= 0
+    while nu.any(indx) and niter < maxiter:
+        rhi[indx]*= 2.
+        fhi[indx]= _rlfunc(rhi[indx],lz[indx],pot)
+        indx[indx]= fhi[indx] < 0.
+        niter+= 1
+    rlo= 10.**-5.*nu.ones_like(lz)
+    flo= _rlfunc(rlo,lz,pot)
+    indx= flo > 0.
+    niter= 0
+    while nu.any(indx) and niter < maxiter:
+        rlo[indx]/= 2.
+        flo[indx]= _rlfunc(rlo[indx],lz[indx],pot)
+        indx[indx]= flo[indx] > 0.
+        niter+= 1
+    out[nonzero]= _rootfind_vec(_rlfunc,rlo,rhi,args=(lz,pot),
+                                maxiter=maxiter)
+    return out.reshape(shape)
+
+def _rootfind_vec(func,a,b,args=(),xtol=2e-12,rtol=8.881784197001252e-16,
+                  maxiter=100):
+    """Find the roots of func(x,*args) in the intervals [a,b] for arrays a 
+    and b at once, using bisection accelerated by a secant step; func needs 
+    to be vectorized and array arguments in args with the shape of a are 
+    indexed along with x; returns NaN where [a,b] does not bracket a root"""
+    lo= nu.array(a,dtype='float')
+    hi= nu.array(b,dtype='float')
+    shape= lo.shape
+    def _sub_args(indx):
+        return tuple([arg[indx] if isinstance(arg,nu.ndarray) \
+                          and arg.shape == shape else arg for arg in args])
+    flo= func(lo,*args)
+    fhi= func(hi,*args)
+    out= nu.empty_like(lo)+nu.nan
+    out[flo == 0.]= lo[flo == 0.]
+    out[fhi == 0.]= hi[fhi == 0.]
+    active= nu.nonzero(flo*fhi < 0.)[0]
+    lo, hi, flo, fhi= lo[active], hi[active], flo[active], fhi[active]
+    for ii in range(maxiter):
+        if len(active) == 0: break
+        thisargs= _sub_args(active)
+        for step in ['bisect','secant']:
+            if step == 'bisect':
+                x= 0.5*(lo+hi)
+            else:
+                with nu.errstate(divide='ignore',invalid='ignore'):
+                    x= lo-flo*(hi-lo)/(fhi-flo)
+                indx= True^(x > lo)*(x < hi)
+                x[indx]= 0.5*(lo[indx]+hi[indx])
+            fx= func(x,*thisargs)
+            right= fx*flo > 0.
+            lo[right]= x[right]
+            flo[right]= fx[right]
+            hi[True^right]= x[True^right]
+            fhi[True^right]= fx[True^right]
+            zero= fx == 0.
+            lo[zero]= x[zero]
+            hi[zero]= x[zero]
+        done= (hi-lo) < xtol+rtol*nu.fabs(0.5*(lo+hi))
+        out[active[done]]= 0.5*(lo[done]+hi[done])
+        active, lo, hi, flo, fhi= active[True^done], lo[True^done], \
+            hi[True^done], flo[True^done], fhi[True^done]
+    out[active]= 0.5*(lo+hi) # not converged within maxiter
+    return out
+
 @physical_conversion('position',pop=True)
 def lindbladR(Pot,OmegaP,m=2,**kwargs):
     """
@@ -2361,12 +2442,14 @@ def lindbladR(Pot,OmegaP,m=2,**kwargs):
 
     OUTPUT:
 
-       radius of Linblad resonance, None if there is no resonance
+       radius of Linblad resonance, None if there is no resonance; for array OmegaP, an array of radii that is NaN where there is no resonance
 
     HISTORY:
 
        2011-10-09 - Written - Bovy (IAS)
 
+       2016-10-29 - Vectorized for array OmegaP - Bovy (UofT)
+
     """
     if _APY_LOADED and isinstance(OmegaP,units.Quantity):
         if hasattr(Pot,'_ro'):
@@ -2381,6 +2464,16 @@ def lindbladR(Pot,OmegaP,m=2,**kwargs):
             raise IOError("'m' input not recognized, should be an integer or 'corotation'")
     else:
         corotation= False
+    if isinstance(OmegaP,nu.ndarray):
+        shape= OmegaP.shape
+        OmegaP= OmegaP.flatten()
+        if corotation:
+            eq, args= _corotationR_eq, (Pot,OmegaP)
+        else:
+            eq, args= _lindbladR_eq, (Pot,OmegaP,m)
+        return _rootfind_vec(eq,0.0000001*nu.ones_like(OmegaP),
+                             1000.*nu.ones_like(OmegaP),
+                             args=args,**kwargs).reshape(shape)
     if corotation:
         try:
             out= optimize.brentq(_corotationR_eq,0.0000001,1000.,
@@ -4,7 +4,7 @@ from galpy.potential_src.Potential import Potential, _APY_LOADED
 if _APY_LOADED:
     from astropy import units
     
-from galpy.util import bovy_coords
+from galpy.util import bovy_coords, multi
 from scipy.special import eval_gegenbauer, lpmn, gamma
 
 from numpy.polynomial.legendre import leggauss
@@ -13,6 +13,8 @@ from scipy.special import gammaln
 
 import hashlib
 
+_CHUNKSIZE= 10000 # number of points to evaluate at once for array inputs
+
 
 class SCFPotential(Potential):
     """Class that implements the `Hernquist & Ostriker (1992) <http://adsabs.harvard.edu/abs/1992ApJ...386..375H>`_ Self-Consistent-Field-type potential. 
@@ -194,11 +196,11 @@ class SCFPotential(Potential):
         xi = self._calculateXi(r)
         CC = _C(xi,N,L)
         a = self._a
-        rho = nu.zeros((N,L), float)
-        n = nu.arange(0,N, dtype=float)[:, nu.newaxis]
-        l = nu.arange(0, L, dtype=float)[nu.newaxis,:]
+        ax = (1,)*nu.ndim(r)
+        n = nu.arange(0,N, dtype=float).reshape((N,1)+ax)
+        l = nu.arange(0, L, dtype=float).reshape((1,L)+ax)
         K = 0.5 * n * (n + 4*l + 3) + (l + 1.)*(2*l + 1)
-        rho[:,:] = K * ((a*r)**l) / ((r/a)*(a + r)**(2*l + 3.)) * CC[:,:]* (nu.pi)**-0.5
+        rho = K * ((a*r)**l) / ((r/a)*(a + r)**(2*l + 3.)) * CC* (nu.pi)**-0.5
         return rho   
 
     def _phiTilde(self, r, N,L):
@@ -219,10 +221,8 @@ class SCFPotential(Potential):
         xi = self._calculateXi(r)
         CC = _C(xi,N,L)
         a = self._a
-        phi = nu.zeros((N,L), float)
-        n = nu.arange(0,N)[:, nu.newaxis]
-        l = nu.arange(0, L)[nu.newaxis,:]
-        phi[:,:] = - (r*a)**l/ ((a + r)**(2*l + 1.)) * CC[:,:]* (4*nu.pi)**0.5
+        l = nu.arange(0, L, dtype=float).reshape((1,L)+(1,)*nu.ndim(r))
+        phi = - (r*a)**l/ ((a + r)**(2*l + 1.)) * CC* (4*nu.pi)**0.5
         return phi  
         
     def _compute(self, funcTilde, R, z, phi):
@@ -279,15 +279,24 @@ class SCFPotential(Potential):
         
         shape = (R*z*phi).shape
         if shape == (): return nu.sum(self._compute(funcTilde, R,z,phi))
-        R = R*nu.ones(shape); z = z*nu.ones(shape); phi = phi*nu.ones(shape);
-        func = nu.zeros(shape, float)
+        R = (R*nu.ones(shape)).flatten(); z = (z*nu.ones(shape)).flatten(); phi = (phi*nu.ones(shape)).flatten();
+        func = nu.empty(R.shape, float)
 
-        
-        li = _cartesian(shape)
-        for i in range(li.shape[0]):
-            j = nu.split(li[i], li.shape[1])
-            func[j] = nu.sum(self._compute(funcTilde, R[j][0],z[j][0],phi[j][0]))
-        return func
+        Acos, Asin = self._Acos, self._Asin
+        N, L, M = Acos.shape
+        m = nu.arange(0, M)[:, nu.newaxis]
+        # Evaluate all points at once, in chunks to limit the memory use
+        for i in range(0,len(R),_CHUNKSIZE):
+            j = slice(i,i+_CHUNKSIZE)
+            r, theta, thisphi = bovy_coords.cyl_to_spher(R[j],z[j],phi[j])
+            PP = _lpmn(L,M,nu.cos(theta)) ##Get the Legendre polynomials
+            func_tilde = funcTilde(r, N, L) ## Tilde of the function of interest
+            mcos = nu.cos(m*thisphi)
+            msin = nu.sin(m*thisphi)
+            func[j] = nu.sum(PP*(nu.einsum('nlp,nlm->lmp',func_tilde,Acos)*mcos
+                                 +nu.einsum('nlp,nlm->lmp',func_tilde,Asin)*msin),
+                             axis=(0,1))
+        return func.reshape(shape)
         
     def _dens(self, R, z, phi=0., t=0.):
         """
@@ -345,8 +354,7 @@ class SCFPotential(Potential):
            2016-06-06 - Written - Aladdin 
         """
         a = self._a
-        l = nu.arange(0, L, dtype=float)[nu.newaxis, :]
-        n = nu.arange(0, N, dtype=float)[:, nu.newaxis]
+        l = nu.arange(0, L, dtype=float).reshape((1,L)+(1,)*nu.ndim(r))
         xi = self._calculateXi(r)
         dC = _dC(xi,N,L)
         return -(4*nu.pi)**.5 * (nu.power(a*r, l)*(l*(a + r)*nu.power(r,-1) -(2*l + 1))/((a + r)**(2*l + 2))*_C(xi,N,L) + 
@@ -425,19 +433,33 @@ class SCFPotential(Potential):
             self._computeforce(R,z,phi)
             return dr_dx*dPhi_dr + dtheta_dx*dPhi_dtheta +dPhi_dphi*dphi_dx
         
-        R = R*nu.ones(shape);
-        z = z* nu.ones(shape);
-        phi = phi* nu.ones(shape);
-        force = nu.zeros(shape, float)
-        dr_dx = dr_dx*nu.ones(shape); dtheta_dx = dtheta_dx*nu.ones(shape);dphi_dx = dphi_dx*nu.ones(shape);  
-        li = _cartesian(shape)
+        R = (R*nu.ones(shape)).flatten();
+        z = (z* nu.ones(shape)).flatten();
+        phi = (phi* nu.ones(shape)).flatten();
+        force = nu.empty(R.shape, float)
+        dr_dx = (dr_dx*nu.ones(shape)).flatten(); dtheta_dx = (dtheta_dx*nu.ones(shape)).flatten();dphi_dx = (dphi_dx*nu.ones(shape)).flatten();  
 
-        for i in range(li.shape[0]):
-            j = nu.split(li[i], li.shape[1])
-            dPhi_dr,dPhi_dtheta,dPhi_dphi = \
-            self._computeforce(R[j][0],z[j][0],phi[j][0])
-            force[j] = dr_dx[j][0]*dPhi_dr + dtheta_dx[j][0]*dPhi_dtheta +dPhi_dphi*dphi_dx[j][0]
-        return force
+        Acos, Asin = self._Acos, self._Asin
+        N, L, M = Acos.shape
+        m = nu.arange(0, M)[:, nu.newaxis]
+        # Evaluate all points at once, in chunks to limit the memory use
+        for i in range(0,len(R),_CHUNKSIZE):
+            j = slice(i,i+_CHUNKSIZE)
+            r, theta, thisphi = bovy_coords.cyl_to_spher(R[j],z[j],phi[j])
+            PP, dPP = _lpmn(L,M,nu.cos(theta),deriv=True) ##Get the Legendre polynomials and their theta derivatives
+            phi_tilde = self._phiTilde(r, N, L)
+            dphi_tilde = self._dphiTilde(r, N, L)
+            mcos = nu.cos(m*thisphi)
+            msin = nu.sin(m*thisphi)
+            phi_cos = nu.einsum('nlp,nlm->lmp',phi_tilde,Acos)
+            phi_sin = nu.einsum('nlp,nlm->lmp',phi_tilde,Asin)
+            dPhi_dr = -nu.sum(PP*(nu.einsum('nlp,nlm->lmp',dphi_tilde,Acos)*mcos
+                                  +nu.einsum('nlp,nlm->lmp',dphi_tilde,Asin)*msin),
+                              axis=(0,1))
+            dPhi_dtheta = -nu.sum(dPP*(phi_cos*mcos+phi_sin*msin),axis=(0,1))
+            dPhi_dphi = -nu.sum(m*PP*(phi_sin*mcos-phi_cos*msin),axis=(0,1))
+            force[j] = dr_dx[j]*dPhi_dr + dtheta_dx[j]*dPhi_dtheta +dPhi_dphi*dphi_dx[j]
+        return force.reshape(shape)
     def _Rforce(self, R, z, phi=0, t=0):
         """
         NAME:
@@ -532,26 +554,57 @@ def _C(xi, N,L, alpha = lambda x: 2*x + 3./2):
     HISTORY:
        2016-05-16 - Written - Aladdin 
     """
-    CC = nu.zeros((N,L), float) 
-     
-    for l in range(L):
-        for n in range(N):
-            a = alpha(l)
-            if n==0:
-                CC[n][l] = 1.
-                continue 
-            elif n==1: CC[n][l] = 2.*a*xi
-            if n + 1 != N:
-                CC[n+1][l] = (n + 1.)**-1. * (2*(n + a)*xi*CC[n][l] - (n + 2*a - 1)*CC[n-1][l])
+    xi = nu.asarray(xi, dtype=float)
+    a = alpha(nu.arange(0, L, dtype=float)).reshape((L,)+(1,)*xi.ndim)
+    CC = nu.zeros((N,L)+xi.shape, float)
+    CC[0] = 1.
+    if N > 1: CC[1] = 2.*a*xi
+    for n in range(1,N-1):
+        CC[n+1] = (n + 1.)**-1. * (2*(n + a)*xi*CC[n] - (n + 2*a - 1)*CC[n-1])
     return CC 
     
 def _dC(xi, N, L):
-    l = nu.arange(0,L)[nu.newaxis, :]
+    l = nu.arange(0,L).reshape((1,L)+(1,)*nu.ndim(xi))
     CC = _C(xi,N + 1,L, alpha = lambda x: 2*x + 5./2)
     CC = nu.roll(CC, 1, axis=0)[:-1,:]
     CC[0, :] = 0
     CC *= 2*(2*l + 3./2)
     return CC
+
+def _lpmn(L, M, x, deriv=False):
+    """
+    NAME:
+       _lpmn
+    PURPOSE:
+       Evaluate the associated Legendre functions P_lm(x) (including the Condon-Shortley phase, as scipy.special.lpmn) for 0 <= l < L and 0 <= m < M for an array of x at once
+    INPUT:
+       L - Size of the L dimension
+       M - Size of the M dimension
+       x - array of cos(theta)
+       deriv= (False) if True, also return the derivative of P_lm(cos(theta)) with respect to theta
+    OUTPUT:
+       An LxMxlen(x) array of Legendre functions (and of their theta derivatives if deriv)
+    HISTORY:
+       2016-10-30 - Written - Bovy (UofT)
+    """
+    x = nu.asarray(x, dtype=float)
+    Mp = M+1 if deriv else M
+    PP = nu.zeros((L,Mp)+x.shape, float)
+    sintheta = nu.sqrt(1.-x**2.)
+    pmm = nu.ones(x.shape)
+    for m in range(min(Mp,L)):
+        if m > 0: pmm = -(2*m-1.)*sintheta*pmm
+        PP[m,m] = pmm
+        if m+1 < L: PP[m+1,m] = (2*m+1.)*x*pmm
+        for l in range(m+2,L):
+            PP[l,m] = ((2*l-1.)*x*PP[l-1,m]-(l+m-1.)*PP[l-2,m])/(l-m)
+    if not deriv: return PP
+    dPP = nu.zeros((L,M)+x.shape, float)
+    if Mp > 1: dPP[:,0] = PP[:,1]
+    l = nu.arange(0,L).reshape((L,)+(1,)*x.ndim)
+    for m in range(1,M):
+        dPP[:,m] = -0.5*((l+m)*(l-m+1.)*PP[:,m-1]-PP[:,m+1])
+    return PP[:,:M], dPP
      
 def scf_compute_coeffs_spherical(dens, N, a=1., radial_order=None):
         """
@@ -586,11 +639,11 @@ def scf_compute_coeffs_spherical(dens, N, a=1., radial_order=None):
         try:
             dens(0)
             numOfParam=1
-        except:
+        except (TypeError,ValueError):
             try:
                 dens(0,0)
                 numOfParam=2
-            except:
+            except (TypeError,ValueError):
                 numOfParam=3
         param = [0]*numOfParam;
         
@@ -651,7 +704,7 @@ def scf_compute_coeffs_axi(dens, N, L, a=1.,radial_order=None, costheta_order=No
         try:
             dens(0,0)
             numOfParam=2
-        except:
+        except (TypeError,ValueError):
             numOfParam=3
         param = [0]*numOfParam;
         def integrand(xi, costheta):
@@ -692,7 +745,7 @@ def scf_compute_coeffs_axi(dens, N, L, a=1.,radial_order=None, costheta_order=No
         
         return Acos, Asin
         
-def scf_compute_coeffs(dens, N, L, a=1., radial_order=None, costheta_order=None, phi_order=None):
+def scf_compute_coeffs(dens, N, L, a=1., radial_order=None, costheta_order=None, phi_order=None, numcores=None):
         """        
         NAME:
 
@@ -704,7 +757,7 @@ def scf_compute_coeffs(dens, N, L, a=1., radial_order=None, costheta_order=None,
 
         INPUT:
 
-           dens - A density function that takes a parameter R, z and phi
+           dens - A density function that takes a parameter R, z and phi; it is evaluated for arrays of R, z, and phi if it supports this
 
            N - size of the Nth dimension of the expansion coefficients
 
@@ -718,6 +771,8 @@ def scf_compute_coeffs(dens, N, L, a=1., radial_order=None, costheta_order=None,
 
            phi_order - Number of sample points of the phi integral. If None, If costheta_order=max(20, L + 1)
 
+           numcores= (None) if set to an integer, use this many cores to evaluate the density at the radial sample points in parallel
+
         OUTPUT:
 
            (Acos,Asin) - Expansion coefficients for density dens that can be given to SCFPotential.__init__
@@ -726,26 +781,9 @@ def scf_compute_coeffs(dens, N, L, a=1., radial_order=None, costheta_order=None,
 
            2016-05-27 - Written - Aladdin 
 
+           2016-11-01 - Evaluate the density once on the grid of sample points and perform the integrals as successive sums over phi, costheta, and xi - Bovy (UofT)
+
         """
-        def integrand(xi, costheta, phi):
-            l = nu.arange(0, L)[nu.newaxis, :, nu.newaxis]
-            m = nu.arange(0, L)[nu.newaxis,nu.newaxis,:]
-            r = _xiToR(xi, a)
-            R = r*nu.sqrt(1 - costheta**2.)
-            z = r*costheta
-            Legandre = lpmn(L - 1,L-1,costheta)[0].T[nu.newaxis,:,:]
-            dV = (1. + xi)**2. * nu.power(1. - xi, -4.)
-            
-            
-            phi_nl = - a**3*(1. + xi)**l * (1. - xi)**(l + 1.)*_C(xi, N, L)[:,:,nu.newaxis] * Legandre
-            
-            return dens(R,z, phi) * phi_nl[nu.newaxis, :,:,:]*nu.array([nu.cos(m*phi), nu.sin(m*phi)])*dV
-            
-               
-        Acos = nu.zeros((N,L,L), float)
-        Asin = nu.zeros((N,L,L), float)
-        
-       
         Ksample = [max(N + 3*L//2 + 1,20), max(L + 1,20 ), max(L + 1,20)]
         if radial_order != None:
             Ksample[0] = radial_order
@@ -753,24 +791,163 @@ def scf_compute_coeffs(dens, N, L, a=1., radial_order=None, costheta_order=None,
             Ksample[1] = costheta_order
         if phi_order != None:
             Ksample[2] = phi_order
-        integrated = _gaussianQuadrature(integrand, [[-1., 1.], [-1., 1.], [0, 2*nu.pi]], Ksample = Ksample)
-        n = nu.arange(0,N)[:,nu.newaxis, nu.newaxis]
-        l = nu.arange(0,L)[nu.newaxis,:, nu.newaxis]
-        m = nu.arange(0,L)[nu.newaxis,nu.newaxis,:]
-        K = .5*n*(n + 4*l + 3) + (l + 1)*(2*l + 1)
+        xi, wxi = leggauss(Ksample[0])
+        costheta, wcostheta = leggauss(Ksample[1])
+        phi, wphi = leggauss(Ksample[2])
+        phi = nu.pi*(phi + 1.); wphi = nu.pi*wphi
+        ##Density on the full (xi,costheta,phi) grid of sample points
+        r = _xiToR(xi, a)
+        R = nu.outer(r,nu.sqrt(1. - costheta**2.))
+        z = nu.outer(r,costheta)
+        densGrid = _dens_grid(dens, R, z, phi, numcores=numcores)
+        ##Integrate over phi, then costheta, then xi
+        m = nu.arange(0, L)[:,nu.newaxis]
+        trig = nu.array([nu.cos(m*phi), nu.sin(m*phi)])
+        integrated = nu.einsum('ijk,tmk,k->tijm', densGrid, trig, wphi)
+        Legandre = _lpmn(L, L, costheta)
+        integrated = nu.einsum('tijm,lmj,j->tilm', integrated, Legandre,
+                               wcostheta)
+        l = nu.arange(0, L)[:,nu.newaxis]
+        dV = (1. + xi)**2. * nu.power(1. - xi, -4.)
+        phi_nl = - a**3*(1. + xi)**l * (1. - xi)**(l + 1.)*_C(xi, N, L)*dV*wxi
+        integrated = nu.einsum('nli,tilm->tnlm', phi_nl, integrated)
+
+        I, constants = _scf_compute_coeffs_normalization(N, L)
+        Acos,Asin = 2*(I**-1.)[nu.newaxis,:,:,:] * integrated * constants[nu.newaxis,:,:,:]
         
-        
-        Nln = .5*gammaln(l - m + 1) - .5*gammaln(l + m + 1) - (2*l)*nu.log(2)
-        NN = nu.e**(Nln)
+        return Acos, Asin
 
-        NN[nu.where(NN == nu.inf)] = 0 ## To account for the fact that m cant be bigger than l
-            
-        constants = NN*(2*l + 1.)**.5
-        
-        lnI = -(8*l + 6)*nu.log(2) + gammaln(n + 4*l + 3) - gammaln(n + 1) - nu.log(n + 2*l + 3./2) - 2*gammaln(2*l + 3./2)
-        I = -K*(4*nu.pi) * nu.e**(lnI)
-        Acos[:,:,:],Asin[:,:,:] = 2*(I**-1.)[nu.newaxis,:,:,:] * integrated * constants[nu.newaxis,:,:,:]
+def _dens_grid(dens, R, z, phi, numcores=None):
+    """
+    NAME:
+       _dens_grid
+    PURPOSE:
+       Evaluate a density function on the outer product of a (R,z) grid and phi
+    INPUT:
+       dens - A density function that takes a parameter R, z and phi
+       R, z - 2D arrays with the cylindrical coordinates of the (xi,costheta) sample points
+       phi - 1D array of phi
+       numcores= (None) if set to an integer, use this many cores to evaluate the density for different rows of R and z in parallel; otherwise the density is evaluated in a single call
+    OUTPUT:
+       3D array of densities with shape R.shape+phi.shape
+    HISTORY:
+       2016-11-01 - Written - Bovy (UofT)
+    """
+    def dens_arrays(Rr, zr, phir):
+        try:
+            out = nu.asarray(dens(Rr,zr,phir),dtype=float)
+            if out.shape != Rr.shape: raise ValueError
+        except (TypeError,ValueError): # density function that does not support arrays
+            out = nu.vectorize(dens,otypes=[float])(Rr,zr,phir)
+        return out
+    Rr = nu.tile(R[:,:,nu.newaxis],(1,1,len(phi)))
+    zr = nu.tile(z[:,:,nu.newaxis],(1,1,len(phi)))
+    phir = nu.tile(phi,R.shape+(1,))
+    if numcores is None:
+        return dens_arrays(Rr,zr,phir)
+    else:
+        return nu.array(multi.parallel_map(\
+                lambda ii: dens_arrays(Rr[ii],zr[ii],phir[ii]),
+                list(range(R.shape[0])),numcores=numcores))
+
+def _scf_compute_coeffs_normalization(N, L):
+    """
+    NAME:
+       _scf_compute_coeffs_normalization
+    PURPOSE:
+       Compute the normalization I_nl and the constants N_lm (2l+1)^1/2 that convert integrals of the density times the basis functions into the expansion coefficients
+    INPUT:
+       N - size of the Nth dimension of the expansion coefficients
+       L - size of the Lth and Mth dimension of the expansion coefficients
+    OUTPUT:
+       (I,constants) - NxLx1 and 1xLxL arrays
+    HISTORY:
+       2016-10-31 - Split off from scf_compute_coeffs - Bovy (UofT)
+    """
+    n = nu.arange(0,N)[:,nu.newaxis, nu.newaxis]
+    l = nu.arange(0,L)[nu.newaxis,:, nu.newaxis]
+    m = nu.arange(0,L)[nu.newaxis,nu.newaxis,:]
+    K = .5*n*(n + 4*l + 3) + (l + 1)*(2*l + 1)
+    
+    Nln = .5*gammaln(l - m + 1) - .5*gammaln(l + m + 1) - (2*l)*nu.log(2)
+    NN = nu.e**(Nln)
+
+    NN[nu.where(NN == nu.inf)] = 0 ## To account for the fact that m cant be bigger than l
         
+    constants = NN*(2*l + 1.)**.5
+    
+    lnI = -(8*l + 6)*nu.log(2) + gammaln(n + 4*l + 3) - gammaln(n + 1) - nu.log(n + 2*l + 3./2) - 2*gammaln(2*l + 3./2)
+    I = -K*(4*nu.pi) * nu.e**(lnI)
+    return I, constants
+
+def scf_compute_coeffs_nbody(pos, mass, N, L, a=1., numcores=None,
+                             chunksize=_CHUNKSIZE):
+        """
+        NAME:
+
+           scf_compute_coeffs_nbody
+
+        PURPOSE:
+
+           Compute the expansion coefficients directly from the positions and masses of a set of N-body particles
+
+        INPUT:
+
+           pos - positions of the particles in rectangular coordinates with shape [3,n]; can be a numpy.memmap, in which case the particles are read from disk one chunk at a time
+
+           mass - masses of the particles (array with shape [n] or a single number for equal-mass particles)
+
+           N - size of the Nth dimension of the expansion coefficients
+
+           L - size of the Lth and Mth dimension of the expansion coefficients
+
+           a - parameter used to shift the basis functions
+
+           numcores= (None) if set to an integer, use this many cores to process chunks of particles in parallel
+
+           chunksize= (10000) number of particles to process at once
+
+        OUTPUT:
+
+           (Acos,Asin) - Expansion coefficients for the particles that can be given to SCFPotential.__init__
+
+        HISTORY:
+
+           2016-10-31 - Written - Bovy (UofT)
+
+        """
+        npart = pos.shape[1]
+        nchunks = int(nu.ceil(npart/float(chunksize)))
+        scalarMass = not isinstance(mass,nu.ndarray)
+        def chunk_coeffs(ii):
+            x,y,z = nu.array(pos[:,ii*chunksize:(ii+1)*chunksize],
+                             dtype=float)
+            if scalarMass: m = mass*nu.ones(len(x))
+            else: m = nu.array(mass[ii*chunksize:(ii+1)*chunksize],
+                               dtype=float)
+            r = nu.sqrt(x**2.+y**2.+z**2.)
+            xi = (r-a)/(r+a)
+            costheta = nu.zeros_like(r)
+            costheta[r > 0.] = z[r > 0.]/r[r > 0.]
+            phi = nu.arctan2(y,x)
+            l = nu.arange(0,L)[:,nu.newaxis]
+            ml = nu.arange(0,L)[:,nu.newaxis]
+            ## -(1+xi)^l (1-xi)^(l+1) C_nl(xi) m_k, NxLxnpart
+            phi_nl = -(1. + xi)**l * (1. - xi)**(l + 1.)*_C(xi, N, L)*m
+            Legandre = _lpmn(L, L, costheta)
+            return nu.array([nu.einsum('nlp,lmp,mp->nlm',phi_nl,Legandre,
+                                       nu.cos(ml*phi)),
+                             nu.einsum('nlp,lmp,mp->nlm',phi_nl,Legandre,
+                                       nu.sin(ml*phi))])
+        if numcores is None or nchunks == 1:
+            summed = nu.sum([chunk_coeffs(ii) for ii in range(nchunks)],
+                            axis=0)
+        else:
+            summed = nu.sum(multi.parallel_map(chunk_coeffs,
+                                               list(range(nchunks)),
+                                               numcores=numcores),axis=0)
+        I, constants = _scf_compute_coeffs_normalization(N, L)
+        Acos,Asin = (I**-1.)[nu.newaxis,:,:,:] * summed * constants[nu.newaxis,:,:,:]
         return Acos, Asin
 
 def _cartesian(arraySizes, out=None):
@@ -0,0 +1,204 @@
+###############################################################################
+#   interp3DPotential.py: class that interpolates a (non-axisymmetric)
+#                         potential and its forces on a 3D rectangular grid
+#                         using tricubic B-splines
+###############################################################################
+import numpy
+from scipy import ndimage
+from galpy.util import multi
+from galpy.potential_src.Potential import Potential
+class interp3DPotential(Potential):
+    """Class that interpolates a given, possibly non-axisymmetric, potential and its forces on a 3D rectangular (x,y,z) grid using tricubic B-splines for fast orbit integration"""
+    def __init__(self,pot=None,
+                 xgrid=(-2.,2.,101),ygrid=(-2.,2.,101),zgrid=(-1.,1.,51),
+                 enable_c=True,numcores=None,ro=None,vo=None):
+        """
+        NAME:
+
+           __init__
+
+        PURPOSE:
+
+           Initialize an interp3DPotential instance
+
+        INPUT:
+
+           pot - Potential or list of such instances to be interpolated
+
+           xgrid, ygrid, zgrid - x, y, and z grids to be given to linspace as in xs= linspace(*xgrid)
+
+           enable_c= (True) enable use of C for orbit integration (outside of the grid, the C code uses the potential and forces at the nearest point on the grid and a warning is issued when this happens, so orbits should stay within the grid)
+
+           numcores= (None) if set to an integer, use this many cores to tabulate the potential and forces
+
+           ro=, vo= distance and velocity scales for translation into internal units (default from configuration file)
+
+        OUTPUT:
+
+           instance
+
+        HISTORY:
+
+           2016-11-02 - Written - Bovy (UofT)
+
+        """
+        if isinstance(pot,interp3DPotential):
+            from galpy.potential import PotentialError
+            raise PotentialError('Cannot setup interp3DPotential with another interp3DPotential')
+        # Propagate ro and vo
+        roSet= True
+        voSet= True
+        if ro is None:
+            if isinstance(pot,list):
+                ro= pot[0]._ro
+                roSet= pot[0]._roSet
+            else:
+                ro= pot._ro
+                roSet= pot._roSet
+        if vo is None:
+            if isinstance(pot,list):
+                vo= pot[0]._vo
+                voSet= pot[0]._voSet
+            else:
+                vo= pot._vo
+                voSet= pot._voSet
+        Potential.__init__(self,amp=1.,ro=ro,vo=vo)
+        # Turn off physical if it hadn't been on
+        if not roSet: self._roSet= False
+        if not voSet: self._voSet= False
+        self._origPot= pot
+        self._xgrid= numpy.linspace(*xgrid)
+        self._ygrid= numpy.linspace(*ygrid)
+        self._zgrid= numpy.linspace(*zgrid)
+        self.isNonAxi= True
+        self.hasC= enable_c
+        self._enable_c= enable_c
+        # Tabulate the potential and the rectangular forces, slab-by-slab in x
+        if numcores is None:
+            grids= [self._tabulate(x) for x in self._xgrid]
+        else:
+            grids= multi.parallel_map(self._tabulate,list(self._xgrid),
+                                      numcores=numcores)
+        grids= numpy.array(grids)
+        # Replace non-finite values (e.g., forces at a central cusp) by
+        # the nearest finite value on the grid
+        for ii in range(4):
+            bad= True^numpy.isfinite(grids[:,ii])
+            if numpy.any(bad):
+                grids[:,ii]= grids[:,ii][tuple(\
+                        ndimage.distance_transform_edt(bad,
+                                                       return_distances=False,
+                                                       return_indices=True))]
+        self._potGrid= grids[:,0]
+        self._xforceGrid= grids[:,1]
+        self._yforceGrid= grids[:,2]
+        self._zforceGrid= grids[:,3]
+        # B-spline coefficients, used both here and in C
+        self._potGrid_splinecoeffs= ndimage.spline_filter(self._potGrid,
+                                                          order=3)
+        self._xforceGrid_splinecoeffs= ndimage.spline_filter(self._xforceGrid,
+                                                             order=3)
+        self._yforceGrid_splinecoeffs= ndimage.spline_filter(self._yforceGrid,
+                                                             order=3)
+        self._zforceGrid_splinecoeffs= ndimage.spline_filter(self._zforceGrid,
+                                                             order=3)
+        return None
+
+    def _tabulate(self,x):
+        """Compute the potential and the rectangular forces on the (y,z) grid at x"""
+        from galpy.potential import evaluatePotentials, evaluateRforces, \
+            evaluatezforces, evaluatephiforces
+        y,z= numpy.meshgrid(self._ygrid,self._zgrid,indexing='ij')
+        xs= x*numpy.ones_like(y)
+        R= numpy.sqrt(xs**2.+y**2.)
+        phi= numpy.arctan2(y,xs)
+        pot= _eval_array(evaluatePotentials,self._origPot,R,z,phi)
+        Rforce= _eval_array(evaluateRforces,self._origPot,R,z,phi)
+        zforce= _eval_array(evaluatezforces,self._origPot,R,z,phi)
+        # phiforce/R --> 0 on the z axis
+        phiforceoverR= numpy.zeros_like(R)
+        indx= R > 0.
+        phiforceoverR[indx]= _eval_array(evaluatephiforces,self._origPot,
+                                         R[indx],z[indx],phi[indx])/R[indx]
+        xforce= numpy.cos(phi)*Rforce-numpy.sin(phi)*phiforceoverR
+        yforce= numpy.sin(phi)*Rforce+numpy.cos(phi)*phiforceoverR
+        return numpy.array([pot,xforce,yforce,zforce])
+
+    def _interp(self,coeffs,R,z,phi):
+        """Evaluate the B-spline with coefficients coeffs at (R,z,phi), returning also which points are inside of the grid"""
+        R,z,phi= numpy.broadcast_arrays(numpy.atleast_1d(R),
+                                        numpy.atleast_1d(z),
+                                        numpy.atleast_1d(phi))
+        x= R*numpy.cos(phi)
+        y= R*numpy.sin(phi)
+        indx= (x >= self._xgrid[0])*(x <= self._xgrid[-1])\
+            *(y >= self._ygrid[0])*(y <= self._ygrid[-1])\
+            *(z >= self._zgrid[0])*(z <= self._zgrid[-1])
+        out= numpy.empty(R.shape)
+        if numpy.sum(indx) > 0:
+            coords= numpy.array(\
+                [(x[indx]-self._xgrid[0])/(self._xgrid[1]-self._xgrid[0]),
+                 (y[indx]-self._ygrid[0])/(self._ygrid[1]-self._ygrid[0]),
+                 (z[indx]-self._zgrid[0])/(self._zgrid[1]-self._zgrid[0])])
+            out[indx]= ndimage.map_coordinates(coeffs,coords,order=3,
+                                               prefilter=False)
+        return (out,indx,R,z,phi)
+
+    def _evaluate(self,R,z,phi=0.,t=0.):
+        from galpy.potential import evaluatePotentials
+        out, indx, R, z, phi= self._interp(self._potGrid_splinecoeffs,R,z,phi)
+        if numpy.sum(True^indx) > 0:
+            out[True^indx]= _eval_array(evaluatePotentials,self._origPot,
+                                        R[True^indx],z[True^indx],
+                                        phi[True^indx],t=t)
+        return out if out.size > 1 else out[0]
+
+    def _xyforces(self,R,z,phi,t):
+        """Interpolate the x and y forces, with the original potential outside of the grid"""
+        from galpy.potential import evaluateRforces, evaluatephiforces
+        Fx, indx, R, z, phi= self._interp(self._xforceGrid_splinecoeffs,
+                                          R,z,phi)
+        Fy= self._interp(self._yforceGrid_splinecoeffs,R,z,phi)[0]
+        if numpy.sum(True^indx) > 0:
+            Ro, zo, phio= R[True^indx], z[True^indx], phi[True^indx]
+            Rforce= _eval_array(evaluateRforces,self._origPot,Ro,zo,phio,t=t)
+            phiforceoverR= _eval_array(evaluatephiforces,self._origPot,
+                                       Ro,zo,phio,t=t)/Ro
+            Fx[True^indx]= numpy.cos(phio)*Rforce-numpy.sin(phio)*phiforceoverR
+            Fy[True^indx]= numpy.sin(phio)*Rforce+numpy.cos(phio)*phiforceoverR
+        return (Fx,Fy,R,phi)
+
+    def _Rforce(self,R,z,phi=0.,t=0.):
+        Fx, Fy, R, phi= self._xyforces(R,z,phi,t)
+        out= numpy.cos(phi)*Fx+numpy.sin(phi)*Fy
+        return out if out.size > 1 else out[0]
+
+    def _phiforce(self,R,z,phi=0.,t=0.):
+        Fx, Fy, R, phi= self._xyforces(R,z,phi,t)
+        out= R*(-numpy.sin(phi)*Fx+numpy.cos(phi)*Fy)
+        return out if out.size > 1 else out[0]
+
+    def _zforce(self,R,z,phi=0.,t=0.):
+        from galpy.potential import evaluatezforces
+        out, indx, R, z, phi= self._interp(self._zforceGrid_splinecoeffs,
+                                           R,z,phi)
+        if numpy.sum(True^indx) > 0:
+            out[True^indx]= _eval_array(evaluatezforces,self._origPot,
+                                        R[True^indx],z[True^indx],
+                                        phi[True^indx],t=t)
+        return out if out.size > 1 else out[0]
+
+    def _dens(self,R,z,phi=0.,t=0.):
+        from galpy.potential import evaluateDensities
+        return evaluateDensities(self._origPot,R,z,phi=phi,t=t)
+
+def _eval_array(func,pot,R,z,phi,t=0.):
+    """Evaluate func(pot,R,z,phi=phi,t=t) for arrays, point-by-point if pot does not support array input"""
+    try:
+        out= numpy.asarray(func(pot,R.flatten(),z.flatten(),
+                                phi=phi.flatten(),t=t),dtype=float)
+        if out.shape != (R.size,): raise ValueError
+    except (TypeError,ValueError):
+        out= numpy.array([func(pot,tR,tz,phi=tphi,t=t) for tR,tz,tphi
+                          in zip(R.flatten(),z.flatten(),phi.flatten())])
+    return numpy.reshape(out,R.shape)
@@ -10,7 +10,7 @@ import numpy
 from numpy.ctypeslib import ndpointer
 from scipy import interpolate
 from galpy.util import multi, galpyWarning
-from galpy.potential_src.Potential import Potential
+from galpy.potential_src.Potential import Potential, _check_c
 from galpy.util.bovy_conversion import physical_conversion
 _DEBUG= False
 #Find and load the library
@@ -132,13 +132,13 @@ class interpRZPotential(Potential):
 
            interpPot, interpRforce, interpzforce, interpDens,interpvcirc, interpepifreq, interpverticalfreq, interpdvcircdr= if True, interpolate these functions
 
-           use_c= use C to speed up the calculation of the grid
+           use_c= use C to speed up the calculation of the grid (the potential, force, and vcirc grids are then computed in a single multi-threaded pass in C; the density and the other frequencies are always computed in python, using the exact second derivatives of the potential)
 
            enable_c= enable use of C for interpolations
 
            zsym= if True (default), the potential is assumed to be symmetric around z=0 (so you can use, e.g.,  zgrid=(0.,1.,101)).
 
-           numcores= if set to an integer, use this many cores (only used for vcirc, dvcircdR, epifreq, and verticalfreq; NOT NECESSARILY FASTER, TIME TO MAKE SURE)
+           numcores= if set to an integer, use this many cores for the grids that are computed in python (these are evaluated vectorized over the whole grid, split into numcores chunks in R; NOT NECESSARILY FASTER, TIME TO MAKE SURE)
 
            ro=, vo= distance and velocity scales for translation into internal units (default from configuration file)
 
@@ -152,6 +152,10 @@ class interpRZPotential(Potential):
 
            2013-01-24 - Started with new implementation - Bovy (IAS)
 
+           2016-11-03 - Compute all grids in a single multi-threaded pass in C - Bovy (UofT)
+
+           2016-12-08 - Evaluate the python grids vectorized over the whole grid - Bovy (UofT)
+
         """
         if isinstance(RZPot,interpRZPotential):
             from galpy.potential import PotentialError
@@ -195,15 +199,19 @@ class interpRZPotential(Potential):
         self._enable_c= enable_c*ext_loaded
         self.hasC= self._enable_c
         self._zsym= zsym
+        use_c= use_c*ext_loaded and _check_c(self._origPot)
+        if use_c:
+            potGrid, rforceGrid, zforceGrid, vcircGrid, err= \
+                calc_grids_c(self._origPot,self._rgrid,self._zgrid,
+                             calcPot=interpPot,calcRforce=interpRforce,
+                             calczforce=interpzforce,calcVcirc=interpvcirc)
         if interpPot:
-            if use_c*ext_loaded:
-                self._potGrid, err= calc_potential_c(self._origPot,self._rgrid,self._zgrid)
+            if use_c:
+                self._potGrid= potGrid
             else:
                 from galpy.potential import evaluatePotentials
-                potGrid= numpy.zeros((len(self._rgrid),len(self._zgrid)))
-                for ii in range(len(self._rgrid)):
-                    for jj in range(len(self._zgrid)):
-                        potGrid[ii,jj]= evaluatePotentials(self._origPot,self._rgrid[ii],self._zgrid[jj])
+                potGrid= _eval_grid(lambda R,z: evaluatePotentials(self._origPot,R,z),
+                               self._rgrid,self._zgrid,numcores=numcores)
                 self._potGrid= potGrid
             if self._logR:
                 self._potInterp= interpolate.RectBivariateSpline(self._logrgrid,
@@ -218,14 +226,12 @@ class interpRZPotential(Potential):
             if enable_c*ext_loaded:
                 self._potGrid_splinecoeffs= calc_2dsplinecoeffs_c(self._potGrid)
         if interpRforce:
-            if use_c*ext_loaded:
-                self._rforceGrid, err= calc_potential_c(self._origPot,self._rgrid,self._zgrid,rforce=True)
+            if use_c:
+                self._rforceGrid= rforceGrid
             else:
                 from galpy.potential import evaluateRforces
-                rforceGrid= numpy.zeros((len(self._rgrid),len(self._zgrid)))
-                for ii in range(len(self._rgrid)):
-                    for jj in range(len(self._zgrid)):
-                        rforceGrid[ii,jj]= evaluateRforces(self._origPot,self._rgrid[ii],self._zgrid[jj])
+                rforceGrid= _eval_grid(lambda R,z: evaluateRforces(self._origPot,R,z),
+                               self._rgrid,self._zgrid,numcores=numcores)
                 self._rforceGrid= rforceGrid
             if self._logR:
                 self._rforceInterp= interpolate.RectBivariateSpline(self._logrgrid,
@@ -240,14 +246,12 @@ class interpRZPotential(Potential):
             if enable_c*ext_loaded:
                 self._rforceGrid_splinecoeffs= calc_2dsplinecoeffs_c(self._rforceGrid)
         if interpzforce:
-            if use_c*ext_loaded:
-                self._zforceGrid, err= calc_potential_c(self._origPot,self._rgrid,self._zgrid,zforce=True)
+            if use_c:
+                self._zforceGrid= zforceGrid
             else:
                 from galpy.potential import evaluatezforces
-                zforceGrid= numpy.zeros((len(self._rgrid),len(self._zgrid)))
-                for ii in range(len(self._rgrid)):
-                    for jj in range(len(self._zgrid)):
-                        zforceGrid[ii,jj]= evaluatezforces(self._origPot,self._rgrid[ii],self._zgrid[jj])
+                zforceGrid= _eval_grid(lambda R,z: evaluatezforces(self._origPot,R,z),
+                               self._rgrid,self._zgrid,numcores=numcores)
                 self._zforceGrid= zforceGrid
             if self._logR:
                 self._zforceInterp= interpolate.RectBivariateSpline(self._logrgrid,
@@ -263,11 +267,9 @@ class interpRZPotential(Potential):
                 self._zforceGrid_splinecoeffs= calc_2dsplinecoeffs_c(self._zforceGrid)
         if interpDens:
             from galpy.potential import evaluateDensities
-            densGrid= numpy.zeros((len(self._rgrid),len(self._zgrid)))
-            for ii in range(len(self._rgrid)):
-                for jj in range(len(self._zgrid)):
-                    densGrid[ii,jj]= evaluateDensities(self._origPot,self._rgrid[ii],self._zgrid[jj])
-            self._densGrid= densGrid
+            self._densGrid= _eval_grid(lambda R,z: evaluateDensities(self._origPot,R,z),
+                                       self._rgrid,self._zgrid,
+                                       numcores=numcores)
             if self._logR:
                 self._densInterp= interpolate.RectBivariateSpline(self._logrgrid,
                                                                   self._zgrid,
@@ -280,33 +282,27 @@ class interpRZPotential(Potential):
                                                                   kx=3,ky=3,s=0.)
         if interpvcirc:
             from galpy.potential import vcirc
-            if not numcores is None:
-                self._vcircGrid= multi.parallel_map((lambda x: vcirc(self._origPot,self._rgrid[x])),
-                                                    list(range(len(self._rgrid))),numcores=numcores)
+            if use_c:
+                self._vcircGrid= vcircGrid
             else:
-                self._vcircGrid= numpy.array([vcirc(self._origPot,r) for r in self._rgrid])
+                self._vcircGrid= _eval_grid(lambda R: vcirc(self._origPot,R),
+                                            self._rgrid,numcores=numcores)
             if self._logR:
                 self._vcircInterp= interpolate.InterpolatedUnivariateSpline(self._logrgrid,self._vcircGrid,k=3)
             else:
                 self._vcircInterp= interpolate.InterpolatedUnivariateSpline(self._rgrid,self._vcircGrid,k=3)
         if interpdvcircdr:
             from galpy.potential import dvcircdR
-            if not numcores is None:
-                self._dvcircdrGrid= multi.parallel_map((lambda x: dvcircdR(self._origPot,self._rgrid[x])),
-                                                       list(range(len(self._rgrid))),numcores=numcores)
-            else:
-                self._dvcircdrGrid= numpy.array([dvcircdR(self._origPot,r) for r in self._rgrid])
+            self._dvcircdrGrid= _eval_grid(lambda R: dvcircdR(self._origPot,R),
+                                           self._rgrid,numcores=numcores)
             if self._logR:
                 self._dvcircdrInterp= interpolate.InterpolatedUnivariateSpline(self._logrgrid,self._dvcircdrGrid,k=3)
             else:
                 self._dvcircdrInterp= interpolate.InterpolatedUnivariateSpline(self._rgrid,self._dvcircdrGrid,k=3)
         if interpepifreq:
             from galpy.potential import epifreq
-            if not numcores is None:
-                self._epifreqGrid= numpy.array(multi.parallel_map((lambda x: epifreq(self._origPot,self._rgrid[x])),
-                                                      list(range(len(self._rgrid))),numcores=numcores))
-            else:
-                self._epifreqGrid= numpy.array([epifreq(self._origPot,r) for r in self._rgrid])
+            self._epifreqGrid= _eval_grid(lambda R: epifreq(self._origPot,R),
+                                          self._rgrid,numcores=numcores)
             indx= True-numpy.isnan(self._epifreqGrid)
             if numpy.sum(indx) < 4:
                 if self._logR:
@@ -320,11 +316,8 @@ class interpRZPotential(Potential):
                     self._epifreqInterp= interpolate.InterpolatedUnivariateSpline(self._rgrid[indx],self._epifreqGrid[indx],k=3)
         if interpverticalfreq:
             from galpy.potential import verticalfreq
-            if not numcores is None:
-                self._verticalfreqGrid= multi.parallel_map((lambda x: verticalfreq(self._origPot,self._rgrid[x])),
-                                                       list(range(len(self._rgrid))),numcores=numcores)
-            else:
-                self._verticalfreqGrid= numpy.array([verticalfreq(self._origPot,r) for r in self._rgrid])
+            self._verticalfreqGrid= _eval_grid(lambda R: verticalfreq(self._origPot,R),
+                                               self._rgrid,numcores=numcores)
             if self._logR:
                 self._verticalfreqInterp= interpolate.InterpolatedUnivariateSpline(self._logrgrid,self._verticalfreqGrid,k=3)
             else:
@@ -502,6 +495,41 @@ class interpRZPotential(Potential):
         else:
             return verticalfreq(self._origPot,R)
     
+def _eval_grid(func,R,z=None,numcores=None):
+    """
+    NAME:
+       _eval_grid
+    PURPOSE:
+       evaluate a function vectorized over a whole (R,z) grid or R grid
+    INPUT:
+       func - function(R,z) (or function(R) when z is None) that accepts arrays
+       R - grid in R
+       z= (None) grid in z
+       numcores= (None) if set, split the R grid into this many chunks that are evaluated in parallel
+    OUTPUT:
+       [nR,nz] (or [nR]) array
+    HISTORY:
+       2016-12-08 - Written - Bovy (UofT)
+    """
+    def _eval(Rs):
+        if z is None:
+            return func(Rs)*numpy.ones(len(Rs))
+        mR, mz= numpy.meshgrid(Rs,z,indexing='ij')
+        return numpy.reshape(func(mR.flatten(),mz.flatten())
+                             *numpy.ones(mR.size),mR.shape)
+    if numcores is None:
+        return _eval(R)
+    # Equal-sized chunks (padded at the end), such that parallel_map can
+    # stack them
+    nchunks= min(numcores,len(R))
+    chunksize= int(numpy.ceil(len(R)/float(nchunks)))
+    chunks= numpy.reshape(numpy.concatenate(\
+            (R,R[-1]*numpy.ones(nchunks*chunksize-len(R)))),
+                          (nchunks,chunksize))
+    return numpy.concatenate(multi.parallel_map((lambda x: _eval(chunks[x])),
+                                                list(range(nchunks)),
+                                                numcores=numcores))[:len(R)]
+
 def calc_potential_c(pot,R,z,rforce=False,zforce=False):
     """
     NAME:
@@ -518,56 +546,98 @@ def calc_potential_c(pot,R,z,rforce=False,zforce=False):
     HISTORY:
        2013-01-24 - Written - Bovy (IAS)
        2013-01-29 - Added forces - Bovy (IAS)
+       2016-11-03 - Use calc_grids_c - Bovy (UofT)
+    """
+    out= calc_grids_c(pot,R,z,calcPot=not rforce and not zforce,
+                      calcRforce=rforce,calczforce=zforce)
+    if rforce:
+        return (out[1],out[-1])
+    elif zforce:
+        return (out[2],out[-1])
+    else:
+        return (out[0],out[-1])
+
+def calc_grids_c(pot,R,z,calcPot=False,calcRforce=False,calczforce=False,
+                 calcVcirc=False):
+    """
+    NAME:
+       calc_grids_c
+    PURPOSE:
+       Use C to calculate the potential and forces on a grid and the circular velocity along R in a single multi-threaded pass
+    INPUT:
+       pot - Potential or list of such instances
+       R - grid in R
+       z - grid in z
+       calcPot=, calcRforce=, calczforce= if True, calculate the potential, radial force, or vertical force on the (R,z) grid
+       calcVcirc= if True, calculate vcirc along R
+    OUTPUT:
+       (potential,Rforce,zforce,vcirc,err); grids that were not calculated are None
+    HISTORY:
+       2016-11-03 - Written - Bovy (UofT)
     """
     from galpy.orbit_src.integrateFullOrbit import _parse_pot #here bc otherwise there is an infinite loop
     #Parse the potential
     npot, pot_type, pot_args= _parse_pot(pot)
 
     #Set up result arrays
-    out= numpy.empty((len(R),len(z)))
+    outGrids= [numpy.empty((len(R),len(z))) if calc else numpy.empty((1,1))
+               for calc in [calcPot,calcRforce,calczforce]]
+    outVcirc= numpy.empty(len(R)) if calcVcirc else numpy.empty(1)
     err= ctypes.c_int(0)
 
     #Set up the C code
     ndarrayFlags= ('C_CONTIGUOUS','WRITEABLE')
-    if rforce:
-        interppotential_calc_potentialFunc= _lib.calc_rforce
-    elif zforce:
-        interppotential_calc_potentialFunc= _lib.calc_zforce
-    else:
-        interppotential_calc_potentialFunc= _lib.calc_potential
-    interppotential_calc_potentialFunc.argtypes= [ctypes.c_int,
-                                                  ndpointer(dtype=numpy.float64,flags=ndarrayFlags),
-                                                  ctypes.c_int,
-                                                  ndpointer(dtype=numpy.float64,flags=ndarrayFlags),
-                                                  ctypes.c_int,
-                                                  ndpointer(dtype=numpy.int32,flags=ndarrayFlags),
-                                                  ndpointer(dtype=numpy.float64,flags=ndarrayFlags),
-                                                  ndpointer(dtype=numpy.float64,flags=ndarrayFlags),
-                                                  ctypes.POINTER(ctypes.c_int)]
+    interppotential_calc_gridsFunc= _lib.calc_rz_grids
+    interppotential_calc_gridsFunc.argtypes= [ctypes.c_int,
+                                              ndpointer(dtype=numpy.float64,flags=ndarrayFlags),
+                                              ctypes.c_int,
+                                              ndpointer(dtype=numpy.float64,flags=ndarrayFlags),
+                                              ctypes.c_int,
+                                              ndpointer(dtype=numpy.int32,flags=ndarrayFlags),
+                                              ndpointer(dtype=numpy.float64,flags=ndarrayFlags),
+                                              ctypes.c_int,
+                                              ctypes.c_int,
+                                              ctypes.c_int,
+                                              ctypes.c_int]\
+        +[ndpointer(dtype=numpy.float64,flags=ndarrayFlags)
+          for ii in range(4)]\
+        +[ctypes.POINTER(ctypes.c_int)]
 
     #Array requirements, first store old order
     f_cont= [R.flags['F_CONTIGUOUS'],
              z.flags['F_CONTIGUOUS']]
     R= numpy.require(R,dtype=numpy.float64,requirements=['C','W'])
     z= numpy.require(z,dtype=numpy.float64,requirements=['C','W'])
-    out= numpy.require(out,dtype=numpy.float64,requirements=['C','W'])
+    outGrids= [numpy.require(out,dtype=numpy.float64,requirements=['C','W'])
+               for out in outGrids]
+    outVcirc= numpy.require(outVcirc,dtype=numpy.float64,
+                            requirements=['C','W'])
 
     #Run the C code
-    interppotential_calc_potentialFunc(len(R),
-                                       R,
-                                       len(z),
-                                       z,
-                                       ctypes.c_int(npot),
-                                       pot_type,
-                                       pot_args,
-                                       out,
-                                       ctypes.byref(err))
+    interppotential_calc_gridsFunc(len(R),
+                                   R,
+                                   len(z),
+                                   z,
+                                   ctypes.c_int(npot),
+                                   pot_type,
+                                   pot_args,
+                                   ctypes.c_int(calcPot),
+                                   ctypes.c_int(calcRforce),
+                                   ctypes.c_int(calczforce),
+                                   ctypes.c_int(calcVcirc),
+                                   outGrids[0],outGrids[1],outGrids[2],
+                                   outVcirc,
+                                   ctypes.byref(err))
     
     #Reset input arrays
     if f_cont[0]: R= numpy.asfortranarray(R)
     if f_cont[1]: z= numpy.asfortranarray(z)
 
-    return (out,err.value)
+    out= [grid if calc else None for grid,calc
+          in zip(outGrids,[calcPot,calcRforce,calczforce])]
+    out.append(outVcirc if calcVcirc else None)
+    out.append(err.value)
+    return tuple(out)
 
 def calc_2dsplinecoeffs_c(array2d):
     """
@@ -18,69 +18,45 @@
 /*
   MAIN FUNCTIONS
 */
-void calc_potential(int nR,
-		    double *R,
-		    int nz,
-		    double *z,
-		    int npot,
-		    int * pot_type,
-		    double * pot_args,
-		    double *out,
-		    int * err){
+void calc_rz_grids(int nR,
+		   double *R,
+		   int nz,
+		   double *z,
+		   int npot,
+		   int * pot_type,
+		   double * pot_args,
+		   int doPot,
+		   int doRforce,
+		   int dozforce,
+		   int doVcirc,
+		   double *potGrid,
+		   double *rforceGrid,
+		   double *zforceGrid,
+		   double *vcirc,
+		   int * err){
+  //Calculate all requested grids in a single, multi-threaded pass
+  //(quantities that require second derivatives of the potential, which
+  //are not all implemented in C, are computed in python)
   int ii, jj, tid, nthreads;
 #ifdef _OPENMP
   nthreads = omp_get_max_threads();
 #else
   nthreads = 1;
 #endif
-  double * row= (double *) malloc ( nthreads * nz * ( sizeof ( double ) ) );
-  //Set up the potentials
-  struct potentialArg * potentialArgs= (struct potentialArg *) malloc ( npot * sizeof (struct potentialArg) );
-  parse_actionAngleArgs(npot,potentialArgs,pot_type,pot_args,false);
-  //Run through the grid and calculate
-  UNUSED int chunk= CHUNKSIZE;
-#pragma omp parallel for schedule(static,chunk) private(ii,tid,jj)	\
-  shared(row,npot,potentialArgs,R,z,nR,nz)
-  for (ii=0; ii < nR; ii++){
-#ifdef _OPENMP
-    tid= omp_get_thread_num();
-#else
-    tid = 0;
-#endif
-    for (jj=0; jj < nz; jj++){
-      *(row+jj+tid*nz)= evaluatePotentials(*(R+ii),*(z+jj),npot,potentialArgs);
-    }
-    put_row(out,ii,row+tid*nz,nz); 
+  //Set up the potentials, separately for each thread, because some potentials
+  //cache intermediate results in their arguments
+  struct potentialArg * potentialArgs= (struct potentialArg *) malloc ( nthreads * npot * sizeof (struct potentialArg) );
+  struct potentialArg * forceArgs= (struct potentialArg *) malloc ( nthreads * npot * sizeof (struct potentialArg) );
+  for (tid=0; tid < nthreads; tid++){
+    if ( doPot )
+      parse_actionAngleArgs(npot,potentialArgs+tid*npot,pot_type,pot_args,
+			    false);
+    parse_leapFuncArgs_Full(npot,forceArgs+tid*npot,pot_type,pot_args);
   }
-  for (ii=0; ii < npot; ii++) {
-    free((potentialArgs+ii)->args);
-  }
-  free(potentialArgs);
-  free(row);
-}
-void calc_rforce(int nR,
-		 double *R,
-		 int nz,
-		 double *z,
-		 int npot,
-		 int * pot_type,
-		 double * pot_args,
-		 double *out,
-		 int * err){
-  int ii, jj, tid, nthreads;
-#ifdef _OPENMP
-  nthreads = omp_get_max_threads();
-#else
-  nthreads = 1;
-#endif
-  double * row= (double *) malloc ( nthreads * nz * ( sizeof ( double ) ) );
-  //Set up the potentials
-  struct potentialArg * potentialArgs= (struct potentialArg *) malloc ( npot * sizeof (struct potentialArg) );
-  parse_leapFuncArgs_Full(npot,potentialArgs,pot_type,pot_args);
   //Run through the grid and calculate
   UNUSED int chunk= CHUNKSIZE;
-#pragma omp parallel for schedule(static,chunk) private(ii,tid,jj)	\
-  shared(row,npot,potentialArgs,R,z,nR,nz)
+#pragma omp parallel for schedule(dynamic,chunk) private(ii,tid,jj) \
+  shared(npot,potentialArgs,forceArgs,R,z,nR,nz)
   for (ii=0; ii < nR; ii++){
 #ifdef _OPENMP
     tid= omp_get_thread_num();
@@ -88,55 +64,28 @@ void calc_rforce(int nR,
     tid = 0;
 #endif
     for (jj=0; jj < nz; jj++){
-      *(row+jj+tid*nz)= calcRforce(*(R+ii),*(z+jj),0.,0.,npot,potentialArgs);
+      if ( doPot )
+	*(potGrid+ii*nz+jj)= evaluatePotentials(*(R+ii),*(z+jj),npot,
+						potentialArgs+tid*npot);
+      if ( doRforce )
+	*(rforceGrid+ii*nz+jj)= calcRforce(*(R+ii),*(z+jj),0.,0.,npot,
+					   forceArgs+tid*npot);
+      if ( dozforce )
+	*(zforceGrid+ii*nz+jj)= calczforce(*(R+ii),*(z+jj),0.,0.,npot,
+					   forceArgs+tid*npot);
     }
-    put_row(out,ii,row+tid*nz,nz); 
-  }
-  for (ii=0; ii < npot; ii++) {
-    free((potentialArgs+ii)->args);
+    //Circular velocity at z=0
+    if ( doVcirc )
+      *(vcirc+ii)= sqrt( - *(R+ii) * calcRforce(*(R+ii),0.,0.,0.,npot,
+						 forceArgs+tid*npot) );
   }
-  free(potentialArgs);
-  free(row);
-}
-void calc_zforce(int nR,
-		 double *R,
-		 int nz,
-		 double *z,
-		 int npot,
-		 int * pot_type,
-		 double * pot_args,
-		 double *out,
-		 int * err){
-  int ii, jj, tid, nthreads;
-#ifdef _OPENMP
-  nthreads = omp_get_max_threads();
-#else
-  nthreads = 1;
-#endif
-  double * row= (double *) malloc ( nthreads * nz * ( sizeof ( double ) ) );
-  //Set up the potentials
-  struct potentialArg * potentialArgs= (struct potentialArg *) malloc ( npot * sizeof (struct potentialArg) );
-  parse_leapFuncArgs_Full(npot,potentialArgs,pot_type,pot_args);
-  //Run through the grid and calculate
-  UNUSED int chunk= CHUNKSIZE;
-#pragma omp parallel for schedule(static,chunk) private(ii,tid,jj)	\
-  shared(row,npot,potentialArgs,R,z,nR,nz)
-  for (ii=0; ii < nR; ii++){
-#ifdef _OPENMP
-    tid= omp_get_thread_num();
-#else
-    tid = 0;
-#endif
-    for (jj=0; jj < nz; jj++){
-      *(row+jj+tid*nz)= calczforce(*(R+ii),*(z+jj),0.,0.,npot,potentialArgs);
-    }
-    put_row(out,ii,row+tid*nz,nz); 
-  }
-  for (ii=0; ii < npot; ii++) {
-    free((potentialArgs+ii)->args);
+  for (ii=0; ii < nthreads * npot; ii++) {
+    if ( doPot )
+      free((potentialArgs+ii)->args);
+    free((forceArgs+ii)->args);
   }
   free(potentialArgs);
-  free(row);
+  free(forceArgs);
 }
 void eval_potential(int nR,
 		    double *R,
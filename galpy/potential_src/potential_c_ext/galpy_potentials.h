@@ -35,6 +35,7 @@ struct potentialArg{
 			    struct potentialArg *);
   int nargs;
   double * args;
+  double * coeffs; // not owned, shared between copies of the arguments
   interp_2d * i2d;
   gsl_interp_accel * accx;
   gsl_interp_accel * accy;
@@ -211,6 +212,20 @@ double interpRZPotentialRforce(double ,double , double, double,
 			       struct potentialArg *);
 double interpRZPotentialzforce(double ,double , double, double,
 			       struct potentialArg *);
+//interp3DPotential
+int interp3DPotential_outsideGrid(int);
+double interp3DPotentialEval(double ,double , double, double,
+			     struct potentialArg *);
+double interp3DPotentialRforce(double ,double , double, double,
+			       struct potentialArg *);
+double interp3DPotentialPlanarRforce(double ,double, double,
+				     struct potentialArg *);
+double interp3DPotentialphiforce(double ,double , double, double,
+				 struct potentialArg *);
+double interp3DPotentialPlanarphiforce(double ,double, double,
+				       struct potentialArg *);
+double interp3DPotentialzforce(double ,double , double, double,
+			       struct potentialArg *);
 //IsochronePotential
 double IsochronePotentialEval(double ,double , double, double,
 			      struct potentialArg *);
@@ -0,0 +1,154 @@
+#include <math.h>
+#include <galpy_potentials.h>
+//interp3DPotential: tricubic B-spline interpolation on a rectangular grid
+//arguments: amp, nx, ny, nz, xmin, ymin, zmin, dx, dy, dz,
+//           cached x, y, z, Fx, Fy, Fz
+//the B-spline coefficients of the potential, Fx, Fy, and Fz (each
+//nx x ny x nz in C order) follow these arguments in pot_args, but are not
+//copied into args; potentialArgs->coeffs points to them, such that all
+//(per-thread) copies of the arguments share them read-only
+//Set when a position outside of the grid is evaluated (at the edge of the
+//grid); read and reset through interp3DPotential_outsideGrid
+int interp3DPotential_outside= 0;
+int interp3DPotential_outsideGrid(int reset){
+  int out= interp3DPotential_outside;
+  if ( reset ) interp3DPotential_outside= 0;
+  return out;
+}
+//Cubic B-spline weights for fractional position t in [0,1]
+static inline void bspline_weights(double t, double * w){
+  double t2= t * t;
+  double t3= t2 * t;
+  *w= ( 1. - t ) * ( 1. - t ) * ( 1. - t ) / 6.;
+  *(w+1)= ( 3. * t3 - 6. * t2 + 4. ) / 6.;
+  *(w+2)= ( -3. * t3 + 3. * t2 + 3. * t + 1. ) / 6.;
+  *(w+3)= t3 / 6.;
+}
+//Coefficient index along one dimension, mirrored at the edges as the
+//coefficients were computed with mirror-symmetric boundary conditions
+static inline int mirror_index(int i, int n){
+  if ( i < 0 ) return -i;
+  else if ( i > n - 1 ) return 2 * ( n - 1 ) - i;
+  else return i;
+}
+//Find the grid cell and the B-spline weights for x; outside of the grid,
+//the position is clamped to the edge
+static inline void cell_weights(double x, double xmin, double dx, int n,
+				int * indx, double * w){
+  double u= ( x - xmin ) / dx;
+  int i;
+  if ( u < 0. ) {
+    u= 0.;
+    interp3DPotential_outside= 1;
+  }
+  else if ( u > n - 1 ) {
+    u= n - 1;
+    interp3DPotential_outside= 1;
+  }
+  i= (int) floor ( u );
+  if ( i > n - 2 ) i= n - 2;
+  bspline_weights(u - i,w);
+  *indx= mirror_index(i-1,n);
+  *(indx+1)= i;
+  *(indx+2)= i+1;
+  *(indx+3)= mirror_index(i+2,n);
+}
+//Evaluate ncoeffs B-splines whose coefficients are stored consecutively
+//starting at coeffs
+static void interp3D_eval(double x, double y, double z, double * args,
+			  int ncoeffs, double * coeffs, double * out){
+  int ii,jj,kk,ll;
+  int nx= (int) *(args+1);
+  int ny= (int) *(args+2);
+  int nz= (int) *(args+3);
+  int ntot= nx * ny * nz;
+  int ix[4], iy[4], iz[4];
+  double wx[4], wy[4], wz[4];
+  double wxy;
+  int offset;
+  cell_weights(x,*(args+4),*(args+7),nx,ix,wx);
+  cell_weights(y,*(args+5),*(args+8),ny,iy,wy);
+  cell_weights(z,*(args+6),*(args+9),nz,iz,wz);
+  for (ll=0; ll < ncoeffs; ll++) *(out+ll)= 0.;
+  for (ii=0; ii < 4; ii++)
+    for (jj=0; jj < 4; jj++){
+      wxy= wx[ii] * wy[jj];
+      for (kk=0; kk < 4; kk++){
+	offset= ( ix[ii] * ny + iy[jj] ) * nz + iz[kk];
+	for (ll=0; ll < ncoeffs; ll++)
+	  *(out+ll)+= wxy * wz[kk] * *(coeffs + ll * ntot + offset);
+      }
+    }
+}
+static void interp3DPotentialxyzforces(double x, double y, double z,
+				       double * Fx, double * Fy, double * Fz,
+				       struct potentialArg * potentialArgs){
+  double * args= potentialArgs->args;
+  int nx= (int) *(args+1);
+  int ny= (int) *(args+2);
+  int nz= (int) *(args+3);
+  double F[3];
+  double * cache= args + 10;
+  if ( x == *cache && y == *(cache+1) && z == *(cache+2) ){
+    *Fx= *(cache+3);
+    *Fy= *(cache+4);
+    *Fz= *(cache+5);
+    return;
+  }
+  interp3D_eval(x,y,z,args,3,potentialArgs->coeffs + nx * ny * nz,F);
+  *Fx= F[0];
+  *Fy= F[1];
+  *Fz= F[2];
+  *cache= x;
+  *(cache+1)= y;
+  *(cache+2)= z;
+  *(cache+3)= *Fx;
+  *(cache+4)= *Fy;
+  *(cache+5)= *Fz;
+}
+double interp3DPotentialEval(double R,double z, double phi,
+			     double t,
+			     struct potentialArg * potentialArgs){
+  double * args= potentialArgs->args;
+  double out;
+  interp3D_eval(R * cos ( phi ),R * sin ( phi ),z,args,1,
+		potentialArgs->coeffs,&out);
+  return *args * out;
+}
+double interp3DPotentialRforce(double R,double z, double phi,
+			       double t,
+			       struct potentialArg * potentialArgs){
+  double * args= potentialArgs->args;
+  double Fx, Fy, Fz;
+  double cp= cos ( phi );
+  double sp= sin ( phi );
+  interp3DPotentialxyzforces(R * cp,R * sp,z,&Fx,&Fy,&Fz,potentialArgs);
+  return *args * ( cp * Fx + sp * Fy );
+}
+double interp3DPotentialPlanarRforce(double R,double phi,double t,
+				     struct potentialArg * potentialArgs){
+  return interp3DPotentialRforce(R,0.,phi,t,potentialArgs);
+}
+double interp3DPotentialphiforce(double R,double z, double phi,
+				 double t,
+				 struct potentialArg * potentialArgs){
+  double * args= potentialArgs->args;
+  double Fx, Fy, Fz;
+  double cp= cos ( phi );
+  double sp= sin ( phi );
+  interp3DPotentialxyzforces(R * cp,R * sp,z,&Fx,&Fy,&Fz,potentialArgs);
+  return *args * R * ( -sp * Fx + cp * Fy );
+}
+double interp3DPotentialPlanarphiforce(double R,double phi,double t,
+				       struct potentialArg * potentialArgs){
+  return interp3DPotentialphiforce(R,0.,phi,t,potentialArgs);
+}
+double interp3DPotentialzforce(double R,double z, double phi,
+			       double t,
+			       struct potentialArg * potentialArgs){
+  double * args= potentialArgs->args;
+  double Fx, Fy, Fz;
+  interp3DPotentialxyzforces(R * cos ( phi ),R * sin ( phi ),z,
+			     &Fx,&Fy,&Fz,potentialArgs);
+  return *args * Fz;
+}
@@ -26,6 +26,7 @@
 #WAY OUT OF THE USE OF THIS SOFTWARE, EVEN IF ADVISED OF THE
 #POSSIBILITY OF SUCH DAMAGE.
 #############################################################################
+import numpy
 import scipy as sc
 import scipy.stats as stats
 import math as m
@@ -376,3 +377,198 @@ def update_hull(hull,newx,newhx,newhpx,domain,isDomainFinite):
     newhull.append(newhus)
     return newhull
 
+
+def bovy_ars_batch(domain,isDomainFinite,abcissae,hx,hpx,nsamples=1,
+                   hxparams=(),maxn=100,hull=None,return_hull=False,
+                   chunk=1024):
+    """bovy_ars_batch: Batched implementation of the Adaptive-Rejection 
+    Sampling algorithm by Gilks & Wild (1992), which draws and tests many
+    candidates from the same hull at once; the uniform deviates are used 
+    in the same order as in bovy_ars, such that, for a new hull, the same 
+    samples are returned as by bovy_ars for the same random seed
+
+    Input:
+
+       domain          - [.,.] upper and lower limit to the domain
+
+       isDomainFinite  - [.,.] is there a lower/upper limit to the domain?
+
+       abcissae        - initial list of abcissae (must lie on either side of the peak in hx if the domain is unbounded
+
+       hx              - function that evaluates h(x) = ln g(x); needs to work for arrays of x
+
+       hpx             - function that evaluates hp(x) =  d h(x) / d x
+
+       nsamples        - (optional) number of desired samples (default=1)
+
+       hxparams        - (optional) a tuple of parameters for h(x) and h'(x)
+
+       maxn            - (optional) maximum number of updates to the hull, including those of a hull that is given (default=100)
+
+       hull            - (optional) hull to start from (e.g., returned by a previous call; if set, abcissae is ignored, except for counting the number of updates)
+
+       return_hull     - (optional) if True, also return the updated hull
+
+       chunk           - (optional) maximum number of candidates to draw at once while the hull is still being updated (default=1024)
+                         
+    Output:
+
+       array with nsamples of samples from exp(h(x)) [, hull]
+
+    External dependencies:
+
+       math
+       numpy
+       scipy.stats
+
+    History:
+       2016-10-20 - Written - Bovy (UofT)
+    """
+    #First set-up the upper and lower hulls
+    if hull is None:
+        hull= setup_hull(domain,isDomainFinite,abcissae,hx,hpx,hxparams)
+    nupdates= len(hull[1])-len(abcissae)
+    nsamples= int(nsamples)
+    out= []
+    nout= 0
+    while nout < nsamples:
+        #Sample a batch of candidates from the upper hull; bovy_ars uses
+        #two uniform deviates for each candidate, one to sample it from the
+        #hull and one to test it
+        nbatch= nsamples-nout
+        if nupdates < maxn: nbatch= min(nbatch,chunk)
+        state= numpy.random.get_state()
+        u= stats.uniform.rvs(size=2*nbatch)
+        candidates= sample_hull_array(hull,domain,isDomainFinite,u[::2])
+        hux, hlx= evaluate_hull_array(candidates,hull)
+        u= u[1::2]
+        #Squeezing test, only evaluate h(x) for those that fail it
+        accept= u < numpy.exp(hlx-hux)
+        evalIndx= True^accept
+        nused= nbatch
+        if numpy.sum(evalIndx) > 0 and nupdates < maxn:
+            #The hull changes at the first candidate that fails the 
+            #squeezing test, so the candidates after it are not used
+            first= numpy.argmax(evalIndx)
+            nused= first+1
+            thishx= hx(candidates[first:nused],hxparams)
+            accept[first]= u[first] < numpy.exp(thishx[0]-hux[first])
+            if not numpy.any(hull[1] == candidates[first]):
+                hull= update_hull(hull,candidates[first],thishx[0],
+                                  hpx(candidates[first],hxparams),
+                                  domain,isDomainFinite)
+            nupdates+= 1
+        elif numpy.sum(evalIndx) > 0:
+            thishx= hx(candidates[evalIndx],hxparams)
+            accept[evalIndx]= u[evalIndx] < numpy.exp(thishx-hux[evalIndx])
+        #Only use the candidates that are necessary to get nsamples
+        acceptIndx= numpy.arange(nused)[accept[:nused]]
+        if len(acceptIndx) > nsamples-nout:
+            acceptIndx= acceptIndx[:nsamples-nout]
+            nused= acceptIndx[-1]+1
+        out.append(candidates[acceptIndx])
+        nout+= len(acceptIndx)
+        #Advance the random-number generator by the deviates that were used
+        numpy.random.set_state(state)
+        stats.uniform.rvs(size=2*nused)
+    out= numpy.hstack(out)
+    if return_hull: return (out,hull)
+    else: return out
+
+def sample_hull_array(hull,domain,isDomainFinite,u):
+    """sample_hull_array: Sample the upper hull for an array of uniform
+    deviates
+
+    Input:
+       hull       - hull structure (see setup_hull for a definition of this)
+       domain          - [.,.] upper and lower limit to the domain
+       isDomainFinite  - [.,.] is there a lower/upper limit to the domain?
+       u               - array of uniform deviates
+
+    Output:
+       array of samples from the hull
+
+    History:
+       2016-10-20 - Written - Bovy (UofT)
+    """
+    cu, xs, hxs, hpxs, zs, scum, hus= hull
+    out= numpy.empty(len(u))
+    #The first bin is a special case
+    firstIndx= scum[0] >= u
+    if numpy.sum(firstIndx) > 0:
+        if hpxs[0] == 0:
+            if isDomainFinite[0]:
+                out[firstIndx]= domain[0]\
+                    +u[firstIndx]/scum[0]*(zs[0]-domain[0])
+            else:
+                out[firstIndx]= 100000000 #Throw some kind of error
+        else:
+            out[firstIndx]= zs[0]+1./hpxs[0]\
+                *numpy.log(1.-hpxs[0]*cu*(scum[0]-u[firstIndx])/m.exp(hus[0]))
+    #Find largest zs[jj] such that scum[jj] < u
+    restIndx= True^firstIndx
+    if numpy.sum(restIndx) == 0: return out
+    tu= u[restIndx]
+    indx= numpy.searchsorted(scum,tu,side='left')-1
+    thp= hpxs[indx+1]
+    tout= numpy.empty(len(tu))
+    flatIndx= thp == 0.
+    if numpy.sum(flatIndx) > 0:
+        fIndx= indx[flatIndx]
+        lastIndx= fIndx == (len(scum)-1)
+        tflat= numpy.empty(len(fIndx))
+        tflat[True^lastIndx]= zs[fIndx[True^lastIndx]]\
+            +(tu[flatIndx][True^lastIndx]-scum[fIndx[True^lastIndx]])\
+            /(scum[fIndx[True^lastIndx]+1]-scum[fIndx[True^lastIndx]])\
+            *(zs[fIndx[True^lastIndx]+1]-zs[fIndx[True^lastIndx]])
+        if isDomainFinite[1]:
+            tflat[lastIndx]= zs[fIndx[lastIndx]]\
+                +(tu[flatIndx][lastIndx]-scum[fIndx[lastIndx]])\
+                /(1.-scum[fIndx[lastIndx]])*(domain[1]-zs[fIndx[lastIndx]])
+        else:
+            tflat[lastIndx]= 100000 #Throw some kind of error
+        tout[flatIndx]= tflat
+    slopeIndx= True^flatIndx
+    sIndx= indx[slopeIndx]
+    tout[slopeIndx]= zs[sIndx]+1./thp[slopeIndx]\
+        *numpy.log(1.+thp[slopeIndx]*cu*(tu[slopeIndx]-scum[sIndx])
+                /numpy.exp(hus[sIndx]))
+    out[restIndx]= tout
+    return out
+
+def evaluate_hull_array(x,hull):
+    """evaluate_hull_array: evaluate h_u(x) and h_l(x) for an array of x, 
+    using the same intervals as evaluate_hull
+
+    Input:
+       x     - array of abcissae
+       hull  - the hull (see setup_hull for a definition)
+
+    Output:
+      hu(x), hl(x)
+
+    History:
+       2016-10-20 - Written - Bovy (UofT)
+    """
+    cu, xs, hxs, hpxs, zs, scum, hus= hull
+    #Find in which [z_{i-1},z_i] interval x lies, as in evaluate_hull
+    if len(scum) == 1:
+        indx= numpy.ones(len(x),dtype='int')
+    else:
+        indx= numpy.searchsorted(zs[1:],x,side='left')
+    indx[x < zs[0]]= 0
+    hux= hpxs[indx]*(x-xs[indx])+hxs[indx]
+    #Now evaluate hlx, interpolating between the abcissae xs[lindx] and
+    #xs[lindx+1]
+    neginf= numpy.finfo(numpy.dtype(numpy.float64)).min
+    lindx= numpy.where(x < xs[numpy.amin([indx+1,
+                                          len(xs)-1+numpy.zeros_like(indx)],
+                                         axis=0)],
+                       indx,indx+1)
+    lindx[indx == 0]= 0
+    lindx[indx == len(zs)]= len(xs)-2
+    lindx= numpy.clip(lindx,0,len(xs)-2)
+    hlx= ((xs[lindx+1]-x)*hxs[lindx]+(x-xs[lindx])*hxs[lindx+1])\
+        /(xs[lindx+1]-xs[lindx])
+    hlx[(x < xs[0])+(x > xs[-1])]= neginf
+    return hux, hlx
@@ -88,7 +88,7 @@ void bovy_rk4(void (*func)(double t, double *q, double *a,
     dt= rk4_estimate_step(*func,dim,yo,init_dt,t,nargs,potentialArgs,
 			  rtol,atol);
   }
-  long ndt= (long) (init_dt/dt);
+  long ndt= (long) (init_dt/dt+0.5);
   //Integrate the system
   double to= *t;
   // Handle KeyboardInterrupt gracefully
@@ -99,7 +99,6 @@ void bovy_rk4(void (*func)(double t, double *q, double *a,
   for (ii=0; ii < (nt-1); ii++){
     if ( interrupted ) {
       *err= -10;
-      interrupted= 0; // need to reset, bc library and vars stay in memory
       break;
     }
     for (jj=0; jj < (ndt-1); jj++) {
@@ -186,7 +185,7 @@ void bovy_rk6(void (*func)(double t, double *q, double *a,
     dt= rk6_estimate_step(*func,dim,yo,init_dt,t,nargs,potentialArgs,
 			  rtol,atol);
   }
-  long ndt= (long) (init_dt/dt);
+  long ndt= (long) (init_dt/dt+0.5);
   //Integrate the system
   double to= *t;
   // Handle KeyboardInterrupt gracefully
@@ -197,7 +196,6 @@ void bovy_rk6(void (*func)(double t, double *q, double *a,
   for (ii=0; ii < (nt-1); ii++){
     if ( interrupted ) {
       *err= -10;
-      interrupted= 0; // need to reset, bc library and vars stay in memory
       break;
     }
     for (jj=0; jj < (ndt-1); jj++) {
@@ -517,7 +515,6 @@ void bovy_dopr54(void (*func)(double t, double *q, double *a,
   for (ii=0; ii < (nt-1); ii++){
     if ( interrupted ) {
       *err= -10;
-      interrupted= 0; // need to reset, bc library and vars stay in memory
       break;
     }
     bovy_dopr54_onestep(func,dim,yn,dt,&to,&dt_one,
@@ -108,7 +108,7 @@ void leapfrog(void (*func)(double t, double *q, double *a,
     dt= leapfrog_estimate_step(*func,dim,qo,po,init_dt,t,nargs,potentialArgs,
 			       rtol,atol);
   }
-  long ndt= (long) (init_dt/dt);
+  long ndt= (long) (init_dt/dt+0.5);
   //Integrate the system
   double to= *t;
   // Handle KeyboardInterrupt gracefully
@@ -119,7 +119,6 @@ void leapfrog(void (*func)(double t, double *q, double *a,
   for (ii=0; ii < (nt-1); ii++){
     if ( interrupted ) {
       *err= -10;
-      interrupted= 0; // need to reset, bc library and vars stay in memory
       break;
     }
     //drift half
@@ -222,7 +221,7 @@ void symplec4(void (*func)(double t, double *q, double *a,
     dt= symplec4_estimate_step(*func,dim,qo,po,init_dt,t,nargs,potentialArgs,
 			       rtol,atol);
   }
-  long ndt= (long) (init_dt/dt);
+  long ndt= (long) (init_dt/dt+0.5);
   //Integrate the system
   double to= *t;
   // Handle KeyboardInterrupt gracefully
@@ -233,7 +232,6 @@ void symplec4(void (*func)(double t, double *q, double *a,
   for (ii=0; ii < (nt-1); ii++){
     if ( interrupted ) {
       *err= -10;
-      interrupted= 0; // need to reset, bc library and vars stay in memory
       break;
     }
     //drift for c1*dt
@@ -371,7 +369,7 @@ void symplec6(void (*func)(double t, double *q, double *a,
     dt= symplec6_estimate_step(*func,dim,qo,po,init_dt,t,nargs,potentialArgs,
 			       rtol,atol);
   }
-  long ndt= (long) (init_dt/dt);
+  long ndt= (long) (init_dt/dt+0.5);
   //Integrate the system
   double to= *t;
   // Handle KeyboardInterrupt gracefully
@@ -382,7 +380,6 @@ void symplec6(void (*func)(double t, double *q, double *a,
   for (ii=0; ii < (nt-1); ii++){
     if ( interrupted ) {
       *err= -10;
-      interrupted= 0; // need to reset, bc library and vars stay in memory
       break;
     }
     //drift for c1*dt
@@ -87,6 +87,51 @@ def test_actionAngleIsochrone_linear_angles():
                                         -8.,-8.,-8.)
     return None
 
+#Test that the C implementation of actionAngleIsochrone agrees with Python
+def test_actionAngleIsochrone_c_vs_python():
+    from galpy.potential import IsochronePotential
+    from galpy.actionAngle import actionAngleIsochrone
+    from galpy.actionAngle_src.actionAngleIsochrone_c import _ext_loaded, \
+        actionAngleIsochrone_c
+    if not _ext_loaded: return None
+    ip= IsochronePotential(normalize=1.,b=1.2)
+    aAI= actionAngleIsochrone(ip=ip)
+    aAIpy= actionAngleIsochrone(ip=ip,c=False)
+    R= numpy.array([[1.1,0.8],[1.5,0.9]])
+    vR= numpy.array([[0.3,-0.2],[0.1,0.]])
+    vT= numpy.array([[1.2,0.9],[-0.7,1.]])
+    z= numpy.array([[0.2,-0.4],[0.1,0.3]])
+    vz= numpy.array([[0.5,0.1],[-0.3,0.2]])
+    phi= numpy.array([[2.,0.5],[4.,1.]])
+    jfa= aAI.actionsFreqsAngles(R,vR,vT,z,vz,phi)
+    jfapy= aAIpy.actionsFreqsAngles(R,vR,vT,z,vz,phi)
+    for ii,(c,py) in enumerate(zip(jfa,jfapy)):
+        assert c.shape == R.shape, 'actionAngleIsochrone with C does not return output with the shape of the input'
+        assert numpy.all(numpy.fabs(c-py) < 10.**-8.), 'actionAngleIsochrone with C does not agree with the Python implementation for output %i' % ii
+    jf= aAI.actionsFreqs(R,vR,vT,z,vz)
+    for ii in range(6):
+        assert numpy.all(numpy.fabs(jf[ii]-jfapy[ii]) < 10.**-8.), 'actionAngleIsochrone.actionsFreqs with C does not agree with the Python implementation for output %i' % ii
+    # Output in preallocated arrays
+    out= [numpy.empty(R.size) for ii in range(9)]
+    jfaout= actionAngleIsochrone_c(aAI.amp,aAI.b,R.flatten(),vR.flatten(),
+                                   vT.flatten(),z.flatten(),vz.flatten(),
+                                   phi=phi.flatten(),freqs=True,angles=True,
+                                   out=out)
+    for ii in range(9):
+        assert numpy.all(numpy.fabs(out[ii]-jfapy[ii].flatten()) < 10.**-8.), 'actionAngleIsochrone_c does not write its output into the preallocated arrays'
+    # Preallocated arrays that cannot be written into directly raise an error
+    for badout in [[numpy.empty(2*R.size)[::2] for ii in range(9)],
+                   [numpy.empty(R.size,dtype=numpy.float32) for ii in range(9)],
+                   [numpy.empty(R.size) for ii in range(8)]]:
+        try:
+            actionAngleIsochrone_c(aAI.amp,aAI.b,R.flatten(),vR.flatten(),
+                                   vT.flatten(),z.flatten(),vz.flatten(),
+                                   phi=phi.flatten(),freqs=True,angles=True,
+                                   out=badout)
+        except ValueError: pass
+        else: raise AssertionError('actionAngleIsochrone_c with non-contiguous, wrong-dtype, or the wrong number of output arrays did not raise ValueError')
+    return None
+
 #Basic sanity checking of the actionAngleSpherical actions
 def test_actionAngleSpherical_basic_actions():
     from galpy.actionAngle import actionAngleSpherical
@@ -299,6 +344,41 @@ def test_actionAngleSpherical_otherIsochrone_angles():
     assert daz < 10.**-6., 'actionAngleSpherical applied to isochrone potential fails for az at %g%%' % (daz*100.)
     return None
 
+#Test that the C and Python implementations of actionAngleSpherical agree
+def test_actionAngleSpherical_c_vs_python():
+    from galpy.potential import NFWPotential
+    from galpy.actionAngle import actionAngleSpherical
+    from galpy.actionAngle_src.actionAngleSpherical_c import _ext_loaded
+    if not _ext_loaded: return None
+    np= NFWPotential(normalize=1.,a=3.)
+    aAS= actionAngleSpherical(pot=np)
+    aASpy= actionAngleSpherical(pot=np,c=False)
+    R= numpy.array([1.1,0.8,1.5])
+    vR= numpy.array([0.3,-0.2,0.1])
+    vT= numpy.array([1.2,0.9,-0.7])
+    z= numpy.array([0.2,-0.4,0.1])
+    vz= numpy.array([0.5,0.1,-0.3])
+    phi= numpy.array([2.,0.5,4.])
+    jfa= aAS.actionsFreqsAngles(R,vR,vT,z,vz,phi)
+    jfapy= aASpy.actionsFreqsAngles(R,vR,vT,z,vz,phi)
+    for ii,(c,py) in enumerate(zip(jfa,jfapy)):
+        assert numpy.all(numpy.fabs(c-py) < 10.**-6.), 'actionAngleSpherical with C does not agree with the Python implementation for output %i' % ii
+    #Also with c= at call time
+    jpy= aAS(R,vR,vT,z,vz,c=False)
+    assert numpy.all(numpy.fabs(jpy[0]-jfa[0]) < 10.**-6.), 'actionAngleSpherical with c=False at call time does not agree with C'
+    #fixed_quad= and scipy quad keywords are not supported in C, so Python should be used, with a warning
+    for kwargs in [{'fixed_quad':True},{'epsabs':10.**-10.}]:
+        with warnings.catch_warnings(record=True) as w:
+            warnings.simplefilter("always",galpyWarning)
+            jq= aAS(R,vR,vT,z,vz,**kwargs)
+            raisedWarning= False
+            for wa in w:
+                raisedWarning= ('not supported by the C implementation of actionAngleSpherical' in str(wa.message))
+                if raisedWarning: break
+            assert raisedWarning, 'actionAngleSpherical with C and %s does not raise a warning' % list(kwargs.keys())[0]
+        assert numpy.all(numpy.fabs(jq[0]-aASpy(R,vR,vT,z,vz,**kwargs)[0]) < 10.**-10.), 'actionAngleSpherical with C and %s does not fall back to Python' % list(kwargs.keys())[0]
+    return None
+
 #Basic sanity checking of the actionAngleAdiabatic actions
 def test_actionAngleAdiabatic_basic_actions():
     from galpy.actionAngle import actionAngleAdiabatic
@@ -509,6 +589,47 @@ def test_actionAngleAdiabaticGrid_basicAndConserved_actions():
                                         -1.2,-8.,-1.7,ntimes=101)
     return None
 
+#Test that an actionAngleAdiabaticGrid can be saved and loaded again
+def test_actionAngleAdiabaticGrid_savedir():
+    import os, shutil, tempfile
+    from galpy.potential import MWPotential
+    from galpy.actionAngle import actionAngleAdiabaticGrid
+    savedir= tempfile.mkdtemp()
+    try:
+        aAA= actionAngleAdiabaticGrid(pot=MWPotential,gamma=1.,c=False,
+                                      nR=8,nEz=8,nEr=11,nLz=11,
+                                      savedir=savedir)
+        assert len(os.listdir(savedir)) == 1, 'actionAngleAdiabaticGrid with savedir= did not save the grid'
+        # Should now be loaded
+        aAAl= actionAngleAdiabaticGrid(pot=MWPotential,gamma=1.,c=False,
+                                       nR=8,nEz=8,nEr=11,nLz=11,
+                                       savedir=savedir)
+        assert len(os.listdir(savedir)) == 1, 'actionAngleAdiabaticGrid with savedir= saved the grid twice'
+        R,vR,vT,z,vz= 1.05,0.02,1.05,0.03,0.1
+        js= aAA(R,vR,vT,z,vz)
+        jsl= aAAl(R,vR,vT,z,vz)
+        for ii in range(3):
+            assert numpy.fabs(js[ii]-jsl[ii]) < 10.**-10., 'actionAngleAdiabaticGrid loaded from savedir does not give the same actions as the original'
+    finally:
+        shutil.rmtree(savedir)
+    return None
+
+#Test that the hash used to name saved grids depends on the potential's parameters
+def test_actionAngle_grid_hash():
+    from galpy.potential import MiyamotoNagaiPotential, SCFPotential, \
+        evaluateRforces
+    from galpy.actionAngle_src.actionAngle import _grid_hash
+    mp= MiyamotoNagaiPotential(a=0.5,b=0.3,normalize=1.)
+    assert _grid_hash(mp,[1.]) == _grid_hash(MiyamotoNagaiPotential(a=0.5,b=0.3,normalize=1.),[1.]), 'Grid hash of identical potentials differs'
+    assert _grid_hash(mp,[1.]) != _grid_hash(MiyamotoNagaiPotential(a=0.5,b=0.3+10.**-10.,normalize=1.),[1.]), 'Grid hash of potentials with different parameters is the same'
+    assert _grid_hash(mp,[1.]) != _grid_hash(mp,[2.]), 'Grid hash for different grid parameters is the same'
+    # Evaluating the potential, which fills caches, should not change the hash
+    sp= SCFPotential()
+    h= _grid_hash(sp,[1.])
+    evaluateRforces(sp,1.1,0.2)
+    assert _grid_hash(sp,[1.]) == h, 'Grid hash changes when the potential is evaluated'
+    return None
+
 #Basic sanity checking of the actionAngleAdiabatic actions
 def test_actionAngleAdiabaticGrid_basic_actions_c():
     from galpy.actionAngle import actionAngleAdiabaticGrid
@@ -578,6 +699,32 @@ def test_actionAngleAdiabaticGrid_Isochrone_actions():
     assert djz < 10.**-1.2, 'actionAngleAdiabatic applied to isochrone potential fails for Jz at %f%%' % (djz*100.)
     return None
 
+#Test that the adaptively-refined actionAngleAdiabaticGrid reaches its tolerance
+def test_actionAngleAdiabaticGrid_adaptive_c():
+    from galpy.potential import MWPotential
+    from galpy.actionAngle import actionAngleAdiabaticGrid, \
+        actionAngleAdiabatic
+    aA= actionAngleAdiabatic(pot=MWPotential,c=True)
+    aAA= actionAngleAdiabaticGrid(pot=MWPotential,c=True)
+    assert aAA.gridError() == (None,None), 'actionAngleAdiabaticGrid.gridError does not return None for a non-adaptive grid'
+    tol= 10.**-3.
+    aAA= actionAngleAdiabaticGrid(pot=MWPotential,c=True,
+                                  nR=8,nEz=8,nEr=31,nLz=31,tol=tol)
+    assert aAA.gridError()[0] < tol, 'Adaptive actionAngleAdiabaticGrid does not reach the requested tolerance for Jz'
+    assert aAA.gridError()[1] < tol, 'Adaptive actionAngleAdiabaticGrid does not reach the requested tolerance for Jr'
+    numpy.random.seed(1)
+    nobj= 30
+    R= numpy.random.uniform(0.5,2.,nobj)
+    vR= numpy.random.normal(size=nobj)*0.1
+    vT= 1.+numpy.random.normal(size=nobj)*0.1
+    z= numpy.random.uniform(-0.2,0.2,nobj)
+    vz= numpy.random.normal(size=nobj)*0.07
+    js= aA(R,vR,vT,z,vz)
+    jsa= aAA(R,vR,vT,z,vz)
+    assert numpy.all(numpy.fabs(js[0]-jsa[0]) < 10.**-2.*numpy.amax(js[0])), 'Adaptive actionAngleAdiabaticGrid does not agree with actionAngleAdiabatic for Jr'
+    assert numpy.all(numpy.fabs(js[2]-jsa[2]) < 10.**-2.*numpy.amax(js[2])), 'Adaptive actionAngleAdiabaticGrid does not agree with actionAngleAdiabatic for Jz'
+    return None
+
 #Basic sanity checking of the actionAngleStaeckel actions
 def test_actionAngleStaeckel_basic_actions():
     from galpy.actionAngle import actionAngleStaeckel
@@ -1163,6 +1310,51 @@ def test_actionAngleStaeckelGrid_conserved_actions_c():
                                         -1.4,-8.,-1.7,ntimes=101)
     return None
 
+#Test that an actionAngleStaeckelGrid can be saved and loaded again
+def test_actionAngleStaeckelGrid_savedir():
+    import os, shutil, tempfile
+    from galpy.potential import MWPotential
+    from galpy.actionAngle import actionAngleStaeckelGrid
+    savedir= tempfile.mkdtemp()
+    try:
+        aAA= actionAngleStaeckelGrid(pot=MWPotential,delta=0.71,c=False,
+                                     nLz=10,nE=10,npsi=10,savedir=savedir)
+        assert len(os.listdir(savedir)) == 1, 'actionAngleStaeckelGrid with savedir= did not save the grid'
+        # Should now be loaded
+        aAAl= actionAngleStaeckelGrid(pot=MWPotential,delta=0.71,c=False,
+                                      nLz=10,nE=10,npsi=10,savedir=savedir)
+        assert len(os.listdir(savedir)) == 1, 'actionAngleStaeckelGrid with savedir= saved the grid twice'
+        R,vR,vT,z,vz= 1.05,0.02,1.05,0.03,0.1
+        js= aAA(R,vR,vT,z,vz)
+        jsl= aAAl(R,vR,vT,z,vz)
+        for ii in range(3):
+            assert numpy.fabs(js[ii]-jsl[ii]) < 10.**-10., 'actionAngleStaeckelGrid loaded from savedir does not give the same actions as the original'
+        # Different parameters should give a different file
+        aAA= actionAngleStaeckelGrid(pot=MWPotential,delta=0.5,c=False,
+                                     nLz=10,nE=10,npsi=10,savedir=savedir)
+        assert len(os.listdir(savedir)) == 2, 'actionAngleStaeckelGrid with different parameters did not save a different grid'
+    finally:
+        shutil.rmtree(savedir)
+    return None
+
+# Test that the grid built in C agrees with that built in python
+def test_actionAngleStaeckelGrid_cgrid():
+    from galpy.potential import MWPotential
+    from galpy.actionAngle import actionAngleStaeckelGrid
+    aAc= actionAngleStaeckelGrid(pot=MWPotential,delta=0.71,c=True,
+                                 nLz=10,nE=10,npsi=10)
+    aAp= actionAngleStaeckelGrid(pot=MWPotential,delta=0.71,c=False,
+                                 nLz=10,nE=10,npsi=10)
+    assert numpy.all(numpy.fabs(aAc._RL-aAp._RL) < 10.**-6.), 'Circular-orbit radii from the C grid do not agree with those from python'
+    assert numpy.all(numpy.fabs(aAc._ERL-aAp._ERL) < 10.**-10.), 'Circular-orbit energies from the C grid do not agree with those from python'
+    assert numpy.all(numpy.fabs(aAc._u0-aAp._u0) < 10.**-5.), 'u0 from the C grid does not agree with that from python'
+    R,vR,vT,z,vz= 1.05,0.02,1.05,0.03,0.1
+    jsc= aAc(R,vR,vT,z,vz)
+    jsp= aAp(R,vR,vT,z,vz)
+    for ii in range(3):
+        assert numpy.fabs(jsc[ii]-jsp[ii])/numpy.fabs(jsp[ii]) < 10.**-3., 'actionAngleStaeckelGrid built in C does not give the same actions as when built in python'
+    return None
+
 #Test the setup of an actionAngleStaeckelGrid
 def test_actionAngleStaeckelGrid_setuperrs():
     from galpy.potential import MWPotential
@@ -1275,6 +1467,37 @@ def test_actionAngleIsochroneApprox_otherIsochrone_angles():
     assert daz < 10.**-4., 'actionAngleIsochroneApprox applied to isochrone potential fails for az at %f%%' % (daz*100.)
     return None
 
+#Test the actionAngleIsochroneApprox against an isochrone potential: actions, frequencies, and angles computed block-by-block
+def test_actionAngleIsochroneApprox_otherIsochrone_nblockJ():
+    from galpy.potential import IsochronePotential
+    from galpy.actionAngle import actionAngleIsochroneApprox, \
+        actionAngleIsochrone
+    from galpy.orbit import Orbit
+    ip= IsochronePotential(normalize=1.,b=1.2)
+    aAI= actionAngleIsochrone(ip=ip)
+    aAIA= actionAngleIsochroneApprox(pot=ip,b=0.8,nblockJ=1500)
+    R,vR,vT,z,vz,phi= 1.1, 0.3, 1.2, 0.2,0.5,2.
+    ji= aAI(R,vR,vT,z,vz,phi)
+    jia= aAIA(R,vR,vT,z,vz,phi)
+    djr= numpy.fabs((ji[0]-jia[0])/ji[0])
+    dlz= numpy.fabs((ji[1]-jia[1])/ji[1])
+    djz= numpy.fabs((ji[2]-jia[2])/ji[2])
+    assert djr < 10.**-2., 'actionAngleIsochroneApprox with nblockJ applied to isochrone potential fails for Jr at %f%%' % (djr*100.)
+    assert dlz < 10.**-10., 'actionAngleIsochroneApprox with nblockJ applied to isochrone potential fails for Lz at %f%%' % (dlz*100.)
+    assert djz < 10.**-6., 'actionAngleIsochroneApprox with nblockJ applied to isochrone potential fails for Jz at %f%%' % (djz*100.)
+    jiO= aAI.actionsFreqsAngles(R,vR,vT,z,vz,phi)
+    jiaO= aAIA.actionsFreqsAngles(Orbit([R,vR,vT,z,vz,phi]))
+    for ii,name in zip(range(3,9),['Or','Op','Oz','ar','ap','az']):
+        tol= 10.**-6.
+        if ii > 5: tol= 10.**-4.
+        assert numpy.fabs((jiO[ii]-jiaO[ii])/jiO[ii]) < tol, 'actionAngleIsochroneApprox with nblockJ applied to isochrone potential fails for %s at %f%%' % (name,numpy.fabs((jiO[ii]-jiaO[ii])/jiO[ii])*100.)
+    # Should agree with computing the full orbit at once
+    aAIA= actionAngleIsochroneApprox(pot=ip,b=0.8)
+    jiaOfull= aAIA.actionsFreqsAngles(R,vR,vT,z,vz,phi)
+    for ii in range(9):
+        assert numpy.fabs((jiaOfull[ii]-jiaO[ii])/jiaOfull[ii]) < 10.**-5., 'actionAngleIsochroneApprox with nblockJ does not agree with computing the full orbit at once'
+    return None
+
 #Test the actionAngleIsochroneApprox against an isochrone potential: actions, cumul
 def test_actionAngleIsochroneApprox_otherIsochrone_actions_cumul():
     from galpy.potential import IsochronePotential
@@ -1506,6 +1729,62 @@ def test_actionAngleIsochroneApprox_firstFlip():
         'actionAngleIsochroneApprox calculated w/ _firstFlip and w/o do not agree at %g%%' % (100.*numpy.amax(numpy.fabs((acfs-acfsfirstFlip)/acfs)))
     return None
 
+#Check that actionAngleIsochroneApprox gives the same answer when multiple
+#phase-space points are integrated together as when they are done one-by-one
+def test_actionAngleIsochroneApprox_multi(): 
+    from galpy.potential import LogarithmicHaloPotential
+    from galpy.actionAngle import actionAngleIsochroneApprox
+    lp= LogarithmicHaloPotential(normalize=1.,q=0.9)
+    aAI= actionAngleIsochroneApprox(pot=lp,b=0.8)
+    R= numpy.array([1.56148083,1.1,0.9])
+    vR= numpy.array([0.35081535,0.1,-0.2])
+    vT= numpy.array([-1.15481504,1.1,0.95])
+    z= numpy.array([0.88719443,0.1,-0.05])
+    vz= numpy.array([-0.47713334,0.1,0.2])
+    phi= numpy.array([0.12019596,2.,4.])
+    acfs= numpy.array(list(aAI.actionsFreqsAngles(R,vR,vT,z,vz,phi)))
+    for ii in range(len(R)):
+        acfsone= numpy.array(list(aAI.actionsFreqsAngles(R[ii],vR[ii],vT[ii],
+                                                         z[ii],vz[ii],
+                                                         phi[ii]))).flatten()
+        assert numpy.amax(numpy.fabs((acfs[:,ii]-acfsone)/acfsone)) < 10.**-10., \
+            'actionAngleIsochroneApprox calculated for multiple phase-space points at once and one-by-one do not agree at %g%%' % (100.*numpy.amax(numpy.fabs((acfs[:,ii]-acfsone)/acfsone)))
+    return None
+
+#Check that a list of Orbits is integrated together and that the integrated
+#orbits are stored in the Orbit instances, as when integrating them directly
+def test_actionAngleIsochroneApprox_orbitlist():
+    from galpy.potential import LogarithmicHaloPotential
+    from galpy.actionAngle import actionAngleIsochroneApprox
+    from galpy.orbit import Orbit
+    lp= LogarithmicHaloPotential(normalize=1.,q=0.9)
+    aAI= actionAngleIsochroneApprox(pot=lp,b=0.8)
+    vxvvs= [[1.56148083,0.35081535,-1.15481504,0.88719443,-0.47713334,
+             0.12019596],
+            [1.1,0.1,1.1,0.1,0.1,2.],
+            [0.9,-0.2,0.95,-0.05,0.2,4.]]
+    for firstFlip in [False,True]:
+        os= [Orbit(vxvv) for vxvv in vxvvs]
+        acfs= numpy.array(list(aAI.actionsFreqsAngles(os,
+                                                      _firstFlip=firstFlip)))
+        for ii in range(len(vxvvs)):
+            acfsone= numpy.array(list(aAI.actionsFreqsAngles(\
+                        Orbit(vxvvs[ii]),_firstFlip=firstFlip))).flatten()
+            assert numpy.amax(numpy.fabs((acfs[:,ii]-acfsone)/acfsone)) < 10.**-10., \
+                'actionAngleIsochroneApprox calculated for a list of Orbits and one-by-one do not agree at %g%%' % (100.*numpy.amax(numpy.fabs((acfs[:,ii]-acfsone)/acfsone)))
+            # The stored orbit is that of Orbit.integrate (backward in time
+            # for _firstFlip)
+            o= Orbit(vxvvs[ii])
+            if firstFlip: o= o.flip()
+            o.integrate(aAI._tsJ,lp,method=aAI._integrate_method)
+            orbit= o.getOrbit()
+            if firstFlip: orbit[:,[1,2,4]]*= -1.
+            assert numpy.all(numpy.fabs(os[ii].getOrbit()-orbit) < 10.**-10.), \
+                'Orbit stored by actionAngleIsochroneApprox does not agree with that integrated directly'
+            assert numpy.all(os[ii].time() == aAI._tsJ), \
+                'Times of the orbit stored by actionAngleIsochroneApprox are not those of the integration'
+    return None
+
 #Test the actionAngleIsochroneApprox used in Bovy (2014)
 def test_actionAngleIsochroneApprox_bovy14():   
     from galpy.potential import LogarithmicHaloPotential
@@ -2056,6 +2335,88 @@ def test_actionAngleTorus_jacobian_linear():
     assert numpy.all(numpy.fabs((xv_fromjac-xv_direct)/xv_direct) < 0.01), 'Jacobian returned by actionAngleTorus method xvJacobianFreqs does not appear to be correct'
     return None
 
+# Test that the cache of fitted tori and fitting many tori at once work
+def test_actionAngleTorus_cache_many():
+    from galpy.potential import MWPotential2014
+    from galpy.actionAngle import actionAngleTorus
+    aAT= actionAngleTorus(pot=MWPotential2014,usecache=True)
+    aATnc= actionAngleTorus(pot=MWPotential2014)
+    aAT.clearCache()
+    jr= numpy.array([0.075,0.05,0.1])
+    jphi= numpy.array([1.1,0.9,1.2])
+    jz= numpy.array([0.05,0.02,0.03])
+    angler= numpy.array([[0.5,1.],[2.,3.],[4.,5.]])
+    anglephi= numpy.array([[1.,2.],[3.,4.],[5.,6.]])
+    anglez= numpy.array([[2.,3.],[1.,0.],[4.,6.]])
+    xvom= aAT.xvFreqsMany(jr,jphi,jz,angler,anglephi,anglez)
+    assert aAT.cacheInfo()[0] == 3, 'Fitted tori not added to the cache'
+    assert aAT.cacheInfo()[1] > 0., 'Fitted tori not added to the cache'
+    om= aAT.Freqs(jr,jphi,jz)
+    for ii in range(len(jr)):
+        # Cached and uncached single tori should agree with the batch
+        for tAT in [aAT,aATnc]:
+            txvom= tAT.xvFreqs(jr[ii],jphi[ii],jz[ii],
+                               angler[ii],anglephi[ii],anglez[ii])
+            assert numpy.all(numpy.fabs(txvom[0]-xvom[0][ii]) < 10.**-8.), 'xvFreqsMany does not agree with xvFreqs for actionAngleTorus'
+            for jj in range(3):
+                assert numpy.fabs(txvom[jj+1]-xvom[jj+1][ii]) < 10.**-8., 'xvFreqsMany frequencies do not agree with xvFreqs for actionAngleTorus'
+                assert numpy.fabs(om[jj][ii]-xvom[jj+1][ii]) < 10.**-8., 'Freqs for array input does not agree with xvFreqsMany for actionAngleTorus'
+    # One angle per torus
+    xv= aAT.xvFreqsMany(jr,jphi,jz,angler[:,0],anglephi[:,0],anglez[:,0])[0]
+    assert xv.shape == (3,6), 'xvFreqsMany with one angle per torus does not return an array with the correct shape'
+    assert numpy.all(numpy.fabs(xv-xvom[0][:,0]) < 10.**-8.), 'xvFreqsMany with one angle per torus does not agree with multiple angles per torus'
+    aAT.clearCache()
+    assert aAT.cacheInfo()[0] == 0, 'Cache of fitted tori not cleared'
+    return None
+
+# Test that warm-started fits agree with fits from scratch and that the
+# frequencies can be interpolated on a grid of tori
+def test_actionAngleTorus_warmstart_grid():
+    from galpy.potential import MWPotential2014
+    from galpy.actionAngle import actionAngleTorus
+    aAT= actionAngleTorus(pot=MWPotential2014,usecache=False)
+    jr= numpy.linspace(0.02,0.06,5)
+    jphi= numpy.linspace(1.,1.1,5)
+    jz= numpy.linspace(0.01,0.03,5)
+    om= aAT.Freqs(jr,jphi,jz)
+    angler= numpy.linspace(0.,2.*numpy.pi,5)
+    xv= aAT.xvFreqsMany(jr,jphi,jz,angler,angler,angler)
+    xvws= aAT.xvFreqsMany(jr,jphi,jz,angler,angler,angler,warmstart=True)
+    assert numpy.all(numpy.fabs((xvws[0]-xv[0])/xv[0]) < 10.**-3.), 'Warm-started torus fits give different (x,v) than fits from scratch'
+    for jj in range(3):
+        assert numpy.all(numpy.fabs((xvws[jj+1]-om[jj])/om[jj]) < 10.**-3.), 'Warm-started torus fits give different frequencies than fits from scratch'
+    # Grid
+    gom= aAT.fitGrid(jr[::2],jphi[::2],jz[::2])
+    assert gom[0].shape == (3,3,3), 'fitGrid does not return frequencies with the expected shape'
+    for jj in range(3):
+        assert numpy.fabs((gom[jj][1,1,1]-om[jj][2])/om[jj][2]) < 10.**-3., 'fitGrid frequencies do not agree with those of single tori'
+    iom= aAT.interpFreqs(jr,jphi,jz)
+    for jj in range(3):
+        assert numpy.all(numpy.fabs((iom[jj]-om[jj])/om[jj]) < 10.**-2.), 'Frequencies interpolated on a grid of tori do not agree with those of single tori'
+    return None
+
+# Test that warm-started fits reach the same frequencies and (x,v) as fits
+# from scratch with fewer potential evaluations
+def test_actionAngleTorus_warmstart_nevals():
+    from galpy.potential import MWPotential2014
+    from galpy.actionAngle import actionAngleTorus
+    aAT= actionAngleTorus(pot=MWPotential2014)
+    nt= 64
+    jr= numpy.linspace(0.02,0.04,nt)
+    jphi= numpy.linspace(1.,1.05,nt)
+    jz= numpy.linspace(0.01,0.02,nt)
+    angler= numpy.linspace(0.,2.*numpy.pi,nt)
+    xv= aAT.xvFreqsMany(jr,jphi,jz,angler,angler,angler,
+                        _return_nevals=True)
+    xvws= aAT.xvFreqsMany(jr,jphi,jz,angler,angler,angler,warmstart=True,
+                          _return_nevals=True)
+    assert numpy.all(xv[4] == 0) and numpy.all(xvws[4] == 0), 'Torus fits in warm-start test failed'
+    assert numpy.all(numpy.fabs((xvws[0]-xv[0])/xv[0]) < 10.**-3.), 'Warm-started torus fits give different (x,v) than fits from scratch'
+    for jj in range(3):
+        assert numpy.all(numpy.fabs((xvws[jj+1]-xv[jj+1])/xv[jj+1]) < 10.**-3.), 'Warm-started torus fits give different frequencies than fits from scratch'
+    assert numpy.sum(xvws[5]) < numpy.sum(xv[5]), 'Warm-started torus fits do not use fewer potential evaluations than fits from scratch'
+    return None
+
 #Test error when potential is not implemented in C
 def test_actionAngleTorus_nocerr():
     from galpy.actionAngle import actionAngleTorus
@@ -1025,6 +1025,32 @@ def test_ELtowRRapRperi_powerrise():
     assert numpy.fabs(wr-2.*Rc**(beta-1.)/gamma) < 10.**-3., "diskdf's _ELtowRRapRperi's radial frequency for close to circular orbit is wrong"
     return None
 
+def test_ELtowRRapRperi_array():
+    # Test that the vectorized rap, rperi, and radial frequency agree with
+    # those computed by actionAngleAxi for each orbit
+    from galpy.actionAngle import actionAngleAxi
+    from galpy.potential import PowerSphericalPotential
+    for beta in [-0.2,0.,0.2]:
+        dfc= dehnendf(beta=beta,profileParams=(1./4.,1.,0.2))
+        pot= PowerSphericalPotential(normalize=1.,alpha=2.-2.*beta).toPlanar()
+        xE= numpy.array([0.5,1.,1.5,2.])
+        L= xE**(1.+beta)*numpy.array([0.7,1.1,0.95,0.3])
+        if beta == 0.:
+            E= numpy.log(xE)+0.5
+        else:
+            E= .5*xE**(2.*beta)*(1.+1./beta)
+        wr,rap,rperi= dfc._ELtowRRapRperi(E,L)
+        for ii in range(len(E)):
+            aA= actionAngleAxi(xE[ii],0.,L[ii]/xE[ii],pot=pot)
+            trperi, trap= aA.calcRapRperi()
+            assert numpy.fabs(rperi[ii]-trperi) < 10.**-10., "diskdf's _ELtowRRapRperi's pericenter for array input is wrong"
+            assert numpy.fabs(rap[ii]-trap) < 10.**-10., "diskdf's _ELtowRRapRperi's apocenter for array input is wrong"
+            assert numpy.fabs(wr[ii]*aA.TR()/2./numpy.pi-1.) < 10.**-7., "diskdf's _ELtowRRapRperi's radial frequency for array input is wrong"
+            # Scalar input gives the same
+            swr,srap,srperi= dfc._ELtowRRapRperi(E[ii],L[ii])
+            assert numpy.fabs(swr-wr[ii]) < 10.**-14. and numpy.fabs(srap-rap[ii]) < 10.**-14. and numpy.fabs(srperi-rperi[ii]) < 10.**-14., "diskdf's _ELtowRRapRperi for scalar input does not agree with that for array input"
+    return None
+
 def test_sampledSurfacemassLOS_target():
     numpy.random.seed(1)
     beta= 0.
@@ -1204,7 +1230,7 @@ def test_dehnendf_sample_powerrise_returnROrbit():
     beta= 0.2
     dfc= dehnendf(beta=beta,profileParams=(1./4.,1.,0.2))
     numpy.random.seed(1)
-    os= dfc.sample(n=100,returnROrbit=True)
+    os= dfc.sample(n=1000,returnROrbit=True)
     #Test the spatial distribution
     rs= numpy.array([o.R() for o in os])
     assert numpy.fabs(numpy.mean(rs)-0.5) < 0.1, 'mean R of sampled points does not agree with that of the input surface profile'
@@ -1221,7 +1247,7 @@ def test_dehnendf_sample_flat_returnOrbit():
     beta= 0.
     dfc= dehnendf(beta=beta,profileParams=(1./4.,1.,0.2))
     numpy.random.seed(1)
-    os= dfc.sample(n=100,returnOrbit=True)
+    os= dfc.sample(n=20000,returnOrbit=True)
     #Test the spatial distribution
     rs= numpy.array([o.R() for o in os])
     phis= numpy.array([o.phi() for o in os])
@@ -1306,7 +1332,7 @@ def test_shudf_sample_flat_returnOrbit():
     beta= 0.
     dfc= shudf(beta=beta,profileParams=(1./4.,1.,0.2))
     numpy.random.seed(1)
-    os= dfc.sample(n=100,returnOrbit=True)
+    os= dfc.sample(n=20000,returnOrbit=True)
     #Test the spatial distribution
     rs= numpy.array([o.R() for o in os])
     phis= numpy.array([o.phi() for o in os])
@@ -1336,6 +1362,45 @@ def test_shudf_sample_flat_EL():
     #BOVY: Could use another test
     return None
 
+def test_dehnendf_sample_flat_EL_returnArray():
+    beta= 0.
+    dfc= dehnendf(beta=beta,profileParams=(1./4.,1.,0.2))
+    numpy.random.seed(1)
+    EL= dfc.sample(n=100000,returnROrbit=False,returnOrbit=False,
+                   returnArray=True)
+    assert EL.shape == (100000,2), 'dehnendf.sample with returnArray=True does not return an array with the correct shape'
+    #radii of circular orbits with this energy, these should follow an exponential
+    rs= numpy.exp(EL[:,0]-0.5)
+    assert numpy.fabs(numpy.mean(rs)-0.5) < 0.005, 'mean R of sampled points does not agree with that of the input surface profile'
+    assert numpy.fabs(numpy.std(rs)-numpy.sqrt(2.)/4.) < 0.003, 'stddev R of sampled points does not agree with that of the input surface profile'
+    return None
+
+def test_shudf_sample_flat_returnArray():
+    beta= 0.
+    dfc= shudf(beta=beta,profileParams=(1./4.,1.,0.2))
+    numpy.random.seed(1)
+    EL= dfc.sample(n=100000,returnROrbit=False,returnOrbit=False,
+                   returnArray=True)
+    assert EL.shape == (100000,2), 'shudf.sample with returnArray=True does not return an array with the correct shape'
+    #radii of circular orbits with this angular momentum, these should follow an exponential
+    rs= EL[:,1]
+    assert numpy.fabs(numpy.mean(rs)-0.5) < 0.005, 'mean R of sampled points does not agree with that of the input surface profile'
+    assert numpy.fabs(numpy.std(rs)-numpy.sqrt(2.)/4.) < 0.003, 'stddev R of sampled points does not agree with that of the input surface profile'
+    # Also for orbits, which should agree with returning Orbits
+    # (use new instances, because the sampling hull is re-used)
+    dfc= shudf(beta=beta,profileParams=(1./4.,1.,0.2))
+    numpy.random.seed(1)
+    vxvv= dfc.sample(n=20,returnOrbit=True,returnArray=True)
+    dfc= shudf(beta=beta,profileParams=(1./4.,1.,0.2))
+    numpy.random.seed(1)
+    os= dfc.sample(n=20,returnOrbit=True)
+    assert vxvv.shape == (len(os),4), 'shudf.sample with returnArray=True does not return an array with the correct shape'
+    for ii in range(len(os)):
+        assert numpy.fabs(vxvv[ii,0]-os[ii].R()) < 10.**-10., 'shudf.sample with returnArray=True does not return the same as when returning Orbits'
+        assert numpy.fabs(vxvv[ii,2]-os[ii].vT()) < 10.**-10., 'shudf.sample with returnArray=True does not return the same as when returning Orbits'
+        assert numpy.fabs(vxvv[ii,3]-os[ii].phi()) < 10.**-10., 'shudf.sample with returnArray=True does not return the same as when returning Orbits'
+    return None
+
 ###############################################################################
 #Tests of DFcorrection
 ###############################################################################
@@ -1439,6 +1504,33 @@ def test_dehnendf_flat_DFcorrection_cleanup():
     except: raise AssertionError("removing DFcorrection's savefile did not work")
     return None
 
+def test_dehnendf_flat_DFcorrection_numcores():
+    # Computing the corrections in parallel should give the same result
+    dfc= dehnendf(beta=0.,profileParams=(1./4.,1.,0.2),
+                  correct=True,
+                  niter=1,
+                  npoints=21,
+                  savedir='.',
+                  numcores=2)
+    assert numpy.all(numpy.fabs(dfc._corr._corrections-ddf_correct_flat._corr._corrections) < 10.**-10.), 'DFcorrection computed in parallel does not agree with that computed serially'
+    # Parameters that only differ beyond the precision of the formatted
+    # parameters should be saved to different files
+    import copy
+    from galpy.df import expSurfaceSigmaProfile 
+    dcorr= copy.copy(dfc._corr)
+    dcorr._surfaceSigmaProfile= expSurfaceSigmaProfile(params=(1./4.+10.**-7.,
+                                                               1.,0.2))
+    assert dcorr._createFormattedSavefilename(1) == dfc._corr._createFormattedSavefilename(1), 'Formatted DFcorrection save filenames differ for parameters that only differ beyond the formatted precision'
+    assert dcorr._createSavefilename(1) != dfc._corr._createSavefilename(1), 'DFcorrection save filenames are the same for different parameters'
+    # Formatted (legacy) save files should only be used when the parameters
+    # are exactly represented in their name
+    assert dfc._corr._formattedSavefilenameIsExact(), 'DFcorrection parameters exactly represented in the formatted save filename are not recognized as such'
+    assert not dcorr._formattedSavefilenameIsExact(), 'DFcorrection parameters that are rounded in the formatted save filename are considered to be exactly represented'
+    try:
+        os.remove(dfc._corr._createSavefilename(1))
+    except: raise AssertionError("removing DFcorrection's savefile did not work")
+    return None
+
 def test_DFcorrection_setup():
     #Test that the keywords are setup correctly and that exceptions are raised
     dfc= dehnendf(beta=0.1,profileParams=(1./3.,1.,0.2),
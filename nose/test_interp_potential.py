@@ -469,6 +469,54 @@ def test_interpolation_potential_force_use_c():
         'Potential interpolation grid of zforce  calculated with use_c does not agree with that calculated in python'
     return None
 
+def test_interpolation_dens_freqs_use_c():
+    #Test the density and frequency grids when the other grids are calculated
+    #in a single pass in C
+    kwargs= dict(RZPot=potential.MWPotential,rgrid=(0.01,2.,51),
+                 zgrid=(0.,0.2,51),logR=False,
+                 interpDens=True,interpvcirc=True,interpdvcircdr=True,
+                 interpepifreq=True,interpverticalfreq=True,zsym=True)
+    rzpot= potential.interpRZPotential(use_c=False,**kwargs)
+    rzpot_c= potential.interpRZPotential(use_c=True,**kwargs)
+    for grid in ['_densGrid','_vcircGrid','_dvcircdrGrid','_epifreqGrid',
+                 '_verticalfreqGrid']:
+        assert numpy.all(numpy.fabs(numpy.array(getattr(rzpot,grid))\
+                                        /getattr(rzpot_c,grid)-1.) < 10.**-10.), \
+            'Potential interpolation grid %s calculated with use_c does not agree with that calculated in python' % grid[1:]
+    return None
+
+def test_interpolation_grids_vectorized():
+    #Test that the grids computed vectorized in python agree with the exact
+    #values at each grid point, also when split over multiple cores
+    kwargs= dict(RZPot=potential.MWPotential,rgrid=(0.01,2.,21),
+                 zgrid=(0.,0.2,11),logR=False,
+                 interpPot=True,interpRforce=True,interpzforce=True,
+                 interpDens=True,interpvcirc=True,interpdvcircdr=True,
+                 interpepifreq=True,interpverticalfreq=True,zsym=True,
+                 use_c=False)
+    rs= numpy.linspace(0.01,2.,21)
+    zs= numpy.linspace(0.,0.2,11)
+    for numcores in [None,2]:
+        rzpot= potential.interpRZPotential(numcores=numcores,**kwargs)
+        for grid,func in zip(['_potGrid','_rforceGrid','_zforceGrid',
+                              '_densGrid'],
+                             [potential.evaluatePotentials,
+                              potential.evaluateRforces,
+                              potential.evaluatezforces,
+                              potential.evaluateDensities]):
+            exact= numpy.array([[func(potential.MWPotential,r,z) for z in zs]
+                                for r in rs])
+            assert numpy.all(numpy.fabs(getattr(rzpot,grid)-exact) < 10.**-14.*numpy.fabs(exact)+10.**-14.), \
+                'Potential interpolation grid %s does not agree with the exact values' % grid[1:]
+        for grid,func in zip(['_vcircGrid','_dvcircdrGrid','_epifreqGrid',
+                              '_verticalfreqGrid'],
+                             [potential.vcirc,potential.dvcircdR,
+                              potential.epifreq,potential.verticalfreq]):
+            exact= numpy.array([func(potential.MWPotential,r) for r in rs])
+            assert numpy.all(numpy.fabs(getattr(rzpot,grid)-exact) < 10.**-14.*numpy.fabs(exact)+10.**-14.), \
+                'Potential interpolation grid %s does not agree with the exact values' % grid[1:]
+    return None
+
 # Test evaluation outside the grid
 def test_interpolation_potential_force_outsidegrid():
     rzpot= potential.interpRZPotential(RZPot=potential.MWPotential,
@@ -949,3 +997,90 @@ def test_interpolation_potential_verticalfreq_notinterpolated():
         assert vfdiff < 10.**-10., 'RZPot interpolation w/ interpRZPotential fails when the potential was not interpolated at R = %g by %g' % (r,vfdiff)
     return None
 
+
+def _nonaxi_scfpot():
+    # Non-axisymmetric SCFPotential used in the interp3DPotential tests
+    hp= potential.HernquistPotential(normalize=1.)
+    def dens(R,z,phi):
+        return hp.dens(R,z,phi)*(1.+0.3*numpy.cos(2.*phi)+0.1*numpy.sin(phi))
+    Acos, Asin= potential.scf_compute_coeffs(dens,4,4)
+    return potential.SCFPotential(Acos=Acos,Asin=Asin)
+
+def test_interp3DPotential():
+    scfpot= _nonaxi_scfpot()
+    ipot= potential.interp3DPotential(pot=scfpot,
+                                      xgrid=(-1.5,1.5,61),
+                                      ygrid=(-1.5,1.5,61),
+                                      zgrid=(-0.5,0.5,21))
+    # Inside the grid, away from the center
+    numpy.random.seed(1)
+    Rs= numpy.random.uniform(0.3,1.,11)
+    zs= numpy.random.uniform(-0.4,0.4,11)
+    phis= numpy.random.uniform(0.,2.*numpy.pi,11)
+    for func in ['__call__','Rforce','zforce','phiforce']:
+        ipvals= getattr(ipot,func)(Rs,zs,phis)
+        for ii in range(len(Rs)):
+            tval= getattr(scfpot,func)(Rs[ii],zs[ii],phis[ii])
+            assert numpy.fabs(ipvals[ii]-tval) < 10.**-3.*numpy.fabs(scfpot(Rs[ii],zs[ii],phis[ii])), 'interp3DPotential %s fails inside the grid at (R,z,phi) = (%g,%g,%g)' % (func,Rs[ii],zs[ii],phis[ii])
+            assert numpy.fabs(getattr(ipot,func)(Rs[ii],zs[ii],phis[ii])-ipvals[ii]) < 10.**-10., 'interp3DPotential %s for scalar and array input are not the same' % func
+    # Outside the grid, the original potential is used
+    for R,z,phi in [(2.,0.1,0.3),(1.,0.7,2.)]:
+        for func in ['__call__','Rforce','zforce','phiforce']:
+            assert numpy.fabs(getattr(ipot,func)(R,z,phi)-getattr(scfpot,func)(R,z,phi)) < 10.**-10., 'interp3DPotential %s fails outside the grid at (R,z,phi) = (%g,%g,%g)' % (func,R,z,phi)
+    # Cannot setup an interp3DPotential with another interp3DPotential
+    try:
+        potential.interp3DPotential(pot=ipot)
+    except potential.PotentialError: pass
+    else: raise AssertionError('Setting up an interp3DPotential w/ another interp3DPotential did not raise PotentialError')
+    return None
+
+def test_interp3DPotential_orbit_c():
+    # Integrating an orbit in C should agree with integrating it in Python
+    from galpy.orbit import Orbit
+    from galpy.orbit_src.FullOrbit import ext_loaded
+    if not ext_loaded: return None
+    ipot= potential.interp3DPotential(pot=_nonaxi_scfpot(),
+                                      xgrid=(-1.5,1.5,61),
+                                      ygrid=(-1.5,1.5,61),
+                                      zgrid=(-0.5,0.5,21),
+                                      numcores=2)
+    ts= numpy.linspace(0.,3.,301)
+    o= Orbit([1.,0.1,1.05,0.05,0.1,0.5])
+    oc= o()
+    o.integrate(ts,ipot,method='odeint')
+    oc.integrate(ts,ipot,method='dopr54_c')
+    assert numpy.amax(numpy.fabs(o.x(ts)-oc.x(ts))) < 10.**-5., 'Orbit integration in interp3DPotential in C does not agree with Python'
+    assert numpy.amax(numpy.fabs(o.z(ts)-oc.z(ts))) < 10.**-5., 'Orbit integration in interp3DPotential in C does not agree with Python'
+    # Planar orbit
+    o= Orbit([1.,0.1,1.05,0.5])
+    oc= o()
+    o.integrate(ts,ipot,method='odeint')
+    oc.integrate(ts,ipot,method='dopr54_c')
+    assert numpy.amax(numpy.fabs(o.x(ts)-oc.x(ts))) < 10.**-5., 'Planar orbit integration in interp3DPotential in C does not agree with Python'
+    return None
+
+def test_interp3DPotential_orbit_c_outsidegrid():
+    # Integrating an orbit in C that leaves the grid should raise a warning
+    import warnings
+    from galpy.orbit import Orbit
+    from galpy.orbit_src.FullOrbit import ext_loaded
+    from galpy.util import galpyWarning
+    if not ext_loaded: return None
+    ipot= potential.interp3DPotential(pot=_nonaxi_scfpot(),
+                                      xgrid=(-1.5,1.5,31),
+                                      ygrid=(-1.5,1.5,31),
+                                      zgrid=(-0.5,0.5,11))
+    ts= numpy.linspace(0.,3.,101)
+    # Stays inside the grid: no warning
+    o= Orbit([1.,0.1,1.05,0.05,0.1,0.5])
+    with warnings.catch_warnings(record=True) as w:
+        warnings.simplefilter("always",galpyWarning)
+        o.integrate(ts,ipot,method='dopr54_c')
+    assert not any(['left the grid' in str(wa.message) for wa in w]), 'Orbit integration in C inside the interp3DPotential grid raised the outside-grid warning'
+    # Leaves the grid in z
+    o= Orbit([1.,0.1,1.05,0.6,0.1,0.5])
+    with warnings.catch_warnings(record=True) as w:
+        warnings.simplefilter("always",galpyWarning)
+        o.integrate(ts,ipot,method='dopr54_c')
+    assert any(['left the grid' in str(wa.message) for wa in w]), 'Orbit integration in C outside the interp3DPotential grid did not raise a warning'
+    return None
@@ -97,7 +97,7 @@ def test_energy_jacobi_conservation():
     pots.append('mockSCFDensityPotential')
     rmpots= ['Potential','MWPotential','MWPotential2014',
              'MovingObjectPotential',
-             'interpRZPotential', 'linearPotential', 'planarAxiPotential',
+             'interpRZPotential', 'interp3DPotential', 'linearPotential', 'planarAxiPotential',
              'planarPotential', 'verticalPotential','PotentialError',
              'SnapshotRZPotential','InterpSnapshotRZPotential']
     if False: #_TRAVIS: #travis CI
@@ -433,7 +433,7 @@ def test_liouville_planar():
     #pots.append('mockFlatTransientLogSpiralPotential')
     rmpots= ['Potential','MWPotential','MWPotential2014',
              'MovingObjectPotential',
-             'interpRZPotential', 'linearPotential', 'planarAxiPotential',
+             'interpRZPotential', 'interp3DPotential', 'linearPotential', 'planarAxiPotential',
              'planarPotential', 'verticalPotential','PotentialError',
              'SnapshotRZPotential','InterpSnapshotRZPotential']
     #rmpots.append('BurkertPotential')
@@ -539,7 +539,7 @@ def test_eccentricity():
     pots.append('testplanarMWPotential')
     rmpots= ['Potential','MWPotential','MWPotential2014',
              'MovingObjectPotential',
-             'interpRZPotential', 'linearPotential', 'planarAxiPotential',
+             'interpRZPotential', 'interp3DPotential', 'linearPotential', 'planarAxiPotential',
              'planarPotential', 'verticalPotential','PotentialError',
              'SnapshotRZPotential','InterpSnapshotRZPotential']
     if False: #_TRAVIS: #travis CI
@@ -659,7 +659,7 @@ def test_pericenter():
     pots.append('testplanarMWPotential')
     rmpots= ['Potential','MWPotential','MWPotential2014',
              'MovingObjectPotential',
-             'interpRZPotential', 'linearPotential', 'planarAxiPotential',
+             'interpRZPotential', 'interp3DPotential', 'linearPotential', 'planarAxiPotential',
              'planarPotential', 'verticalPotential','PotentialError',
              'SnapshotRZPotential','InterpSnapshotRZPotential']
     if False: #_TRAVIS: #travis CI
@@ -778,7 +778,7 @@ def test_apocenter():
     pots.append('testplanarMWPotential')
     rmpots= ['Potential','MWPotential','MWPotential2014',
              'MovingObjectPotential',
-             'interpRZPotential', 'linearPotential', 'planarAxiPotential',
+             'interpRZPotential', 'interp3DPotential', 'linearPotential', 'planarAxiPotential',
              'planarPotential', 'verticalPotential','PotentialError',
              'SnapshotRZPotential','InterpSnapshotRZPotential']
     if False: #_TRAVIS: #travis CI
@@ -897,7 +897,7 @@ def test_zmax():
     pots.append('testMWPotential')
     rmpots= ['Potential','MWPotential','MWPotential2014',
              'MovingObjectPotential',
-             'interpRZPotential', 'linearPotential', 'planarAxiPotential',
+             'interpRZPotential', 'interp3DPotential', 'linearPotential', 'planarAxiPotential',
              'planarPotential', 'verticalPotential','PotentialError',
              'SnapshotRZPotential','InterpSnapshotRZPotential']
     if False: #_TRAVIS: #travis CI
@@ -1003,7 +1003,7 @@ def test_analytic_ecc_rperi_rap():
     pots.append('testplanarMWPotential')
     rmpots= ['Potential','MWPotential','MWPotential2014',
              'MovingObjectPotential',
-             'interpRZPotential', 'linearPotential', 'planarAxiPotential',
+             'interpRZPotential', 'interp3DPotential', 'linearPotential', 'planarAxiPotential',
              'planarPotential', 'verticalPotential','PotentialError',
              'SnapshotRZPotential','InterpSnapshotRZPotential']
     if False: #_TRAVIS: #travis CI
@@ -1208,7 +1208,7 @@ def test_analytic_zmax():
     pots.append('testMWPotential')
     rmpots= ['Potential','MWPotential','MWPotential2014',
              'MovingObjectPotential',
-             'interpRZPotential', 'linearPotential', 'planarAxiPotential',
+             'interpRZPotential', 'interp3DPotential', 'linearPotential', 'planarAxiPotential',
              'planarPotential', 'verticalPotential','PotentialError',
              'SnapshotRZPotential','InterpSnapshotRZPotential']
     if False: #_TRAVIS: #travis CI
@@ -1277,6 +1277,286 @@ def test_analytic_zmax():
     #raise AssertionError
     return None
 
+# Test that event detection during C orbit integration gives the same rperi, rap, zmax, and e as a finely-sampled orbit
+# Test that multiple orbits can be integrated at once with a separate set of
+# output times for each orbit
+def test_integrate_multi_pertimes():
+    from galpy.potential import MWPotential
+    from galpy.orbit_src.FullOrbit import _integrateFullOrbit_multi, \
+        _integrateFullOrbit
+    vxvv= numpy.array([[1.,0.1,1.1,0.1,0.05,0.3],
+                       [0.9,-0.2,0.9,0.,0.1,2.],
+                       [1.2,0.,1.,-0.1,0.,4.]])
+    ts= numpy.array([numpy.linspace(0.,ii+1.,11) for ii in range(3)])
+    for method in ['symplec4_c','dopr54_c','odeint']:
+        out= _integrateFullOrbit_multi(vxvv,MWPotential,ts,method,None)
+        for ii in range(3):
+            sout= _integrateFullOrbit(vxvv[ii],MWPotential,ts[ii],method,None)
+            assert numpy.all(numpy.fabs(out[ii]-sout) < 10.**-10.), 'Orbits integrated together with separate times do not agree with those integrated separately for method %s' % method
+    return None
+
+def test_integrate_events():
+    from galpy.orbit import Orbit
+    from galpy.potential import MWPotential
+    times= numpy.linspace(0.,20.,200001)
+    times_events= numpy.linspace(0.,20.,201)
+    integrators= ['leapfrog_c','rk4_c','rk6_c',
+                  'symplec4_c','symplec6_c','dopr54_c']
+    for integrator in integrators:
+        o= Orbit([1.,0.1,1.1,0.1,0.05,0.3])
+        o.integrate(times,MWPotential,method=integrator)
+        rperi, rap, zmax, e= o.rperi(), o.rap(), o.zmax(), o.e()
+        o.integrate_events(times_events,MWPotential,method=integrator)
+        assert numpy.fabs(o.rperi()-rperi) < 10.**-6., 'rperi from event detection does not agree with that from a finely-sampled orbit for integrator %s' % integrator
+        assert numpy.fabs(o.rap()-rap) < 10.**-6., 'rap from event detection does not agree with that from a finely-sampled orbit for integrator %s' % integrator
+        assert numpy.fabs(o.zmax()-zmax) < 10.**-6., 'zmax from event detection does not agree with that from a finely-sampled orbit for integrator %s' % integrator
+        assert numpy.fabs(o.e()-e) < 10.**-6., 'e from event detection does not agree with that from a finely-sampled orbit for integrator %s' % integrator
+        assert numpy.fabs(o.rperi(ro=8.)/8.-o.rperi()) < 10.**-10., 'rperi from event detection in physical coordinates does not agree with that in natural units'
+    # Crossings of z=0 and of a plane
+    o.integrate_events(times_events,MWPotential,
+                       events=['zcross',('plane',(1.,0.,0.,0.5))],
+                       method='dopr54_c')
+    t, vxvv, indx= o.getEvents()
+    assert numpy.all(numpy.diff(t) > 0.), 'Events are not sorted in time'
+    assert numpy.all(numpy.fabs(vxvv[indx == 0,3]) < 10.**-8.), 'Events for crossing z=0 do not have z=0'
+    assert numpy.all(numpy.fabs(vxvv[indx == 1,0]*numpy.cos(vxvv[indx == 1,5])-0.5) < 10.**-8.), 'Events for crossing the plane x=0.5 do not have x=0.5'
+    # maxevents
+    o.integrate_events(times_events,MWPotential,events=['zcross'],
+                       method='dopr54_c',maxevents=3)
+    assert len(o.getEvents()[0]) == 3, 'integrate_events does not stop after maxevents events'
+    # Regular integration erases the events and vice versa
+    o.integrate(times_events,MWPotential)
+    try:
+        o.getEvents()
+    except AttributeError: pass
+    else: raise AssertionError('Orbit integration does not erase the events from a previous integrate_events')
+    # Errors
+    try:
+        o.integrate_events(times_events,MWPotential,method='odeint')
+    except RuntimeError: pass
+    else: raise AssertionError('integrate_events with a non-C integrator does not raise a RuntimeError')
+    try:
+        o.integrate_events(times_events,MWPotential,events=['bovy'])
+    except ValueError: pass
+    else: raise AssertionError('integrate_events with an unknown event does not raise a ValueError')
+    o= Orbit([1.,0.1,1.1,0.3])
+    try:
+        o.integrate_events(times_events,MWPotential)
+    except AttributeError: pass
+    else: raise AssertionError('integrate_events for a planar orbit does not raise an AttributeError')
+    return None
+
+# Test that reduction-only orbit integration gives the same summary statistics as a regular integration
+def test_integrate_reduce():
+    from galpy.orbit import Orbit
+    from galpy.potential import MWPotential
+    times= numpy.linspace(0.,20.,2001)
+    reductions= [('mean','R'),('mean','z',2.),('min','r'),('max','r'),
+                 ('frac','z',0.,10.),('max','vT'),'Eerr']
+    integrators= ['leapfrog_c','rk4_c','rk6_c',
+                  'symplec4_c','symplec6_c','dopr54_c']
+    for integrator in integrators:
+        o= Orbit([1.,0.1,1.1,0.1,0.05,0.3])
+        red= o.integrate_reduce(times,MWPotential,reductions,
+                                method=integrator)
+        o.integrate(times,MWPotential,method=integrator)
+        rs= numpy.sqrt(o.R(times)**2.+o.z(times)**2.)
+        assert numpy.fabs(red[0]-numpy.mean(o.R(times))) < 10.**-8., 'Mean R from integrate_reduce does not agree with that from the integrated orbit for integrator %s' % integrator
+        assert numpy.fabs(red[1]-numpy.mean(o.z(times)**2.)) < 10.**-8., 'Mean z^2 from integrate_reduce does not agree with that from the integrated orbit for integrator %s' % integrator
+        assert numpy.fabs(red[2]-numpy.amin(rs)) < 10.**-8., 'Minimum r from integrate_reduce does not agree with that from the integrated orbit for integrator %s' % integrator
+        assert numpy.fabs(red[3]-numpy.amax(rs)) < 10.**-8., 'Maximum r from integrate_reduce does not agree with that from the integrated orbit for integrator %s' % integrator
+        assert numpy.fabs(red[4]-numpy.mean(o.z(times) >= 0.)) < 10.**-8., 'Fraction of time at z > 0 from integrate_reduce does not agree with that from the integrated orbit for integrator %s' % integrator
+        assert numpy.fabs(red[5]-numpy.amax(o.vT(times))) < 10.**-8., 'Maximum vT from integrate_reduce does not agree with that from the integrated orbit for integrator %s' % integrator
+        assert numpy.fabs(red[6]-numpy.amax(numpy.fabs(o.E(times)-o.E(0.))/numpy.fabs(o.E(0.)))) < 10.**-8., 'Maximum energy error from integrate_reduce does not agree with that from the integrated orbit for integrator %s' % integrator
+    # Errors
+    try:
+        o.integrate_reduce(times,MWPotential,[('median','R')])
+    except ValueError: pass
+    else: raise AssertionError('integrate_reduce with an unknown reduction does not raise a ValueError')
+    try:
+        o.integrate_reduce(times,MWPotential,[('mean','Rz')])
+    except ValueError: pass
+    else: raise AssertionError('integrate_reduce with an unknown quantity does not raise a ValueError')
+    try:
+        o.integrate_reduce(times,MWPotential,[('frac','R',1.)])
+    except ValueError: pass
+    else: raise AssertionError('integrate_reduce with a frac reduction without range does not raise a ValueError')
+    return None
+
+# Test that the energy error for a potential that cannot be evaluated in C falls back to that at the final time
+def test_integrate_reduce_Eerr_noCEval():
+    from galpy.orbit import Orbit
+    from galpy.orbit_src.integrateFullOrbit import integrateFullOrbit_reduce_c
+    from galpy.potential import MWPotential
+    rzpot= potential.interpRZPotential(RZPot=MWPotential,
+                                       rgrid=(0.01,2.,101),
+                                       zgrid=(0.,0.2,101),
+                                       logR=False,
+                                       interpPot=True,
+                                       interpRforce=True,
+                                       interpzforce=True,
+                                       enable_c=True,
+                                       zsym=True)
+    times= numpy.linspace(0.,10.,1001)
+    # Directly calling the C integrator raises an error
+    try:
+        integrateFullOrbit_reduce_c(rzpot,numpy.array([1.,0.,0.1,0.,1.1,0.05]),
+                                    times,'symplec4_c',['Eerr'])
+    except ValueError: pass
+    else: raise AssertionError("integrateFullOrbit_reduce_c with an 'Eerr' reduction for a potential that cannot be evaluated in C does not raise a ValueError")
+    o= Orbit([1.,0.1,1.1,0.1,0.05,0.3])
+    with warnings.catch_warnings(record=True) as w:
+        warnings.simplefilter("always",galpyWarning)
+        red= o.integrate_reduce(times,rzpot,[('max','R'),'Eerr'],
+                                method='symplec4_c')
+        raisedWarning= False
+        for wa in w:
+            raisedWarning= (str(wa.message) == "The potential cannot be evaluated in C, so the 'Eerr' reduction is the energy error at the final time rather than the maximum energy error along the orbit")
+            if raisedWarning: break
+        assert raisedWarning, "integrate_reduce with an 'Eerr' reduction for a potential that cannot be evaluated in C should have thrown a warning, but didn't"
+    o.integrate(times,rzpot,method='symplec4_c')
+    assert numpy.fabs(red[0]-numpy.amax(o.R(times))) < 10.**-8., 'Maximum R from integrate_reduce does not agree with that from the integrated orbit'
+    assert numpy.fabs(red[1]-(o.E(times[-1])-o.E(0.))/numpy.fabs(o.E(0.))) < 10.**-8., 'Final energy error from integrate_reduce does not agree with that from the integrated orbit'
+    return None
+
+# Test that integrating with outfile= writes the orbit to a memory-mapped file
+def test_integrate_outfile():
+    import os, shutil, tempfile
+    from galpy.orbit import Orbit
+    from galpy.potential import MWPotential
+    import galpy.orbit_src.OrbitTop as OrbitTop
+    savedir= tempfile.mkdtemp()
+    blocksize= OrbitTop._OUTFILE_BLOCKSIZE
+    OrbitTop._OUTFILE_BLOCKSIZE= 100 # such that we use multiple blocks
+    try:
+        for vxvv in [[1.,0.1,1.1,0.1,0.05,0.3],[1.,0.1,1.1,0.3]]:
+            for ts in [numpy.linspace(0.,10.,1001),
+                       numpy.linspace(0.,-10.,1001)]:
+                outfile= os.path.join(savedir,'orbit.npy')
+                o= Orbit(vxvv)
+                o.integrate(ts,MWPotential,method='dopr54_c')
+                om= Orbit(vxvv)
+                om.integrate(ts,MWPotential,method='dopr54_c',
+                             outfile=outfile)
+                assert isinstance(om.getOrbit(),numpy.memmap), 'Orbit integrated with outfile= is not memory-mapped'
+                assert numpy.all(numpy.fabs(om.getOrbit()-numpy.load(outfile)) == 0.), 'Orbit integrated with outfile= is not the same as that saved to the file'
+                assert numpy.all(numpy.fabs(om.getOrbit()-o.getOrbit()) < 10.**-8.), 'Orbit integrated with outfile= does not agree with the regularly integrated orbit'
+                assert numpy.all(numpy.fabs(om.R(ts)-o.R(ts)) < 10.**-8.), 'Orbit integrated with outfile= does not agree with the regularly integrated orbit'
+                assert numpy.fabs(om.vT(ts[123])-o.vT(ts[123])) < 10.**-8., 'Orbit integrated with outfile= does not agree with the regularly integrated orbit'
+                # Also at times off the integration grid
+                assert numpy.all(numpy.fabs(om.R(ts[:-1]+ts[1]/3.)-o.R(ts[:-1]+ts[1]/3.)) < 10.**-8.), 'Orbit integrated with outfile= does not agree with the regularly integrated orbit when interpolated'
+                # Integrating again without outfile= stores the orbit in memory
+                om.integrate(ts,MWPotential,method='dopr54_c')
+                assert not isinstance(om.getOrbit(),numpy.memmap), 'Orbit integrated without outfile= is memory-mapped'
+                del om
+    finally:
+        OrbitTop._OUTFILE_BLOCKSIZE= blocksize
+        shutil.rmtree(savedir)
+    return None
+
+# Test that, with dt= set, the fixed-step C integrators give the same orbit
+# with outfile= as without, even though each block restarts the integrator
+def test_integrate_outfile_fixedstep_dt():
+    import os, shutil, tempfile
+    from galpy.orbit import Orbit
+    from galpy.potential import MWPotential
+    savedir= tempfile.mkdtemp()
+    try:
+        ts= numpy.linspace(0.,10.,1001)
+        for method in ['symplec4_c','rk4_c']:
+            outfile= os.path.join(savedir,'orbit.npy')
+            o= Orbit([1.,0.1,1.1,0.1,0.05,0.3])
+            o.integrate(ts,MWPotential,method=method,dt=ts[1]/4.)
+            om= Orbit([1.,0.1,1.1,0.1,0.05,0.3])
+            om.integrate(ts,MWPotential,method=method,dt=ts[1]/4.,
+                         outfile=outfile,checkpoint_every=100)
+            assert numpy.all(numpy.fabs(om.getOrbit()-o.getOrbit()) < 10.**-10.), 'Orbit integrated with outfile= and dt= does not agree with the regularly integrated orbit for method %s' % method
+            del om
+    finally:
+        shutil.rmtree(savedir)
+    return None
+
+# Test that an interrupted integration with outfile= can be resumed
+def test_integrate_outfile_resume():
+    import os, shutil, tempfile
+    from galpy.orbit import Orbit
+    from galpy.potential import MWPotential
+    from galpy.potential import MWPotential2014
+    import galpy.orbit_src.FullOrbit as FullOrbit
+    savedir= tempfile.mkdtemp()
+    integrateFullOrbit= FullOrbit._integrateFullOrbit
+    # Mock integrator that counts the blocks and, if interrupt[0], gets
+    # interrupted in the fourth block
+    ncalls, interrupt= [0], [True]
+    def interrupted_integrateFullOrbit(*args):
+        ncalls[0]+= 1
+        if interrupt[0] and ncalls[0] > 3: raise KeyboardInterrupt
+        return integrateFullOrbit(*args)
+    try:
+        ts= numpy.linspace(0.,10.,1001)
+        o= Orbit([1.,0.1,1.1,0.1,0.05,0.3])
+        o.integrate(ts,MWPotential,method='dopr54_c',
+                    outfile=os.path.join(savedir,'orbit.npy'),
+                    checkpoint_every=100) # such that we use multiple blocks
+        outfile= os.path.join(savedir,'orbit_resume.npy')
+        om= Orbit([1.,0.1,1.1,0.1,0.05,0.3])
+        FullOrbit._integrateFullOrbit= interrupted_integrateFullOrbit
+        try:
+            om.integrate(ts,MWPotential,method='dopr54_c',outfile=outfile,
+                         checkpoint_every=100)
+        except KeyboardInterrupt: pass
+        else: raise AssertionError('Mock interrupted integration was not interrupted')
+        finally:
+            FullOrbit._integrateFullOrbit= integrateFullOrbit
+        assert os.path.exists(outfile+'.checkpoint.npz'), 'Interrupted integration with outfile= did not write a checkpoint'
+        # Resuming with different times should fail
+        try:
+            om.integrate(ts[:-1],MWPotential,method='dopr54_c',
+                         outfile=outfile,resume=True)
+        except ValueError: pass
+        else: raise AssertionError('Resuming an integration with different times does not raise a ValueError')
+        # Resuming in a different potential should fail
+        try:
+            om.integrate(ts,MWPotential2014,method='dopr54_c',
+                         outfile=outfile,resume=True,checkpoint_every=100)
+        except ValueError: pass
+        else: raise AssertionError('Resuming an integration in a different potential does not raise a ValueError')
+        # Resume
+        ncalls[0], interrupt[0]= 0, False
+        FullOrbit._integrateFullOrbit= interrupted_integrateFullOrbit
+        try:
+            om.integrate(ts,MWPotential,method='dopr54_c',outfile=outfile,
+                         resume=True,checkpoint_every=100)
+        finally:
+            FullOrbit._integrateFullOrbit= integrateFullOrbit
+        assert ncalls[0] == 7, 'Resumed integration did not start from the checkpoint'
+        assert numpy.all(om.getOrbit() == o.getOrbit()), 'Resumed integration is not the same as an uninterrupted integration'
+        # Resuming a finished integration does not integrate again
+        ncalls[0]= 0
+        FullOrbit._integrateFullOrbit= interrupted_integrateFullOrbit
+        try:
+            om.integrate(ts,MWPotential,method='dopr54_c',outfile=outfile,
+                         resume=True,checkpoint_every=100)
+        finally:
+            FullOrbit._integrateFullOrbit= integrateFullOrbit
+        assert ncalls[0] == 0, 'Resuming a finished integration integrated again'
+        assert numpy.all(om.getOrbit() == o.getOrbit()), 'Resumed integration is not the same as an uninterrupted integration'
+        # resume= requires outfile=
+        try:
+            om.integrate(ts,MWPotential,method='dopr54_c',resume=True)
+        except ValueError: pass
+        else: raise AssertionError('Orbit.integrate with resume=True but without outfile= does not raise a ValueError')
+        # checkpoint_every= needs to be positive
+        try:
+            om.integrate(ts,MWPotential,method='dopr54_c',outfile=outfile,
+                         checkpoint_every=0)
+        except ValueError: pass
+        else: raise AssertionError('Orbit.integrate with checkpoint_every=0 does not raise a ValueError')
+        del o, om
+    finally:
+        shutil.rmtree(savedir)
+    return None
+
 # Test the error for when explicit stepsize does not divide the output stepsize
 def test_check_integrate_dt():
     from galpy.orbit import Orbit
@@ -2421,6 +2701,43 @@ def test_interpolation_issue187():
     assert numpy.all(numpy.fabs((postWrapInterpolate(tsPostWrap) % (2.*numpy.pi))-orb.phi(tsPostWrap)) < 10.**-5.), 'phase interpolation near a phase-wrap does not work'
     return None
 
+#Test the accuracy of the orbit interpolation against a finely-sampled orbit
+def test_interpolation_accuracy():
+    from galpy.orbit import Orbit
+    lp= potential.LogarithmicHaloPotential(normalize=1.,q=0.9)
+    dp= potential.DehnenBarPotential()
+    ts= numpy.linspace(0.,-10.,201)
+    tsf= numpy.linspace(0.,-10.,4001)
+    for vxvv,pot in [([1.,0.1,1.1,0.1,0.05,0.3],lp),
+                     ([1.,0.1,1.1,0.1,0.05],lp),
+                     ([1.,0.1,1.1,0.3],[lp,dp]),
+                     ([1.,0.1,1.1],lp)]:
+        o= Orbit(vxvv)
+        o.integrate(ts,pot,method='dopr54_c')
+        of= Orbit(vxvv)
+        of.integrate(tsf,pot,method='dopr54_c')
+        # Positions only need the velocities, so no forces are computed
+        assert numpy.all(numpy.fabs(o.R(tsf)-of.R(tsf)) < 10.**-6.), 'Orbit interpolation of R is not accurate'
+        assert len(o._orb._orbInterp._vderivs) == 0, 'Orbit interpolation of R set up the interpolation of the velocities'
+        for ii in range(len(vxvv)):
+            diff= numpy.fabs(o._orb(tsf)[ii]-of.getOrbit()[:,ii])
+            if ii == len(vxvv)-1 and len(vxvv) % 2 == 0: # phase wrap
+                diff= numpy.fabs((diff+numpy.pi) % (2.*numpy.pi)-numpy.pi)
+            assert numpy.all(diff < 10.**-6.), 'Orbit interpolation is not accurate for coordinate %i of a %i-dimensional orbit' % (ii,len(vxvv))
+    # Without forces, the velocities are interpolated using finite
+    # differences, which should raise a warning
+    o._orb._orbInterp._pot= None
+    o._orb._orbInterp._vderivs= {}
+    with warnings.catch_warnings(record=True) as w:
+        warnings.simplefilter("always",galpyWarning)
+        o.vR(tsf)
+        raisedWarning= False
+        for wa in w:
+            raisedWarning= (str(wa.message) == "Could not evaluate the forces to interpolate the orbit with velocity derivatives; using less accurate finite differences of the velocities instead")
+            if raisedWarning: break
+        assert raisedWarning, "Orbit interpolation with finite differences should have thrown a warning, but didn't"
+    return None
+
 # Test that fitting an orbit works
 def test_orbitfit():
     from galpy.orbit import Orbit
@@ -28,7 +28,7 @@ def test_normalize_potential():
     pots.append('specialMN3ExponentialDiskPotentialSECH')
     rmpots= ['Potential','MWPotential','MWPotential2014',
              'MovingObjectPotential',
-             'interpRZPotential', 'linearPotential', 'planarAxiPotential',
+             'interpRZPotential', 'interp3DPotential', 'linearPotential', 'planarAxiPotential',
              'planarPotential', 'verticalPotential','PotentialError',
              'SnapshotRZPotential','InterpSnapshotRZPotential']
     if False: #_TRAVIS: #travis CI
@@ -125,7 +125,7 @@ def test_forceAsDeriv_potential():
     pots.append('mockSCFDensityPotential')
     rmpots= ['Potential','MWPotential','MWPotential2014',
              'MovingObjectPotential',
-             'interpRZPotential', 'linearPotential', 'planarAxiPotential',
+             'interpRZPotential', 'interp3DPotential', 'linearPotential', 'planarAxiPotential',
              'planarPotential', 'verticalPotential','PotentialError',
              'SnapshotRZPotential','InterpSnapshotRZPotential']
     if False: #_TRAVIS: #travis CI
@@ -276,7 +276,7 @@ def test_2ndDeriv_potential():
     pots.append('JaffeTwoPowerTriaxialPotential')
     rmpots= ['Potential','MWPotential','MWPotential2014',
              'MovingObjectPotential',
-             'interpRZPotential', 'linearPotential', 'planarAxiPotential',
+             'interpRZPotential', 'interp3DPotential', 'linearPotential', 'planarAxiPotential',
              'planarPotential', 'verticalPotential','PotentialError',
              'SnapshotRZPotential','InterpSnapshotRZPotential']
     if False: #_TRAVIS: #travis CI
@@ -485,7 +485,7 @@ def test_poisson_potential():
     pots.append('JaffeTwoPowerTriaxialPotential')
     rmpots= ['Potential','MWPotential','MWPotential2014',
              'MovingObjectPotential',
-             'interpRZPotential', 'linearPotential', 'planarAxiPotential',
+             'interpRZPotential', 'interp3DPotential', 'linearPotential', 'planarAxiPotential',
              'planarPotential', 'verticalPotential','PotentialError',
              'SnapshotRZPotential','InterpSnapshotRZPotential']
     if False: #_TRAVIS: #travis CI
@@ -584,7 +584,7 @@ def test_evaluateAndDerivs_potential():
     pots.append('mockSCFDensityPotential')
     rmpots= ['Potential','MWPotential','MWPotential2014',
              'MovingObjectPotential',
-             'interpRZPotential', 'linearPotential', 'planarAxiPotential',
+             'interpRZPotential', 'interp3DPotential', 'linearPotential', 'planarAxiPotential',
              'planarPotential', 'verticalPotential','PotentialError',
              'SnapshotRZPotential','InterpSnapshotRZPotential']
     if False: #_TRAVIS: #travis CI
@@ -830,7 +830,7 @@ def test_toVertical_toPlanar():
                and not 'evaluate' in p)]
     rmpots= ['Potential','MWPotential','MWPotential2014',
              'MovingObjectPotential',
-             'interpRZPotential', 'linearPotential', 'planarAxiPotential',
+             'interpRZPotential', 'interp3DPotential', 'linearPotential', 'planarAxiPotential',
              'planarPotential', 'verticalPotential','PotentialError',
              'SnapshotRZPotential','InterpSnapshotRZPotential']
     if False: #_TRAVIS: #travis CI
@@ -1046,6 +1046,30 @@ def test_lindbladR():
         raise AssertionError("lindbladR w/ wrong m input should have raised IOError, but didn't")
     return None
 
+def test_rl_lindbladR_array():
+    # Array inputs should give the same as the scalar ones
+    pots= [potential.MWPotential2014,
+           potential.MiyamotoNagaiPotential(normalize=1.,a=0.3)]
+    lzs= numpy.array([0.001,0.1,0.5,1.,2.,10.])
+    for pot in pots:
+        rls= potential.rl(pot,lzs)
+        for ii in range(len(lzs)):
+            assert numpy.fabs(rls[ii]-potential.rl(pot,lzs[ii])) < 10.**-10., 'rl for array Lz does not agree with rl for scalar Lz'
+        # Also for 2D arrays
+        rls= potential.rl(pot,numpy.tile(lzs,(2,1)))
+        assert rls.shape == (2,len(lzs)), 'rl for 2D array Lz does not return an array of the same shape'
+    mp= potential.MiyamotoNagaiPotential(normalize=1.,a=0.3)
+    ops= numpy.array([0.2,0.5,1.,3.,6.])
+    for m in [2,-2,'corotation']:
+        lrs= mp.lindbladR(ops,m)
+        for ii in range(len(ops)):
+            lr= mp.lindbladR(ops[ii],m)
+            if lr is None:
+                assert numpy.isnan(lrs[ii]), 'lindbladR for array OmegaP does not return NaN for a non-existent resonance'
+            else:
+                assert numpy.fabs(lrs[ii]-lr) < 10.**-10., 'lindbladR for array OmegaP does not agree with lindbladR for scalar OmegaP'
+    return None
+
 def test_vterm():
     lp= potential.LogarithmicHaloPotential(normalize=1.)
     assert numpy.fabs(lp.vterm(30.,deg=True)-0.5*(lp.omegac(0.5)-1.)) < 10.**-10., 'vterm for LogarithmicHaloPotential at l=30 is incorrect'
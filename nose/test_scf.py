@@ -139,6 +139,18 @@ def testArrayBroadcasting():
     phi = numpy.zeros((10,20))[:,:,None]
     
     ArrayTest(scf, [R, z, phi])
+
+def testArray_nonAxi():
+    numpy.random.seed(1)
+    N, L= 5, 4
+    Acos= numpy.tril(numpy.random.normal(size=(N,L,L)))
+    Asin= numpy.tril(numpy.random.normal(size=(N,L,L)))
+    Asin[:,:,0]= 0.
+    scf = SCFPotential(Acos=Acos,Asin=Asin,a=0.8)
+    R = numpy.linspace(0.1,3,10)[:,None]
+    z = numpy.linspace(-1,1,4)[None,:]
+    phi = numpy.linspace(0,2*numpy.pi,40).reshape((10,4))
+    ArrayTest(scf, [R, z, phi])
     
     
  
@@ -233,6 +245,39 @@ def test_density1_Order():
     assert numpy.all(numpy.fabs(Asin - Asin) < EPS), \
     "Increasing the radial, costheta, and phi order fails for Asin from scf_compute_coeffs"
 
+##Tests that scf_compute_coeffs gives the same result for a density that does not support arrays and when run in parallel
+def test_density1_scalardens_numcores():
+    Acos, Asin = potential.scf_compute_coeffs(density1, 5,5)
+    def scalar_density1(R,z,phi):
+        return float(density1(R,z,phi))
+    Acos2, Asin2 = potential.scf_compute_coeffs(scalar_density1, 5,5)
+    Acos3, Asin3 = potential.scf_compute_coeffs(density1, 5,5, numcores=2)
+    assert numpy.all(numpy.fabs(Acos - Acos2) < EPS) and numpy.all(numpy.fabs(Asin - Asin2) < EPS), \
+    "scf_compute_coeffs for a density that does not support arrays fails"
+    assert numpy.all(numpy.fabs(Acos - Acos3) < EPS) and numpy.all(numpy.fabs(Asin - Asin3) < EPS), \
+    "scf_compute_coeffs with numcores fails"
+    return None
+
+##Tests that scf_compute_coeffs_nbody gives the same coefficients as scf_compute_coeffs for particles at the quadrature points
+def test_density1_nbody():
+    Acos, Asin = potential.scf_compute_coeffs(density1, 5,5)
+    xi, wxi = numpy.polynomial.legendre.leggauss(20)
+    costheta, wcostheta = numpy.polynomial.legendre.leggauss(20)
+    phi, wphi = numpy.polynomial.legendre.leggauss(20)
+    phi = numpy.pi*(phi + 1.); wphi *= numpy.pi
+    xi, costheta, phi = [x.flatten() for x in numpy.meshgrid(xi,costheta,phi,indexing='ij')]
+    w = numpy.prod([x.flatten() for x in numpy.meshgrid(wxi,wcostheta,wphi,indexing='ij')],axis=0)
+    r = (1. + xi)/(1. - xi)
+    R = r*numpy.sqrt(1. - costheta**2.); z = r*costheta
+    mass = density1(R,z,phi)*2.*(1. + xi)**2./(1. - xi)**4.*w
+    pos = numpy.array([R*numpy.cos(phi),R*numpy.sin(phi),z])
+    for numcores in [None,2]:
+        Acos2, Asin2 = potential.scf_compute_coeffs_nbody(pos, mass, 5,5, numcores=numcores, chunksize=1000)
+        assert numpy.all(numpy.fabs(Acos - Acos2) < EPS), \
+        "scf_compute_coeffs_nbody does not agree with scf_compute_coeffs for Acos"
+        assert numpy.all(numpy.fabs(Asin - Asin2) < EPS), \
+        "scf_compute_coeffs_nbody does not agree with scf_compute_coeffs for Asin"
+    return None
 
 ## Tests whether scf_compute_axi reduces to scf_compute_spherical for the Hernquist Potential   
 def test_scf_axiHernquistCoeffs_ReducesToSpherical():
@@ -264,6 +264,15 @@ def test_density_par():
     assert numpy.fabs(sdf_bovy14.density_par(1.8)-0.) < 10.**-2., 'density far progenitor not close to 0 for Bovy14 stream'
     return None
 
+def test_density_par_array():
+    #Test that density_par for an array of angles is the same as for each angle separately
+    da= numpy.linspace(0.1,1.7,7)
+    for coord in ['apar','phi','ll','ra','customra']:
+        dens= sdf_bovy14.density_par(da,coord=coord)
+        assert dens.shape == da.shape, 'density_par for array input does not return an array of the same shape'
+        assert numpy.all(numpy.fabs(dens-numpy.array([sdf_bovy14.density_par(d,coord=coord) for d in da])) < 10.**-10.), 'density_par for array input is not the same as for each angle separately for coord=%s' % coord
+    return None
+
 def test_density_phi():
     #Test that the density in phi is correctly computed, by doing this by hand
     def dens_phi(apar):
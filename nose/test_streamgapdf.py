@@ -505,6 +505,40 @@ def test_meanOmega_approx_higherorder():
     assert numpy.fabs(sdf_sanders15.meanOmega(apar,approx=False,oned=True)/sdf_sanders15.meanOmega(apar,approx=True,higherorder=True,oned=True)-1.) < 10.**-3., 'Approximate meanOmega does not agree with direct integration'
     return None
 
+def test_density_apar_approx_array():
+    # Test that the approximate density evaluated for an array of apar
+    # agrees with evaluating it for each apar separately
+    apars= numpy.linspace(0.1,3.,31)
+    for higherorder in [False,True]:
+        dens= sdf_sanders15.density_par(apars,higherorder=higherorder)
+        for ii,apar in enumerate(apars):
+            assert numpy.fabs(dens[ii]-sdf_sanders15.density_par(apar,higherorder=higherorder)) < 10.**-10., 'Approximate density for an array of apar does not agree with that for individual apar'
+    # Also for different tdisrupt
+    dens= sdf_sanders15.density_par(apars,tdisrupt=sdf_sanders15._tdisrupt/2.)
+    for ii,apar in enumerate(apars):
+        assert numpy.fabs(dens[ii]-sdf_sanders15.density_par(apar,tdisrupt=sdf_sanders15._tdisrupt/2.)) < 10.**-10., 'Approximate density for an array of apar does not agree with that for individual apar'
+    return None
+
+def test_minOpar_array():
+    apars= numpy.linspace(0.1,3.,31)
+    minOpars= sdf_sanders15.minOpar(apars)
+    for ii,apar in enumerate(apars):
+        assert numpy.fabs(minOpars[ii]-sdf_sanders15.minOpar(apar)) < 10.**-10., 'minOpar for an array of apar does not agree with that for individual apar'
+    return None
+
+def test_meanOmega_approx_array():
+    # Test that the approximate meanOmega evaluated for an array of apar
+    # agrees with evaluating it for each apar separately
+    apars= numpy.linspace(0.1,3.,31)
+    for higherorder in [False,True]:
+        mO= sdf_sanders15.meanOmega(apars,higherorder=higherorder,oned=True)
+        mO3D= sdf_sanders15.meanOmega(apars,higherorder=higherorder)
+        assert mO3D.shape == (len(apars),3), 'meanOmega for an array of apar does not return an array with shape (N,3)'
+        for ii,apar in enumerate(apars):
+            assert numpy.fabs(mO[ii]-sdf_sanders15.meanOmega(apar,higherorder=higherorder,oned=True)) < 10.**-10., 'Approximate meanOmega for an array of apar does not agree with that for individual apar'
+            assert numpy.all(numpy.fabs(mO3D[ii]-sdf_sanders15.meanOmega(apar,higherorder=higherorder)) < 10.**-10.), 'Approximate meanOmega for an array of apar does not agree with that for individual apar'
+    return None
+
 def test_hernquist():
     # Test that Hernquist kicks are similar to Plummer kicks, but are
     # different in understood ways (...)
@@ -919,6 +953,145 @@ def test_hernquistX_unity():
     assert streamgapdf.HernquistX(1.)==1., 'Hernquist X function not returning 1 with argument 1'
     return None
 
+# Test the batched kick calculations against the single-encounter ones
+def test_impulse_deltav_multi():
+    from galpy.df import impulse_deltav_plummer, \
+        impulse_deltav_plummer_multi, impulse_deltav_hernquist, \
+        impulse_deltav_hernquist_multi
+    tol= -10.
+    numpy.random.seed(1)
+    nstar, nenc= 31, 7
+    v= numpy.random.normal(size=(nstar,3))
+    y= numpy.random.normal(size=nstar)
+    b= numpy.random.uniform(0.1,2.,size=nenc)
+    w= 3.*numpy.random.normal(size=(nenc,3))
+    GM= numpy.random.uniform(0.5,2.,size=nenc)
+    rs= numpy.random.uniform(0.1,2.,size=nenc)
+    for multi_func, func in zip([impulse_deltav_plummer_multi,
+                                 impulse_deltav_hernquist_multi],
+                                [impulse_deltav_plummer,
+                                 impulse_deltav_hernquist]):
+        kicks= multi_func(v,y,b,w,GM,rs)
+        assert kicks.shape == (nstar,nenc,3), 'batched kicks do not have the expected shape'
+        for ii in range(nenc):
+            kick= func(v,y,b[ii],w[ii],GM[ii],rs[ii])
+            assert numpy.all(numpy.fabs(kick-kicks[:,ii]) < 10.**tol), 'batched kick calculation does not agree with single-encounter calculation'
+    # Perpendicular impact, B&T ex. 8.7
+    kick= impulse_deltav_plummer_multi(numpy.array([[0.,numpy.pi,0.]]),
+                                       numpy.array([0.]),
+                                       [3.,3.],
+                                       numpy.array([[0.,numpy.pi/2.,0.],
+                                                    [0.,numpy.pi/2.,0.]]),
+                                       1.5,4.)
+    assert numpy.all(numpy.fabs(kick[0,:,0]-2.*1.5*3./numpy.pi*2./25.) < 10.**tol), 'Perpendicular kick of subhalo perpendicular not as expected for batched kicks'
+    assert numpy.all(numpy.fabs(kick[0,:,2]+2.*1.5*3./numpy.pi*2./25.) < 10.**tol), 'Perpendicular kick of subhalo perpendicular not as expected for batched kicks'
+    return None
+
+def test_impulse_deltav_curvedstream_multi():
+    from galpy.df import impulse_deltav_plummer_curvedstream, \
+        impulse_deltav_plummer_curvedstream_multi, \
+        impulse_deltav_hernquist_curvedstream, \
+        impulse_deltav_hernquist_curvedstream_multi
+    tol= -10.
+    numpy.random.seed(2)
+    nstar, nenc= 31, 7
+    v= numpy.random.normal(size=(nstar,3))
+    x= numpy.random.normal(size=(nstar,3))
+    b= numpy.random.uniform(0.1,2.,size=nenc)
+    w= 3.*numpy.random.normal(size=(nenc,3))
+    x0= numpy.random.normal(size=(nenc,3))
+    v0= numpy.random.normal(size=(nenc,3))
+    GM= numpy.random.uniform(0.5,2.,size=nenc)
+    rs= numpy.random.uniform(0.1,2.,size=nenc)
+    for multi_func, func in zip([impulse_deltav_plummer_curvedstream_multi,
+                                 impulse_deltav_hernquist_curvedstream_multi],
+                                [impulse_deltav_plummer_curvedstream,
+                                 impulse_deltav_hernquist_curvedstream]):
+        kicks= multi_func(v,x,b,w,x0,v0,GM,rs)
+        assert kicks.shape == (nstar,nenc,3), 'batched kicks do not have the expected shape'
+        for ii in range(nenc):
+            kick= func(v,x,b[ii],w[ii],x0[ii],v0[ii],GM[ii],rs[ii])
+            assert numpy.all(numpy.fabs(kick-kicks[:,ii]) < 10.**tol), 'batched curved-stream kick calculation does not agree with single-encounter calculation'
+    return None
+
+# Test batched general impulse vs. Plummer and Hernquist
+def test_impulse_deltav_general_multi():
+    from galpy.df import impulse_deltav_plummer_multi, \
+        impulse_deltav_general_multi, \
+        impulse_deltav_hernquist_curvedstream_multi, \
+        impulse_deltav_general_curvedstream_multi
+    from galpy.potential import PlummerPotential, HernquistPotential
+    tol= -9.
+    numpy.random.seed(3)
+    nstar, nenc= 31, 7
+    v= numpy.random.normal(size=(nstar,3))
+    y= numpy.random.normal(size=nstar)
+    x= numpy.random.normal(size=(nstar,3))
+    b= numpy.random.uniform(0.1,2.,size=nenc)
+    w= 3.*numpy.random.normal(size=(nenc,3))
+    x0= numpy.random.normal(size=(nenc,3))
+    v0= numpy.random.normal(size=(nenc,3))
+    GM= numpy.random.uniform(0.5,2.,size=nenc)
+    rs= numpy.random.uniform(0.1,2.,size=nenc)
+    kick= impulse_deltav_plummer_multi(v,y,b,w,GM,rs)
+    pp= [PlummerPotential(amp=GM[ii],b=rs[ii]) for ii in range(nenc)]
+    general_kick= impulse_deltav_general_multi(v,y,b,w,pots=pp)
+    assert numpy.all(numpy.fabs(kick-general_kick) < 10.**tol), 'batched general kick calculation does not agree with Plummer calculation for a Plummer potential'
+    # Same potential for all encounters
+    kick= impulse_deltav_plummer_multi(v,y,b,w,GM[0],rs[0])
+    general_kick= impulse_deltav_general_multi(v,y,b,w,pp[0])
+    assert numpy.all(numpy.fabs(kick-general_kick) < 10.**tol), 'batched general kick calculation does not agree with Plummer calculation for a Plummer potential'
+    # Same potential for all encounters, given as a list of components
+    general_kick= impulse_deltav_general_multi(\
+        v,y,b,w,[PlummerPotential(amp=GM[0]/2.,b=rs[0]),
+                 PlummerPotential(amp=GM[0]/2.,b=rs[0])])
+    assert numpy.all(numpy.fabs(kick-general_kick) < 10.**tol), 'batched general kick calculation does not agree with Plummer calculation for a Plummer potential given as a list of components'
+    # Curved stream, Hernquist; note factor of 2 in definition of GM and amp
+    kick= impulse_deltav_hernquist_curvedstream_multi(v,x,b,w,x0,v0,GM,rs)
+    hp= [HernquistPotential(amp=2.*GM[ii],a=rs[ii]) for ii in range(nenc)]
+    general_kick= impulse_deltav_general_curvedstream_multi(v,x,b,w,x0,v0,
+                                                            pots=hp)
+    assert numpy.all(numpy.fabs(kick-general_kick) < 10.**tol), 'batched general kick calculation does not agree with Hernquist calculation for a Hernquist potential, for curved stream'
+    return None
+
+# Test that the batched kick functions raise errors for inconsistent inputs
+def test_impulse_deltav_multi_valueerrors():
+    from galpy.df import impulse_deltav_plummer_multi, \
+        impulse_deltav_plummer_curvedstream_multi, \
+        impulse_deltav_general_multi
+    from galpy.potential import PlummerPotential
+    nstar, nenc= 5, 3
+    v= numpy.ones((nstar,3))
+    y= numpy.ones(nstar)
+    b= numpy.ones(nenc)
+    w= numpy.ones((nenc,3))
+    pp= PlummerPotential(amp=1.,b=0.5)
+    # Parameters with length neither 1 nor nenc
+    for args in [(v,y,b,w,numpy.ones(2),1.),
+                 (v,y,b,numpy.ones((2,3)),1.,1.),
+                 (v,y,numpy.ones(2),w,1.,1.)]:
+        try: impulse_deltav_plummer_multi(*args)
+        except ValueError: pass
+        else: raise AssertionError('impulse_deltav_plummer_multi does not raise a ValueError for inconsistent numbers of encounters')
+    try:
+        impulse_deltav_plummer_curvedstream_multi(v,numpy.ones((nstar,3)),
+                                                  b,w,numpy.ones((2,3)),
+                                                  numpy.ones((nenc,3)),1.,1.)
+    except ValueError: pass
+    else: raise AssertionError('impulse_deltav_plummer_curvedstream_multi does not raise a ValueError for inconsistent numbers of encounters')
+    # Wrong number of per-encounter potentials, or both/neither pot= and pots=
+    for kwargs in [{'pots':[pp,pp]},{'pot':pp,'pots':[pp,pp,pp]},{}]:
+        try: impulse_deltav_general_multi(v,y,b,w,**kwargs)
+        except ValueError: pass
+        else: raise AssertionError('impulse_deltav_general_multi does not raise a ValueError for inconsistent potential input')
+    return None
+
+@raises(ValueError)
+def test_hernquistX_array_negative():
+    from galpy.df_src import streamgapdf
+    streamgapdf._HernquistX_array(numpy.array([1.,-1.]))
+    return None
+
 # Test general impulse vs. full orbit integration for zero force
 def test_impulse_deltav_general_orbit_zeroforce():
     from galpy.df import impulse_deltav_plummer_curvedstream, \
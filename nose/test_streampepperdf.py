@@ -0,0 +1,169 @@
+import numpy
+from nose.tools import raises
+numpy.random.seed(1)
+sdf_sanders15= None #so we can set this up and then use in other tests
+spdf_sanders15= None #so we can set this up and then use in other tests
+V0, R0= 220., 8.
+
+def test_sanders15_setup():
+    #Imports
+    from galpy.df import streamgapdf, streampepperdf
+    from galpy.orbit import Orbit
+    from galpy.potential import LogarithmicHaloPotential
+    from galpy.actionAngle import actionAngleIsochroneApprox
+    from galpy.util import bovy_conversion #for unit conversions
+    lp= LogarithmicHaloPotential(normalize=1.,q=0.9)
+    aAI= actionAngleIsochroneApprox(pot=lp,b=0.8)
+    prog_unp_peri= Orbit([2.6556151742081835,
+                          0.2183747276300308,
+                          0.67876510797240575,
+                          -2.0143395648974671,
+                          -0.3273737682604374,
+                          0.24218273922966019])
+    global sdf_sanders15
+    sigv= 0.365*(10./2.)**(1./3.) # km/s
+    sdf_sanders15= streamgapdf(sigv/V0,progenitor=prog_unp_peri,pot=lp,aA=aAI,
+                               leading=False,nTrackChunks=26,
+                               nTrackIterations=1,
+                               sigMeanOffset=4.5,
+                               tdisrupt=10.88\
+                                   /bovy_conversion.time_in_Gyr(V0,R0),
+                               Vnorm=V0,Rnorm=R0,
+                               impactb=0.,
+                               subhalovel=numpy.array([6.82200571,132.7700529,
+                                                       149.4174464])/V0,
+                               timpact=0.88/bovy_conversion.time_in_Gyr(V0,R0),
+                               impact_angle=-2.34,
+                               GM=10.**-2.\
+                                   /bovy_conversion.mass_in_1010msol(V0,R0),
+                               rs=0.625/R0)
+    assert not sdf_sanders15 is None, 'sanders15 streamgapdf setup did not work'
+    # Same impact using streampepperdf, with a second impact time setup
+    global spdf_sanders15
+    spdf_sanders15= streampepperdf(\
+        sigv/V0,progenitor=prog_unp_peri,pot=lp,aA=aAI,
+        leading=False,nTrackChunks=26,
+        nTrackIterations=1,
+        sigMeanOffset=4.5,
+        tdisrupt=10.88/bovy_conversion.time_in_Gyr(V0,R0),
+        Vnorm=V0,Rnorm=R0,
+        impactb=[0.,0.],
+        subhalovel=numpy.array([[6.82200571,132.7700529,149.4174464],
+                                [6.82200571,132.7700529,149.4174464]])/V0,
+        timpact=[0.88/bovy_conversion.time_in_Gyr(V0,R0),
+                 2.88/bovy_conversion.time_in_Gyr(V0,R0)],
+        impact_angle=[-2.34,-1.34],
+        GM=[10.**-2./bovy_conversion.mass_in_1010msol(V0,R0),
+            10.**-2./bovy_conversion.mass_in_1010msol(V0,R0)],
+        rs=[0.625/R0,0.625/R0])
+    assert not spdf_sanders15 is None, 'sanders15 streampepperdf setup did not work'
+    assert len(spdf_sanders15._sgapdfs_coordtransform) == 2, 'streampepperdf should have setup one coordinate transformation per unique impact time'
+    return None
+
+def test_oneimpact_sample():
+    # With a single impact, streampepperdf should reproduce streamgapdf
+    from galpy.util import bovy_conversion
+    spdf_sanders15.set_impacts(\
+        impactb=[0.],
+        subhalovel=numpy.array([[6.82200571,132.7700529,149.4174464]])/V0,
+        timpact=[0.88/bovy_conversion.time_in_Gyr(V0,R0)],
+        impact_angle=[-2.34],
+        GM=[10.**-2./bovy_conversion.mass_in_1010msol(V0,R0)],
+        rs=[0.625/R0])
+    numpy.random.seed(1)
+    Om,angle,dt= sdf_sanders15._sample_aAt(1000)
+    numpy.random.seed(1)
+    pOm,pangle,pdt= spdf_sanders15._sample_aAt(1000)
+    assert numpy.all(numpy.fabs(Om-pOm) < 10.**-10.), 'streampepperdf with a single impact does not sample the same frequencies as streamgapdf'
+    assert numpy.all(numpy.fabs(angle-pangle) < 10.**-10.), 'streampepperdf with a single impact does not sample the same angles as streamgapdf'
+    assert numpy.all(numpy.fabs(dt-pdt) < 10.**-10.), 'streampepperdf with a single impact does not sample the same times as streamgapdf'
+    return None
+
+def test_oneimpact_pOparapar():
+    # With a single impact, streampepperdf should reproduce streamgapdf
+    from galpy.util import bovy_conversion
+    spdf_sanders15.set_impacts(\
+        impactb=[0.],
+        subhalovel=numpy.array([[6.82200571,132.7700529,149.4174464]])/V0,
+        timpact=[0.88/bovy_conversion.time_in_Gyr(V0,R0)],
+        impact_angle=[-2.34],
+        GM=[10.**-2./bovy_conversion.mass_in_1010msol(V0,R0)],
+        rs=[0.625/R0])
+    Opars= numpy.linspace(0.05,0.35,101)
+    for apar in [0.3,2.6]:
+        assert numpy.all(numpy.fabs(sdf_sanders15.pOparapar(Opars,apar)
+                                    -spdf_sanders15.pOparapar(Opars,apar)) \
+                             < 10.**-10.), 'streampepperdf with a single impact does not give the same pOparapar as streamgapdf'
+    return None
+
+def test_twoimpacts_negligible():
+    # Adding a second, negligible impact should not change anything
+    from galpy.util import bovy_conversion
+    spdf_sanders15.set_impacts(\
+        impactb=[0.,0.],
+        subhalovel=numpy.array([[6.82200571,132.7700529,149.4174464],
+                                [6.82200571,132.7700529,149.4174464]])/V0,
+        timpact=[2.88/bovy_conversion.time_in_Gyr(V0,R0),
+                 0.88/bovy_conversion.time_in_Gyr(V0,R0)],
+        impact_angle=[-1.34,-2.34],
+        GM=[10.**-12./bovy_conversion.mass_in_1010msol(V0,R0),
+            10.**-2./bovy_conversion.mass_in_1010msol(V0,R0)],
+        rs=[0.625/R0,0.625/R0])
+    numpy.random.seed(1)
+    Om,angle,dt= sdf_sanders15._sample_aAt(1000)
+    numpy.random.seed(1)
+    pOm,pangle,pdt= spdf_sanders15._sample_aAt(1000)
+    assert numpy.all(numpy.fabs(Om-pOm) < 10.**-6.), 'streampepperdf with an additional negligible impact does not sample the same frequencies as streamgapdf'
+    assert numpy.all(numpy.fabs(angle-pangle) < 10.**-5.), 'streampepperdf with an additional negligible impact does not sample the same angles as streamgapdf'
+    Opars= numpy.linspace(0.05,0.35,101)
+    assert numpy.all(numpy.fabs(sdf_sanders15.pOparapar(Opars,2.6)
+                                -spdf_sanders15.pOparapar(Opars,2.6)) \
+                         < 10.**-4.), 'streampepperdf with an additional negligible impact does not give the same pOparapar as streamgapdf'
+    return None
+
+def test_twoimpacts_density():
+    # Two impacts should give a density that is lower than the smooth one
+    # near both impacts
+    from galpy.util import bovy_conversion
+    spdf_sanders15.set_impacts(\
+        impactb=[0.,0.],
+        subhalovel=numpy.array([[6.82200571,132.7700529,149.4174464],
+                                [6.82200571,132.7700529,149.4174464]])/V0,
+        timpact=[2.88/bovy_conversion.time_in_Gyr(V0,R0),
+                 0.88/bovy_conversion.time_in_Gyr(V0,R0)],
+        impact_angle=[-1.34,-2.34],
+        GM=[10.**-2./bovy_conversion.mass_in_1010msol(V0,R0),
+            10.**-2./bovy_conversion.mass_in_1010msol(V0,R0)],
+        rs=[0.625/R0,0.625/R0])
+    smooth_dens= super(type(spdf_sanders15),spdf_sanders15)._density_par
+    assert spdf_sanders15._density_par(2.6)/spdf_sanders15._density_par(0.3) \
+        < smooth_dens(2.6)/smooth_dens(0.3), 'density of stream with two impacts not lower in the gap than that of the smooth stream'
+    return None
+
+def test_twoimpacts_density_quad():
+    # The density for an array of angles, computed for all angles at once,
+    # should agree with directly integrating p(Opar,apar) for each angle
+    # (uses the impacts set in the previous test)
+    from scipy import integrate
+    sigOpar= numpy.sqrt(spdf_sanders15._sortedSigOEig[2])
+    meandO= spdf_sanders15._meandO
+    dangles= numpy.array([0.3,1.5,2.6])
+    dens= spdf_sanders15._density_par(dangles)
+    for ii,da in enumerate(dangles):
+        qdens= integrate.quad(lambda T: sigOpar*(1+T*T)/(1-T*T)**2.\
+                                  *spdf_sanders15.pOparapar(\
+                T/(1-T*T)*sigOpar+meandO,da),-1.,1.,limit=100)[0]
+        assert numpy.fabs(dens[ii]-qdens) < 10.**-2.*qdens, 'density of stream with two impacts for an array of angles does not agree with direct integration'
+        assert numpy.fabs(spdf_sanders15._density_par(da)-dens[ii]) < 10.**-10., 'density of stream with two impacts for scalar and array input does not agree'
+    return None
+
+@raises(ValueError)
+def test_set_impacts_timpact_error():
+    # timpact not in the set used for the setup should raise an error
+    spdf_sanders15.set_impacts(\
+        impactb=[0.],
+        subhalovel=numpy.array([[6.82200571,132.7700529,149.4174464]])/V0,
+        timpact=[0.1],
+        impact_angle=[-2.34],
+        GM=[10.**-2.],rs=[0.625/R0])
+    return None